@@ -0,0 +1,230 @@
+# filename: alpha_backtest.py
+# ============================================================
+# BACKTEST OFFLINE — MÓDULO ALPHA
+# ============================================================
+# Replay dos frames WebSocket gravados pelo FrameRecorder (alpha_module)
+# com relógio simulado no lugar de time.time(). Roda sem Playwright e
+# sem Tesseract: só o caminho matemático (TickDecoder -> MarketTracker ->
+# evaluate_scripts) é exercitado; a confirmação visual por OCR não entra.
+#
+# Uso:
+#   python alpha_backtest.py frames.bin
+#   python alpha_backtest.py frames.bin --grid flash_min_breakout=0.0001,0.0002,0.0003 \
+#          --grid flash_exhaustion=0.5,0.7,0.9 --workers 4
+# ============================================================
+
+import os
+import time
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, List, Any
+
+import numpy as np
+
+from alpha_module import QuantClassifier, MarketTracker, read_frames
+
+
+class SimClock:
+    """Relógio controlado pelo replay; substitui time.time() no classificador."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass
+class BacktestResult:
+    params: Dict[str, float]
+    frames: int = 0
+    ticks: int = 0
+    signals: int = 0
+    wins: int = 0
+    losses: int = 0
+    unresolved: int = 0
+    hit_rate: Optional[float] = None
+    by_signal: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    signal_age_ms_p50: Optional[float] = None   # idade da vela no momento do sinal (tempo simulado)
+    signal_age_ms_p90: Optional[float] = None
+    eval_us_p50: Optional[float] = None         # custo real de evaluate_scripts
+    eval_us_p99: Optional[float] = None
+    sim_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    ticks_per_s: float = 0.0
+    speedup: float = 0.0                        # segundos simulados por segundo real
+
+
+def replay(path: str, params: Optional[Dict[str, float]] = None, eval_interval: float = 0.25,
+           expiry_s: float = 60.0, speed: Optional[float] = None) -> BacktestResult:
+    """
+    Reproduz um arquivo de frames e avalia os scripts a cada `eval_interval` segundos simulados
+    (o autopilot real roda a cada ~0.5s). Cada sinal abre uma operação que expira após
+    `expiry_s`; vence se o preço andou na direção do sinal (empate conta como perda, como no live).
+
+    Args:
+        speed: None = o mais rápido possível; 10.0 = 10x o tempo real
+    """
+    clock = SimClock()
+    classifier = QuantClassifier(clock=clock, market_params=params, fetch_news=False)
+    market = classifier.market
+    candle_s = market.params["candle_seconds"]
+    result = BacktestResult(params=dict(params or {}))
+
+    open_trades = deque()   # (expira_em, asset_id, direção, preço_entrada, nome)
+    last_signal_candle: Dict[int, int] = {}
+    per_signal: Dict[str, List[int]] = {}
+    ages_ms: List[float] = []
+    eval_us: List[float] = []
+
+    def resolve_until(ts: float):
+        while open_trades and open_trades[0][0] <= ts:
+            _, asset_id, direction, entry, name = open_trades.popleft()
+            exit_price = market.get_current_close(asset_id)
+            if exit_price is None:
+                result.unresolved += 1
+                continue
+            win = exit_price > entry if direction == "CALL" else exit_price < entry
+            stats = per_signal.setdefault(name, [0, 0])
+            stats[0] += 1
+            if win:
+                result.wins += 1
+                stats[1] += 1
+            else:
+                result.losses += 1
+
+    def evaluate(now: float):
+        asset_id = classifier._last_asset_id
+        t0 = time.perf_counter()
+        direction, name = market.evaluate_scripts(asset_id)
+        eval_us.append((time.perf_counter() - t0) * 1e6)
+        if direction is None:
+            return
+        candle = int(now) // candle_s
+        if last_signal_candle.get(asset_id) == candle:
+            return  # um sinal por vela, como o pending_signal do live
+        last_signal_candle[asset_id] = candle
+        entry = market.get_current_close(asset_id)
+        if entry is None:
+            return
+        result.signals += 1
+        ages_ms.append((now - candle * candle_s) * 1000)
+        open_trades.append((now + expiry_s, asset_id, direction, entry, name))
+
+    first_ts = last_ts = None
+    next_eval = None
+    wall_start = time.perf_counter()
+
+    for ts, payload in read_frames(path):
+        if first_ts is None:
+            first_ts = next_eval = ts
+        if speed:
+            delay = (ts - first_ts) / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+
+        while next_eval <= ts:
+            clock.now = next_eval
+            resolve_until(next_eval)
+            evaluate(next_eval)
+            next_eval += eval_interval
+
+        clock.now = ts
+        resolve_until(ts)
+        classifier.process_network_packet(payload)
+        result.frames += 1
+        last_ts = ts
+
+    result.unresolved += len(open_trades)
+    result.ticks = classifier.tick_decoder.ticks
+    result.wall_seconds = time.perf_counter() - wall_start
+    result.sim_seconds = (last_ts - first_ts) if first_ts is not None else 0.0
+
+    resolved = result.wins + result.losses
+    result.hit_rate = round(result.wins / resolved, 4) if resolved else None
+    result.by_signal = {
+        name: {"trades": n, "wins": w, "hit_rate": round(w / n, 4) if n else None}
+        for name, (n, w) in sorted(per_signal.items())
+    }
+    if ages_ms:
+        result.signal_age_ms_p50 = round(float(np.percentile(ages_ms, 50)), 1)
+        result.signal_age_ms_p90 = round(float(np.percentile(ages_ms, 90)), 1)
+    if eval_us:
+        result.eval_us_p50 = round(float(np.percentile(eval_us, 50)), 2)
+        result.eval_us_p99 = round(float(np.percentile(eval_us, 99)), 2)
+    if result.wall_seconds > 0:
+        result.ticks_per_s = round(result.ticks / result.wall_seconds, 1)
+        result.speedup = round(result.sim_seconds / result.wall_seconds, 1)
+    return result
+
+
+def expand_grid(grid: Dict[str, List[float]]) -> List[Dict[str, float]]:
+    """{'a': [1, 2], 'b': [3]} -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _replay_worker(job):
+    path, params, kwargs = job
+    return replay(path, params, **kwargs)
+
+
+def run_grid(path: str, param_sets: List[Dict[str, float]], workers: Optional[int] = None,
+             **kwargs) -> List[BacktestResult]:
+    """Roda um replay por conjunto de parâmetros num pool de processos; ordena por hit rate."""
+    jobs = [(path, params, kwargs) for params in param_sets]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        results = [_replay_worker(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_replay_worker, jobs))
+    return sorted(results, key=lambda r: (r.hit_rate or 0.0, r.signals), reverse=True)
+
+
+def _parse_grid(items: List[str]) -> Dict[str, List[float]]:
+    grid = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        if key not in MarketTracker.DEFAULT_PARAMS:
+            raise SystemExit(f"Parâmetro desconhecido: {key} (opções: {', '.join(MarketTracker.DEFAULT_PARAMS)})")
+        grid[key] = [float(v) for v in values.split(",") if v]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest offline dos scripts do Módulo Alpha")
+    parser.add_argument("frames", help="arquivo gravado pelo FrameRecorder")
+    parser.add_argument("--grid", action="append", default=[], metavar="PARAM=v1,v2,...")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--expiry", type=float, default=60.0, help="expiração da operação (s)")
+    parser.add_argument("--eval-interval", type=float, default=0.25, help="cadência do autopilot simulado (s)")
+    parser.add_argument("--speed", type=float, default=None, help="fator de aceleração (padrão: máximo)")
+    parser.add_argument("--json", action="store_true", help="saída em JSON")
+    args = parser.parse_args()
+
+    param_sets = expand_grid(_parse_grid(args.grid)) if args.grid else [{}]
+    results = run_grid(args.frames, param_sets, workers=args.workers, expiry_s=args.expiry,
+                       eval_interval=args.eval_interval, speed=args.speed)
+
+    if args.json:
+        import json
+        print(json.dumps([asdict(r) for r in results], ensure_ascii=False, indent=2))
+        return
+
+    print(f"\n📼 Replay: {args.frames} | {len(results)} conjunto(s) de parâmetros\n")
+    for r in results:
+        hit = f"{r.hit_rate:.1%}" if r.hit_rate is not None else "—"
+        print(f"  {r.params or 'padrão'}")
+        print(f"     sinais {r.signals:>5} | hit {hit:>6} ({r.wins}W/{r.losses}L/{r.unresolved} abertos)"
+              f" | idade p50 {r.signal_age_ms_p50} ms | eval p99 {r.eval_us_p99} µs"
+              f" | {r.ticks_per_s:,.0f} ticks/s | {r.speedup:,.0f}x")
+        for name, s in r.by_signal.items():
+            print(f"       - {name:<18} {s['trades']:>4} trades | hit {s['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,26 +20,37 @@
 #   (mas com required_ticks = 0) para garantir condições no clique.
 # ============================================================
 
+import os
 import time
 import logging
 import threading
+import struct
 import re
 import html
 import urllib.request
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Tuple, Any
+from typing import Optional, Dict, Tuple, Any, Callable, Iterator
 from enum import Enum
-from playwright.sync_api import Page
-
-# --- OCR imports ---
-import pytesseract
-from PIL import Image
 import io
 
-logger = logging.getLogger("ModuloAlpha")
+import numpy as np
 
-# Configuração explícita do Tesseract
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+# Playwright e OCR são opcionais: o replay/backtest (alpha_backtest.py) roda sem eles
+try:
+    from playwright.sync_api import Page
+except ImportError:
+    Page = Any
+
+try:
+    import pytesseract
+    from PIL import Image
+    # Configuração explícita do Tesseract
+    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+except ImportError:
+    pytesseract = None
+    Image = None
+
+logger = logging.getLogger("ModuloAlpha")
 
 class ScreenState(str, Enum):
     IDLE = "IDLE"
@@ -125,28 +136,95 @@ class NewsSentimentAnalyzer:
 # ============================================================
 # 2. MESO: MOTOR QUANTITATIVO AUTO-ADAPTÁVEL
 # ============================================================
-class MarketTracker:
-    def __init__(self):
-        self.assets: Dict[int, Dict[str, Any]] = {}
-        self._lock = threading.Lock()
+class CandleRing:
+    """
+    Buffer circular de velas fechadas com arrays float64 pré-alocados (O, H, L, C, ticks, t).
+    Cada valor é gravado duas vezes (i e i+depth), então as últimas n velas são sempre
+    uma fatia contígua — view sem cópia. Uma view de n < depth velas continua válida
+    pelas próximas depth-n inserções.
+    """
+    FIELDS = ("open", "high", "low", "close", "ticks", "time")
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self._buf = np.zeros((len(self.FIELDS), 2 * depth), dtype=np.float64)
+        self._write = -1
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.depth)
+
+    def append(self, op: float, hi: float, lo: float, cl: float, ticks: int, ts: float):
+        w = (self._write + 1) % self.depth
+        col = (op, hi, lo, cl, ticks, ts)
+        self._buf[:, w] = col
+        self._buf[:, w + self.depth] = col
+        self._write = w
+        self.count += 1
+
+    def view(self, n: Optional[int] = None) -> np.ndarray:
+        """Últimas n velas (mais antiga primeiro) como view somente-leitura, shape (6, n)."""
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self._write + self.depth + 1
+        v = self._buf[:, end - n:end]
+        v.flags.writeable = False
+        return v
+
+
+class AssetState:
+    def __init__(self, depth: int):
+        self.lock = threading.Lock()
+        self.candles = CandleRing(depth)
+        self.last_candle_time: Optional[int] = None
+        self.current_open: Optional[float] = None
+        self.current_close: Optional[float] = None
+        self.current_high: Optional[float] = None
+        self.current_low: Optional[float] = None
+        self.current_ticks = 0
+        self.consecutive_ticks = 0
+        self.last_color_state = "UNKNOWN"
 
-    def _init_asset_state(self, asset_id: int) -> Dict[str, Any]:
-        return {
-            "history_c": [],
-            "history_o": [],
-            "last_candle_time": None,
-            "current_close": None,
-            "current_open": None,
-            "consecutive_ticks": 0,
-            "last_color_state": "UNKNOWN",
-        }
 
-    def update_robust(self, asset_id: int, op: float, cl: float, candle_time: int) -> bool:
-        with self._lock:
-            if asset_id not in self.assets:
-                self.assets[asset_id] = self._init_asset_state(asset_id)
-            state = self.assets[asset_id]
+class MarketTracker:
+    # Janela usada pelos scripts (C1..C8 e médias de 5 velas)
+    EVAL_WINDOW = 10
+
+    # Limiares dos scripts; o backtest varia estes valores por conjunto de parâmetros
+    DEFAULT_PARAMS = {
+        "candle_seconds": 5,
+        "lateral_min_amplitude": 0.00008,
+        "momentum_exhaustion": 2.5,
+        "flash_window_s": 1.5,
+        "flash_min_breakout": 0.0002,
+        "flash_exhaustion": 0.7,
+        "late_entry_s": 3.0,
+    }
+
+    def __init__(self, depth: int = 500, clock: Callable[[], float] = time.time,
+                 params: Optional[Dict[str, float]] = None):
+        if depth <= self.EVAL_WINDOW:
+            raise ValueError(f"depth precisa ser maior que {self.EVAL_WINDOW}")
+        unknown = set(params or {}) - set(self.DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Parâmetros desconhecidos: {', '.join(sorted(unknown))}")
+        self.depth = depth
+        self.clock = clock
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
+        self.assets: Dict[int, AssetState] = {}
+        # Só protege a criação de ativos; cada ativo tem seu próprio lock
+        self._registry_lock = threading.Lock()
+
+    def _get_state(self, asset_id: int, create: bool = False) -> Optional[AssetState]:
+        state = self.assets.get(asset_id)
+        if state is None and create:
+            with self._registry_lock:
+                state = self.assets.setdefault(asset_id, AssetState(self.depth))
+        return state
 
+    def update_robust(self, asset_id: int, op: float, cl: float, candle_time: int) -> bool:
+        state = self._get_state(asset_id, create=True)
+        with state.lock:
             is_new_candle = False
 
             current_color = "UNKNOWN"
@@ -156,130 +234,143 @@ class MarketTracker:
                 current_color = "RED"
 
             if current_color == "UNKNOWN":
-                state["consecutive_ticks"] = 0
-                state["last_color_state"] = "UNKNOWN"
+                state.consecutive_ticks = 0
+                state.last_color_state = "UNKNOWN"
             else:
-                if current_color == state["last_color_state"]:
-                    state["consecutive_ticks"] += 1
+                if current_color == state.last_color_state:
+                    state.consecutive_ticks += 1
                 else:
-                    state["consecutive_ticks"] = 1
-                    state["last_color_state"] = current_color
-
-            if state["last_candle_time"] is None:
-                state["last_candle_time"] = candle_time
-
-            if candle_time != state["last_candle_time"]:
-                if state["current_close"] is not None:
-                    state["history_c"].append(state["current_close"])
-                    state["history_o"].append(state["current_open"])
-                    if len(state["history_c"]) > 20:
-                        state["history_c"].pop(0)
-                        state["history_o"].pop(0)
-                state["last_candle_time"] = candle_time
-                state["current_open"] = op
+                    state.consecutive_ticks = 1
+                    state.last_color_state = current_color
+
+            if state.last_candle_time is None:
+                state.last_candle_time = candle_time
+
+            if candle_time != state.last_candle_time:
+                if state.current_close is not None:
+                    state.candles.append(state.current_open, state.current_high, state.current_low,
+                                         state.current_close, state.current_ticks, state.last_candle_time)
+                state.last_candle_time = candle_time
+                state.current_open = op
+                state.current_high = state.current_low = None
+                state.current_ticks = 0
                 is_new_candle = True
 
-            if state["current_open"] is None:
-                state["current_open"] = op
+            if state.current_open is None:
+                state.current_open = op
 
-            state["current_close"] = cl
+            state.current_close = cl
+            state.current_high = cl if state.current_high is None else max(state.current_high, cl)
+            state.current_low = cl if state.current_low is None else min(state.current_low, cl)
+            state.current_ticks += 1
             return is_new_candle
 
     def get_color_ticks(self, asset_id: int) -> Tuple[str, int]:
-        with self._lock:
-            if asset_id not in self.assets:
-                return ("UNKNOWN", 0)
-            state = self.assets[asset_id]
-            return (state["last_color_state"], state["consecutive_ticks"])
+        state = self._get_state(asset_id)
+        if state is None:
+            return ("UNKNOWN", 0)
+        with state.lock:
+            return (state.last_color_state, state.consecutive_ticks)
 
     def get_current_close(self, asset_id: int) -> Optional[float]:
-        with self._lock:
-            if asset_id not in self.assets:
-                return None
-            return self.assets[asset_id]["current_close"]
+        state = self._get_state(asset_id)
+        if state is None:
+            return None
+        with state.lock:
+            return state.current_close
 
     def get_history_len(self, asset_id: int) -> int:
-        with self._lock:
-            if asset_id not in self.assets:
-                return 0
-            return len(self.assets[asset_id]["history_c"])
+        state = self._get_state(asset_id)
+        if state is None:
+            return 0
+        with state.lock:
+            return len(state.candles)
+
+    def get_candles(self, asset_id: int, n: Optional[int] = None) -> Optional[np.ndarray]:
+        """View somente-leitura das últimas n velas fechadas: linhas em CandleRing.FIELDS."""
+        state = self._get_state(asset_id)
+        if state is None:
+            return None
+        with state.lock:
+            return state.candles.view(n)
 
     def evaluate_scripts(self, asset_id: int) -> Tuple[Optional[str], str]:
-        # Cópias rasas das listas criadas DENTRO do lock
-        with self._lock:
-            if asset_id not in self.assets:
-                return None, ""
-            state = self.assets[asset_id]
-            history_c = list(state["history_c"])
-            history_o = list(state["history_o"])
-            C0 = state["current_close"]
-            O0 = state["current_open"]
-
-        if len(history_c) < 10:
-            return None, f"MATRIZ_INCOMPLETA: apenas {len(history_c)} velas"
+        # View sem cópia das últimas velas; estável enquanto depth > EVAL_WINDOW
+        state = self._get_state(asset_id)
+        if state is None:
+            return None, ""
+        with state.lock:
+            n_candles = len(state.candles)
+            window = state.candles.view(self.EVAL_WINDOW)
+            C0 = state.current_close
+            O0 = state.current_open
+
+        if n_candles < 10:
+            return None, f"MATRIZ_INCOMPLETA: apenas {n_candles} velas"
+
+        history_o = window[0]
+        history_c = window[3]
+        p = self.params
 
         # ========== IDADE DA VELA (precisão fracionária) ==========
         # Obtém o timestamp atual em fração de segundo
-        now = time.time()
-        candle_start = (int(now) // 5) * 5
+        now = self.clock()
+        candle_start = (int(now) // p["candle_seconds"]) * p["candle_seconds"]
         age_in_seconds = now - candle_start
         # =========================================================
 
         recent = history_c[-5:]
-        amplitude = (max(recent) - min(recent)) / max(recent)
-        if amplitude < 0.00008:
+        recent_max = float(recent.max())
+        recent_min = float(recent.min())
+        amplitude = (recent_max - recent_min) / recent_max
+        if amplitude < p["lateral_min_amplitude"]:
             return None, "LATERAL_BLOQUEADO"
 
-        momentum = abs(history_c[-1] - history_c[-3])
-        avg_move = sum(abs(history_c[i] - history_c[i - 1]) for i in range(-5, -1)) / 4
-        if avg_move > 0 and momentum > avg_move * 2.5:
+        momentum = abs(float(history_c[-1]) - float(history_c[-3]))
+        avg_move = float(np.abs(np.diff(history_c[-6:-1])).sum()) / 4
+        if avg_move > 0 and momentum > avg_move * p["momentum_exhaustion"]:
             return None, "MOMENTUM_ESGOTADO"
 
-        C1 = history_c[-1]
-        C2 = history_c[-2]
-        C3 = history_c[-3]
-        C4 = history_c[-4]
-        C5 = history_c[-5]
-        C8 = history_c[-8]
-        O2 = history_o[-2]
-        O1 = history_o[-1]
+        C1, C2, C3, C4, C5, C8 = (float(history_c[i]) for i in (-1, -2, -3, -4, -5, -8))
+        O2 = float(history_o[-2])
+        O1 = float(history_o[-1])
 
         # ========== PADRÃO FLASH CORRIGIDO (rompimento de consolidação) ==========
         # Só é válido nos primeiros 1.5 segundos da vela
-        if age_in_seconds < 1.5:
+        if age_in_seconds < p["flash_window_s"]:
             # Para evitar entradas no fim do movimento, verifica se o preço está rompendo uma faixa de consolidação
             # Usa as últimas 3 velas fechadas como referência
             last_3_closes = history_c[-3:]
-            range_high = max(last_3_closes)
-            range_low = min(last_3_closes)
+            range_high = float(last_3_closes.max())
+            range_low = float(last_3_closes.min())
             range_size = range_high - range_low
             
             # CALL: preço atual acima do ponto mais alto das últimas 3 velas, com amplitude mínima
-            if C0 > range_high and (C0 - range_high) >= 0.0002:
+            if C0 > range_high and (C0 - range_high) >= p["flash_min_breakout"]:
                 # Verifica se o movimento não está exausto (evita entrada no topo)
                 # Calcula a amplitude média das últimas 5 velas
-                avg_range_5 = (max(history_c[-5:]) - min(history_c[-5:])) / 5
+                avg_range_5 = (recent_max - recent_min) / 5
                 if avg_range_5 > 0:
                     # Se já percorreu mais de 70% da amplitude média, bloqueia
-                    distance_from_low = C0 - min(history_c[-5:])
-                    if distance_from_low / avg_range_5 < 0.7:
+                    distance_from_low = C0 - recent_min
+                    if distance_from_low / avg_range_5 < p["flash_exhaustion"]:
                         return "CALL", "FLASH"
                 else:
                     return "CALL", "FLASH"
                     
             # PUT: preço atual abaixo do ponto mais baixo das últimas 3 velas, com amplitude mínima
-            if C0 < range_low and (range_low - C0) >= 0.0002:
-                avg_range_5 = (max(history_c[-5:]) - min(history_c[-5:])) / 5
+            if C0 < range_low and (range_low - C0) >= p["flash_min_breakout"]:
+                avg_range_5 = (recent_max - recent_min) / 5
                 if avg_range_5 > 0:
-                    distance_from_high = max(history_c[-5:]) - C0
-                    if distance_from_high / avg_range_5 < 0.7:
+                    distance_from_high = recent_max - C0
+                    if distance_from_high / avg_range_5 < p["flash_exhaustion"]:
                         return "PUT", "FLASH"
                 else:
                     return "PUT", "FLASH"
         # ============================================================
 
         # Bloqueio geral para entradas tardias (após 3 segundos)
-        if age_in_seconds >= 3.0:
+        if age_in_seconds >= p["late_entry_s"]:
             return None, f"ENTRADA_TARDIA (Idade {age_in_seconds:.1f}s)"
 
         # Padrão JustWin: tendência de médio prazo confirmando direção atual
@@ -315,18 +406,126 @@ class MarketTracker:
 # ============================================================
 # 3. MICRO: CLASSIFICADOR QUANTITATIVO + VISÃO COMPUTACIONAL
 # ============================================================
+class TickDecoder:
+    """
+    Estágio de decodificação de ticks dos frames WebSocket da corretora.
+    Roda na thread do Playwright (a mesma que clica), então o caminho comum —
+    frame sem preço — tem que sair cedo:
+      1. pré-filtro pelo "name" da mensagem: tipos de controle conhecidos e tipos
+         que nunca trouxeram preço em LEARN_FRAMES frames são descartados sem varredura
+         (re-sondados a cada REPROBE_EVERY frames, caso a corretora mude o formato);
+      2. regex pré-compiladas sobre o payload original, sem cópia .lower().
+
+    As chaves da corretora chegam em minúsculas; use case_insensitive=True se um dia
+    vierem capitalizadas (IGNORECASE custa ~4x mais em frames longos).
+    """
+    # Mensagens de controle que nunca carregam preço
+    SKIP_NAMES = frozenset({"heartbeat", "timesync", "ping", "pong", "profile", "balances", "authenticated"})
+    LEARN_FRAMES = 50
+    REPROBE_EVERY = 1000
+
+    _RE_NAME = re.compile(r'\s*\{\s*"name"\s*:\s*"([^"]{1,64})"')
+    _PRICES = r'"(?:close|ask|bid|value)"\s*:\s*"?([0-9]+\.[0-9]+)"?'
+    _OPENS = r'"open"\s*:\s*([0-9]+\.[0-9]+)'
+    _ACTIVE_ID = r'"active_id"\s*:\s*(\d+)'
+
+    def __init__(self, case_insensitive: bool = False):
+        flags = re.IGNORECASE if case_insensitive else 0
+        self._re_prices = re.compile(self._PRICES, flags)
+        self._re_opens = re.compile(self._OPENS, flags)
+        self._re_active_id = re.compile(self._ACTIVE_ID, flags)
+        # name -> [frames vistos, frames com tick]; o lock só cobre nomes novos e a leitura do status
+        self._name_stats: Dict[str, list] = {}
+        self._names_lock = threading.Lock()
+        self.frames = 0
+        self.skipped = 0
+        self.ticks = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.last_ns = 0
+
+    def decode(self, payload: str) -> Optional[Tuple[float, float, Optional[int]]]:
+        """Retorna (open, close, active_id) ou None se o frame não traz preço."""
+        t0 = time.perf_counter_ns()
+        try:
+            return self._decode(payload)
+        finally:
+            dt = time.perf_counter_ns() - t0
+            self.frames += 1
+            self.total_ns += dt
+            self.last_ns = dt
+            if dt > self.max_ns:
+                self.max_ns = dt
+
+    def _decode(self, payload: str) -> Optional[Tuple[float, float, Optional[int]]]:
+        if "{" not in payload and "[" not in payload:
+            self.skipped += 1
+            return None
+
+        stats = None
+        m_name = self._RE_NAME.match(payload)
+        if m_name:
+            name = m_name.group(1)
+            if name.lower() in self.SKIP_NAMES:
+                self.skipped += 1
+                return None
+            stats = self._name_stats.get(name)
+            if stats is None:
+                with self._names_lock:
+                    stats = self._name_stats.setdefault(name, [0, 0])
+            stats[0] += 1
+            if stats[1] == 0 and stats[0] > self.LEARN_FRAMES and stats[0] % self.REPROBE_EVERY:
+                self.skipped += 1
+                return None
+
+        # Aspirador universal de ticks
+        prices = self._re_prices.findall(payload)
+        opens = self._re_opens.findall(payload)
+        if not prices and not opens:
+            return None
+
+        cl = float(prices[-1]) if prices else float(opens[-1])
+        op = float(opens[-1]) if opens else cl
+        match_id = self._re_active_id.search(payload)
+        self.ticks += 1
+        if stats is not None:
+            stats[1] += 1
+        return op, cl, int(match_id.group(1)) if match_id else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        # Chamado pelo AlphaEngine.get_status em outra thread enquanto o Playwright insere nomes
+        with self._names_lock:
+            names = list(self._name_stats.items())
+        frames = self.frames
+        return {
+            "frames": frames,
+            "skipped": self.skipped,
+            "ticks": self.ticks,
+            "avg_us": round(self.total_ns / frames / 1000, 2) if frames else 0.0,
+            "max_us": round(self.max_ns / 1000, 2),
+            "last_us": round(self.last_ns / 1000, 2),
+            "muted_names": sorted(n for n, (seen, hits) in names
+                                  if hits == 0 and seen > self.LEARN_FRAMES),
+        }
+
+
 class QuantClassifier:
-    def __init__(self):
+    def __init__(self, clock: Callable[[], float] = time.time, market_params: Optional[Dict[str, float]] = None,
+                 fetch_news: bool = True):
         self.pending_signal = None
         self._data_lock = threading.Lock()
+        self.clock = clock
+        # Gravação opcional dos frames brutos para replay (ver FrameRecorder)
+        self.recorder: Optional["FrameRecorder"] = None
 
         self.candle_maturity_delay = 0.0
         self.signal_timeout = 15.0
 
         self.news_analyzer = NewsSentimentAnalyzer()
-        self.market = MarketTracker()
+        self.market = MarketTracker(clock=clock, params=market_params)
 
         self._last_asset_id = 1
+        self.tick_decoder = TickDecoder()
 
         # --- OCR ---
         self._last_ocr_scan_time = 0.0
@@ -336,7 +535,8 @@ class QuantClassifier:
         self._last_warmup_log = 0.0
         self._system_armed_logged = False
 
-        self.news_analyzer.get_sentiment()
+        if fetch_news:
+            self.news_analyzer.get_sentiment()
 
     def _extract_visual_signal(self, page: Page) -> Tuple[Optional[str], Optional[str], Optional[int]]:
         now = time.time()
@@ -344,6 +544,12 @@ class QuantClassifier:
             return None, None, None
         self._last_ocr_scan_time = now
 
+        if pytesseract is None:
+            if not self._ocr_error_logged:
+                print("\n⚠️ MÓDULO DE VISÃO INDISPONÍVEL: instale pytesseract e Pillow.\n")
+                self._ocr_error_logged = True
+            return None, None, None
+
         try:
             screenshot_bytes = page.screenshot(full_page=False)
             img = Image.open(io.BytesIO(screenshot_bytes))
@@ -422,34 +628,26 @@ class QuantClassifier:
 
     def process_network_packet(self, payload: str):
         try:
-            if "{" not in payload and "[" not in payload:
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.write(self.clock(), payload)
+            tick = self.tick_decoder.decode(payload)
+            if tick is None:
                 return
-            payload_lower = payload.lower()
-
-            # Aspirador universal de ticks
-            prices = re.findall(r'"(?:close|ask|bid|value)"\s*:\s*"?([0-9]+\.[0-9]+)"?', payload_lower)
-            opens = re.findall(r'"open"\s*:\s*([0-9]+\.[0-9]+)', payload_lower)
-
-            if not prices and not opens:
-                return
-
-            cl = float(prices[-1]) if prices else float(opens[-1])
-            op = float(opens[-1]) if opens else cl
+            op, cl, asset_id = tick
 
             # Proteção Multi-Aba: ignora ativos baratos (EUR, DOGE, etc)
             if op < 3.0 or op > 7.0:
                 return
 
-            match_id = re.search(r'"active_id"\s*:\s*(\d+)', payload_lower)
-            if match_id:
-                asset_id = int(match_id.group(1))
+            if asset_id is not None:
                 with self._data_lock:
                     self._last_asset_id = asset_id
             else:
                 asset_id = self._last_asset_id
 
             # Relógio absoluto (PC clock) - velas de 5 em 5s
-            candle_time = int(time.time()) // 5
+            candle_time = int(self.clock()) // self.market.params["candle_seconds"]
 
             self.market.update_robust(asset_id, op, cl, candle_time)
 
@@ -600,6 +798,80 @@ class QuantClassifier:
         return int(m.group(1)) > 0 if m else False
 
 
+# ============================================================
+# 3b. GRAVADOR DE FRAMES (replay offline)
+# ============================================================
+# Formato append-only: registros [t: float64][len: uint32][payload utf-8], little-endian.
+# Um registro truncado no fim (queda do processo) é ignorado na leitura.
+_FRAME_HEADER = struct.Struct("<dI")
+
+
+def _complete_length(path: str) -> int:
+    """Bytes até o último frame completo; um frame cortado por queda do processo fica de fora."""
+    size = os.path.getsize(path)
+    pos = 0
+    with open(path, "rb") as fh:
+        while pos + _FRAME_HEADER.size <= size:
+            fh.seek(pos)
+            _, length = _FRAME_HEADER.unpack(fh.read(_FRAME_HEADER.size))
+            if pos + _FRAME_HEADER.size + length > size:
+                break
+            pos += _FRAME_HEADER.size + length
+    return pos
+
+
+class FrameRecorder:
+    """
+    Log binário append-only de frames brutos: [float64 ts][uint32 len][utf-8] por frame.
+    Ao reabrir um arquivo existente, a cauda incompleta (gravação interrompida entre o
+    cabeçalho e o corpo) é truncada antes de anexar; senão os frames novos seriam lidos
+    como continuação do corpo cortado.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.frames = 0
+        self.truncated_bytes = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            valid = _complete_length(path)
+            self.truncated_bytes = os.path.getsize(path) - valid
+            if self.truncated_bytes:
+                print(f"⚠️ [RECORDER] Cauda incompleta de {self.truncated_bytes} bytes truncada em {path}")
+                with open(path, "r+b") as fh:
+                    fh.truncate(valid)
+        self._fh = open(path, "ab", buffering=1 << 16)
+
+    def write(self, ts: float, payload: str):
+        data = payload.encode("utf-8", errors="ignore")
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(_FRAME_HEADER.pack(ts, len(data)))
+            self._fh.write(data)
+            self.frames += 1
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+def read_frames(path: str) -> Iterator[Tuple[float, str]]:
+    """Itera (timestamp, payload) de um arquivo gravado pelo FrameRecorder."""
+    with open(path, "rb") as fh:
+        while True:
+            header = fh.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                return
+            ts, size = _FRAME_HEADER.unpack(header)
+            data = fh.read(size)
+            if len(data) < size:
+                return
+            yield ts, data.decode("utf-8", errors="ignore")
+
+
 # ============================================================
 # 4. MICRO: EXECUTOR DE AÇÕES
 # ============================================================
@@ -658,6 +930,19 @@ class AlphaEngine:
         with self._lock:
             self._stop_requested = True
 
+    def start_recording(self, path: str) -> Dict:
+        self.stop_recording()
+        self.classifier.recorder = FrameRecorder(path)
+        return {"ok": True, "recording": path}
+
+    def stop_recording(self) -> Dict:
+        recorder = self.classifier.recorder
+        self.classifier.recorder = None
+        if recorder is None:
+            return {"ok": True, "recording": None}
+        recorder.close()
+        return {"ok": True, "recording": None, "file": recorder.path, "frames": recorder.frames}
+
     def perceive_and_act(self) -> Dict:
         with self._lock:
             if self._stop_requested:
@@ -737,10 +1022,11 @@ class AlphaEngine:
         return {"cycle_id": str(self._cycle_count), "state": inf.state, "action_result": res}
 
     def get_status(self) -> Dict:
+        tick_parser = self.classifier.tick_decoder.get_stats()
         with self._lock:
             if not self._last_result:
-                return {"status": "IDLE"}
-            return {"status": "ACTIVE", "last_state": self._last_result.state}
+                return {"status": "IDLE", "tick_parser": tick_parser}
+            return {"status": "ACTIVE", "last_state": self._last_result.state, "tick_parser": tick_parser}
 
 
 alpha_engine = AlphaEngine()
\ No newline at end of file
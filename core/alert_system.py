@@ -10,6 +10,8 @@ from enum import Enum
 from datetime import datetime, timedelta
 import requests
 
+from utils.http_client import get_http_client
+
 class AlertLevel(Enum):
     INFO = "info"
     WARNING = "warning"
@@ -407,7 +409,7 @@ class AlertSystem:
         """Monitor NOAA space weather"""
         try:
             # NOAA Space Weather Alerts
-            response = requests.get(
+            response = get_http_client().get(
                 "https://services.swpc.noaa.gov/products/alerts.json",
                 timeout=10
             )
@@ -439,7 +441,7 @@ class AlertSystem:
         """Monitor network connectivity"""
         try:
             # Simple network check
-            response = requests.get("https://www.google.com", timeout=5)
+            response = get_http_client().get("https://www.google.com", timeout=5, attempts=1, conditional=False)
             
             if response.status_code != 200:
                 self.create_custom_alert(
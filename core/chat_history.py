@@ -0,0 +1,120 @@
+"""
+Histórico de conversa persistente e indexado
+SQLite em modo WAL: cada troca é um INSERT (sem reescrever o arquivo), "últimas N" sai do
+índice da chave primária e a busca textual usa FTS5 (LIKE quando o SQLite não tem FTS5).
+Nada é descartado: o contexto carregado na RAM é que é limitado.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class ChatHistory:
+    """
+    Trocas Teddy ↔ R2 em `historico(id, timestamp, teddy, r2)`.
+
+    Uma única conexão compartilhada entre threads, serializada por lock; as chamadas
+    são curtas e o main2 as despacha com asyncio.to_thread para não travar o event loop.
+    """
+
+    def __init__(self, db_path: str = "static/logs/historico_chat.db", legacy_json: Optional[str] = None):
+        self.db_path = db_path
+        pasta = os.path.dirname(db_path)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(db_path, check_same_thread=False)
+        self._con.row_factory = sqlite3.Row
+        self.fts = False
+        self._init_db()
+        if legacy_json and os.path.exists(legacy_json) and not self.total():
+            self.importar_json(legacy_json)
+
+    def _init_db(self):
+        with self._lock, self._con as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("CREATE TABLE IF NOT EXISTS historico (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                        "timestamp TEXT NOT NULL, teddy TEXT NOT NULL, r2 TEXT NOT NULL)")
+            try:
+                # Índice FTS5 com conteúdo externo: o texto fica só na tabela principal
+                con.execute("CREATE VIRTUAL TABLE IF NOT EXISTS historico_fts USING fts5("
+                            "teddy, r2, content='historico', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+                con.execute("CREATE TRIGGER IF NOT EXISTS historico_ai AFTER INSERT ON historico BEGIN "
+                            "INSERT INTO historico_fts(rowid, teddy, r2) VALUES (new.id, new.teddy, new.r2); END")
+                con.execute("CREATE TRIGGER IF NOT EXISTS historico_ad AFTER DELETE ON historico BEGIN "
+                            "INSERT INTO historico_fts(historico_fts, rowid, teddy, r2) "
+                            "VALUES ('delete', old.id, old.teddy, old.r2); END")
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False
+
+    # ── Escrita ──
+    def adicionar(self, teddy: str, r2: str, timestamp: Optional[str] = None) -> int:
+        """Grava uma troca; devolve o id"""
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock, self._con as con:
+            cur = con.execute("INSERT INTO historico (timestamp, teddy, r2) VALUES (?, ?, ?)",
+                              (timestamp, teddy, r2))
+            return cur.lastrowid
+
+    def importar_json(self, caminho: str) -> int:
+        """Migra o historico_chat.json antigo (lista de {timestamp, teddy, r2})"""
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        linhas = [(d.get("timestamp", ""), d.get("teddy", ""), d.get("r2", "")) for d in dados if isinstance(d, dict)]
+        with self._lock, self._con as con:
+            con.executemany("INSERT INTO historico (timestamp, teddy, r2) VALUES (?, ?, ?)", linhas)
+        return len(linhas)
+
+    # ── Leitura ──
+    def total(self) -> int:
+        with self._lock:
+            return self._con.execute("SELECT COUNT(*) FROM historico").fetchone()[0]
+
+    def ultimas(self, n: int = 20) -> List[Dict[str, Any]]:
+        """Últimas n trocas, da mais antiga para a mais recente"""
+        with self._lock:
+            linhas = self._con.execute("SELECT id, timestamp, teddy, r2 FROM historico ORDER BY id DESC LIMIT ?",
+                                       (n,)).fetchall()
+        return [dict(l) for l in reversed(linhas)]
+
+    def buscar(self, consulta: str, limite: int = 20) -> List[Dict[str, Any]]:
+        """Busca textual nas falas dos dois lados; resultados mais relevantes primeiro"""
+        termos = [t for t in consulta.split() if t]
+        if not termos:
+            return []
+        with self._lock:
+            if self.fts:
+                # Cada termo entre aspas: pontuação do usuário não vira sintaxe FTS
+                expr = " ".join('"' + t.replace('"', '""') + '"' for t in termos)
+                linhas = self._con.execute(
+                    "SELECT h.id, h.timestamp, h.teddy, h.r2 FROM historico_fts f "
+                    "JOIN historico h ON h.id = f.rowid WHERE historico_fts MATCH ? "
+                    "ORDER BY bm25(historico_fts) LIMIT ?", (expr, limite)).fetchall()
+            else:
+                filtro = " AND ".join("(teddy LIKE ? OR r2 LIKE ?)" for _ in termos)
+                params = [p for t in termos for p in (f"%{t}%", f"%{t}%")]
+                linhas = self._con.execute(
+                    f"SELECT id, timestamp, teddy, r2 FROM historico WHERE {filtro} ORDER BY id DESC LIMIT ?",
+                    (*params, limite)).fetchall()
+        return [dict(l) for l in linhas]
+
+    def contexto(self, n: int = 20) -> List[str]:
+        """Últimas n trocas no formato de memória de sessão do main2 ('Teddy: ...', 'R2: ...')"""
+        contexto = []
+        for item in self.ultimas(n):
+            contexto.append(f"Teddy: {item['teddy']}")
+            contexto.append(f"R2: {item['r2']}")
+        return contexto
+
+    def fechar(self):
+        with self._lock:
+            self._con.close()
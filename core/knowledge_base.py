@@ -0,0 +1,313 @@
+"""
+Base de Conhecimento (RAG)
+Documentos de static/docs fatiados em chunks, embedados e buscados por similaridade.
+O sync é incremental: só arquivos novos ou alterados passam pelo embedder.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import faiss
+import numpy as np
+
+from core.vector_index import ajustar_busca, construir_indice, extrair_vetores, precisa_reconstruir, tipo_do_indice
+from utils.cache import LRUCache
+
+RAG_TIPO_INDICE = os.getenv("R2_RAG_INDEX", "auto")   # auto | flat | hnsw | ivfpq
+RAG_MODELO_EMBED = "all-MiniLM-L6-v2"
+RAG_WORKERS = 2
+RAG_SOBRA_ORFAOS = 8   # vizinhos extras pedidos ao ANN quando há órfãos (descartados na busca)
+
+_embedder_global = None
+_embedder_lock = threading.Lock()
+_rag_executor = concurrent.futures.ThreadPoolExecutor(max_workers=RAG_WORKERS, thread_name_prefix="rag")
+
+def get_embedder():
+    """Embedder único do processo; carregado no lifespan, nunca no meio de uma requisição."""
+    global _embedder_global
+    with _embedder_lock:
+        if _embedder_global is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"[RAG] Carregando embedder {RAG_MODELO_EMBED}...")
+            _embedder_global = SentenceTransformer(RAG_MODELO_EMBED)
+    return _embedder_global
+
+class KnowledgeBase:
+    """
+    RAG incremental: um manifesto (caminho, mtime, tamanho, sha1) decide quais arquivos
+    precisam ser re-embedados; o texto dos chunks fica num SQLite ao lado do índice.
+    Há um único índice na RAM: Flat (removível por id) em corpora pequenos; acima do limiar,
+    HNSW ou IVF-PQ, que recebem os vetores novos incrementalmente. Como esses não apagam,
+    os vetores de chunks removidos ficam órfãos (sem texto no SQLite, ignorados na busca)
+    até `precisa_reconstruir` pedir uma reconstrução.
+    """
+    LOTE_EMBED = 64
+
+    def __init__(self, docs_dir="static/docs", embedder=None, tipo_indice=RAG_TIPO_INDICE, cache_consultas=512):
+        self.docs_dir = docs_dir
+        self.index_path = os.path.join(docs_dir, "faiss_index.bin")
+        self.meta_path = os.path.join(docs_dir, "rag_indice.json")
+        self.legado_ann_path = os.path.join(docs_dir, "faiss_ann.bin")   # ANN separado das versões anteriores
+        self.db_path = os.path.join(docs_dir, "rag_chunks.db")
+        self.manifest_path = os.path.join(docs_dir, "rag_manifest.json")
+        self.embedder = embedder
+        self.tipo_indice = tipo_indice
+        self.index = None
+        self.tipo_ativo = "flat"
+        self.meta_indice = {"treinado_com": 0, "orfaos": 0}
+        self.cache_consultas = LRUCache(max_size=cache_consultas, name="rag_consultas")
+        self.manifest = {}
+        self.arquivos_indexados = []
+        self._lock = threading.Lock()
+        self._lock_indice = threading.Lock()   # adições do sync x buscas (o faiss não é thread-safe para escrita)
+        os.makedirs(docs_dir, exist_ok=True)
+        self._init_db()
+        if os.path.exists(self.index_path) and os.path.exists(self.manifest_path):
+            try:
+                self._carregar_indice()
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+                self.arquivos_indexados = sorted(a for a, m in self.manifest.items() if m.get("ids"))
+            except Exception:
+                self.index, self.manifest = None, {}
+        elif os.path.exists(os.path.join(docs_dir, "rag_data.json")):
+            print("[RAG] Índice legado detectado. Execute /doc sync para migrar para o índice incremental.")
+
+    # ── Armazenamento de chunks ──
+    def _db(self):
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        with closing(self._db()) as con, con:
+            con.execute("CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY AUTOINCREMENT, arquivo TEXT NOT NULL, texto TEXT NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_chunks_arquivo ON chunks(arquivo)")
+
+    def _buscar_textos(self, ids):
+        if not ids:
+            return {}
+        marcadores = ",".join("?" * len(ids))
+        with closing(self._db()) as con:
+            return dict(con.execute(f"SELECT id, texto FROM chunks WHERE id IN ({marcadores})", ids).fetchall())
+
+    # ── Extração ──
+    @staticmethod
+    def _extrair_texto(caminho, arq, pdf_lib):
+        text = ""
+        if arq.lower().endswith('.pdf'):
+            with open(caminho, 'rb') as f:
+                reader = pdf_lib.PdfReader(f)
+                for page in reader.pages:
+                    try:
+                        extracted = page.extract_text()
+                        # Filtro de Sanidade: Se a página extraída for muito pequena ou
+                        # cheia de caracteres de erro (como '□' ou '\ufffd'), ignoramos.
+                        if extracted and len(extracted.strip()) > 10:
+                            text += extracted
+                    except Exception:
+                        # Se a página der erro de encoding (UniGB), pulamos silenciosamente
+                        continue
+        else:
+            with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        # Blindagem 1: Garante que o texto é uma string válida
+        if not isinstance(text, str):
+            return ""
+        # Limpeza extra para evitar caracteres problemáticos
+        return text.replace('\x00', '').replace('\ufffd', '')
+
+    @staticmethod
+    def _fatiar(text, arq):
+        chunks = []
+        for i in range(0, len(text), 800):
+            chunk = text[i:i+1000].strip()
+            if len(chunk) > 50:
+                chunks.append(f"[Fonte: {arq}] {chunk}")
+        return chunks
+
+    @staticmethod
+    def _sha1(caminho):
+        h = hashlib.sha1()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+        return h.hexdigest()
+
+    def _carregar_indice(self):
+        """Índice persistido; o ANN legado já tem todos os vetores e substitui o Flat ao lado dele."""
+        self.index, self.tipo_ativo = None, "flat"
+        self.meta_indice = {"treinado_com": 0, "orfaos": 0}
+        if not os.path.exists(self.index_path):
+            return
+        legado = os.path.exists(self.legado_ann_path)
+        self.index = ajustar_busca(faiss.read_index(self.legado_ann_path if legado else self.index_path))
+        self.tipo_ativo = tipo_do_indice(self.index)
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.meta_indice.update(json.load(f))
+        except (OSError, ValueError):
+            self.meta_indice["treinado_com"] = self.index.ntotal
+
+    def _salvar_indice(self):
+        faiss.write_index(self.index, self.index_path)
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta_indice, f)
+        os.replace(tmp, self.meta_path)
+        if os.path.exists(self.legado_ann_path):
+            os.unlink(self.legado_ann_path)
+
+    def _remover_vetores(self, ids):
+        if not ids or self.index is None:
+            return
+        if self.tipo_ativo == "flat":
+            with self._lock_indice:
+                self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+        else:
+            self.meta_indice["orfaos"] += len(ids)
+
+    def sync(self):
+        try:
+            import pypdf as _pdf_lib
+        except ImportError:
+            try:
+                import PyPDF2 as _pdf_lib
+            except ImportError:
+                return "❌ Nenhuma biblioteca PDF encontrada. Execute: pip install pypdf"
+
+        with self._lock:
+            t0 = time.time()
+            arquivos = sorted(f for f in os.listdir(self.docs_dir) if f.lower().endswith(('.pdf', '.md')))
+            manifesto = dict(self.manifest)
+            pendentes = []   # (id, texto) a embedar
+            alterados, removidos = [], [a for a in manifesto if a not in arquivos]
+
+            with closing(self._db()) as con, con:
+                # Arquivos apagados da pasta: some o vetor e o texto
+                for arq in removidos:
+                    self._remover_vetores(manifesto.pop(arq).get("ids", []))
+                    con.execute("DELETE FROM chunks WHERE arquivo = ?", (arq,))
+
+                for arq in arquivos:
+                    p = os.path.join(self.docs_dir, arq)
+                    try:
+                        st = os.stat(p)
+                        anterior = manifesto.get(arq)
+                        if anterior and anterior["mtime"] == st.st_mtime and anterior["size"] == st.st_size:
+                            continue
+                        sha1 = self._sha1(p)
+                        if anterior and anterior["sha1"] == sha1:
+                            anterior.update(mtime=st.st_mtime, size=st.st_size)
+                            continue
+
+                        chunks = self._fatiar(self._extrair_texto(p, arq, _pdf_lib), arq)
+                        if anterior:
+                            self._remover_vetores(anterior.get("ids", []))
+                        con.execute("DELETE FROM chunks WHERE arquivo = ?", (arq,))
+                        ids = []
+                        for chunk in chunks:
+                            cur = con.execute("INSERT INTO chunks (arquivo, texto) VALUES (?, ?)", (arq, chunk))
+                            ids.append(cur.lastrowid)
+                            pendentes.append((cur.lastrowid, chunk))
+                        manifesto[arq] = {"mtime": st.st_mtime, "size": st.st_size, "sha1": sha1, "ids": ids}
+                        alterados.append(arq)
+                    except Exception as e:
+                        print(f"[AVISO RAG] Arquivo corrompido ou ignorado ({arq}): {e}")
+                        continue
+
+                if pendentes:
+                    try:
+                        if not self.embedder:
+                            self.embedder = get_embedder()
+                        print(f"[RAG] Codificando {len(pendentes)} blocos novos ({len(alterados)} arquivos)...")
+                        for i in range(0, len(pendentes), self.LOTE_EMBED):
+                            lote = pendentes[i:i + self.LOTE_EMBED]
+                            vetores = self.embedder.encode([t for _, t in lote], convert_to_numpy=True).astype(np.float32)
+                            with self._lock_indice:
+                                if self.index is None:
+                                    self.index = faiss.IndexIDMap(faiss.IndexFlatL2(vetores.shape[1]))
+                                self.index.add_with_ids(vetores, np.asarray([i for i, _ in lote], dtype=np.int64))
+                    except Exception as e:
+                        # Desfaz os chunks inseridos e recarrega o índice persistido
+                        con.rollback()
+                        self._carregar_indice()
+                        return f"❌ Erro crítico ao criar embeddings do RAG: {e}"
+
+            if not alterados and not removidos:
+                if not manifesto:
+                    return "❌ Falha na extração. Nenhum texto válido encontrado nos documentos."
+                self.manifest = manifesto
+                self._salvar_manifesto()
+                return f"✅ Cérebro RAG já sincronizado. {len(self.arquivos_indexados)} arquivos, nada a reprocessar."
+
+            if self.index is not None:
+                self._manter_indice(manifesto)
+                self._salvar_indice()
+            self.cache_consultas.clear()
+            self.manifest = manifesto
+            self._salvar_manifesto()
+            self.arquivos_indexados = sorted(a for a, m in manifesto.items() if m.get("ids"))
+            return (f"✅ Cérebro RAG Sincronizado! {len(alterados)} arquivos reprocessados, "
+                    f"{len(removidos)} removidos, {len(self.arquivos_indexados)} indexados ({time.time() - t0:.1f}s).")
+
+    def _manter_indice(self, manifesto):
+        """Reconstrói só quando o tipo muda, há órfãos demais ou o IVF-PQ precisa de novo treino."""
+        vivos = np.asarray([i for m in manifesto.values() for i in m.get("ids", [])], dtype=np.int64)
+        tipo = precisa_reconstruir(self.index, len(vivos), self.meta_indice["orfaos"],
+                                   self.meta_indice["treinado_com"], self.tipo_indice)
+        if tipo is None:
+            return
+        t0 = time.time()
+        vetores, ids = extrair_vetores(self.index)
+        manter = np.isin(ids, vivos)
+        novo, self.tipo_ativo = construir_indice(vetores[manter], ids[manter], tipo)
+        self.index = novo  # troca atômica: buscas em andamento seguem no índice anterior
+        self.meta_indice = {"treinado_com": int(manter.sum()), "orfaos": 0}
+        print(f"[RAG] Índice {tipo.upper()} reconstruído com {int(manter.sum())} vetores ({time.time() - t0:.1f}s).")
+
+    def _embed_consulta(self, query):
+        chave = " ".join(query.lower().split())
+        vetor = self.cache_consultas.get(chave)
+        if vetor is None:
+            embedder = self.embedder or get_embedder()
+            vetor = embedder.encode([query], convert_to_numpy=True).astype(np.float32)
+            self.cache_consultas.set(chave, vetor)
+        return vetor
+
+    def _salvar_manifesto(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp, self.manifest_path)
+
+    def search(self, query, max_chars=1500):
+        if self.index is None or self.index.ntotal == 0: return ""
+        try:
+            vetor = self._embed_consulta(query)
+            k = 2 + (RAG_SOBRA_ORFAOS if self.meta_indice["orfaos"] else 0)
+            with self._lock_indice:
+                _, indices = self.index.search(vetor, k)
+            ids = [int(i) for i in indices[0] if i >= 0]
+            textos = self._buscar_textos(ids)
+            # Blindagem na busca: ids órfãos (chunk removido) não têm texto e são ignorados
+            ids = [i for i in ids if i in textos][:2]
+            contexto = ""
+            for i in ids:
+                chunk = textos.get(i)
+                if isinstance(chunk, str) and len(contexto) + len(chunk) < max_chars:
+                    contexto += chunk + "\n\n"
+            return contexto
+        except Exception as e: 
+            print(f"[ERRO BUSCA RAG]: {e}")
+            return ""
+
+    async def asearch(self, query, max_chars=1500):
+        """Versão assíncrona de search(); roda no pool limitado do RAG, fora do event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_rag_executor, self.search, query, max_chars)
@@ -1,96 +1,262 @@
 import json
-import time
+import math
+import os
+import pickle
 import re
-from pathlib import Path
-from datetime import datetime
+import heapq
+import threading
+from array import array
 from collections import Counter
-import math
+from datetime import datetime
+from pathlib import Path
+
+# Stop words simples em PT-BR
+STOP_WORDS = frozenset({'o', 'a', 'os', 'as', 'um', 'uma', 'de', 'do', 'da', 'em', 'no', 'na',
+                        'que', 'e', 'é', 'para', 'por', 'com', 'não', 'sim', 'eu', 'voce', 'r2'})
+_PONTUACAO = re.compile(r'[^\w\s]')
+
+INDEX_VERSION = 1
+
 
 class LongTermMemory:
-    def __init__(self, config):
+    """
+    Memória de longo prazo com índice invertido BM25.
+
+    - Persistência append-only em permanent_memory.jsonl (uma memória por linha)
+    - Índice (postings por termo, tamanho de cada memória e offset da linha no arquivo) mantido
+      incrementalmente a cada save e salvo em snapshot (permanent_memory.idx) a cada
+      `snapshot_every` inserções; na abertura carrega o snapshot e só relê as linhas posteriores
+    - Nada é carregado no __init__: o índice sobe no primeiro uso
+    - Os textos das memórias ficam no disco e são lidos por offset só para o top-k
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, config, snapshot_every=1000, reranker=None):
         self.config = config
-        self.memory_file = Path(config.DATA_DIR) / "permanent_memory.json"
+        self.memory_file = Path(config.DATA_DIR) / "permanent_memory.jsonl"
+        self.index_file = Path(config.DATA_DIR) / "permanent_memory.idx"
+        self.legacy_file = Path(config.DATA_DIR) / "permanent_memory.json"
+        self.snapshot_every = snapshot_every
+        self.reranker = reranker   # opcional: fn(query, [memórias]) → memórias reordenadas (ex.: embeddings)
+        self._lock = threading.RLock()
+        self._loaded = False
         self._ensure_memory_file()
-        self.memories = self._load_memories()
 
     def _ensure_memory_file(self):
         if not self.memory_file.parent.exists():
             self.memory_file.parent.mkdir(parents=True)
         if not self.memory_file.exists():
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump([], f)
+            self._migrate_legacy()
 
-    def _load_memories(self):
+    def _migrate_legacy(self):
+        """Converte o permanent_memory.json antigo (lista única) para JSONL"""
+        memories = []
+        if self.legacy_file.exists():
+            try:
+                with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                    memories = json.load(f)
+            except:
+                memories = []
+        tmp = self.memory_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for mem in memories:
+                f.write(json.dumps(mem, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.memory_file)
+
+    # ------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------
+    def _reset_index(self):
+        self._postings = {}            # termo → (array de doc, array de tf)
+        self._lengths = array('I')     # nº de termos de cada memória
+        self._offsets = array('Q')     # offset da linha no JSONL
+        self._ids = array('Q')         # id da memória
+        self._total_len = 0
+        self._indexed_until = 0        # bytes do JSONL já indexados
+        self._since_snapshot = 0
+
+    def _ensure_index(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._reset_index()
+            self._load_snapshot()
+            self._index_from(self._indexed_until)
+            if self.memory_file.stat().st_size > self._indexed_until:
+                # Linha final incompleta: corta para o próximo append começar numa linha nova
+                with open(self.memory_file, 'r+b') as f:
+                    f.truncate(self._indexed_until)
+            self._loaded = True
+
+    def _load_snapshot(self):
+        if not self.index_file.exists():
+            return
         try:
-            with open(self.memory_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
+            with open(self.index_file, 'rb') as f:
+                snap = pickle.load(f)
+            if snap.get('version') != INDEX_VERSION or snap['indexed_until'] > self.memory_file.stat().st_size:
+                return   # snapshot de outro formato ou de um arquivo maior (truncado por fora): reindexa
+            self._postings = snap['postings']
+            self._lengths = snap['lengths']
+            self._offsets = snap['offsets']
+            self._ids = snap['ids']
+            self._total_len = snap['total_len']
+            self._indexed_until = snap['indexed_until']
+        except Exception:
+            self._reset_index()
+
+    def save_index(self):
+        """Grava o snapshot do índice (atômico)"""
+        with self._lock:
+            if not self._loaded:
+                return
+            snap = {
+                'version': INDEX_VERSION,
+                'postings': self._postings,
+                'lengths': self._lengths,
+                'offsets': self._offsets,
+                'ids': self._ids,
+                'total_len': self._total_len,
+                'indexed_until': self._indexed_until,
+            }
+            tmp = self.index_file.with_suffix('.idx.tmp')
+            with open(tmp, 'wb') as f:
+                pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.index_file)
+            self._since_snapshot = 0
 
+    def _index_from(self, offset):
+        """Indexa as linhas completas do JSONL a partir de `offset`"""
+        with open(self.memory_file, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break   # linha truncada (queda no meio da escrita): ignora
+                try:
+                    mem = json.loads(raw)
+                    self._add_to_index(mem['id'], offset, self._terms(mem))
+                except (ValueError, KeyError):
+                    pass
+                offset += len(raw)
+        self._indexed_until = offset
+
+    def _terms(self, mem):
+        keywords = mem.get('keywords')
+        if keywords is None:
+            keywords = self._extract_keywords(mem.get('user', '') + " " + mem.get('bot', ''))
+        return keywords
+
+    def _add_to_index(self, mem_id, offset, keywords):
+        doc = len(self._lengths)
+        for term, tf in Counter(keywords).items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = (array('I'), array('H'))
+            posting[0].append(doc)
+            posting[1].append(min(tf, 65535))
+        self._lengths.append(len(keywords))
+        self._offsets.append(offset)
+        self._ids.append(mem_id)
+        self._total_len += len(keywords)
+
+    def __len__(self):
+        self._ensure_index()
+        return len(self._lengths)
+
+    # ------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------
     def save_interaction(self, user_input, bot_response):
         """Salva uma interação completa com metadados"""
-        entry = {
-            "id": len(self.memories) + 1,
-            "timestamp": datetime.now().isoformat(),
-            "user": user_input,
-            "bot": bot_response,
-            "keywords": self._extract_keywords(user_input + " " + bot_response)
-        }
-        self.memories.append(entry)
-        self._persist()
-
-    def _persist(self):
-        with open(self.memory_file, 'w', encoding='utf-8') as f:
-            json.dump(self.memories, f, indent=2, ensure_ascii=False)
+        with self._lock:
+            self._ensure_index()
+            entry = {
+                "id": (self._ids[-1] + 1) if self._ids else 1,
+                "timestamp": datetime.now().isoformat(),
+                "user": user_input,
+                "bot": bot_response,
+                "keywords": self._extract_keywords(user_input + " " + bot_response)
+            }
+            offset = self._indexed_until
+            with open(self.memory_file, 'ab') as f:
+                f.write((json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8'))
+                f.flush()
+                self._indexed_until = f.tell()
+            self._add_to_index(entry['id'], offset, entry['keywords'])
+            self._since_snapshot += 1
+            if self._since_snapshot >= self.snapshot_every:
+                self.save_index()
+        return entry
 
     def retrieve_relevant_context(self, current_query, limit=3):
         """
         Busca memórias passadas relevantes à query atual.
-        Usa um algoritmo de similaridade baseado em palavras-chave (Jaccard/Overlap).
+        Pontuação BM25 percorrendo só as postings dos termos da consulta.
         """
-        if not self.memories:
-            return ""
-
-        query_keywords = set(self._extract_keywords(current_query))
-        scored_memories = []
-
-        for mem in self.memories:
-            # Pula memórias muito recentes (já estão no histórico de curto prazo)
-            # Assumindo que as últimas 5 já estão no chat context
-            if mem['id'] > len(self.memories) - 5:
-                continue
-
-            mem_keywords = set(mem['keywords'])
-            
-            # Cálculo simples de relevância (Interseção de palavras)
-            overlap = len(query_keywords.intersection(mem_keywords))
-            
-            if overlap > 0:
-                scored_memories.append((overlap, mem))
-
-        # Ordena por relevância e pega os top N
-        scored_memories.sort(key=lambda x: x[0], reverse=True)
-        top_memories = scored_memories[:limit]
-
-        if not top_memories:
+        memories = self.search(current_query, limit)
+        if not memories:
             return ""
 
         # Formata para injeção no prompt
         context_str = "\n[MEMÓRIA DE LONGO PRAZO RECUPERADA]:\n"
-        for score, mem in top_memories:
+        for mem in memories:
             date_str = datetime.fromisoformat(mem['timestamp']).strftime("%d/%m/%Y")
             context_str += f"- Em {date_str}, você disse: '{mem['user']}' e eu respondi: '{mem['bot'][:100]}...'\n"
-        
+
         return context_str
 
+    def search(self, query, limit=3, skip_recent=5):
+        """Top `limit` memórias por BM25 (as `skip_recent` mais novas já estão no contexto curto)"""
+        self._ensure_index()
+        with self._lock:
+            n_docs = len(self._lengths)
+            cutoff = n_docs - skip_recent
+            if cutoff <= 0:
+                return []
+            avgdl = (self._total_len / n_docs) or 1.0
+            k1, b = self.K1, self.B
+            lengths = self._lengths
+            scores = {}
+            for term in set(self._extract_keywords(query)):
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                docs, tfs = posting
+                df = len(docs)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc, tf in zip(docs, tfs):
+                    if doc >= cutoff:
+                        break   # postings crescentes: o resto são memórias recentes
+                    norm = tf + k1 * (1 - b + b * lengths[doc] / avgdl)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (k1 + 1) / norm
+            n_candidates = limit * 4 if self.reranker else limit
+            top = heapq.nlargest(n_candidates, scores.items(), key=lambda kv: (kv[1], kv[0]))
+            offsets = [self._offsets[doc] for doc, _ in top]
+
+        memories = self._read_at(offsets)
+        if self.reranker and memories:
+            memories = list(self.reranker(query, memories))
+        return memories[:limit]
+
+    def _read_at(self, offsets):
+        memories = []
+        with open(self.memory_file, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                memories.append(json.loads(f.readline()))
+        return memories
+
+    def close(self):
+        """Grava o snapshot pendente (chamar no desligamento)"""
+        with self._lock:
+            if self._loaded and self._since_snapshot:
+                self.save_index()
+
     def _extract_keywords(self, text):
         """Extrai palavras importantes (filtra stop words básicas)"""
-        # Stop words simples em PT-BR
-        stop_words = {'o', 'a', 'os', 'as', 'um', 'uma', 'de', 'do', 'da', 'em', 'no', 'na', 
-                      'que', 'e', 'é', 'para', 'por', 'com', 'não', 'sim', 'eu', 'voce', 'r2'}
-        
         # Limpeza
-        text = re.sub(r'[^\w\s]', '', text.lower())
-        words = text.split()
-        
-        return [w for w in words if w not in stop_words and len(w) > 2]
\ No newline at end of file
+        words = _PONTUACAO.sub('', text.lower()).split()
+
+        return [w for w in words if w not in STOP_WORDS and len(w) > 2]
@@ -0,0 +1,153 @@
+"""
+Índices vetoriais do RAG
+Escolha automática entre busca exata (Flat), HNSW e IVF-PQ conforme o tamanho do corpus.
+Só um índice fica na RAM: acima do limiar do Flat, o próprio índice ANN recebe os vetores
+novos com add_with_ids e só é reconstruído quando muda de tipo, acumula órfãos demais ou,
+no IVF-PQ, quando o corpus cresce além do fator de re-treino.
+"""
+
+import math
+import os
+
+import numpy as np
+import faiss
+
+TIPOS_INDICE = ("auto", "flat", "hnsw", "ivfpq")
+
+# Abaixo de LIMIAR_HNSW a busca exata ainda é barata; acima de LIMIAR_IVFPQ
+# o HNSW (vetores inteiros + grafo) passa a pesar demais na RAM.
+LIMIAR_HNSW = int(os.getenv("R2_RAG_LIMIAR_HNSW", "10000"))
+LIMIAR_IVFPQ = int(os.getenv("R2_RAG_LIMIAR_IVFPQ", "500000"))
+
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+IVFPQ_BITS = 8
+IVFPQ_NPROBE = 32
+IVFPQ_REFINO = 8  # candidatos do PQ reordenados com distância exata (k * IVFPQ_REFINO)
+
+# HNSW e IVF-PQ não apagam vetores: os removidos viram órfãos até a próxima reconstrução
+FRACAO_ORFAOS = 0.2
+# Centróides do IVF-PQ treinados com N vetores envelhecem quando o corpus passa de N * fator
+FATOR_RETREINO = float(os.getenv("R2_RAG_FATOR_RETREINO", "2.0"))
+
+
+def escolher_tipo(n_vetores, preferido="auto"):
+    """Resolve o tipo de índice; 'auto' decide pelo número de vetores."""
+    if preferido not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice inválido: {preferido} (use {', '.join(TIPOS_INDICE)})")
+    if preferido != "auto":
+        return preferido
+    if n_vetores < LIMIAR_HNSW:
+        return "flat"
+    if n_vetores < LIMIAR_IVFPQ:
+        return "hnsw"
+    return "ivfpq"
+
+
+def _subquantizadores(dim):
+    # Maior divisor de dim que deixa ~8 dimensões por subquantizador
+    for m in range(max(dim // 8, 1), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def construir_indice(vetores, ids, tipo="auto"):
+    """
+    Constrói um índice de busca com ids externos.
+
+    Args:
+        vetores: matriz float32 (n, dim)
+        ids: ids int64 correspondentes às linhas
+        tipo: 'auto', 'flat', 'hnsw' ou 'ivfpq'
+
+    Returns:
+        (índice faiss, tipo efetivamente usado)
+    """
+    vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    n, dim = vetores.shape
+    tipo = escolher_tipo(n, tipo)
+
+    if tipo == "flat":
+        indice = faiss.IndexIDMap(faiss.IndexFlatL2(dim))
+    elif tipo == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_M)
+        hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        indice = faiss.IndexIDMap(hnsw)
+    else:
+        nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+        quantizador = faiss.IndexFlatL2(dim)
+        ivfpq = faiss.IndexIVFPQ(quantizador, dim, nlist, _subquantizadores(dim), IVFPQ_BITS)
+        # Sem o refino o PQ sozinho perde metade dos vizinhos; o custo é guardar os vetores inteiros
+        refino = faiss.IndexRefineFlat(ivfpq)
+        amostra = vetores
+        limite_treino = max(nlist * 64, 2 ** IVFPQ_BITS * 39)
+        if n > limite_treino:
+            amostra = vetores[np.random.default_rng(0).choice(n, limite_treino, replace=False)]
+        refino.train(amostra)
+        indice = faiss.IndexIDMap(refino)
+
+    indice.add_with_ids(vetores, ids)
+    ajustar_busca(indice)
+    return indice, tipo
+
+
+def ajustar_busca(indice):
+    """Aplica os parâmetros de busca (efSearch / nprobe) a um índice carregado do disco."""
+    base = faiss.downcast_index(indice.index) if isinstance(indice, faiss.IndexIDMap) else indice
+    if isinstance(base, faiss.IndexRefine):
+        base.k_factor = IVFPQ_REFINO
+        base = faiss.downcast_index(base.base_index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = HNSW_EF_SEARCH
+    elif isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(IVFPQ_NPROBE, base.nlist)
+    return indice
+
+
+def tipo_do_indice(indice):
+    """'flat', 'hnsw' ou 'ivfpq' de um índice criado por construir_indice."""
+    base = faiss.downcast_index(indice.index) if isinstance(indice, faiss.IndexIDMap) else indice
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, (faiss.IndexRefine, faiss.IndexIVF)):
+        return "ivfpq"
+    return "flat"
+
+
+def extrair_vetores(indice_idmap):
+    """Devolve (vetores, ids) de um IndexIDMap sobre Flat, HNSW-Flat ou IVF-PQ com refino."""
+    n = indice_idmap.ntotal
+    ids = faiss.vector_to_array(indice_idmap.id_map).astype(np.int64)
+    base = faiss.downcast_index(indice_idmap.index)
+    if isinstance(base, faiss.IndexRefine):
+        base = faiss.downcast_index(base.refine_index)   # vetores inteiros guardados para o refino
+    vetores = base.reconstruct_n(0, n) if n else np.zeros((0, base.d), dtype=np.float32)
+    return vetores, ids
+
+
+def precisa_reconstruir(indice, n_vivos, n_orfaos, treinado_com, preferido="auto"):
+    """
+    Decide se o índice atual ainda serve depois de um sync incremental.
+
+    Args:
+        n_vivos: vetores que ainda têm chunk no corpus
+        n_orfaos: vetores removidos do corpus mas ainda dentro do índice
+        treinado_com: vetores usados na última construção
+
+    Returns:
+        tipo a construir, ou None para seguir adicionando no índice atual
+    """
+    desejado = escolher_tipo(n_vivos, preferido) if n_vivos else "flat"
+    atual = tipo_do_indice(indice)
+    if desejado != atual:
+        return desejado
+    if atual == "flat":
+        return None
+    if n_orfaos > FRACAO_ORFAOS * max(indice.ntotal, 1):
+        return atual
+    if atual == "ivfpq" and n_vivos >= FATOR_RETREINO * max(treinado_com, 1):
+        return atual
+    return None
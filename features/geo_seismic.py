@@ -1,6 +1,7 @@
-import requests
 import datetime
 
+from utils.http_client import get_http_client
+
 class GeoSeismicSystem:
     def __init__(self):
         # Fonte de Dados: USGS (United States Geological Survey)
@@ -11,7 +12,7 @@ class GeoSeismicSystem:
         """Busca dados sísmicos em tempo real e formata relatório de texto"""
         try:
             print("🌋 [GEO]: Consultando sensores USGS...")
-            resp = requests.get(self.url_api, timeout=10)
+            resp = get_http_client().get(self.url_api, timeout=10)
             data = resp.json()
             
             # Pegamos os 5 eventos mais recentes
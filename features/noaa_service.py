@@ -10,8 +10,14 @@ import os
 import json
 import time
 import shutil
+import hashlib
+import tempfile
+import threading
 import subprocess
-import requests
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from utils.http_client import get_http_client
+from utils.media_cache import MediaCache
 
 try:
     from imageio_ffmpeg import get_ffmpeg_exe
@@ -29,33 +35,38 @@ HEADERS = {
     )
 }
 
-# ─── Utilitários internos ─────────────────────────────────────────────────────
-
-def _get(url: str, timeout: int = 20, stream: bool = False, retries: int = 3):
-    """GET com retry automático e headers padrão."""
-    for attempt in range(retries):
-        try:
-            r = requests.get(url, headers=HEADERS, timeout=timeout, stream=stream)
-            if r.status_code == 200:
-                return r
-        except Exception as e:
-            if attempt == retries - 1:
-                print(f"⚠️  [NOAA] Falha após {retries} tentativas em {url}: {e}")
-    return None
+# Cache persistente de mídia/frames (sobrevive entre chamadas e reinícios)
+CACHE_DIR        = os.getenv("R2_NOAA_CACHE", os.path.join("static", "cache", "noaa"))
+MIDIA_MAX_BYTES  = int(os.getenv("R2_NOAA_CACHE_MB", "512")) * 1024 * 1024
+ENLIL_WORKERS    = 8     # downloads simultâneos de frames ENLIL
+ENLIL_FRAMERATE  = 18
+
+# Prazo (s) de cada fonte no get_full_intel paralelo, contado a partir do início da coleta.
+# Fonte que estoura o prazo entra com o valor de fallback e o relatório sai parcial.
+PRAZOS_FONTES = {
+    "goes_xray":    15,
+    "kp_index":     15,
+    "solar_wind":   15,
+    "proton_flux":  15,
+    "alertas":      15,
+    "previsao_3d":  15,
+    "solar_region": 15,
+    "drap":         25,
+    "sdo_imagens":  30,
+}
 
+# ─── Utilitários internos ─────────────────────────────────────────────────────
 
-def _salvar_binario(res, path: str) -> bool:
-    """Salva conteúdo binário de uma resposta requests em disco."""
+def _get(url: str, timeout: int = 20, stream: bool = False, retries: int = 3, conditional=None):
+    """GET pelo transporte compartilhado (retry com backoff, GET condicional) com headers padrão."""
     try:
-        with open(path, "wb") as f:
-            if hasattr(res, "iter_content"):
-                for chunk in res.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            else:
-                f.write(res.content)
-        return os.path.getsize(path) > 500
-    except Exception:
-        return False
+        r = get_http_client().get(url, headers=HEADERS, timeout=timeout, stream=stream, attempts=retries,
+                                  conditional=conditional)
+        if r.status_code == 200:
+            return r
+    except Exception as e:
+        print(f"⚠️  [NOAA] Falha após {retries} tentativas em {url}: {e}")
+    return None
 
 
 def _ffmpeg_run(cmd: list) -> bool:
@@ -83,7 +94,102 @@ def _ffmpeg_run(cmd: list) -> bool:
         return False
 
 
-def _gif_para_mp4(gif_path: str, mp4_path: str) -> bool:
+class CacheFrames:
+    """
+    Cache endereçado por conteúdo dos frames ENLIL.
+
+    Cada frame vira `<sha1>.jpg` em `pasta`; `index.json` mapeia URL → sha1. Frames já
+    conhecidos não são baixados de novo e o índice é gravado a cada lote, então uma
+    execução interrompida continua de onde parou.
+    """
+
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        self.index_path = os.path.join(pasta, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(pasta, exist_ok=True)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            dados = {}
+        self.frames = dados.get("frames", {})
+        self.ultimo_render = dados.get("ultimo_render")
+
+    def caminho(self, digest: str) -> str:
+        return os.path.join(self.pasta, f"{digest}.jpg")
+
+    def get(self, url: str):
+        """sha1 do frame se ele já está no cache (e o arquivo ainda existe)."""
+        digest = self.frames.get(url)
+        if digest and os.path.exists(self.caminho(digest)):
+            return digest
+        return None
+
+    def put(self, url: str, conteudo: bytes) -> str:
+        digest = hashlib.sha1(conteudo).hexdigest()
+        destino = self.caminho(digest)
+        if not os.path.exists(destino):
+            tmp = f"{destino}.{threading.get_ident()}.part"
+            with open(tmp, "wb") as f:
+                f.write(conteudo)
+            os.replace(tmp, destino)
+        with self._lock:
+            self.frames[url] = digest
+        return digest
+
+    def salvar(self):
+        with self._lock:
+            dados = {"frames": dict(self.frames), "ultimo_render": self.ultimo_render}
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f)
+        os.replace(tmp, self.index_path)
+
+    def podar(self, urls_ativas: set) -> int:
+        """Esquece URLs que saíram da simulação e apaga blobs sem referência."""
+        with self._lock:
+            self.frames = {u: d for u, d in self.frames.items() if u in urls_ativas}
+            vivos = set(self.frames.values())
+        removidos = 0
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(".jpg") and nome[:-4] not in vivos:
+                os.remove(os.path.join(self.pasta, nome))
+                removidos += 1
+        return removidos
+
+
+def _ffmpeg_pipe_jpegs(caminhos: list, mp4_path: str, framerate: int = ENLIL_FRAMERATE) -> bool:
+    """Codifica uma sequência de JPEGs enviando os bytes pelo stdin do FFmpeg (image2pipe)."""
+    cmd = [
+        _FFMPEG, "-y", "-loglevel", "error",
+        "-f", "image2pipe", "-framerate", str(framerate), "-c:v", "mjpeg", "-i", "-",
+        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        "-movflags", "faststart", mp4_path
+    ]
+    # stderr em arquivo: um PIPE cheio travaria o FFmpeg enquanto escrevemos no stdin
+    with tempfile.TemporaryFile() as erros:
+        try:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=erros)
+        except FileNotFoundError:
+            print(f"❌ [FFmpeg] Binário não encontrado: {_FFMPEG}")
+            return False
+        try:
+            for caminho in caminhos:
+                with open(caminho, "rb") as f:
+                    proc.stdin.write(f.read())
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        codigo = proc.wait()
+        if codigo != 0:
+            erros.seek(0)
+            print(f"⚠️  [FFmpeg] Código de saída {codigo}: {erros.read().decode('utf-8', errors='replace')[-200:]}")
+    return codigo == 0
+
+
+def _gif_para_mp4(gif_path: str, mp4_path: str, apagar_gif: bool = True) -> bool:
     """Converte GIF em MP4 H.264 compatível com browsers."""
     if not os.path.exists(gif_path) or os.path.getsize(gif_path) < 1000:
         return False
@@ -94,7 +200,7 @@ def _gif_para_mp4(gif_path: str, mp4_path: str) -> bool:
         "-movflags", "faststart", mp4_path
     ]
     ok = _ffmpeg_run(cmd)
-    if os.path.exists(gif_path):
+    if apagar_gif and os.path.exists(gif_path):
         os.remove(gif_path)
     return ok and os.path.exists(mp4_path) and os.path.getsize(mp4_path) > 1000
 
@@ -133,6 +239,25 @@ class NOAAService:
         self.url_previsao_txt = f"{NOAA_BASE}/text/3-day-forecast.txt"
         self.url_report_txt   = f"{NOAA_BASE}/text/solar-region-summary.txt"
 
+        # ── Cache de mídia (revalidação por ETag/Last-Modified, LRU por tamanho) ──
+        self.midia = MediaCache(os.path.join(CACHE_DIR, "midia"), max_bytes=MIDIA_MAX_BYTES, http=get_http_client())
+
+    def _baixar_midia(self, url: str, destino: str = None, ext: str = "", timeout: int = 30,
+                      min_bytes: int = 500) -> dict:
+        """
+        Busca `url` pelo cache de mídia e, se `destino` for dado, mantém uma cópia lá.
+        A cópia só é refeita quando o conteúdo mudou ou o arquivo de destino sumiu.
+        """
+        item = self.midia.fetch(url, ext=ext, headers=HEADERS, timeout=timeout, min_bytes=min_bytes)
+        if item is None:
+            return None
+        if destino and (item["mudou"] or not os.path.exists(destino)
+                        or os.path.getsize(destino) != os.path.getsize(item["path"])):
+            shutil.copyfile(item["path"], destino)
+        if item["origem"] != "rede":
+            print(f"♻️  [Cache] {os.path.basename(destino or url)} reaproveitado ({item['origem']}).")
+        return item
+
     # ══════════════════════════════════════════════════════════════════════════
     # SEÇÃO 1 — VÍDEOS E ANIMAÇÕES
     # ══════════════════════════════════════════════════════════════════════════
@@ -140,15 +265,18 @@ class NOAAService:
     def get_cme_video(self, banda: str = "C3") -> tuple:
         """Baixa GIF SOHO LASCO C2 ou C3 e converte para MP4."""
         url = self.url_cme_c2_gif if banda == "C2" else self.url_cme_gif
-        gif_path = f"temp_cme_{banda.lower()}.gif"
         mp4_path = f"intel_cme_{banda.lower()}.mp4"
         print(f"⏳ [CME {banda}] Baixando coronógrafo SOHO LASCO...")
-        res = _get(url, timeout=30)
-        if not res:
-            return None, None
-        if not _salvar_binario(res, gif_path):
+        gif = self._baixar_midia(url, ext=".gif", timeout=30)
+        if not gif:
             return None, None
-        if _gif_para_mp4(gif_path, mp4_path):
+        # Mesmo GIF da última conversão: o MP4 existente continua válido
+        if self.midia.get_meta(url, "mp4_sha1") == gif["sha1"] \
+                and os.path.exists(mp4_path) and os.path.getsize(mp4_path) > 1000:
+            print(f"✅ [CME {banda}] GIF inalterado — reutilizando vídeo.")
+            return mp4_path, "video"
+        if _gif_para_mp4(gif["path"], mp4_path, apagar_gif=False):
+            self.midia.set_meta(url, "mp4_sha1", gif["sha1"])
             print(f"✅ [CME {banda}] Vídeo renderizado.")
             return mp4_path, "video"
         return None, None
@@ -157,75 +285,74 @@ class NOAAService:
         """Baixa vídeo SDO AIA 193Å (corona extrema UV)."""
         path = "intel_sdo.mp4"
         print("⏳ [SDO] Baixando vídeo solar AIA 193...")
-        res = _get(self.url_sdo_mp4, timeout=90, stream=True)
-        if not res:
-            return None, None
-        if _salvar_binario(res, path) and os.path.getsize(path) > 50_000:
-            print("✅ [SDO] Vídeo baixado.")
+        if self._baixar_midia(self.url_sdo_mp4, path, ext=".mp4", timeout=90, min_bytes=50_000):
+            print("✅ [SDO] Vídeo pronto.")
             return path, "video"
         return None, None
 
+    def _baixar_frame_enlil(self, cache: "CacheFrames", url: str):
+        # Frames são imutáveis e já ficam no CacheFrames: não ocupam a memória de revalidação do HttpClient
+        r = _get(url, timeout=8, retries=2, conditional=False)
+        if r is None or len(r.content) <= 500:
+            return None
+        return cache.put(url, r.content)
+
     def get_enlil_video(self) -> tuple:
-        """Reconstrói animação WSA-ENLIL a partir de todos os frames disponíveis."""
+        """
+        Reconstrói animação WSA-ENLIL a partir de todos os frames disponíveis.
+        Só os frames novos desde a última execução são baixados (cache por conteúdo,
+        pool de ENLIL_WORKERS) e os JPEGs vão direto para o stdin do FFmpeg.
+        """
         mp4_path = "intel_enlil.mp4"
-        temp_dir = "temp_enlil_frames"
         print("⏳ [ENLIL] Acessando simulação de vento solar...")
 
         try:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-            os.makedirs(temp_dir)
-
             res = _get(self.url_enlil_json, timeout=20)
             if not res:
                 return self._fallback_enlil_static()
 
-            frames = res.json()
-            total  = len(frames)
-            print(f"📥 [ENLIL] {total} frames detectados. Iniciando download...")
-
-            ok = 0
-            for i, frame in enumerate(frames):
-                img_url   = NOAA_BASE + frame["url"]
-                save_path = os.path.join(temp_dir, f"frame_{i:04d}.jpg")
-                r = _get(img_url, timeout=8, retries=2)
-                if r and _salvar_binario(r, save_path):
-                    ok += 1
-                if i % 25 == 0:
-                    print(f"   ↳ {i}/{total} frames ({ok} OK)...")
-
-            if ok < 10:
+            urls  = [NOAA_BASE + frame["url"] for frame in res.json()]
+            total = len(urls)
+            cache = CacheFrames(os.path.join(CACHE_DIR, "enlil"))
+            faltando = [u for u in urls if cache.get(u) is None]
+            print(f"📥 [ENLIL] {total} frames detectados | {total - len(faltando)} em cache | {len(faltando)} a baixar...")
+
+            if faltando:
+                with ThreadPoolExecutor(max_workers=ENLIL_WORKERS, thread_name_prefix="enlil") as pool:
+                    for i, _ in enumerate(pool.map(lambda u: self._baixar_frame_enlil(cache, u), faltando), 1):
+                        if i % 25 == 0:
+                            cache.salvar()  # checkpoint: uma queda no meio não perde o que já veio
+                            print(f"   ↳ {i}/{len(faltando)} frames novos...")
+            cache.podar(set(urls))
+            cache.salvar()
+
+            digests = [d for d in (cache.get(u) for u in urls) if d]
+            if len(digests) < 10:
                 print("❌ [ENLIL] Frames insuficientes — ativando fallback estático.")
-                shutil.rmtree(temp_dir)
                 return self._fallback_enlil_static()
 
-            print(f"⚙️  [ENLIL] Renderizando {ok} frames...")
-            cmd = [
-                _FFMPEG, "-y",
-                "-framerate", "18",
-                "-i", os.path.join(temp_dir, "frame_%04d.jpg"),
-                "-c:v", "libx264", "-pix_fmt", "yuv420p",
-                "-movflags", "faststart", mp4_path
-            ]
-            _ffmpeg_run(cmd)
-            shutil.rmtree(temp_dir)
-
-            if os.path.exists(mp4_path) and os.path.getsize(mp4_path) > 1000:
+            assinatura = hashlib.sha1("".join(digests).encode()).hexdigest()
+            if cache.ultimo_render == assinatura and os.path.exists(mp4_path) and os.path.getsize(mp4_path) > 1000:
+                print("✅ [ENLIL] Nenhum frame novo — reutilizando animação existente.")
+                return mp4_path, "video"
+
+            print(f"⚙️  [ENLIL] Renderizando {len(digests)} frames (image2pipe)...")
+            if _ffmpeg_pipe_jpegs([cache.caminho(d) for d in digests], mp4_path) \
+                    and os.path.exists(mp4_path) and os.path.getsize(mp4_path) > 1000:
+                cache.ultimo_render = assinatura
+                cache.salvar()
                 print("✅ [ENLIL] Animação completa pronta.")
                 return mp4_path, "video"
             return self._fallback_enlil_static()
 
         except Exception as e:
             print(f"❌ [ENLIL] Erro: {e}")
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
             return self._fallback_enlil_static()
 
     def _fallback_enlil_static(self) -> tuple:
         print("⚠️  [ENLIL] Ativando imagem estática de backup.")
         path = "intel_enlil_static.jpg"
-        r = _get(f"{NOAA_BASE}/images/animations/enlil/latest.jpg", timeout=15)
-        if r and _salvar_binario(r, path):
+        if self._baixar_midia(f"{NOAA_BASE}/images/animations/enlil/latest.jpg", path, ext=".jpg", timeout=15):
             return path, "foto"
         return None, None
 
@@ -237,24 +364,23 @@ class NOAAService:
         """Mapa D-RAP de absorção de ondas de rádio (blackout HF)."""
         path = "intel_drap.png"
         print("⏳ [D-RAP] Baixando mapa de absorção...")
-        r = _get(self.url_drap, timeout=30)
-        if r and _salvar_binario(r, path):
+        if self._baixar_midia(self.url_drap, path, ext=".png", timeout=30):
             return path, "foto"
         return None, None
 
     def get_sdo_imagens(self) -> dict:
-        """Baixa SDO em múltiplos comprimentos de onda. Retorna {nome: (path, 'foto')}."""
-        resultado = {}
-        for nome, url in self.sdo_bandas.items():
+        """Baixa SDO em múltiplos comprimentos de onda (bandas em paralelo). Retorna {nome: (path, 'foto')}."""
+        def baixar(item):
+            nome, url = item
             path = f"intel_{nome.lower()}.jpg"
             print(f"⏳ [SDO] Banda {nome}...")
-            r = _get(url, timeout=20)
-            if r and _salvar_binario(r, path):
-                resultado[nome] = (path, "foto")
+            if self._baixar_midia(url, path, ext=".jpg", timeout=20):
                 print(f"✅ [{nome}] OK")
-            else:
-                resultado[nome] = (None, None)
-        return resultado
+                return nome, (path, "foto")
+            return nome, (None, None)
+
+        with ThreadPoolExecutor(max_workers=len(self.sdo_bandas)) as pool:
+            return dict(pool.map(baixar, self.sdo_bandas.items()))
 
     # ══════════════════════════════════════════════════════════════════════════
     # SEÇÃO 3 — TELEMETRIA JSON (DADOS NUMÉRICOS)
@@ -466,30 +592,101 @@ class NOAAService:
     # SEÇÃO 5 — RELATÓRIO CONSOLIDADO (MÉTODO PRINCIPAL)
     # ══════════════════════════════════════════════════════════════════════════
 
-    def get_full_intel(self) -> dict:
+    def _fontes_intel(self) -> dict:
+        """Fontes do relatório consolidado: {nome: (coletor, valor de fallback)}."""
+        return {
+            # Telemetria numérica
+            "goes_xray":    (self.get_goes_xray,            {"erro": "timeout", "classe_flare": "N/A"}),
+            "kp_index":     (self.get_kp_index,             {"erro": "timeout", "kp_atual": None}),
+            "solar_wind":   (self.get_solar_wind,           {"erro": "timeout"}),
+            "proton_flux":  (self.get_proton_flux,          {"erro": "timeout"}),
+            # Alertas textuais
+            "alertas":      (self.get_alertas_ativos,       []),
+            "previsao_3d":  (self.get_previsao_3dias,       "Previsão indisponível."),
+            "solar_region": (self.get_solar_region_summary, "Relatório de regiões solares indisponível."),
+            # Mídias (paths locais) — vídeos são pesados e ficam sob demanda
+            "drap":         (self.get_drap_map,             (None, None)),
+            "sdo_imagens":  (self.get_sdo_imagens,          {nome: (None, None) for nome in self.sdo_bandas}),
+        }
+
+    def _coletar_paralelo(self, fontes: dict, prazos: dict, inicio: float) -> tuple:
+        """
+        Dispara todas as fontes ao mesmo tempo e espera cada uma até o seu prazo.
+        Retorna (resultados, tempos_s, status) — status: 'ok', 'timeout' ou 'erro'.
+        """
+        tempos, status, resultados = {}, {}, {}
+
+        def medir(nome, coletor):
+            t0 = time.time()
+            try:
+                return coletor()
+            finally:
+                tempos[nome] = round(time.time() - t0, 2)
+
+        # Sem `with`: fontes atrasadas terminam em segundo plano sem segurar o relatório
+        pool = ThreadPoolExecutor(max_workers=len(fontes), thread_name_prefix="noaa")
+        futuros = {nome: pool.submit(medir, nome, coletor) for nome, (coletor, _) in fontes.items()}
+        pool.shutdown(wait=False)
+
+        for nome in sorted(futuros, key=lambda n: prazos.get(n, max(prazos.values()))):
+            restante = inicio + prazos.get(nome, max(prazos.values())) - time.time()
+            try:
+                resultados[nome] = futuros[nome].result(timeout=max(restante, 0))
+                status[nome] = "ok"
+            except FuturesTimeout:
+                resultados[nome] = fontes[nome][1]
+                status[nome] = "timeout"
+                tempos[nome] = round(time.time() - inicio, 2)
+                print(f"⏱️  [NOAA] {nome} estourou o prazo de {prazos.get(nome)}s — relatório parcial.")
+            except Exception as e:
+                resultados[nome] = fontes[nome][1]
+                status[nome] = "erro"
+                print(f"❌ [NOAA] {nome} falhou: {e}")
+        ordem = list(fontes)
+        return resultados, {n: tempos[n] for n in ordem if n in tempos}, {n: status[n] for n in ordem}
+
+    def get_full_intel(self, paralelo: bool = True, prazos: dict = None) -> dict:
         """
         Executa TODOS os módulos e retorna um pacote de inteligência completo.
         Usado pelo WebSocket para montar o relatório HTML do painel NOAA.
+
+        Args:
+            paralelo: coleta todas as fontes ao mesmo tempo (padrão); False = sequencial
+            prazos: sobrescreve PRAZOS_FONTES ({fonte: segundos}) no modo paralelo
         """
         print("\n" + "═"*55)
         print("🛰️  [NOAA FULL INTEL] Iniciando varredura completa...")
         print("═"*55)
         inicio = time.time()
+        fontes = self._fontes_intel()
+
+        if paralelo:
+            resultados, tempos, status = self._coletar_paralelo(fontes, {**PRAZOS_FONTES, **(prazos or {})}, inicio)
+        else:
+            resultados, tempos, status = {}, {}, {}
+            for nome, (coletor, fallback) in fontes.items():
+                t0 = time.time()
+                try:
+                    resultados[nome], status[nome] = coletor(), "ok"
+                except Exception as e:
+                    resultados[nome], status[nome] = fallback, "erro"
+                    print(f"❌ [NOAA] {nome} falhou: {e}")
+                tempos[nome] = round(time.time() - t0, 2)
 
         intel = {
             # Telemetria numérica
-            "goes_xray":    self.get_goes_xray(),
-            "kp_index":     self.get_kp_index(),
-            "solar_wind":   self.get_solar_wind(),
-            "proton_flux":  self.get_proton_flux(),
+            "goes_xray":    resultados["goes_xray"],
+            "kp_index":     resultados["kp_index"],
+            "solar_wind":   resultados["solar_wind"],
+            "proton_flux":  resultados["proton_flux"],
             # Alertas textuais
-            "alertas":      self.get_alertas_ativos(),
-            "previsao_3d":  self.get_previsao_3dias(),
-            "solar_region": self.get_solar_region_summary(),
+            "alertas":      resultados["alertas"],
+            "previsao_3d":  resultados["previsao_3d"],
+            "solar_region": resultados["solar_region"],
             # Mídias (paths locais)
             "media": {
-                "drap":         self.get_drap_map(),
-                "sdo_imagens":  self.get_sdo_imagens(),
+                "drap":         resultados["drap"],
+                "sdo_imagens":  resultados["sdo_imagens"],
                 # Vídeos são pesados — coletados sob demanda
                 # "cme_c3":    self.get_cme_video("C3"),
                 # "enlil":     self.get_enlil_video(),
@@ -497,6 +694,9 @@ class NOAAService:
             # Metadados
             "timestamp_coleta": time.strftime("%d/%m/%Y %H:%M:%S UTC"),
             "duracao_s": round(time.time() - inicio, 1),
+            "tempos_fontes_s": tempos,
+            "status_fontes": status,
+            "parcial": any(st != "ok" for st in status.values()),
         }
 
         # ── Score de Alerta Consolidado ────────────────────────────────────
@@ -541,7 +741,8 @@ class NOAAService:
         html = f"""
 <div style="font-family:'Share Tech Mono',monospace;font-size:12px;line-height:1.7;color:#00ff88;">
 <b>🛰️ NOAA SPACE WEATHER INTEL — {intel.get('timestamp_coleta','N/A')}</b><br>
-<b>Estado Geral: {intel.get('estado_geral','N/A')} | Score: {intel.get('score_alerta',0)}</b>
+<b>Estado Geral: {intel.get('estado_geral','N/A')} | Score: {intel.get('score_alerta',0)}</b><br>
+⏱️ Coleta: {intel.get('duracao_s','N/A')}s{' | ⚠️ parcial: ' + ', '.join(n for n, st in intel.get('status_fontes', {}).items() if st != 'ok') if intel.get('parcial') else ''}
 <hr style="border-color:#333;"/>
 <b>☀️ GOES X-Ray (Flares Solares)</b><br>
 &nbsp;• Classe: <b>{xray.get('classe_flare','N/A')}</b> | Fluxo: {flux_x:.2e} W/m²<br>
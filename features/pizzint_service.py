@@ -9,14 +9,21 @@ Expansões: RSS feeds de agências primárias, sistema de peso por categoria,
 """
 
 import re
+import html
 import time
+import hashlib
+import threading
 import urllib.parse
 import urllib.request
 import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 
 import requests
 from bs4 import BeautifulSoup
 
+from utils.http_client import get_http_client
+
 # ─── Constantes ───────────────────────────────────────────────────────────────
 HEADERS = {
     "User-Agent": (
@@ -110,11 +117,18 @@ RSS_FEEDS = [
 ]
 
 
+# ── Coleta ────────────────────────────────────────────────────────────────────
+STATUS_TTL_S      = 300    # get_status reaproveita o último relatório por este tempo (config "status_ttl_s")
+RSS_TIMEOUT_S     = 10     # timeout HTTP de cada feed
+RSS_PRAZO_S       = 15     # prazo total da coleta RSS; feed atrasado fica de fora desta rodada
+ITENS_VISTOS_MAX  = 2000   # análises de manchetes guardadas entre rodadas (por URL/GUID)
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 def _get_safe(url: str, timeout: int = 12) -> Optional[requests.Response]:
-    """GET seguro com timeout e headers."""
+    """GET seguro com timeout e headers (transporte compartilhado: keep-alive, GET condicional)."""
     try:
-        r = requests.get(url, headers=HEADERS, timeout=timeout)
+        r = get_http_client().get(url, headers=HEADERS, timeout=timeout, attempts=2)
         if r.status_code == 200:
             return r
     except Exception:
@@ -122,24 +136,57 @@ def _get_safe(url: str, timeout: int = 12) -> Optional[requests.Response]:
     return None
 
 
+class _MatcherAmeacas:
+    """
+    Casa todas as palavras-chave de todas as categorias numa única varredura do texto.
+
+    Uma alternância compilada dentro de lookahead acha, em cada posição, a palavra mais
+    longa que começa ali; as palavras que são prefixo dela ("war" em "warhead",
+    "attack" em "attack launched") casam na mesma posição e são contadas junto, o que
+    reproduz a contagem por substring de `str.count` palavra a palavra.
+    """
+
+    def __init__(self, categorias: dict):
+        self.categorias = list(categorias)
+        self.alvos: Dict[str, list] = {}   # palavra → [(categoria, peso)]
+        for cat, dados in categorias.items():
+            for palavra in dados["palavras"]:
+                self.alvos.setdefault(palavra, []).append((cat, dados["peso"]))
+        palavras = sorted(self.alvos, key=len, reverse=True)
+        self.prefixos = {p: [q for q in palavras if q != p and p.startswith(q)] for p in palavras}
+        self.regex = re.compile("(?=(" + "|".join(map(re.escape, palavras)) + "))")
+
+    def score_e_hits(self, texto: str) -> tuple[int, dict]:
+        contagem: Dict[str, int] = {}
+        for m in self.regex.finditer(texto.lower()):
+            palavra = m.group(1)
+            contagem[palavra] = contagem.get(palavra, 0) + 1
+            for prefixo in self.prefixos[palavra]:
+                contagem[prefixo] = contagem.get(prefixo, 0) + 1
+
+        score = 0
+        hits  = {cat: {} for cat in self.categorias}
+        for palavra, count in contagem.items():
+            for cat, peso in self.alvos[palavra]:
+                hits[cat][palavra] = count
+                score += count * peso
+        return score, hits
+
+
+_MATCHER = _MatcherAmeacas(CATEGORIAS_AMEACA)
+
+
 def _calcular_score_e_hits(texto: str) -> tuple[int, dict]:
     """
     Varre o texto e calcula o score bruto de ameaça.
     Retorna (score_total, {categoria: {palavra: contagem}})
     """
-    texto_lower = texto.lower()
-    score = 0
-    hits  = {}
-
-    for cat, dados in CATEGORIAS_AMEACA.items():
-        hits[cat] = {}
-        for palavra in dados["palavras"]:
-            count = texto_lower.count(palavra)
-            if count:
-                hits[cat][palavra] = count
-                score += count * dados["peso"]
+    return _MATCHER.score_e_hits(texto)
+
 
-    return score, hits
+def _texto_html(fragmento: str) -> str:
+    """Texto puro de um trecho HTML curto (descrições de RSS) sem montar uma árvore BeautifulSoup."""
+    return " ".join(html.unescape(re.sub(r"<[^>]+>", " ", fragmento)).split())
 
 
 def _score_para_defcon(score: int) -> dict:
@@ -160,18 +207,14 @@ def _score_para_defcon(score: int) -> dict:
     }
 
 
-def _parse_rss(url: str, limite: int = 5) -> List[Dict]:
+def _parse_rss_xml(conteudo: bytes, limite: int = 5) -> List[Dict]:
     """
-    Parseia feed RSS e extrai título, link e data.
+    Parseia feed RSS e extrai título, link, data e id (GUID/Atom id, ou o link).
     Funciona com feeds Atom e RSS 2.0.
     """
     noticias = []
-    r = _get_safe(url, timeout=10)
-    if not r:
-        return noticias
-
     try:
-        root = ET.fromstring(r.content)
+        root = ET.fromstring(conteudo)
         ns   = {"atom": "http://www.w3.org/2005/Atom"}
 
         # ── RSS 2.0 ──
@@ -181,12 +224,14 @@ def _parse_rss(url: str, limite: int = 5) -> List[Dict]:
             link   = item.findtext("link", "").strip()
             data   = item.findtext("pubDate", "").strip()
             desc   = item.findtext("description", "").strip()
+            guid   = item.findtext("guid", "").strip()
             if titulo and link:
                 noticias.append({
                     "titulo": titulo,
                     "url":    link,
                     "data":   data,
-                    "desc":   BeautifulSoup(desc, "html.parser").get_text()[:200] if desc else "",
+                    "desc":   _texto_html(desc)[:200] if desc else "",
+                    "id":     guid or link,
                 })
 
         # ── Atom ──
@@ -203,8 +248,12 @@ def _parse_rss(url: str, limite: int = 5) -> List[Dict]:
                     entry.findtext("atom:updated", "", ns) or
                     entry.findtext("updated", "")
                 ).strip()
+                entry_id = (
+                    entry.findtext("atom:id", "", ns) or
+                    entry.findtext("id", "")
+                ).strip()
                 if titulo and link:
-                    noticias.append({"titulo": titulo, "url": link, "data": data, "desc": ""})
+                    noticias.append({"titulo": titulo, "url": link, "data": data, "desc": "", "id": entry_id or link})
 
     except ET.ParseError:
         pass
@@ -212,6 +261,14 @@ def _parse_rss(url: str, limite: int = 5) -> List[Dict]:
     return noticias
 
 
+def _parse_rss(url: str, limite: int = 5, timeout: int = RSS_TIMEOUT_S) -> List[Dict]:
+    """Baixa e parseia um feed RSS/Atom."""
+    r = _get_safe(url, timeout=timeout)
+    if not r:
+        return []
+    return _parse_rss_xml(r.content, limite)
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 class PizzaINTService:
     """
@@ -223,6 +280,17 @@ class PizzaINTService:
         self.config = config or {}
         self.url_primario = "https://www.pizzint.watch/"
         self._historico_scores: list[int] = []   # Rastreia variação no tempo
+        self.status_ttl_s = self.config.get("status_ttl_s", STATUS_TTL_S)
+
+        # Cache entre rodadas: feed → (hash do XML, itens parseados); manchete (URL/GUID) → análise
+        self._feeds_cache: Dict[str, tuple] = {}
+        self._itens_vistos: "OrderedDict[str, dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Último relatório (TTL) — um único chamador coleta, os demais esperam e reaproveitam
+        self._status_cache: Optional[dict] = None
+        self._status_ts = 0.0
+        self._status_lock = threading.Lock()
 
     # ══════════════════════════════════════════════════════════════════════════
     # FONTE 1: PizzINT.watch (scraping HTML)
@@ -270,58 +338,139 @@ class PizzaINTService:
     # FONTE 2: RSS de agências primárias
     # ══════════════════════════════════════════════════════════════════════════
 
-    def _coletar_rss(self, limite_por_feed: int = 4) -> tuple[int, List[Dict]]:
+    def _ler_feed(self, feed: dict, limite: int) -> List[Dict]:
+        """
+        Baixa um feed (GET condicional pelo transporte compartilhado) e só reparseia o XML
+        quando o conteúdo mudou desde a última rodada.
         """
-        Coleta notícias de todos os RSS feeds e calcula score de ameaça.
+        r = _get_safe(feed["url"], timeout=feed.get("timeout", RSS_TIMEOUT_S))
+        if not r:
+            return []
+        digest = hashlib.sha1(r.content).hexdigest()
+        with self._cache_lock:
+            cache = self._feeds_cache.get(feed["url"])
+        if cache and cache[0] == (digest, limite):
+            return cache[1]
+        items = _parse_rss_xml(r.content, limite)
+        with self._cache_lock:
+            self._feeds_cache[feed["url"]] = ((digest, limite), items)
+        return items
+
+    def _analisar_item(self, item: dict) -> tuple[dict, bool]:
+        """(score_item, categorias) da manchete; reaproveita a análise se o URL/GUID já foi visto."""
+        chave = item.get("id") or item["url"]
+        with self._cache_lock:
+            analise = self._itens_vistos.get(chave)
+            if analise is not None:
+                self._itens_vistos.move_to_end(chave)
+                return analise, False
+
+        # Calcula score individual da manchete + descrição
+        score_item, hits = _calcular_score_e_hits(f"{item['titulo']} {item['desc']}")
+        analise = {"score_item": score_item, "categorias": [c for c, h in hits.items() if h]}
+        with self._cache_lock:
+            self._itens_vistos[chave] = analise
+            while len(self._itens_vistos) > ITENS_VISTOS_MAX:
+                self._itens_vistos.popitem(last=False)
+        return analise, True
+
+    def _coletar_rss(self, limite_por_feed: int = 4, prazo_s: float = RSS_PRAZO_S,
+                     pool: ThreadPoolExecutor = None) -> tuple[int, List[Dict]]:
+        """
+        Coleta notícias de todos os RSS feeds em paralelo e calcula score de ameaça.
+        Feeds que não respondem dentro de `prazo_s` ficam de fora desta rodada.
         Retorna (score_total_rss, lista_noticias).
         """
         print("📡 [RSS] Varrendo feeds de agências internacionais...")
+        inicio = time.time()
+        proprio = pool is None
+        if proprio:
+            pool = ThreadPoolExecutor(max_workers=len(RSS_FEEDS), thread_name_prefix="rss")
+        futuros = [(feed, pool.submit(self._ler_feed, feed, limite_por_feed)) for feed in RSS_FEEDS]
+        if proprio:
+            # Sem esperar: um feed travado termina em segundo plano sem segurar o relatório
+            pool.shutdown(wait=False)
+
         todas_noticias = []
         score_total    = 0
+        ids_rodada     = set()
+        for feed, futuro in futuros:
+            try:
+                items = futuro.result(timeout=max(inicio + prazo_s - time.time(), 0))
+            except FuturesTimeout:
+                print(f"⏱️  [RSS] {feed['nome']} estourou o prazo de {prazo_s}s.")
+                continue
+            except Exception as e:
+                print(f"⚠️  [RSS] {feed['nome']} falhou: {e}")
+                continue
+            print(f"   ↳ {feed['nome']}: {len(items)} itens")
 
-        for feed in RSS_FEEDS:
-            print(f"   ↳ {feed['nome']}...")
-            items = _parse_rss(feed["url"], limite=limite_por_feed)
             for item in items:
-                # Calcula score individual da manchete + descrição
-                texto_item  = f"{item['titulo']} {item['desc']}"
-                score_item, hits = _calcular_score_e_hits(texto_item)
-                score_total += score_item
-
-                # Adiciona categoria detectada
-                categorias_hit = [c for c, h in hits.items() if h]
+                # A mesma matéria pode vir em mais de um feed: conta uma vez só
+                chave = item.get("id") or item["url"]
+                if chave in ids_rodada:
+                    continue
+                ids_rodada.add(chave)
+
+                analise, novo = self._analisar_item(item)
+                score_total += analise["score_item"]
                 todas_noticias.append({
                     **item,
                     "fonte":       feed["nome"],
-                    "score_item":  score_item,
-                    "categorias":  categorias_hit,
+                    "score_item":  analise["score_item"],
+                    "categorias":  analise["categorias"],
+                    "novo":        novo,
                 })
 
         # Ordena por relevância (score_item desc)
         todas_noticias.sort(key=lambda x: x["score_item"], reverse=True)
 
-        print(f"✅ [RSS] {len(todas_noticias)} manchetes | Score RSS: {score_total}")
+        novos = sum(1 for n in todas_noticias if n["novo"])
+        print(f"✅ [RSS] {len(todas_noticias)} manchetes ({novos} novas) | Score RSS: {score_total}")
         return score_total, todas_noticias
 
     # ══════════════════════════════════════════════════════════════════════════
     # MÉTODO PRINCIPAL
     # ══════════════════════════════════════════════════════════════════════════
 
-    def get_status(self) -> dict:
+    def get_status(self, forcar: bool = False) -> dict:
         """
-        Executa coleta completa e retorna pacote de inteligência DEFCON.
+        Retorna o pacote de inteligência DEFCON.
         Compatível com o WebSocket do R2 (chave 'level' preservada).
+
+        O relatório fica em cache por `status_ttl_s`; chamadas dentro do TTL (ou simultâneas
+        a uma coleta em andamento) recebem o mesmo resultado sem nova raspagem.
+        `forcar=True` ignora o cache.
         """
+        with self._status_lock:
+            idade = time.time() - self._status_ts
+            if not forcar and self._status_cache is not None and idade < self.status_ttl_s:
+                return {**self._status_cache, "em_cache": True, "idade_cache_s": round(idade, 1)}
+            resultado = self._coletar_status()
+            self._status_cache, self._status_ts = resultado, time.time()
+            return {**resultado, "em_cache": False, "idade_cache_s": 0.0}
+
+    def _coletar_status(self) -> dict:
+        """Executa a coleta completa (PizzINT + RSS em paralelo) e monta o relatório."""
         print("\n" + "═"*55)
         print("🍕 [PizzINT FULL INTEL] Iniciando varredura geopolítica...")
         print("═"*55)
         inicio = time.time()
 
-        # ── 1. PizzINT scraping ───────────────────────────────────────────
-        score_pizzint, noticias_pizzint, texto_raw = self._scrape_pizzint()
-
-        # ── 2. RSS feeds ──────────────────────────────────────────────────
-        score_rss, noticias_rss = self._coletar_rss(limite_por_feed=5)
+        # ── 1+2. PizzINT scraping em paralelo com os RSS feeds ────────────
+        pool = ThreadPoolExecutor(max_workers=len(RSS_FEEDS) + 1, thread_name_prefix="pizzint")
+        futuro_pizzint = pool.submit(self._scrape_pizzint)
+        score_rss, noticias_rss = self._coletar_rss(limite_por_feed=5, pool=pool)
+        pool.shutdown(wait=False)
+        try:
+            score_pizzint, noticias_pizzint, texto_raw = futuro_pizzint.result(
+                timeout=max(inicio + RSS_PRAZO_S - time.time(), 0))
+        except FuturesTimeout:
+            print("⏱️  [PizzINT] Site primário estourou o prazo.")
+            score_pizzint, noticias_pizzint, texto_raw = 0, [], ""
+        except Exception as e:
+            print(f"⚠️  [PizzINT] Falha na raspagem: {e}")
+            score_pizzint, noticias_pizzint, texto_raw = 0, [], ""
 
         # ── 3. Score consolidado ──────────────────────────────────────────
         # Peso: PizzINT 40% + RSS 60% (normalizado a 0-100)
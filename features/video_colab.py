@@ -2,7 +2,6 @@ import os
 import time
 import json
 import re
-import cv2
 import yt_dlp
 import whisper
 from moviepy.editor import (
@@ -11,6 +10,12 @@ from moviepy.editor import (
 )
 from moviepy.config import change_settings
 
+from utils.transcript_cache import TranscriptCache
+from utils.streaming_transcriber import ResumoMapReduce, TranscritorStreaming, linha_segmento
+from utils.face_track import centro_corte, rastrear_rostos
+from utils.ffmpeg_graph import blocos_legenda, geometria_crop, gerar_ass, job_cortes, sondar_video
+from utils.render_scheduler import RenderScheduler
+
 # ⚠️ CAMINHO DO IMAGEMAGICK PARA NUVEM (LINUX / COLAB)
 change_settings({"IMAGEMAGICK_BINARY": "convert"})
 
@@ -21,13 +26,26 @@ CORTE_MIN_SEG     = 8    # Corte mínimo em segundos
 CORTE_MAX_SEG     = 90   # Corte máximo em segundos
 CORTES_MIN        = 3    # Mínimo de cortes que a IA DEVE retornar
 CORTES_MAX        = 7    # Máximo de cortes
-LIMITE_TRANSCRIPT = 8000 # Limite de chars para o LLM não explodir
+LIMITE_TRANSCRIPT = 8000 # Limite de chars por chamada ao LLM (acima disso: map-reduce)
+WORKERS_WHISPER   = 2    # Janelas transcritas em paralelo (uma réplica do modelo por worker)
+RENDERIZADOR      = "ffmpeg" # "ffmpeg" (grafo único, sem frames no Python) ou "moviepy" (config["renderer"])
+AMOSTRAS_ROSTO    = 2.0  # Quadros por segundo analisados pelo radar visual (passada única por vídeo)
+PROCESSOS_ROSTO   = None # Processos do radar visual (None = até 4, conforme os núcleos)
+TRILHA_ROSTO      = "rosto:v1" # Nome do artefato da trilha de rosto no cache de transcrições
 TEMPERATURA_IA    = 0.1  # Protocolo de Disciplina
 
 class VideoSurgeon:
-    def __init__(self):
+    PERFIL_WHISPER = "base"
+
+    def __init__(self, transcript_cache=None):
         print("✂️ [TESOURA NEURAL V3 - NUVEM]: Inicializando Córtex de Costura Viral...")
-        self.whisper_model = whisper.load_model("base")
+        self.whisper_model = whisper.load_model(self.PERFIL_WHISPER)
+        # Vídeo baixado + transcrição por URL: reprocessar com outro estilo de legenda não baixa nem transcreve de novo
+        self.cache = transcript_cache or TranscriptCache()
+        self.transcritor = TranscritorStreaming(
+            self.whisper_model, fabrica_modelo=lambda: whisper.load_model(self.PERFIL_WHISPER),
+            workers=WORKERS_WHISPER, cache=self.cache, perfil=self.PERFIL_WHISPER, fp16=False,
+        )
         self.temp_dir = "temp_video"
         self.out_dir  = "static/media"
         os.makedirs(self.temp_dir, exist_ok=True)
@@ -36,44 +54,36 @@ class VideoSurgeon:
     # ══════════════════════════════════════════════════════════════
     # MÓDULO 1: OLHO DE ÁGUIA V3 — RADAR VISUAL DE ROSTO
     # ══════════════════════════════════════════════════════════════
-    def detectar_rosto_x(self, video_path, tempo_inicio, tempo_fim):
+    def trilha_rosto(self, video_path, chave=None, duracao=None, log=print):
+        """Linha do tempo do rosto (um centro por segundo), calculada uma vez por vídeo e guardada no cache"""
         try:
-            cap          = cv2.VideoCapture(video_path)
-            frontal      = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            perfil       = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_profileface.xml')
-            duracao      = max(tempo_fim - tempo_inicio, 0.1)
-            passo        = duracao / 7
-
-            melhor_x     = None
-            maior_area   = 0
-
-            for i in range(1, 7):
-                tempo_teste = tempo_inicio + (passo * i)
-                cap.set(cv2.CAP_PROP_POS_MSEC, tempo_teste * 1000)
-                ret, frame = cap.read()
-                if not ret:
-                    continue
-
-                gray  = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                gray  = cv2.equalizeHist(gray)
-
-                faces = frontal.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(40, 40))
-                if len(faces) == 0:
-                    faces = perfil.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=3, minSize=(40, 40))
-
-                for (x, y, w, h) in faces:
-                    area = w * h
-                    if area > maior_area:
-                        maior_area = area
-                        melhor_x   = x + (w / 2)
-
-            cap.release()
-            return melhor_x
-
+            chave  = chave or self.cache.chave_arquivo(video_path)
+            trilha = self.cache.get_artefato(chave, TRILHA_ROSTO)
+            if trilha is not None:
+                log("👁️ <b>[RADAR VISUAL]:</b> Trilha de rosto recuperada do cache.")
+                return trilha
+            if duracao is None:
+                duracao = self._sondar(video_path)["duracao"]
+            log(f"👁️ <b>[RADAR VISUAL]:</b> Rastreando rostos em passada única ({AMOSTRAS_ROSTO:g} quadros/s)...")
+            t0     = time.perf_counter()
+            trilha = rastrear_rostos(video_path, duracao, processos=PROCESSOS_ROSTO,
+                                     amostras_por_seg=AMOSTRAS_ROSTO)
+            self.cache.put_artefato(chave, TRILHA_ROSTO, trilha)
+            log(f"✅ <b>[RADAR VISUAL]:</b> {trilha['deteccoes']} detecções em {time.perf_counter() - t0:.0f}s")
+            return trilha
         except Exception as e:
             print(f"⚠️ [RADAR VISUAL]: {e}")
             return None
 
+    def detectar_rosto_x(self, video_path, tempo_inicio, tempo_fim, trilha=None, largura_fonte=None):
+        """Centro x (pixels) do rosto no trecho, lido da trilha do vídeo; None = recorte no meio"""
+        trilha = trilha or self.trilha_rosto(video_path)
+        if not trilha:
+            return None
+        if largura_fonte is None:
+            largura_fonte = self._sondar(video_path)["largura"]
+        return centro_corte(trilha, tempo_inicio, tempo_fim, largura_fonte)
+
     # ══════════════════════════════════════════════════════════════
     # MÓDULO 2: PROTOCOLO DE DISCIPLINA — ANÁLISE IA + RAG
     # ══════════════════════════════════════════════════════════════
@@ -185,59 +195,32 @@ TRANSCRIÇÃO COMPLETA:
     # MÓDULO 3: FÁBRICA DE LEGENDAS VIRAIS (ESTILO TIKTOK)
     # ══════════════════════════════════════════════════════════════
     def _criar_legendas_virais(self, segmentos_whisper, st_corte, nd_corte,
-                                subclip_duration, y_pixels, subclip_w,
-                                tamanho, cor_texto, cor_fundo):
+                                y_pixels, subclip_w, tamanho, cor_texto, cor_fundo):
         clips_legenda = []
-        PALAVRAS_POR_BLOCO = 5 
-
-        for seg in segmentos_whisper:
-            seg_start = seg["start"]
-            seg_end   = seg["end"]
-
-            if seg_end <= st_corte or seg_start >= nd_corte:
-                continue
-
-            clip_start = max(0.0, seg_start - st_corte)
-            clip_end   = min(subclip_duration, seg_end - st_corte)
-            dur_seg    = clip_end - clip_start
-            if dur_seg <= 0: continue
-
-            palavras = seg["text"].strip().upper().split()
-            if not palavras: continue
-
-            blocos     = [palavras[i:i + PALAVRAS_POR_BLOCO] for i in range(0, len(palavras), PALAVRAS_POR_BLOCO)]
-            tempo_bloco = dur_seg / max(len(blocos), 1)
-
-            for idx_bloco, bloco in enumerate(blocos):
-                texto   = " ".join(bloco)
-                b_start = clip_start + idx_bloco * tempo_bloco
-                b_end   = b_start + tempo_bloco
 
-                b_end = min(b_end, clip_end)
-                if b_end - b_start < 0.2: continue
-
-                try:
-                    txt = (
-                        TextClip(
-                            texto,
-                            fontsize=tamanho,
-                            color=cor_texto,
-                            bg_color=cor_fundo,
-                            font="Arial-Bold" if os.name == 'nt' else "Liberation-Sans-Bold", # Fallback para Linux
-                            method="caption",
-                            size=(int(subclip_w * 0.88), None),
-                            stroke_color="black" if cor_fundo == "transparent" else None,
-                            stroke_width=2       if cor_fundo == "transparent" else 0,
-                        )
-                        .set_position(("center", y_pixels))
-                        .set_start(b_start)
-                        .set_end(b_end)
-                        .crossfadein(0.1)
-                        .crossfadeout(0.1)
+        for texto, b_start, b_end in blocos_legenda(segmentos_whisper, st_corte, nd_corte):
+            try:
+                txt = (
+                    TextClip(
+                        texto,
+                        fontsize=tamanho,
+                        color=cor_texto,
+                        bg_color=cor_fundo,
+                        font="Arial-Bold" if os.name == 'nt' else "Liberation-Sans-Bold", # Fallback para Linux
+                        method="caption",
+                        size=(int(subclip_w * 0.88), None),
+                        stroke_color="black" if cor_fundo == "transparent" else None,
+                        stroke_width=2       if cor_fundo == "transparent" else 0,
                     )
-                    clips_legenda.append(txt)
-                except Exception as e:
-                    print(f"⚠️ [LEGENDA]: Falha no bloco '{texto}': {e}")
+                    .set_position(("center", y_pixels))
+                    .set_start(b_start)
+                    .set_end(b_end)
+                    .crossfadein(0.1)
+                    .crossfadeout(0.1)
+                )
+                clips_legenda.append(txt)
+            except Exception as e:
+                print(f"⚠️ [LEGENDA]: Falha no bloco '{texto}': {e}")
 
         return clips_legenda
 
@@ -258,28 +241,41 @@ TRANSCRIÇÃO COMPLETA:
         sub_enabled = config.get("active", True)
         auto_pos    = config.get("autoPos", True)
 
-        log("📥 <b>[Fase 1/5] Infiltração:</b> Baixando alvo tático...")
-        ydl_opts = {
-            "format"    : "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
-            "outtmpl"   : f"{self.temp_dir}/alvo_%(id)s.%(ext)s",
-            "noplaylist": True,
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info       = ydl.extract_info(url, download=True)
-            video_path = ydl.prepare_filename(info)
-
-        duracao_total = VideoFileClip(video_path).duration
+        chave      = self.cache.chave_url(url)
+        video_path = self.cache.midia(chave)
+        if video_path:
+            log("📥 <b>[Fase 1/5] Infiltração:</b> Alvo já em cache — download dispensado.")
+        else:
+            log("📥 <b>[Fase 1/5] Infiltração:</b> Baixando alvo tático...")
+            ydl_opts = {
+                "format"    : "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+                "outtmpl"   : f"{self.temp_dir}/alvo_%(id)s.%(ext)s",
+                "noplaylist": True,
+            }
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info       = ydl.extract_info(url, download=True)
+                video_path = self.cache.guardar_midia(chave, ydl.prepare_filename(info))
+
+        fonte_info    = self._sondar(video_path)
+        duracao_total = fonte_info["duracao"]
         log(f"✅ Download OK — duração total: <b>{duracao_total:.0f}s</b>")
 
-        log("🎧 <b>[Fase 2/5] Interrogatório:</b> Whisper transcrevendo áudio...")
-        resultado      = self.whisper_model.transcribe(video_path, fp16=False)
-        transcricao_str = ""
-        for seg in resultado["segments"]:
-            transcricao_str += f"[{seg['start']:.1f} - {seg['end']:.1f}] {seg['text']}\n"
-
-        if len(transcricao_str) > LIMITE_TRANSCRIPT:
-            log("⚠️ <b>[BLINDAGEM]:</b> Alvo massivo — fatiando transcrição...")
-            transcricao_str = transcricao_str[:LIMITE_TRANSCRIPT] + "\n...[FIM DE LEITURA SEGURA]"
+        em_cache = self.cache.get(chave, self.PERFIL_WHISPER)
+        if em_cache is not None:
+            log("🎧 <b>[Fase 2/5] Interrogatório:</b> Transcrição recuperada do cache.")
+            fonte_segmentos = em_cache["segments"]
+        else:
+            log("🎧 <b>[Fase 2/5] Interrogatório:</b> Whisper transcrevendo em janelas (VAD + streaming)...")
+            fonte_segmentos = self.transcritor.transcrever(video_path, chave)
+
+        # Alvo massivo: blocos que passam do limite são resumidos pelo LLM enquanto o Whisper segue
+        resumo    = ResumoMapReduce(ai_brain, LIMITE_TRANSCRIPT, temperatura=TEMPERATURA_IA, log=log) if ai_brain else None
+        segmentos = []
+        for seg in fonte_segmentos:
+            segmentos.append(seg)
+            if resumo:
+                resumo.adicionar(linha_segmento(seg))
+        transcricao_str = resumo.finalizar() if resumo else "".join(linha_segmento(seg) for seg in segmentos)
 
         if ai_brain:
             log("🧠 <b>[Fase 3/5] Decisão:</b> IA calculando cortes virais com RAG...")
@@ -298,60 +294,123 @@ TRANSCRIÇÃO COMPLETA:
             log("⚠️ <b>IA offline:</b> Usando cortes padrão de fallback.")
 
         log(f"🎯 <b>[Fase 4/5] Cirurgia:</b> Processando {len(cortes)} cortes...")
-        video_original = VideoFileClip(video_path)
-
-        cor_fundo = "black"       if estilo == "box"    else "transparent"
-        cor_texto = "yellow"      if estilo == "yellow" else cor
-
-        clipes_finais = []
+        if not cortes:
+            log("❌ <b>[ERRO]:</b> Nenhum corte válido gerado.")
+            return None
 
+        trilha    = self.trilha_rosto(video_path, chave, duracao_total, log)
+        centros_x = []
         for idx, corte in enumerate(cortes):
             st = float(corte["start"])
             nd = float(corte["end"])
             log(f"✂️ <b>Corte {idx + 1}/{len(cortes)}:</b> [{st:.1f}s → {nd:.1f}s]")
+            centros_x.append(centro_corte(trilha, st, nd, fonte_info["largura"]) if trilha else None)
+        largura, altura, crops_x = geometria_crop(fonte_info["largura"], fonte_info["altura"], centros_x)
+
+        legenda = {
+            "segmentos": segmentos if sub_enabled else [],
+            "y_pixels" : altura - (altura * (y_final / 100)),
+            "tamanho"  : tamanho,
+            "cor_fundo": "black"  if estilo == "box"    else "transparent",
+            "cor_texto": "yellow" if estilo == "yellow" else cor,
+        }
 
-            subclip = video_original.subclip(st, nd)
-            w, h    = subclip.size
-
-            target_w = int(h * 9 / 16)
-            rosto_x  = self.detectar_rosto_x(video_path, st, nd)
-            x_center = rosto_x if rosto_x else (w / 2)
-            x_center = max(target_w / 2, min(x_center, w - target_w / 2))
-            
-            subclip  = subclip.crop(x1=x_center - target_w / 2, y1=0, x2=x_center + target_w / 2, y2=h)
-            y_pixels = subclip.h - (subclip.h * (y_final / 100))
-
-            clips_legenda = []
-            if sub_enabled:
-                clips_legenda = self._criar_legendas_virais(
-                    segmentos_whisper=resultado["segments"], st_corte=st, nd_corte=nd,
-                    subclip_duration=subclip.duration, y_pixels=y_pixels, subclip_w=subclip.w,
-                    tamanho=tamanho, cor_texto=cor_texto, cor_fundo=cor_fundo,
-                )
+        nome_saida    = f"corte_viral_{int(time.time())}.mp4"
+        caminho_final = os.path.join(self.out_dir, nome_saida)
+        log(f"🔥 <b>[Fase 5/5] Fusão:</b> Costurando {len(cortes)} cortes...")
+
+        duracao_final = None
+        if config.get("renderer", RENDERIZADOR) == "ffmpeg":
+            duracao_final = self._renderizar_ffmpeg(video_path, caminho_final, cortes, crops_x, largura, altura,
+                                                    fonte_info["tem_audio"], legenda, log)
+            if duracao_final is None:
+                log("⚠️ <b>[FFMPEG]:</b> Grafo falhou — refazendo pelo MoviePy...")
+        if duracao_final is None:
+            duracao_final = self._renderizar_moviepy(video_path, caminho_final, cortes, crops_x, largura,
+                                                     legenda, log)
+        if duracao_final is None:
+            return None
 
-            if clips_legenda:
-                clipes_finais.append(CompositeVideoClip([subclip] + clips_legenda))
-            else:
-                clipes_finais.append(subclip)
+        # O vídeo fonte fica no cache de transcrições (despejo LRU por tamanho)
+        log(f"✅ <b>[MISSÃO CUMPRIDA]:</b> Clipe de <b>{duracao_final:.1f}s</b> forjado e pronto! 🚀")
+        return f"/static/media/{nome_saida}"
 
-        if not clipes_finais:
-            log("❌ <b>[ERRO]:</b> Nenhum corte válido gerado.")
-            video_original.close()
+    # ══════════════════════════════════════════════════════════════
+    # MÓDULO 5: RENDERIZADORES
+    # ══════════════════════════════════════════════════════════════
+    def _sondar(self, video_path):
+        """Dimensões, duração e áudio pelo ffprobe; sem ffprobe, abre (e fecha) uma vez pelo MoviePy"""
+        try:
+            return sondar_video(video_path)
+        except (OSError, RuntimeError, ValueError):
+            clip = VideoFileClip(video_path)
+            try:
+                return {"largura": clip.w, "altura": clip.h, "duracao": clip.duration,
+                        "tem_audio": clip.audio is not None}
+            finally:
+                clip.close()
+
+    def _renderizar_ffmpeg(self, video_path, caminho_final, cortes, crops_x, largura, altura,
+                           tem_audio, legenda, log):
+        """Cortes + recorte + legendas ASS num único ffmpeg; devolve a duração final ou None"""
+        arquivo_ass = None
+        if legenda["segmentos"]:
+            arquivo_ass = os.path.join(self.temp_dir, f"legendas_{int(time.time() * 1000)}.ass")
+            with open(arquivo_ass, "w", encoding="utf-8") as f:
+                f.write(gerar_ass(legenda["segmentos"], cortes, largura, altura, legenda["y_pixels"],
+                                  legenda["tamanho"], legenda["cor_texto"], legenda["cor_fundo"]))
+
+        marcos = set()
+        def progresso(nome, info):
+            marco = int(info["percent"] // 25)
+            if info["status"] == "rodando" and 0 < marco < 4 and marco not in marcos:
+                marcos.add(marco)
+                log(f"🔥 <b>[FFMPEG]:</b> {marco * 25}% ({info['fps'] or 0:.0f} fps)")
+
+        job = job_cortes("corte_viral", video_path, caminho_final, cortes, crops_x, largura, altura,
+                         tem_audio=tem_audio, arquivo_ass=arquivo_ass)
+        try:
+            resultado, = RenderScheduler(max_paralelo=1, on_progress=progresso).executar([job])
+        finally:
+            if arquivo_ass and os.path.exists(arquivo_ass):
+                try: os.remove(arquivo_ass)
+                except Exception: pass
+        if not resultado["ok"]:
+            log(f"❌ <b>[RENDERIZAÇÃO FALHOU]:</b> {resultado.get('erro', '')[-200:]}")
             return None
+        return job.duracao_s
 
-        log(f"🔥 <b>[Fase 5/5] Fusão:</b> Costurando {len(clipes_finais)} cortes...")
-        nome_saida    = f"corte_viral_{int(time.time())}.mp4"
-        caminho_final = os.path.join(self.out_dir, nome_saida)
-
-        final_video = None
+    def _renderizar_moviepy(self, video_path, caminho_final, cortes, crops_x, largura, legenda, log):
+        """Caminho original: composição quadro a quadro no Python; devolve a duração final ou None"""
+        video_original = VideoFileClip(video_path)
+        clipes_finais  = []
+        final_video    = None
         try:
+            for corte, x1 in zip(cortes, crops_x):
+                st = float(corte["start"])
+                nd = float(corte["end"])
+                subclip = video_original.subclip(st, nd)
+                subclip = subclip.crop(x1=x1, y1=0, x2=x1 + largura, y2=subclip.h)
+
+                clips_legenda = []
+                if legenda["segmentos"]:
+                    clips_legenda = self._criar_legendas_virais(
+                        segmentos_whisper=legenda["segmentos"], st_corte=st, nd_corte=nd,
+                        y_pixels=legenda["y_pixels"], subclip_w=subclip.w, tamanho=legenda["tamanho"],
+                        cor_texto=legenda["cor_texto"], cor_fundo=legenda["cor_fundo"],
+                    )
+
+                if clips_legenda:
+                    clipes_finais.append(CompositeVideoClip([subclip] + clips_legenda))
+                else:
+                    clipes_finais.append(subclip)
+
             final_video = concatenate_videoclips(clipes_finais, method="compose")
             final_video.write_videofile(
                 caminho_final, codec="libx264", audio_codec="aac", fps=30, preset="ultrafast",
                 ffmpeg_params=["-crf", "23"], logger=None,
             )
-            log(f"✅ <b>[MISSÃO CUMPRIDA]:</b> Clipe de <b>{final_video.duration:.1f}s</b> forjado e pronto! 🚀")
-            return f"/static/media/{nome_saida}"
+            return final_video.duration
         except Exception as e:
             log(f"❌ <b>[RENDERIZAÇÃO FALHOU]:</b> {e}")
             return None
@@ -360,6 +419,3 @@ TRANSCRIÇÃO COMPLETA:
                 try:
                     if recurso: recurso.close()
                 except Exception: pass
-            if os.path.exists(video_path):
-                try: os.remove(video_path)
-                except Exception: pass
\ No newline at end of file
@@ -1,4 +1,4 @@
-import requests
+from utils.http_client import get_http_client
 
 class WeatherSystem:
     def __init__(self, api_key):
@@ -53,7 +53,7 @@ class WeatherSystem:
 
             try:
                 print(f"📡 [DEBUG]: Tentativa {i+1} de varredura: '{query}'...")
-                response = requests.get(self.base_url, params=params)
+                response = get_http_client().get(self.base_url, params=params, timeout=10)
                 dados = response.json()
 
                 if response.status_code == 200:
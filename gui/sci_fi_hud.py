@@ -23,6 +23,7 @@ from core.module_manager import ModuleManager, ModuleStatus
 from features.osint.pizzint_service import PizzaINTService
 
 from .theme import SciFiTheme, ThemeManager
+from .telemetry import TelemetryCollector, FrameMonitor
 from .components.wave_animation import WaveAnimation
 from .components.circular_gauge import CircularGauge
 from .components.datastream import DataStreamVisualization
@@ -33,6 +34,12 @@ from .components.ai_panel import AIPanel
 from .components.weather_panel import WeatherPanel
 from .components.gesture_panel import GesturePanel
 
+# Telemetry cadences (collectors run on worker threads, the UI only reads snapshots)
+SYSTEM_SAMPLE_INTERVAL_S = 1.0
+PIZZINT_SAMPLE_INTERVAL_S = 60.0
+UI_HEARTBEAT_MS = 16  # ~60 fps frame-time probe
+
+
 class R2SciFiGUI(ctk.CTk):
     """Main Sci-Fi/HUD interface window - V2.1"""
     
@@ -117,6 +124,12 @@ class R2SciFiGUI(ctk.CTk):
             'ai_requests': 0,
             'weather_requests': 0
         }
+
+        # Background telemetry (psutil / PizzINT) + UI frame-time probe
+        self.telemetry = TelemetryCollector()
+        self.frame_monitor = FrameMonitor(target_ms=UI_HEARTBEAT_MS)
+        self._telemetry_version = -1
+        self._net_prev = None
         
         print("✅ Core components initialized")
     
@@ -630,6 +643,12 @@ class R2SciFiGUI(ctk.CTk):
     
     def _start_updates(self):
         """Start periodic UI updates"""
+        self.telemetry.add_source('system', self._sample_system, SYSTEM_SAMPLE_INTERVAL_S)
+        if self.pizzint_service:
+            self.telemetry.add_source('pizzint', self._sample_pizzint, PIZZINT_SAMPLE_INTERVAL_S)
+        self.telemetry.start()
+        self._ui_heartbeat()
+
         self._update_time()
         self._update_metrics()
         self._update_datastream()
@@ -860,18 +879,67 @@ class R2SciFiGUI(ctk.CTk):
         self.time_label.configure(text=f"TIME: {current_time}")
         self.after(1000, self._update_time)
     
+    # Telemetry samplers (worker threads — never touch widgets here)
+    def _sample_system(self) -> Dict[str, float]:
+        """CPU / RAM / network throughput"""
+        import psutil
+
+        now = time.monotonic()
+        bytes_recv = psutil.net_io_counters().bytes_recv
+        speed = None
+        if self._net_prev is not None:
+            last_ts, last_bytes = self._net_prev
+            speed = (bytes_recv - last_bytes) / 1024 / 1024 / max(now - last_ts, 1e-6)  # MB/s
+        self._net_prev = (now, bytes_recv)
+        return {
+            'cpu': psutil.cpu_percent(),
+            'ram': psutil.virtual_memory().percent,
+            'net_mb_s': speed,
+        }
+
+    def _sample_pizzint(self) -> Dict[str, Any]:
+        """PizzINT scrape (network — seconds) reduced to what the HUD shows"""
+        check_anomaly = getattr(self.pizzint_service, 'check_anomaly', None)
+        is_anomaly, msg = check_anomaly() if check_anomaly else (False, "")
+        status = self.pizzint_service.get_status()
+        return {'anomaly': is_anomaly, 'message': msg, 'level': status['level']}
+
+    def _ui_heartbeat(self):
+        """Frame-time probe: measures how late the Tk loop runs a 16 ms callback"""
+        self.frame_monitor.tick()
+        self.after(UI_HEARTBEAT_MS, self._ui_heartbeat)
+
+    def get_telemetry_stats(self) -> Dict[str, Any]:
+        """Frame time / UI stalls and per-collector timings"""
+        return {'ui': self.frame_monitor.get_stats(), 'collectors': self.telemetry.get_stats()}
+
     def _update_metrics(self):
-        """Atualiza interface com DADOS REAIS"""
+        """Atualiza interface com DADOS REAIS (lidos do último snapshot, sem bloquear)"""
         try:
-            import psutil
-            
-            # --- 1. MONITORAMENTO CPU (NÚCLEO AI) ---
-            cpu = psutil.cpu_percent()
-            ram = psutil.virtual_memory().percent
+            snapshot = self.telemetry.snapshot()
+            if snapshot.version != self._telemetry_version:
+                self._telemetry_version = snapshot.version
+                self._apply_snapshot(snapshot)
+
+            ui = self.frame_monitor.get_stats()
+            self.metrics['frame_p99_ms'] = ui.get('frame_p99_ms', 0.0)
+            self.metrics['ui_stalls'] = ui['stalls']
+        except Exception as e:
+            print(f"Erro update metrics: {e}")
+        
+        # Chama a função novamente em 1 segundo (1000ms)
+        self.after(1000, self._update_metrics)
+
+    def _apply_snapshot(self, snapshot):
+        """Push collected values into the widgets (Tk thread)"""
+        # --- 1. MONITORAMENTO CPU (NÚCLEO AI) ---
+        system = snapshot.get('system')
+        if system:
+            cpu = system['cpu']
             
             # Atualiza gráficos numéricos
             self.metrics['cpu_usage'] = cpu
-            self.metrics['memory_usage'] = ram
+            self.metrics['memory_usage'] = system['ram']
             self.cpu_gauge.set_value(cpu)
             
             # >>> AQUI: O Anel Central reage à CPU <<<
@@ -879,43 +947,30 @@ class R2SciFiGUI(ctk.CTk):
                 self.wave_animation.set_load_level(cpu)
 
             # --- 2. MONITORAMENTO DE REDE (MATRIX RAIN) ---
-            net = psutil.net_io_counters()
-            # Calcula velocidade em MB/s (diferença desde a última checagem)
-            bytes_recv = net.bytes_recv
-            if hasattr(self, '_last_bytes_recv'):
-                speed = (bytes_recv - self._last_bytes_recv) / 1024 / 1024 # MB
-                
+            speed = system['net_mb_s']
+            if speed is not None:
                 # >>> AQUI: Chuva de dados reage à velocidade <<<
                 # Se speed > 1MB/s, chuva rápida. Se 0, lenta.
                 rain_speed = min(10, max(1, int(speed * 5))) 
                 if hasattr(self, 'data_stream'): # Widget Fluxo de Dados
                     self.data_stream.set_speed(rain_speed) 
-            
-            self._last_bytes_recv = bytes_recv
-
-            # --- 3. PIZZAINT OSINT (RADAR) ---
-            if self.pizzint_service:
-                is_anomaly, msg = self.pizzint_service.check_anomaly()
-                status = self.pizzint_service.get_status()
-                orders = status['level']
 
-                # >>> AQUI: Radar mostra "inimigos" se houver pico de pizza <<<
-                if hasattr(self, 'radar_view'): # Widget Radar
-                    if is_anomaly:
-                        # Adiciona blips vermelhos agressivos
-                        self.radar_view.add_threat(intensity=1.0)
-                        self.radar_view.configure(bg="#1a0000") # Fundo levemente vermelho
-                    elif orders > 45: 
-                        # Adiciona blips amarelos de alerta
-                        if random.random() < 0.1:
-                            self.radar_view.add_threat(intensity=0.3)
-                        self.radar_view.configure(bg="black")
+        # --- 3. PIZZAINT OSINT (RADAR) ---
+        pizzint = snapshot.get('pizzint')
+        if pizzint:
+            orders = pizzint['level']
 
-        except Exception as e:
-            print(f"Erro update metrics: {e}")
-        
-        # Chama a função novamente em 1 segundo (1000ms)
-        self.after(1000, self._update_metrics)
+            # >>> AQUI: Radar mostra "inimigos" se houver pico de pizza <<<
+            if hasattr(self, 'radar_view'): # Widget Radar
+                if pizzint['anomaly']:
+                    # Adiciona blips vermelhos agressivos
+                    self.radar_view.add_threat(intensity=1.0)
+                    self.radar_view.configure(bg="#1a0000") # Fundo levemente vermelho
+                elif orders > 45: 
+                    # Adiciona blips amarelos de alerta
+                    if random.random() < 0.1:
+                        self.radar_view.add_threat(intensity=0.3)
+                    self.radar_view.configure(bg="black")
     
     def _update_datastream(self):
         """Update datastream visualization"""
@@ -998,6 +1053,8 @@ class R2SciFiGUI(ctk.CTk):
     def cleanup(self):
         """Cleanup resources"""
         print("🧹 Cleaning up...")
+
+        self.telemetry.stop()
         
         if self.voice_engine and self.voice_active:
             self.voice_engine.stop_listening()
@@ -0,0 +1,173 @@
+"""
+Telemetry Collector - Sci-Fi HUD
+Samples psutil and remote services on worker threads, each at its own cadence, and
+publishes immutable snapshots the Tk thread reads without blocking.
+Also measures UI frame time / stalls so slow collectors can be ruled out as the cause.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class TelemetrySnapshot:
+    """Immutable view of the latest value of every source"""
+    version: int = 0
+    values: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    updated_at: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+    errors: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+
+    def get(self, source: str, default: Any = None) -> Any:
+        return self.values.get(source, default)
+
+    def age(self, source: str, now: Optional[float] = None) -> Optional[float]:
+        """Seconds since `source` last produced a value (None if it never did)"""
+        ts = self.updated_at.get(source)
+        if ts is None:
+            return None
+        return (time.monotonic() if now is None else now) - ts
+
+
+class _Source:
+    def __init__(self, name: str, fn: Callable[[], Any], interval_s: float):
+        self.name = name
+        self.fn = fn
+        self.interval_s = interval_s
+        self.durations = deque(maxlen=100)
+        self.runs = 0
+        self.failures = 0
+        self.thread: Optional[threading.Thread] = None
+
+
+class TelemetryCollector:
+    """
+    One daemon thread per source; each calls its function every `interval_s` seconds.
+    A slow source (network scrape) only delays its own next sample, never the UI or
+    the other sources. Results are merged into a new TelemetrySnapshot that replaces
+    the previous one atomically; `snapshot()` is a plain attribute read.
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, _Source] = {}
+        self._snapshot = TelemetrySnapshot()
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add_source(self, name: str, fn: Callable[[], Any], interval_s: float):
+        source = self._sources[name] = _Source(name, fn, interval_s)
+        if self.running:
+            self._start_source(source)
+
+    @property
+    def running(self) -> bool:
+        return any(s.thread is not None and s.thread.is_alive() for s in self._sources.values())
+
+    def start(self):
+        self._stop.clear()
+        for source in self._sources.values():
+            if source.thread is None or not source.thread.is_alive():
+                self._start_source(source)
+
+    def stop(self, timeout: float = 0.0):
+        self._stop.set()
+        if timeout:
+            for source in self._sources.values():
+                if source.thread is not None:
+                    source.thread.join(timeout)
+
+    def snapshot(self) -> TelemetrySnapshot:
+        return self._snapshot
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for name, source in list(self._sources.items()):
+            samples = sorted(source.durations)
+            stats[name] = {
+                'intervalo_s': source.interval_s,
+                'coletas': source.runs,
+                'falhas': source.failures,
+                'duracao_p50_ms': round(samples[len(samples) // 2], 1) if samples else None,
+                'duracao_max_ms': round(samples[-1], 1) if samples else None,
+                'idade_s': self._snapshot.age(name),
+            }
+        return stats
+
+    # ------------------------------------------------------------
+    def _start_source(self, source: _Source):
+        source.thread = threading.Thread(target=self._loop, args=(source,),
+                                         name=f"telemetry-{source.name}", daemon=True)
+        source.thread.start()
+
+    def _loop(self, source: _Source):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                value = source.fn()
+                error = None
+            except Exception as e:
+                value, error = None, f"{type(e).__name__}: {e}"
+            finished = time.monotonic()
+            source.durations.append((finished - started) * 1000)
+            source.runs += 1
+            if error is not None:
+                source.failures += 1
+            self._publish(source.name, value, error, finished)
+            self._stop.wait(max(0.0, source.interval_s - (finished - started)))
+
+    def _publish(self, name: str, value: Any, error: Optional[str], ts: float):
+        with self._publish_lock:
+            current = self._snapshot
+            values, updated, errors = dict(current.values), dict(current.updated_at), dict(current.errors)
+            if error is None:
+                values[name] = value
+                updated[name] = ts
+                errors.pop(name, None)
+            else:
+                errors[name] = error   # keeps the last good value
+            self._snapshot = TelemetrySnapshot(current.version + 1, MappingProxyType(values),
+                                               MappingProxyType(updated), MappingProxyType(errors))
+
+
+class FrameMonitor:
+    """
+    UI heartbeat: `tick()` is called from a Tk `after` loop scheduled every `target_ms`.
+    The gap between consecutive ticks is the real frame time; gaps above `stall_ms`
+    are UI stalls (the event loop was blocked).
+    """
+
+    def __init__(self, target_ms: float = 1000 / 60, stall_ms: float = 100.0, window: int = 600):
+        self.target_ms = target_ms
+        self.stall_ms = stall_ms
+        self.frames = deque(maxlen=window)
+        self.stalls = 0
+        self.max_stall_ms = 0.0
+        self._last: Optional[float] = None
+
+    def tick(self, now: Optional[float] = None):
+        now = time.perf_counter() if now is None else now
+        if self._last is not None:
+            frame_ms = (now - self._last) * 1000
+            self.frames.append(frame_ms)
+            if frame_ms > self.stall_ms:
+                self.stalls += 1
+                self.max_stall_ms = max(self.max_stall_ms, frame_ms)
+        self._last = now
+
+    def get_stats(self) -> Dict[str, Any]:
+        samples = sorted(self.frames)
+        if not samples:
+            return {'frames': 0, 'stalls': self.stalls}
+        mean = sum(samples) / len(samples)
+        return {
+            'frames': len(samples),
+            'fps': round(1000 / mean, 1) if mean else 0.0,
+            'frame_p50_ms': round(samples[len(samples) // 2], 2),
+            'frame_p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+            'frame_max_ms': round(samples[-1], 2),
+            'stalls': self.stalls,
+            'max_stall_ms': round(self.max_stall_ms, 1),
+        }
@@ -1,23 +1,24 @@
 import os
-import json
+
+from core.chat_history import ChatHistory
 
 print("🧠 [DIAGNÓSTICO] Acessando a caixa preta do R2...\n")
 
-arquivo_memoria = "static/logs/historico_chat.json"
+arquivo_memoria = "static/logs/historico_chat.db"
 
 if not os.path.exists(arquivo_memoria):
-    print("⚠️ O R2 ainda não tem memórias gravadas. O arquivo JSON está vazio ou não foi criado.")
+    print("⚠️ O R2 ainda não tem memórias gravadas. O banco de histórico não foi criado.")
 else:
     try:
-        with open(arquivo_memoria, "r", encoding="utf-8") as f:
-            historico = json.load(f)
+        memoria = ChatHistory(arquivo_memoria)
+        historico = memoria.ultimas(5)
             
-        print(f"✅ Memória localizada! O R2 possui {len(historico)} interações gravadas no HD.\n")
+        print(f"✅ Memória localizada! O R2 possui {memoria.total()} interações gravadas no HD.\n")
         print("ÚLTIMOS REGISTROS NA MEMÓRIA DE LONGO PRAZO:")
         print("=" * 50)
         
         # Pega as últimas 5 interações para não poluir a tela
-        for i, interacao in enumerate(historico[-5:]):
+        for i, interacao in enumerate(historico):
             print(f"[{interacao.get('timestamp', 'Data Indisponível')}]")
             print(f"👤 TEDDY: {interacao.get('teddy', '')}")
             print(f"🤖 R2:    {interacao.get('r2', '')}")
@@ -13,14 +13,20 @@ else:
 
 # 2. Expurgar Memória Vetorial (RAG) - Preserva os PDFs
 docs_dir = "static/docs"
-arquivos_rag = ["faiss_index.bin", "rag_data.json"]
+arquivos_rag = ["faiss_index.bin", "rag_data.json", "rag_chunks.db", "rag_manifest.json", "faiss_ann.bin", "rag_indice.json"]
 for arq in arquivos_rag:
     caminho = os.path.join(docs_dir, arq)
     if os.path.exists(caminho):
         os.remove(caminho)
         print(f"✅ Cache de memória RAG ({arq}) resetado.")
 
-# 3. Limpar Cache de Sistema do Python (__pycache__)
+# 3. Expurgar Cache de Frames/Mídia da NOAA (re-baixado sob demanda)
+noaa_cache = os.getenv("R2_NOAA_CACHE", os.path.join("static", "cache", "noaa"))
+if os.path.exists(noaa_cache):
+    shutil.rmtree(noaa_cache)
+    print(f"✅ Cache de mídia NOAA ({noaa_cache}/) incinerado.")
+
+# 4. Limpar Cache de Sistema do Python (__pycache__)
 pycache_count = 0
 for root, dirs, files in os.walk("."):
     if "__pycache__" in dirs:
@@ -29,7 +35,7 @@ for root, dirs, files in os.walk("."):
         pycache_count += 1
 print(f"✅ {pycache_count} pastas de cache do Python (__pycache__) eliminadas.")
 
-# 4. Opcional: Limpar Mídias Geradas (Descomente as linhas abaixo se quiser apagar os vídeos/imagens prontas)
+# 5. Opcional: Limpar Mídias Geradas (Descomente as linhas abaixo se quiser apagar os vídeos/imagens prontas)
 # media_dir = "static/media"
 # if os.path.exists(media_dir):
 #     shutil.rmtree(media_dir)
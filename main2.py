@@ -10,8 +10,8 @@ import pyttsx3
 from pathlib import Path
 import os, json, datetime, sys, time, asyncio, subprocess, shutil, re, gc, base64, tempfile
 import threading
+import concurrent.futures
 from contextlib import asynccontextmanager
-from queue import Queue, Empty
 from fastapi import Request, FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException, Form
 from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
@@ -20,8 +20,10 @@ from pydantic import BaseModel
 from typing import List, Optional
 import uvicorn
 import torch
-import faiss
-from sentence_transformers import SentenceTransformer
+from core.chat_history import ChatHistory
+from core.knowledge_base import KnowledgeBase, get_embedder  # núcleo RAG
+from utils.http_client import get_http_client
+from utils.transcript_cache import TranscriptCache
 from huggingface_hub import hf_hub_download
 import edge_tts
 import glob
@@ -97,31 +99,16 @@ class CodePayload(BaseModel):
 # ══════════════════════════════════════════
 # 💾 NÚCLEO DE MEMÓRIA (LOCK PROTEGIDO)
 # ══════════════════════════════════════════
-LOG_HISTORICO = "static/logs/historico_chat.json"
+LOG_HISTORICO = "static/logs/historico_chat.json"   # formato antigo: migrado na 1ª execução
+DB_HISTORICO = "static/logs/historico_chat.db"
 os.makedirs("static/logs", exist_ok=True)
-historico_lock = threading.Lock()
+historico_chat = ChatHistory(DB_HISTORICO, legacy_json=LOG_HISTORICO)
 
-def salvar_no_historico_json(usuario, bot):
-    interacao = {"timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "teddy": usuario, "r2": bot}
-    with historico_lock:
-        historico = []
-        if os.path.exists(LOG_HISTORICO):
-            try:
-                with open(LOG_HISTORICO, "r", encoding="utf-8") as f: historico = json.load(f)
-            except: pass
-        historico.append(interacao)
-        with open(LOG_HISTORICO, "w", encoding="utf-8") as f: 
-            json.dump(historico[-100:], f, ensure_ascii=False, indent=4)
+def salvar_no_historico(usuario, bot):
+    historico_chat.adicionar(usuario, bot)
 
 def carregar_historico_na_ram():
-    with historico_lock:
-        if os.path.exists(LOG_HISTORICO):
-            try:
-                with open(LOG_HISTORICO, "r", encoding="utf-8") as f:
-                    dados = json.load(f)
-                    return [f"{'Teddy' if k=='teddy' else 'R2'}: {v}" for item in dados[-20:] for k,v in item.items() if k in ['teddy','r2']]
-            except: pass
-        return []
+    return historico_chat.contexto(20)
 
 # ══════════════════════════════════════════
 # 📂 IMPORTAÇÕES TÁTICAS SEGURAS
@@ -140,119 +127,6 @@ def safe_import(module_name, class_name):
             print(f"⚠️ Módulo {class_name} indisponível: {ex}")
             return None
 
-# ══════════════════════════════════════════
-# 📚 NÚCLEO RAG COM MEMÓRIA NO HD
-# ══════════════════════════════════════════
-# NÚCLEO RAG COM FILTRO DE SEGURANÇA E BLINDAGEM
-# ══════════════════════════════════════════
-class KnowledgeBase:
-    def __init__(self, docs_dir="static/docs"):
-        self.docs_dir = docs_dir
-        self.index_path = os.path.join(docs_dir, "faiss_index.bin")
-        self.data_path = os.path.join(docs_dir, "rag_data.json")
-        self.embedder = None
-        self.index = None
-        self.chunks = []
-        self.arquivos_indexados = []
-        os.makedirs(docs_dir, exist_ok=True)
-        if os.path.exists(self.index_path) and os.path.exists(self.data_path):
-            try:
-                self.index = faiss.read_index(self.index_path)
-                with open(self.data_path, "r", encoding="utf-8") as f: 
-                    dados = json.load(f)
-                    self.chunks = dados.get("chunks", [])
-                    self.arquivos_indexados = dados.get("arquivos_indexados", [])
-            except: pass
-
-    def sync(self):
-        try:
-            import pypdf as _pdf_lib
-        except ImportError:
-            try:
-                import PyPDF2 as _pdf_lib
-            except ImportError:
-                return "❌ Nenhuma biblioteca PDF encontrada. Execute: pip install pypdf"
-
-        if not self.embedder: 
-            self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-            
-        self.chunks = []
-        self.arquivos_indexados = [] 
-        arquivos = [f for f in os.listdir(self.docs_dir) if f.lower().endswith(('.pdf', '.md'))]
-        
-        for arq in arquivos:
-            try:
-                p = os.path.join(self.docs_dir, arq)
-                text = ""
-                if arq.endswith('.pdf'):
-                    with open(p, 'rb') as f:
-                        reader = _pdf_lib.PdfReader(f)
-                        for page in reader.pages:
-                            try:
-                                extracted = page.extract_text()
-                                # Filtro de Sanidade: Se a página extraída for muito pequena ou
-                                # cheia de caracteres de erro (como '□' ou '\ufffd'), ignoramos.
-                                if extracted and len(extracted.strip()) > 10:
-                                    text += extracted
-                            except Exception:
-                                # Se a página der erro de encoding (UniGB), pulamos silenciosamente
-                                continue
-                else:
-                    with open(p, 'r', encoding='utf-8', errors='ignore') as f: 
-                        text = f.read()
-                        
-                # Blindagem 1: Garante que o texto é uma string válida
-                if isinstance(text, str) and text.strip():
-                    # Limpeza extra para evitar caracteres problemáticos
-                    text = text.replace('\x00', '').replace('\ufffd', '') 
-                    
-                    self.arquivos_indexados.append(arq)
-                    
-                    # Criação de chunks garantindo que só inserimos strings válidas
-                    for i in range(0, len(text), 800):
-                        chunk = text[i:i+1000].strip()
-                        if isinstance(chunk, str) and len(chunk) > 50: 
-                            self.chunks.append(f"[Fonte: {arq}] {chunk}")
-                            
-            except Exception as e: 
-                print(f"[AVISO RAG] Arquivo corrompido ou ignorado ({arq}): {e}")
-                continue
-                
-        # Blindagem 2: Verifica se há chunks válidos antes de tentar codificar
-        if not self.chunks: 
-            return "❌ Falha na extração. Nenhum texto válido encontrado nos documentos."
-            
-        try:
-            print(f"[RAG] Codificando {len(self.chunks)} blocos de texto...")
-            embeddings = self.embedder.encode(self.chunks, convert_to_numpy=True)
-            self.index = faiss.IndexFlatL2(embeddings.shape[1])
-            self.index.add(embeddings)
-            faiss.write_index(self.index, self.index_path)
-            
-            with open(self.data_path, "w", encoding="utf-8") as f:
-                json.dump({"chunks": self.chunks, "arquivos_indexados": self.arquivos_indexados}, f, ensure_ascii=False)
-                
-            return f"✅ Cérebro RAG Sincronizado! {len(self.arquivos_indexados)} arquivos processados."
-        except Exception as e:
-            return f"❌ Erro crítico ao criar embeddings do RAG: {e}"
-
-    def search(self, query, max_chars=1500):
-        if not self.index or not self.chunks: return ""
-        try:
-            if not self.embedder: self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-            _, indices = self.index.search(self.embedder.encode([query], convert_to_numpy=True), 2)
-            contexto = ""
-            for i in indices[0]:
-                # Blindagem na busca: evita index out of bounds e garante string
-                if i >= 0 and i < len(self.chunks) and isinstance(self.chunks[i], str):
-                    chunk = self.chunks[i]
-                    if len(contexto) + len(chunk) < max_chars:
-                        contexto += chunk + "\n\n"
-            return contexto
-        except Exception as e: 
-            print(f"[ERRO BUSCA RAG]: {e}")
-            return ""
-
 # ══════════════════════════════════════════
 # 🎙️ FUNÇÃO DE SÍNTESE DE VOZ
 # ══════════════════════════════════════════
@@ -301,6 +175,7 @@ def falar_r2(texto):
 # 🎤 FUNÇÃO DE TRANSCRIÇÃO DE ÁUDIO (WHISPER)
 # ══════════════════════════════════════════
 _modelo_whisper = None
+cache_transcricoes = TranscriptCache()   # compartilhado com a Tesoura Neural
 
 def get_whisper_model():
     global _modelo_whisper
@@ -325,6 +200,12 @@ async def transcrever_audio_base64(base64_audio: str) -> str:
     
     try:
         audio_bytes = base64.b64decode(base64_audio)
+        chave = cache_transcricoes.chave_bytes(audio_bytes)
+        em_cache = cache_transcricoes.get(chave, "base:pt")
+        if em_cache is not None:
+            texto = em_cache["text"].strip()
+            return texto if texto else "[Áudio sem fala detectada]"
+
         with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as tmp_webm:
             tmp_webm.write(audio_bytes)
             tmp_webm_path = tmp_webm.name
@@ -338,6 +219,7 @@ async def transcrever_audio_base64(base64_audio: str) -> str:
 
         caminho_para_whisper = tmp_wav_path if os.path.exists(tmp_wav_path) else tmp_webm_path
         result = await asyncio.to_thread(model.transcribe, caminho_para_whisper, language="pt")
+        await asyncio.to_thread(cache_transcricoes.put_resultado, chave, "base:pt", result)
         texto = result["text"].strip()
         
         for p in [tmp_webm_path, tmp_wav_path]:
@@ -449,7 +331,12 @@ async def lifespan(app: FastAPI):
     os.makedirs("static/media", exist_ok=True)
     print("\n⚙️ [BOOT] Inicializando Módulos Táticos...")
     
-    rag_ops = KnowledgeBase()
+    try:
+        embedder_global = await asyncio.to_thread(get_embedder)
+    except Exception as e:
+        print(f"❌ [RAG] Embedder indisponível: {e}")
+        embedder_global = None
+    rag_ops = KnowledgeBase(embedder=embedder_global)
     CortexEU = safe_import("eu", "CORTEX_EU")
     eu_ops = CortexEU("R2") if CortexEU else None
     PizzaINTService = safe_import("pizzint_service", "PizzaINTService")
@@ -467,7 +354,7 @@ async def lifespan(app: FastAPI):
     whisper_model_global = get_whisper_model() if WHISPER_AVAILABLE else None
     try:
         from video_ops import VideoSurgeon
-        video_ops = VideoSurgeon(whisper_model=whisper_model_global)
+        video_ops = VideoSurgeon(whisper_model=whisper_model_global, transcript_cache=cache_transcricoes)
         print("✂️ [TESOURA]: ONLINE")
     except Exception as e:
         print(f"✂️ [TESOURA]: OFFLINE → {e}")
@@ -576,6 +463,17 @@ async def listar_cortes():
 def alpha_status():
     return alpha_engine.get_status()
 
+@app.post("/api/alpha/record/start")
+def alpha_record_start():
+    # Grava os frames brutos da corretora para replay offline (alpha_backtest.py)
+    os.makedirs("static/logs/frames", exist_ok=True)
+    caminho = os.path.join("static/logs/frames", f"frames_{datetime.datetime.now():%Y%m%d_%H%M%S}.bin")
+    return alpha_engine.start_recording(caminho)
+
+@app.post("/api/alpha/record/stop")
+def alpha_record_stop():
+    return alpha_engine.stop_recording()
+
 @app.post("/api/broker/start")
 def start_broker():
     if not broker_ops:
@@ -718,44 +616,167 @@ async def serve_gui():
 # ══════════════════════════════════════════
 
 # [BUG1] Streaming Gemma 4 corrigido
-async def stream_llama(ai_brain, prompt, stop_flag_getter):
-    """Roda Gemma 4 em thread separada e yields tokens via queue síncrona."""
-    q = Queue()
-    
+# [PERF] Pipeline real: thread produtora -> asyncio.Queue limitada -> consumidor no event loop.
+STREAM_FLUSH_MS   = 30    # janela de coalescência entre frames "stream" (0 = token a token)
+STREAM_QUEUE_MAX  = 64    # backpressure: a thread do llama.cpp espera se o cliente estiver lento
+STREAM_TIMEOUT_S  = 30    # entre tokens: sem token novo nesse intervalo, encerra o stream
+# Avaliar um prompt longo na CPU pode passar de minutos antes do primeiro token
+STREAM_PRIMEIRO_TOKEN_S = float(os.getenv("R2_STREAM_FIRST_TOKEN_S", "600"))
+_FIM_STREAM = object()
+
+_metricas_stream = {
+    "respostas": 0,
+    "cancelados": 0,
+    "tokens": 0,
+    "ultimo_ttft_ms": None,       # tempo até o primeiro token chegar ao consumidor
+    "ultimo_ms_por_token": None,  # intervalo médio entre tokens gerados
+    "ultimo_atraso_max_ms": None, # maior atraso geração -> envio (efeito do backpressure)
+    "ttft_medio_ms": None,
+}
+
+def _registrar_metricas_stream(ttft_ms, ms_por_token, atraso_max_ms, n_tokens, cancelado):
+    m = _metricas_stream
+    m["respostas"] += 1
+    m["tokens"] += n_tokens
+    if cancelado:
+        m["cancelados"] += 1
+    m["ultimo_ms_por_token"] = ms_por_token
+    m["ultimo_atraso_max_ms"] = atraso_max_ms
+    if ttft_ms is not None:
+        m["ultimo_ttft_ms"] = ttft_ms
+        anterior = m["ttft_medio_ms"]
+        m["ttft_medio_ms"] = ttft_ms if anterior is None else round(anterior * 0.8 + ttft_ms * 0.2, 1)
+
+async def stream_llama(ai_brain, prompt, stop_flag_getter, flush_ms=STREAM_FLUSH_MS, **gen_kwargs):
+    """
+    Roda o Gemma em thread separada e entrega os tokens enquanto ainda estão sendo gerados.
+    Tokens que chegam dentro de `flush_ms` são agrupados num único pedaço.
+    Feche o gerador com `aclose()` para cancelar a geração em andamento.
+    """
+    loop = asyncio.get_running_loop()
+    q = asyncio.Queue(maxsize=STREAM_QUEUE_MAX)
+    cancelado = threading.Event()
+    gen_kwargs.setdefault("max_tokens", 1024)  # [FIX] max_tokens=-1 causava overflow
+    gen_kwargs.setdefault("stop", ["<end_of_turn>"])
+
+    def _put(item):
+        # Bloqueia a thread produtora enquanto a fila estiver cheia, mas acorda se o consumidor sumir
+        fut = asyncio.run_coroutine_threadsafe(q.put(item), loop)
+        while not cancelado.is_set():
+            try:
+                fut.result(timeout=0.5)
+                return True
+            except concurrent.futures.TimeoutError:
+                continue
+        fut.cancel()
+        return False
+
     def _run():
         try:
-            # [FIX] max_tokens=-1 causava overflow; limitado a 1024 para garantir margem segura
-            for chunk in ai_brain(prompt, max_tokens=1024, stop=["<end_of_turn>"], stream=True):
-                if stop_flag_getter():
-                    q.put(None)
+            for chunk in ai_brain(prompt, stream=True, **gen_kwargs):
+                if stop_flag_getter() or cancelado.is_set():
+                    break
+                if not _put((chunk["choices"][0]["text"], time.perf_counter())):
                     return
-                q.put(chunk["choices"][0]["text"])
         except ValueError as e:
             # [FIX] captura "Requested tokens exceed context window" e avisa o usuário
-            q.put(f"\n\n⚠️ [ERRO DE CONTEXTO] Prompt muito longo: {e}")
+            _put((f"\n\n⚠️ [ERRO DE CONTEXTO] Prompt muito longo: {e}", time.perf_counter()))
         except Exception as e:
-            q.put(f"\n\n❌ [ERRO GEMMA] {e}")
+            _put((f"\n\n❌ [ERRO GEMMA] {e}", time.perf_counter()))
         finally:
-            q.put(None)
-    
-    loop = asyncio.get_running_loop()
-    # Dispara a thread em background sem bloquear
-    loop.run_in_executor(None, _run)
-    
-    while True:
-        try:
-            token = await asyncio.to_thread(q.get, timeout=30)
-            if token is None:
+            _put(_FIM_STREAM)
+
+    t0 = time.perf_counter()
+    produtor = loop.run_in_executor(None, _run)
+    flush_s = max(flush_ms, 0) / 1000
+    t_primeiro = t_ultimo = None
+    n_tokens = 0
+    atraso_max = 0.0
+    ultimo_envio = 0.0
+    concluido = False
+
+    try:
+        while True:
+            try:
+                limite = STREAM_TIMEOUT_S if n_tokens else STREAM_PRIMEIRO_TOKEN_S
+                item = await asyncio.wait_for(q.get(), timeout=limite)
+            except asyncio.TimeoutError:
+                break
+            if item is _FIM_STREAM:
+                concluido = True
+                break
+
+            lote = [item]
+            if n_tokens and flush_s:
+                espera = ultimo_envio + flush_s - loop.time()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+            while True:
+                try:
+                    prox = q.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if prox is _FIM_STREAM:
+                    concluido = True
+                    break
+                lote.append(prox)
+
+            agora = time.perf_counter()
+            if t_primeiro is None:
+                t_primeiro = lote[0][1]
+            t_ultimo = lote[-1][1]
+            n_tokens += len(lote)
+            atraso_max = max(atraso_max, agora - lote[0][1])
+
+            yield "".join(texto for texto, _ in lote)
+            ultimo_envio = loop.time()
+            if concluido:
                 break
-            yield token
-        except Empty:
-            break
+    finally:
+        cancelado.set()
+        try:
+            await produtor
+        except Exception:
+            pass
+        _registrar_metricas_stream(
+            ttft_ms=round((t_primeiro - t0) * 1000, 1) if t_primeiro else None,
+            ms_por_token=round((t_ultimo - t_primeiro) * 1000 / (n_tokens - 1), 1) if n_tokens > 1 else None,
+            atraso_max_ms=round(atraso_max * 1000, 1),
+            n_tokens=n_tokens,
+            cancelado=not concluido or stop_flag_getter(),
+        )
+
+@app.get("/api/stream/metrics")
+def stream_metrics():
+    return _metricas_stream
+
+@app.get("/api/http/metrics")
+def http_metrics():
+    return get_http_client().get_stats()
+
+@app.get("/api/historico")
+def historico_api(q: str = "", n: int = 20):
+    """Últimas n trocas do chat, ou busca textual com ?q="""
+    n = max(1, min(n, 200))
+    itens = historico_chat.buscar(q, n) if q.strip() else historico_chat.ultimas(n)
+    return {"total": historico_chat.total(), "itens": itens}
+
+def _progresso_cortes(websocket):
+    """Callback de render da Tesoura Neural: avisa no chat quando cada corte termina (chamado da thread do ffmpeg)."""
+    loop = asyncio.get_running_loop()
+    def progresso(nome, info):
+        if info["status"] == "rodando":
+            return
+        texto = (f"🎞️ Corte <b>{nome}</b> renderizado ({info['fps'] or 0:.0f} fps)" if info["status"] == "concluido"
+                 else f"⚠️ Corte <b>{nome}</b> falhou no render")
+        asyncio.run_coroutine_threadsafe(websocket.send_json({"type": "system", "text": texto}), loop)
+    return progresso
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     global _stop_generation
     await websocket.accept()
-    sessao_memoria_ram = carregar_historico_na_ram()
+    sessao_memoria_ram = await asyncio.to_thread(carregar_historico_na_ram)
     sys_prompt = "Você é o R2, IA tática e Mestre Programador. REGRA: A primeira linha do código DEVE ser: # filename: nome.py"
     voz_atual = "Thalita"
     
@@ -841,7 +862,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 await websocket.send_json({"type": "system", "text": f"⏳ Tesoura Neural V4: Analisando {video_alvo}..."})
                 
                 if video_ops and ai_brain:
-                    res = await asyncio.to_thread(video_ops.processar_video_viral, video_alvo, ai_brain)
+                    res = await asyncio.to_thread(video_ops.processar_video_viral, video_alvo, ai_brain,
+                                                  _progresso_cortes(websocket))
                     if isinstance(res, list):
                         msg = "✅ **Cortes Virais Extraídos com Sucesso:**\n"
                         for r in res:
@@ -865,7 +887,8 @@ async def websocket_endpoint(websocket: WebSocket):
                         await websocket.send_json({"type": "system", "text": "❌ URL do vídeo não fornecida."})
                         continue
                     if video_ops and ai_brain:
-                        res = await asyncio.to_thread(video_ops.processar_video_viral, video_url, ai_brain)
+                        res = await asyncio.to_thread(video_ops.processar_video_viral, video_url, ai_brain,
+                                                      _progresso_cortes(websocket))
                         if isinstance(res, list):
                             msg = "✅ **Extração concluída:**\n"
                             for r in res:
@@ -883,7 +906,7 @@ async def websocket_endpoint(websocket: WebSocket):
 
             if ai_brain:
                 _stop_generation = False
-                ctx = rag_ops.search(comando) # Agora utiliza o novo padrão leve de 1000 chars
+                ctx = await rag_ops.asearch(comando) # Agora utiliza o novo padrão leve de 1000 chars
                 
                 # Template rigoroso para o Gemma 4
                 prompt = f"<start_of_turn>user\nContexto tático: {ctx}\n\nComando: {comando}<end_of_turn>\n<start_of_turn>model\n"
@@ -892,28 +915,24 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 resp_full = ""
                 
-                def generate_tokens():
-                    try:
-                        # Ajustamos temperature para 0.7 e top_p para 0.9 para evitar respostas vazias
-                        # repeat_penalty ajuda o modelo a não "travar"
-                        for chunk in ai_brain(
-                            prompt, 
-                            max_tokens=1024, 
-                            temperature=0.7, 
-                            top_p=0.9,
-                            repeat_penalty=1.1,
-                            stream=True, 
-                            stop=["<end_of_turn>", "user"]
-                        ):
-                            if _stop_generation: break
-                            token = chunk["choices"][0]["text"]
-                            yield token
-                    except Exception as e:
-                        yield f"\n[ERRO DE CÉREBRO]: {str(e)}"
-
-                for token in await asyncio.to_thread(list, generate_tokens()):
-                    resp_full += token
-                    await websocket.send_json({"type": "stream", "text": token})
+                # Ajustamos temperature para 0.7 e top_p para 0.9 para evitar respostas vazias
+                # repeat_penalty ajuda o modelo a não "travar"
+                tokens = stream_llama(
+                    ai_brain,
+                    prompt,
+                    lambda: _stop_generation,
+                    max_tokens=1024,
+                    temperature=0.7,
+                    top_p=0.9,
+                    repeat_penalty=1.1,
+                    stop=["<end_of_turn>", "user"],
+                )
+                try:
+                    async for pedaco in tokens:
+                        resp_full += pedaco
+                        await websocket.send_json({"type": "stream", "text": pedaco})
+                finally:
+                    await tokens.aclose()
                 
                 if not resp_full.strip():
                     # Fallback caso o modelo ainda retorne vazio
@@ -921,7 +940,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     await websocket.send_json({"type": "stream", "text": resp_full})
 
                 await websocket.send_json({"type": "done"})
-                salvar_no_historico_json(comando, resp_full)
+                await asyncio.to_thread(salvar_no_historico, comando, resp_full)
 
                 limpar_audios_antigos()
 
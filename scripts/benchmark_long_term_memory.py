@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark da Memória de Longo Prazo
+Mede, para corpora sintéticos: indexação a frio do JSONL, recarga pelo snapshot, latência
+p50/p99 de consulta BM25, latência de save_interaction e (opcional) a varredura linear antiga
+
+Uso:
+    python scripts/benchmark_long_term_memory.py                    # 10k, 100k e 1M memórias
+    python scripts/benchmark_long_term_memory.py --tamanhos 10000 --linear
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.long_term_memory import LongTermMemory
+
+
+def gerar_vocabulario(rng, tamanho=20_000):
+    letras = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letras) for _ in range(rng.randint(4, 10))) for _ in range(tamanho)]
+
+
+def gerar_corpus(caminho, n, vocab, rng):
+    """Escreve n memórias no JSONL; termos com distribuição de Zipf como em texto real."""
+    pesos = [1 / (i + 1) for i in range(len(vocab))]
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            user = " ".join(rng.choices(vocab, pesos, k=rng.randint(4, 12)))
+            bot = " ".join(rng.choices(vocab, pesos, k=rng.randint(8, 30)))
+            mem = {"id": i + 1, "timestamp": "2024-01-01T00:00:00", "user": user, "bot": bot}
+            f.write(json.dumps(mem, ensure_ascii=False) + "\n")
+
+
+def busca_linear(memorias, extrair, consulta, limite=3):
+    """Algoritmo anterior: interseção de palavras-chave com todas as memórias."""
+    termos = set(extrair(consulta))
+    pontuadas = []
+    for mem in memorias:
+        overlap = len(termos.intersection(extrair(mem['user'] + " " + mem['bot'])))
+        if overlap:
+            pontuadas.append((overlap, mem))
+    pontuadas.sort(key=lambda x: x[0], reverse=True)
+    return pontuadas[:limite]
+
+
+def rodar(n, n_consultas, linear, vocab, rng):
+    print(f"\n📦 Corpus: {n:,} memórias")
+    with tempfile.TemporaryDirectory() as pasta:
+        config = SimpleNamespace(DATA_DIR=pasta)
+        caminho = os.path.join(pasta, "permanent_memory.jsonl")
+        gerar_corpus(caminho, n, vocab, rng)
+        print(f"   JSONL          {os.path.getsize(caminho) / 1e6:9.1f} MB")
+
+        t0 = time.perf_counter()
+        memoria = LongTermMemory(config)
+        print(f"   __init__       {(time.perf_counter() - t0) * 1000:9.2f} ms")
+
+        t0 = time.perf_counter()
+        len(memoria)
+        print(f"   indexação fria {time.perf_counter() - t0:9.2f} s")
+
+        t0 = time.perf_counter()
+        memoria.save_index()
+        print(f"   snapshot       {time.perf_counter() - t0:9.2f} s  ({os.path.getsize(memoria.index_file) / 1e6:.1f} MB)")
+
+        t0 = time.perf_counter()
+        recarga = LongTermMemory(config)
+        len(recarga)
+        print(f"   recarga        {time.perf_counter() - t0:9.2f} s")
+
+        consultas = [" ".join(rng.choices(vocab[:2000], k=rng.randint(2, 5))) for _ in range(n_consultas)]
+        latencias = []
+        for q in consultas:
+            t0 = time.perf_counter()
+            recarga.search(q, 3)
+            latencias.append((time.perf_counter() - t0) * 1000)
+        print(f"   busca BM25     p50 {np.percentile(latencias, 50):8.2f} ms   p99 {np.percentile(latencias, 99):8.2f} ms")
+
+        saves = []
+        for i in range(200):
+            t0 = time.perf_counter()
+            recarga.save_interaction(consultas[i % len(consultas)], "resposta de teste")
+            saves.append((time.perf_counter() - t0) * 1000)
+        print(f"   save           p50 {np.percentile(saves, 50):8.3f} ms   p99 {np.percentile(saves, 99):8.3f} ms")
+
+        if linear:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                memorias = [json.loads(l) for l in f]
+            extrair = recarga._extract_keywords
+            latencias = []
+            for q in consultas[:20]:
+                t0 = time.perf_counter()
+                busca_linear(memorias, extrair, q)
+                latencias.append((time.perf_counter() - t0) * 1000)
+            print(f"   busca linear   p50 {np.percentile(latencias, 50):8.2f} ms   (algoritmo anterior)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice BM25 da memória de longo prazo")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--linear", action="store_true", help="compara com a varredura linear antiga")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocab = gerar_vocabulario(rng)
+    for n in args.tamanhos:
+        rodar(n, args.consultas, args.linear, vocab, rng)
+
+
+if __name__ == "__main__":
+    main()
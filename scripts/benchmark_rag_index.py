@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos Índices do RAG
+Compara HNSW e IVF-PQ com a busca exata (Flat): recall@k e latência p50/p99 por consulta
+
+Uso:
+    python scripts/benchmark_rag_index.py                       # 10k, 100k e 1M chunks
+    python scripts/benchmark_rag_index.py --tamanhos 10000 --consultas 100
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.vector_index import construir_indice
+
+DIM_PADRAO = 384  # all-MiniLM-L6-v2
+
+
+def gerar_corpus(n, dim, rng, n_clusters=256):
+    """Vetores agrupados em clusters, mais próximos de embeddings reais que ruído uniforme."""
+    centros = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    rotulos = rng.integers(0, n_clusters, n)
+    vetores = centros[rotulos] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vetores.astype(np.float32)
+
+
+def medir(indice, consultas, k):
+    latencias = []
+    resultados = []
+    for q in consultas:
+        t0 = time.perf_counter()
+        _, ids = indice.search(q[None, :], k)
+        latencias.append((time.perf_counter() - t0) * 1000)
+        resultados.append(ids[0])
+    return np.array(resultados), np.array(latencias)
+
+
+def recall(verdade, obtido, k):
+    acertos = sum(len(set(v[:k]) & set(o[:k])) for v, o in zip(verdade, obtido))
+    return acertos / (len(verdade) * k)
+
+
+def rodar(n, dim, n_consultas, k, tipos, rng):
+    print(f"\n📦 Corpus: {n:,} chunks × {dim} dims")
+    vetores = gerar_corpus(n, dim, rng)
+    ids = np.arange(n, dtype=np.int64)
+    consultas = vetores[rng.choice(n, n_consultas, replace=False)] + 0.05 * rng.standard_normal((n_consultas, dim)).astype(np.float32)
+
+    t0 = time.perf_counter()
+    flat, _ = construir_indice(vetores, ids, "flat")
+    print(f"   {'FLAT':<6} build {time.perf_counter() - t0:7.1f}s")
+    verdade, lat_flat = medir(flat, consultas, k)
+    linhas = [("flat", 1.0, lat_flat)]
+    del flat
+
+    for tipo in tipos:
+        t0 = time.perf_counter()
+        indice, _ = construir_indice(vetores, ids, tipo)
+        print(f"   {tipo.upper():<6} build {time.perf_counter() - t0:7.1f}s")
+        obtido, lat = medir(indice, consultas, k)
+        linhas.append((tipo, recall(verdade, obtido, k), lat))
+        del indice
+
+    print(f"   {'índice':<8}{'recall@' + str(k):>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for tipo, rec, lat in linhas:
+        print(f"   {tipo:<8}{rec:>10.3f}{np.percentile(lat, 50):>10.3f}{np.percentile(lat, 99):>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos índices vetoriais do RAG")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=DIM_PADRAO)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--tipos", nargs="+", default=["hnsw", "ivfpq"], choices=["hnsw", "ivfpq"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for n in args.tamanhos:
+        rodar(n, args.dim, args.consultas, args.k, args.tipos, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos Renderizadores da Tesoura Neural (features/video_colab)
+Gera um vídeo sintético (testsrc2 + tom), monta cortes e legendas sintéticos e renderiza o
+mesmo pedido pelos dois caminhos: grafo único do ffmpeg e composição MoviePy.
+
+Uso:
+    python scripts/benchmark_video_render.py                        # 10 min 1280x720, 3 cortes
+    python scripts/benchmark_video_render.py --duracao 3600 --cortes 5 --altura 1080
+    python scripts/benchmark_video_render.py --sem-legendas         # MoviePy sem ImageMagick
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ffmpeg_graph import geometria_crop, sondar_video
+
+
+def gerar_fonte(caminho, duracao, altura):
+    largura = altura * 16 // 9
+    subprocess.run(["ffmpeg", "-y", "-v", "error",
+                    "-f", "lavfi", "-i", f"testsrc2=size={largura}x{altura}:rate=30:duration={duracao}",
+                    "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duracao}",
+                    "-c:v", "libx264", "-preset", "ultrafast", "-g", "60", "-c:a", "aac", "-shortest", caminho],
+                   check=True)
+
+
+def gerar_cortes(duracao, n):
+    """n cortes de 45 s espalhados pelo vídeo (o último perto do fim, para medir a busca)"""
+    passo = (duracao - 60) / max(1, n - 1) if n > 1 else 0
+    return [{"start": 5.0 + i * passo, "end": 5.0 + i * passo + 45.0} for i in range(n)]
+
+
+def gerar_segmentos(duracao):
+    return [{"start": float(t), "end": float(t) + 2.8, "text": f" frase número {t // 3} com algumas palavras"}
+            for t in range(0, int(duracao) - 3, 3)]
+
+
+def medir(nome, funcao, duracao_saida):
+    t0 = time.perf_counter()
+    ok = funcao()
+    segundos = time.perf_counter() - t0
+    if ok is None:
+        print(f"   {nome:8s} FALHOU após {segundos:.1f} s")
+        return None
+    print(f"   {nome:8s} {segundos:8.1f} s   {duracao_saida * 30 / segundos:7.1f} fps   "
+          f"{duracao_saida / segundos:5.2f}x tempo real")
+    return segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grafo ffmpeg vs MoviePy no processar_alvo")
+    parser.add_argument("--duracao", type=int, default=600, help="duração do vídeo fonte (s)")
+    parser.add_argument("--altura", type=int, default=720)
+    parser.add_argument("--cortes", type=int, default=3)
+    parser.add_argument("--sem-legendas", action="store_true")
+    parser.add_argument("--so-ffmpeg", action="store_true", help="pula o MoviePy (lento em vídeos longos)")
+    args = parser.parse_args()
+
+    from features.video_colab import VideoSurgeon
+
+    with tempfile.TemporaryDirectory() as pasta:
+        fonte = os.path.join(pasta, "fonte.mp4")
+        print(f"🎬 Gerando fonte sintética: {args.duracao}s @ {args.altura}p...")
+        gerar_fonte(fonte, args.duracao, args.altura)
+
+        info = sondar_video(fonte)
+        cortes = gerar_cortes(args.duracao, args.cortes)
+        largura, altura, crops_x = geometria_crop(info["largura"], info["altura"], [None] * len(cortes))
+        legenda = {"segmentos": [] if args.sem_legendas else gerar_segmentos(args.duracao),
+                   "y_pixels": altura * 0.8, "tamanho": 48, "cor_texto": "#ffffff", "cor_fundo": "transparent"}
+        duracao_saida = sum(c["end"] - c["start"] for c in cortes)
+
+        # Instância sem __init__: só os renderizadores, sem carregar o Whisper
+        cirurgiao = VideoSurgeon.__new__(VideoSurgeon)
+        cirurgiao.temp_dir = pasta
+        cirurgiao.out_dir = pasta
+        log = lambda msg: None
+
+        print(f"\n📊 {len(cortes)} cortes, {duracao_saida:.0f}s de saída {largura}x{altura}, "
+              f"legendas {'não' if args.sem_legendas else 'sim'}")
+        t_ffmpeg = medir("ffmpeg", lambda: cirurgiao._renderizar_ffmpeg(
+            fonte, os.path.join(pasta, "ffmpeg.mp4"), cortes, crops_x, largura, altura,
+            info["tem_audio"], legenda, log), duracao_saida)
+        if args.so_ffmpeg:
+            return
+        t_moviepy = medir("moviepy", lambda: cirurgiao._renderizar_moviepy(
+            fonte, os.path.join(pasta, "moviepy.mp4"), cortes, crops_x, largura, legenda, log), duracao_saida)
+        if t_ffmpeg and t_moviepy:
+            print(f"\n   ffmpeg {t_moviepy / t_ffmpeg:.1f}x mais rápido")
+
+
+if __name__ == "__main__":
+    main()
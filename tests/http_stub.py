@@ -0,0 +1,56 @@
+"""
+Servidor HTTP Local para os Testes
+ThreadingHTTPServer numa porta livre com um handler base silencioso; o estado do teste
+fica em `self.server.state` para cada handler ler e alterar
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Base dos handlers dos testes: sem log no stderr e respostas com Content-Length"""
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reply_json(self, payload, status=200):
+        self._reply(status, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+
+
+class StubServer:
+    """Sobe `handler` em 127.0.0.1 numa thread daemon; `close` derruba e libera a porta"""
+
+    def __init__(self, handler, state=None):
+        self.state = state
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.state = state
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.host = f"{host}:{port}"
+        self.base = f"http://{self.host}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_stub(test, handler, state=None):
+    """StubServer derrubado no cleanup do TestCase `test`"""
+    stub = StubServer(handler, state)
+    test.addCleanup(stub.close)
+    return stub
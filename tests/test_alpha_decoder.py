@@ -0,0 +1,104 @@
+"""
+Testes do TickDecoder do Módulo Alpha
+Mesmo resultado do parser original (lower() + regex) nos frames com preço, descarte de
+mensagens de controle, silenciamento de tipos sem preço e status lido de outra thread
+"""
+
+import json
+import re
+import threading
+import unittest
+
+from alpha_module import TickDecoder
+
+
+def parser_original(payload):
+    """process_network_packet antes do TickDecoder: (open, close, active_id) ou None"""
+    if "{" not in payload and "[" not in payload:
+        return None
+    payload_lower = payload.lower()
+    prices = re.findall(r'"(?:close|ask|bid|value)"\s*:\s*"?([0-9]+\.[0-9]+)"?', payload_lower)
+    opens = re.findall(r'"open"\s*:\s*([0-9]+\.[0-9]+)', payload_lower)
+    if not prices and not opens:
+        return None
+    cl = float(prices[-1]) if prices else float(opens[-1])
+    op = float(opens[-1]) if opens else cl
+    match_id = re.search(r'"active_id"\s*:\s*(\d+)', payload_lower)
+    return op, cl, int(match_id.group(1)) if match_id else None
+
+
+AMOSTRAS = [
+    json.dumps({"name": "candle-generated", "msg": {"active_id": 76, "size": 5, "open": 5.1234,
+                                                    "close": 5.1241, "min": 5.12, "max": 5.13}}),
+    json.dumps({"name": "quotes-generated", "msg": {"active_id": 1, "ask": 5.0012, "bid": 5.0009}}),
+    '{"name":"price-splitter.client-price-generated","msg":{"asset_id":76,"prices":[{"value":"5.4321"}]}}',
+    '{"name": "candles-generated", "msg": {"candles": [{"open": 5.1, "close": 5.2}, {"open": 5.2, "close": 5.25}]}}',
+    '[{"open": 4.9000, "close": 4.9100, "active_id": 3}]',
+    '{"name":"positions-state","msg":{"positions":[]}}',
+    '{"name":"heartbeat","msg":1700000000000}',
+    '{"name":"timeSync","msg":1700000000000}',
+    '42["ping"]',
+    'pong',
+    '{"msg": {"open": 5.0, "close": 5.1}}',
+]
+
+
+class TestTickDecoder(unittest.TestCase):
+
+    def test_matches_original_parser_on_price_frames(self):
+        decoder = TickDecoder()
+        for payload in AMOSTRAS:
+            esperado = parser_original(payload)
+            self.assertEqual(decoder.decode(payload), esperado, payload)
+        stats = decoder.get_stats()
+        self.assertEqual(stats["frames"], len(AMOSTRAS))
+        self.assertEqual(stats["ticks"], sum(parser_original(p) is not None for p in AMOSTRAS))
+
+    def test_control_messages_skipped_before_scan(self):
+        decoder = TickDecoder()
+        # Mesmo com um número no corpo, heartbeat/timeSync não viram tick
+        self.assertIsNone(decoder.decode('{"name":"heartbeat","msg":{"value":"5.5000"}}'))
+        self.assertIsNone(decoder.decode('{"name":"timeSync","msg":{"value":"5.5000"}}'))
+        self.assertEqual(decoder.get_stats()["skipped"], 2)
+
+    def test_case_insensitive_keys(self):
+        payload = '{"name":"candle-generated","msg":{"Open": 5.1, "Close": 5.2, "Active_Id": 9}}'
+        self.assertIsNone(TickDecoder().decode(payload))
+        self.assertEqual(TickDecoder(case_insensitive=True).decode(payload), parser_original(payload))
+
+    def test_names_without_prices_are_muted_and_reprobed(self):
+        decoder = TickDecoder()
+        vazio = '{"name":"positions-state","msg":{"positions":[]}}'
+        for _ in range(decoder.REPROBE_EVERY - 1):
+            decoder.decode(vazio)
+        self.assertEqual(decoder.get_stats()["muted_names"], ["positions-state"])
+        # Na re-sondagem o tipo volta a ser varrido; se trouxer preço, sai da lista
+        self.assertEqual(decoder.decode('{"name":"positions-state","msg":{"close": 5.3}}'), (5.3, 5.3, None))
+        self.assertEqual(decoder.get_stats()["muted_names"], [])
+
+    def test_stats_read_while_new_names_arrive(self):
+        decoder = TickDecoder()
+        parar = threading.Event()
+        erros = []
+
+        def leitor():
+            while not parar.is_set():
+                try:
+                    decoder.get_stats()
+                except RuntimeError as e:
+                    erros.append(e)
+                    return
+
+        thread = threading.Thread(target=leitor)
+        thread.start()
+        try:
+            for i in range(20000):
+                decoder.decode(f'{{"name":"tipo-{i}","msg":{{}}}}')
+        finally:
+            parar.set()
+            thread.join()
+        self.assertEqual(erros, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+Testes do Motor Quantitativo do Módulo Alpha
+CandleRing (volta do buffer circular e view contígua da escrita dupla) contra uma lista de
+referência, OHLC das velas fechadas pelo MarketTracker e paridade dos scripts com a
+implementação original baseada em listas
+"""
+
+import random
+import unittest
+
+import numpy as np
+
+from alpha_module import CandleRing, MarketTracker
+
+
+class TrackerLista:
+    """MarketTracker original (listas, histórico de 20 velas), com relógio injetável"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.history_c, self.history_o = [], []
+        self.last_candle_time = self.current_close = self.current_open = None
+
+    def update(self, op, cl, candle_time):
+        if self.last_candle_time is None:
+            self.last_candle_time = candle_time
+        if candle_time != self.last_candle_time:
+            if self.current_close is not None:
+                self.history_c.append(self.current_close)
+                self.history_o.append(self.current_open)
+                if len(self.history_c) > 20:
+                    self.history_c.pop(0)
+                    self.history_o.pop(0)
+            self.last_candle_time = candle_time
+            self.current_open = op
+        if self.current_open is None:
+            self.current_open = op
+        self.current_close = cl
+
+    def evaluate(self):
+        history_c, history_o, C0 = self.history_c, self.history_o, self.current_close
+        if len(history_c) < 10:
+            return None, f"MATRIZ_INCOMPLETA: apenas {len(history_c)} velas"
+        now = self.clock()
+        age = now - (int(now) // 5) * 5
+        recent = history_c[-5:]
+        if (max(recent) - min(recent)) / max(recent) < 0.00008:
+            return None, "LATERAL_BLOQUEADO"
+        momentum = abs(history_c[-1] - history_c[-3])
+        avg_move = sum(abs(history_c[i] - history_c[i - 1]) for i in range(-5, -1)) / 4
+        if avg_move > 0 and momentum > avg_move * 2.5:
+            return None, "MOMENTUM_ESGOTADO"
+        C1, C2, C3, C4, C8 = history_c[-1], history_c[-2], history_c[-3], history_c[-4], history_c[-8]
+        O2, O1 = history_o[-2], history_o[-1]
+        if age < 1.5:
+            range_high, range_low = max(history_c[-3:]), min(history_c[-3:])
+            avg_range_5 = (max(recent) - min(recent)) / 5
+            if C0 > range_high and (C0 - range_high) >= 0.0002:
+                if avg_range_5 <= 0 or (C0 - min(recent)) / avg_range_5 < 0.7:
+                    return "CALL", "FLASH"
+            if C0 < range_low and (range_low - C0) >= 0.0002:
+                if avg_range_5 <= 0 or (max(recent) - C0) / avg_range_5 < 0.7:
+                    return "PUT", "FLASH"
+        if age >= 3.0:
+            return None, f"ENTRADA_TARDIA (Idade {age:.1f}s)"
+        justwin = genind = None
+        if C0 > C2 and C2 > O2 and C4 > C8:
+            justwin = "CALL"
+        elif C0 < C2 and C2 < O2 and C4 < C8:
+            justwin = "PUT"
+        if C0 > C1 and C1 > O1 and C3 > C2:
+            genind = "CALL"
+        elif C0 < C1 and C1 < O1 and C3 < C2:
+            genind = "PUT"
+        if justwin is not None and justwin == genind:
+            return justwin, "DUPLA_CONFIRMACAO"
+        if justwin is not None:
+            return justwin, "JustWin_Solo"
+        if genind is not None:
+            return genind, "GenInd_Solo"
+        return None, ""
+
+
+class TestCandleRing(unittest.TestCase):
+
+    def test_wraparound_matches_list_reference(self):
+        ring = CandleRing(depth=7)
+        referencia = []
+        rng = random.Random(3)
+        for i in range(40):
+            vela = tuple(rng.uniform(4, 6) for _ in range(4)) + (rng.randint(1, 30), float(i))
+            ring.append(*vela)
+            referencia.append(vela)
+            self.assertEqual(len(ring), min(i + 1, 7))
+            for n in (None, 1, 3, 7, 50):
+                esperado = referencia[-min(n or 7, 7):]
+                np.testing.assert_array_equal(ring.view(n), np.array(esperado).T)
+
+    def test_view_is_contiguous_readonly_and_not_a_copy(self):
+        ring = CandleRing(depth=5)
+        for i in range(13):   # escrita atual no meio do buffer: sem a escrita dupla a janela estaria partida
+            ring.append(i, i + 1, i - 1, i + 0.5, 1, i)
+        v = ring.view(5)
+        self.assertTrue(np.shares_memory(v, ring._buf))
+        self.assertTrue(all(linha.flags["C_CONTIGUOUS"] for linha in v))
+        np.testing.assert_array_equal(v[3], [8.5, 9.5, 10.5, 11.5, 12.5])
+        with self.assertRaises(ValueError):
+            v[0, 0] = 99
+        # Uma view de n < depth velas segue válida pelas próximas depth - n inserções
+        curta = ring.view(3)
+        ring.append(13, 14, 12, 13.5, 1, 13)
+        ring.append(14, 15, 13, 14.5, 1, 14)
+        np.testing.assert_array_equal(curta[5], [10, 11, 12])
+
+
+class TestMarketTracker(unittest.TestCase):
+
+    def test_closed_candles_keep_ohlc_and_ticks(self):
+        tracker = MarketTracker(depth=20)
+        ticks = [(5.0, 5.1, 0), (5.0, 5.3, 0), (5.0, 4.9, 0), (5.0, 5.2, 0), (5.2, 5.25, 1), (5.2, 5.1, 2)]
+        novas = [tracker.update_robust(7, op, cl, t) for op, cl, t in ticks]
+        self.assertEqual(novas, [False, False, False, False, True, True])
+        velas = tracker.get_candles(7)
+        np.testing.assert_array_equal(velas.T, [[5.0, 5.3, 4.9, 5.2, 4, 0], [5.2, 5.25, 5.25, 5.25, 1, 1]])
+        self.assertEqual(tracker.get_current_close(7), 5.1)
+        self.assertEqual(tracker.get_color_ticks(7), ("RED", 1))
+        self.assertIsNone(tracker.get_candles(8))
+        with self.assertRaises(ValueError):
+            MarketTracker(depth=10)
+        with self.assertRaises(ValueError):
+            MarketTracker(params={"nao_existe": 1})
+
+    def test_scripts_match_list_implementation(self):
+        rng = random.Random(11)
+        agora = [0.0]
+        relogio = lambda: agora[0]
+        tracker = MarketTracker(depth=12, clock=relogio)   # depth pequeno: o ring dá várias voltas
+        referencia = TrackerLista(relogio)
+        preco, candle_time = 5.0, 0
+        vistos = {}
+        for _ in range(20000):
+            if rng.random() < 0.3:
+                candle_time += 1
+            passo = rng.choice((0.00002, 0.0001, 0.0004))
+            preco = max(3.5, min(6.5, preco + rng.gauss(0, passo)))
+            op = preco + rng.gauss(0, passo)
+            tracker.update_robust(1, op, preco, candle_time)
+            referencia.update(op, preco, candle_time)
+            agora[0] = candle_time * 5 + rng.uniform(0, 5)
+            resultado = tracker.evaluate_scripts(1)
+            self.assertEqual(resultado, referencia.evaluate())
+            nome = resultado[1].split(" ")[0].split(":")[0]
+            vistos[nome] = vistos.get(nome, 0) + 1
+        # A sequência aleatória passa por todos os ramos dos scripts
+        for nome in ("LATERAL_BLOQUEADO", "MOMENTUM_ESGOTADO", "FLASH", "ENTRADA_TARDIA", "DUPLA_CONFIRMACAO",
+                     "JustWin_Solo", "GenInd_Solo"):
+            self.assertGreater(vistos.get(nome, 0), 0, nome)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Testes da Gravação de Frames e do Backtest do Módulo Alpha
+Ida e volta FrameRecorder → read_frames, leitura tolerante a cauda cortada e truncamento
+da cauda ao reabrir o arquivo; replay() de um pump com reversão gravado em arquivo e
+run_grid() em processos contra o replay serial
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from dataclasses import asdict
+
+from alpha_backtest import SimClock, _replay_worker, expand_grid, replay, run_grid
+from alpha_module import FrameRecorder, read_frames
+
+FRAMES = [
+    (1700000000.125, '{"name":"candle-generated","msg":{"open":5.1,"close":5.2}}'),
+    (1700000000.5, '{"name":"heartbeat","msg":1}'),
+    (1700000001.0, ''),
+    (1700000002.75, '{"name":"ação","msg":"preço ↑"}'),
+]
+
+
+class TestFrameRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.caminho = os.path.join(self.tmp.name, "frames.bin")
+
+    def gravar(self, frames):
+        recorder = FrameRecorder(self.caminho)
+        for ts, payload in frames:
+            recorder.write(ts, payload)
+        recorder.close()
+        recorder.write(0.0, "depois de fechar")   # ignorado
+        return recorder
+
+    def test_roundtrip(self):
+        recorder = self.gravar(FRAMES)
+        self.assertEqual(recorder.frames, len(FRAMES))
+        self.assertEqual(list(read_frames(self.caminho)), FRAMES)
+        # Reabrir anexa ao final
+        self.gravar(FRAMES[:1])
+        self.assertEqual(list(read_frames(self.caminho)), FRAMES + FRAMES[:1])
+
+    def test_torn_tail(self):
+        self.gravar(FRAMES)
+        completo = os.path.getsize(self.caminho)
+        for corte in (3, 12, 20):   # no meio do cabeçalho, logo após ele e no meio do corpo
+            with self.subTest(corte=corte):
+                with open(self.caminho, "r+b") as f:
+                    f.truncate(completo - len(FRAMES[-1][1].encode("utf-8")) - 12 + corte)
+                self.assertEqual(list(read_frames(self.caminho)), FRAMES[:-1])
+
+                recorder = self.gravar(FRAMES[-1:])
+                self.assertEqual(recorder.truncated_bytes, corte)
+                self.assertEqual(list(read_frames(self.caminho)), FRAMES)
+                self.assertEqual(os.path.getsize(self.caminho), completo)
+
+
+T0 = 1000.0   # início de vela (velas de 5 s)
+
+
+def tick(op, cl):
+    return json.dumps({"name": "candle-generated", "msg": {"active_id": 76, "open": op, "close": cl}})
+
+
+def pump_com_reversao():
+    """
+    11 velas doji alternando 5.000/5.001 (sem sinal), um pump para 5.0025 que rompe a máxima
+    das últimas 3 velas em 0.0005, a reversão para 4.998 (rompe a mínima em 0.002) e uma cauda
+    em 4.9979. O primeiro tick de cada vela chega aos 0.05 s e as avaliações caem aos 0.1 s
+    """
+    frames = [(T0 - 4.9, '{"name":"heartbeat","msg":1}')]
+
+    def vela(n, ticks):
+        for idade, (op, cl) in zip((0.05, 1.0, 2.0, 3.0, 4.0), ticks):
+            frames.append((T0 + 5 * n + idade, tick(op, cl)))
+
+    for n in range(11):
+        nivel = 5.001 if n % 2 else 5.000
+        vela(n, [(nivel, nivel)] * 5)
+    vela(11, [(5.0, 5.0015), (5.0, 5.002), (5.0, 5.0025), (5.0, 5.0025), (5.0, 5.0025)])
+    vela(12, [(4.998, 4.998)] * 5)
+    for n in range(13, 17):
+        vela(n, [(4.9979, 4.9979)] * 5)
+    return frames
+
+
+TEMPOS = ("eval_us_p50", "eval_us_p99", "wall_seconds", "ticks_per_s", "speedup")
+
+
+def sem_tempos(resultado):
+    """Campos determinísticos do BacktestResult (sem as medidas de tempo real)"""
+    dados = asdict(resultado)
+    for campo in TEMPOS:
+        dados.pop(campo)
+    return dados
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.caminho = os.path.join(self.tmp.name, "pump.bin")
+        recorder = FrameRecorder(self.caminho)
+        for ts, payload in pump_com_reversao():
+            recorder.write(ts, payload)
+        recorder.close()
+
+    def test_sim_clock(self):
+        clock = SimClock(5.0)
+        self.assertEqual(clock(), 5.0)
+        clock.now = 7.5
+        self.assertEqual(clock(), 7.5)
+
+    def test_default_params_block_exhausted_pump(self):
+        # Pump de 7.5x a amplitude média: acima do flash_exhaustion padrão (0.7), não entra
+        r = replay(self.caminho, expiry_s=10)
+        self.assertEqual((r.frames, r.ticks, r.signals), (86, 85, 0))
+        self.assertIsNone(r.hit_rate)
+        self.assertEqual(r.by_signal, {})
+        self.assertAlmostEqual(r.sim_seconds, 88.9)
+
+    def test_pump_then_reversal_signals(self):
+        # CALL no pump (entrada 5.0015, sai em 4.9979: perde) e PUT na reversão (4.998 → 4.9979: ganha)
+        r = replay(self.caminho, {"flash_exhaustion": 10}, expiry_s=10)
+        self.assertEqual((r.signals, r.wins, r.losses, r.unresolved), (2, 1, 1, 0))
+        self.assertEqual(r.hit_rate, 0.5)
+        self.assertEqual(r.by_signal, {"FLASH": {"trades": 2, "wins": 1, "hit_rate": 0.5}})
+        self.assertEqual((r.signal_age_ms_p50, r.signal_age_ms_p90), (100.0, 100.0))
+        self.assertIsNotNone(r.eval_us_p99)
+
+        # Rompimento mínimo acima do pump (0.0005) e abaixo da reversão (0.002): só o PUT
+        r = replay(self.caminho, {"flash_exhaustion": 10, "flash_min_breakout": 0.001}, expiry_s=10)
+        self.assertEqual((r.signals, r.wins, r.losses, r.hit_rate), (1, 1, 0, 1.0))
+
+        # Expiração depois do fim do arquivo: as operações ficam em aberto
+        r = replay(self.caminho, {"flash_exhaustion": 10}, expiry_s=1000)
+        self.assertEqual((r.signals, r.wins, r.losses, r.unresolved), (2, 0, 0, 2))
+        self.assertIsNone(r.hit_rate)
+
+    def test_expand_grid_is_full_product(self):
+        grid = {"flash_exhaustion": [0.7, 10], "flash_min_breakout": [0.0002, 0.001], "late_entry_s": [3.0]}
+        combinacoes = expand_grid(grid)
+        self.assertEqual(len(combinacoes), 4)
+        self.assertEqual({tuple(sorted(c.items())) for c in combinacoes},
+                         {(("flash_exhaustion", e), ("flash_min_breakout", b), ("late_entry_s", 3.0))
+                          for e in (0.7, 10) for b in (0.0002, 0.001)})
+        self.assertEqual(expand_grid({}), [{}])
+
+    def test_run_grid_in_processes_matches_serial_replay(self):
+        param_sets = expand_grid({"flash_exhaustion": [0.7, 10], "flash_min_breakout": [0.0002, 0.001]})
+        paralelo = run_grid(self.caminho, param_sets, workers=2, expiry_s=10)
+        serial = {json.dumps(p, sort_keys=True): sem_tempos(replay(self.caminho, p, expiry_s=10))
+                  for p in param_sets}
+        self.assertEqual(len(paralelo), len(param_sets))
+        for r in paralelo:
+            self.assertEqual(sem_tempos(r), serial[json.dumps(r.params, sort_keys=True)])
+        # Ordenado por hit rate: PUT sozinho (100%) na frente
+        self.assertEqual(paralelo[0].hit_rate, 1.0)
+        self.assertEqual(sem_tempos(_replay_worker((self.caminho, param_sets[-1], {"expiry_s": 10}))),
+                         serial[json.dumps(param_sets[-1], sort_keys=True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Testes da Série de Preços do Dashboard
+Merge incremental de velas, vela em formação e SMAs contra o rolling do pandas
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from trading.ui.chart_widget import PriceSeries
+
+MINUTO_MS = 60_000
+T0 = 1_700_000_000_000 // MINUTO_MS * MINUTO_MS
+
+
+def row(i, close):
+    open_time = T0 + i * MINUTO_MS
+    return [open_time, str(close), str(close), str(close), str(close), "1", open_time + MINUTO_MS - 1]
+
+
+class TestPriceSeries(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.closes = list(100 + np.cumsum(rng.normal(0, 0.5, 200)))
+
+    def test_incremental_smas_match_pandas_rolling(self):
+        series = PriceSeries("X", depth=50)
+        # Carga inicial (50 velas, a última em formação) e depois um minuto por vez
+        series.merge([row(i, self.closes[i]) for i in range(50)], now_ms=T0 + 49 * MINUTO_MS + 1)
+        for i in range(50, 120):
+            now = T0 + i * MINUTO_MS + 1
+            # o fetch incremental repete a vela que estava em formação, agora fechada
+            series.merge([row(i - 1, self.closes[i - 1]), row(i, self.closes[i])], now_ms=now)
+
+        times, closes, smas = series.arrays()
+        self.assertEqual(len(times), 50)
+        self.assertEqual(times[-1], T0 + 119 * MINUTO_MS)
+        expected = pd.Series(self.closes[:120])
+        np.testing.assert_allclose(closes, expected.iloc[-50:].to_numpy())
+        for period in (13, 21):
+            reference = expected.rolling(period).mean().iloc[-50:].to_numpy()
+            np.testing.assert_allclose(smas[period], reference, rtol=1e-9)
+
+    def test_live_candle_updates_in_place(self):
+        series = PriceSeries("X", depth=10, sma_periods=(3,))
+        series.merge([row(i, 10.0 + i) for i in range(5)], now_ms=T0 + 4 * MINUTO_MS + 1)
+        self.assertEqual(series.next_start_time(), T0 + 4 * MINUTO_MS)
+        version = series.version
+
+        self.assertTrue(series.merge([row(4, 20.0)], now_ms=T0 + 4 * MINUTO_MS + 2))
+        self.assertFalse(series.merge([row(4, 20.0)], now_ms=T0 + 4 * MINUTO_MS + 3))
+        self.assertEqual(series.version, version + 1)
+        times, closes, smas = series.arrays()
+        self.assertEqual(len(closes), 5)
+        self.assertEqual(closes[-1], 20.0)
+        self.assertAlmostEqual(smas[3][-1], (12.0 + 13.0 + 20.0) / 3)
+        self.assertEqual(series.last_price(), 20.0)
+
+    def test_stale_series_is_reloaded(self):
+        series = PriceSeries("X", depth=50)
+        series.merge([row(i, self.closes[i]) for i in range(50)], now_ms=T0 + 49 * MINUTO_MS + 1)
+        # Lacuna menor que a janela: o fetch incremental alcança tudo de uma vez
+        self.assertFalse(series.is_stale(T0 + 98 * MINUTO_MS + 1))
+        # Símbolo revisitado 100 minutos depois: startTime antigo traria velas já fechadas
+        now = T0 + 149 * MINUTO_MS + 1
+        self.assertTrue(series.is_stale(now))
+        version = series.version
+        series.reset()
+        self.assertIsNone(series.next_start_time())
+        self.assertIsNone(series.last_price())
+        self.assertGreater(series.version, version)
+
+        series.merge([row(i, self.closes[i]) for i in range(100, 150)], now_ms=now)
+        self.assertEqual(series.last_price(), self.closes[149])
+        times, closes, smas = series.arrays()
+        self.assertEqual(times[0], T0 + 100 * MINUTO_MS)
+        self.assertEqual(times[-1], T0 + 149 * MINUTO_MS)
+        # As SMAs recomeçam na janela nova em vez de atravessar a lacuna
+        reference = pd.Series(self.closes[100:150]).rolling(21).mean().to_numpy()
+        np.testing.assert_allclose([np.nan if v is None else v for v in smas[21]], reference, rtol=1e-9)
+        self.assertFalse(series.is_stale(now))
+
+    def test_initial_smas_are_undefined(self):
+        series = PriceSeries("X", depth=50)
+        series.merge([row(i, self.closes[i]) for i in range(30)], now_ms=T0 + 30 * MINUTO_MS)
+        _, _, smas = series.arrays()
+        self.assertEqual(sum(v is None for v in smas[21]), 20)
+        self.assertEqual(sum(v is None for v in smas[13]), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Testes do Histórico de Conversa
+INSERT por troca, últimas N, busca textual, migração do JSON antigo e escrita concorrente
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from core.chat_history import ChatHistory
+
+
+class TestChatHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmp.name, "logs", "historico.db")
+        self.historico = ChatHistory(self.db)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.historico.fechar)
+
+    def test_last_n_keeps_everything_on_disk(self):
+        for i in range(150):
+            self.historico.adicionar(f"pergunta {i}", f"resposta {i}")
+        self.assertEqual(self.historico.total(), 150)
+        ultimas = self.historico.ultimas(3)
+        self.assertEqual([u["teddy"] for u in ultimas], ["pergunta 147", "pergunta 148", "pergunta 149"])
+        self.assertEqual(self.historico.contexto(1), ["Teddy: pergunta 149", "R2: resposta 149"])
+
+    def test_search_matches_both_sides(self):
+        self.historico.adicionar("como está o clima espacial?", "Vento solar calmo, índice Kp 2.")
+        self.historico.adicionar("abre o radar", "Radar aéreo de Ivinhema gerado.")
+        self.historico.adicionar("e a previsão solar?", "Sem tempestades previstas.")
+
+        self.assertEqual([r["teddy"] for r in self.historico.buscar("radar")], ["abre o radar"])
+        self.assertEqual(len(self.historico.buscar("solar")), 2)
+        self.assertEqual(self.historico.buscar("solar calmo")[0]["r2"], "Vento solar calmo, índice Kp 2.")
+        self.assertEqual(self.historico.buscar('"; DROP'), [])
+        self.assertEqual(self.historico.buscar("   "), [])
+
+    def test_legacy_json_is_imported_once(self):
+        legado = os.path.join(self.tmp.name, "historico_chat.json")
+        with open(legado, "w", encoding="utf-8") as f:
+            json.dump([{"timestamp": "2024-01-01 10:00:00", "teddy": "oi", "r2": "olá"}], f)
+        db = os.path.join(self.tmp.name, "migrado.db")
+        primeira = ChatHistory(db, legacy_json=legado)
+        primeira.fechar()
+        segunda = ChatHistory(db, legacy_json=legado)
+        self.addCleanup(segunda.fechar)
+        self.assertEqual(segunda.total(), 1)
+        self.assertEqual(segunda.ultimas(1)[0]["timestamp"], "2024-01-01 10:00:00")
+
+    def test_concurrent_writers(self):
+        def escrever(t):
+            for i in range(50):
+                self.historico.adicionar(f"t{t} {i}", "ok")
+
+        threads = [threading.Thread(target=escrever, args=(t,)) for t in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.historico.total(), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Testes da Trilha de Rosto
+Divisão em trechos por processo, linha do tempo suavizada por segundo, centro de recorte de
+cada corte e a trilha guardada no cache ao lado da transcrição
+"""
+
+import os
+import tempfile
+import unittest
+
+from utils.face_track import centro_corte, dividir_trechos, suavizar
+from utils.transcript_cache import TranscriptCache
+
+
+class TestFaceTrack(unittest.TestCase):
+
+    def test_shards_cover_video(self):
+        self.assertEqual(dividir_trechos(90, 4), [(0.0, 90)])
+        trechos = dividir_trechos(1000, 4)
+        self.assertEqual(len(trechos), 4)
+        self.assertEqual(trechos[0][0], 0.0)
+        self.assertEqual(trechos[-1][1], 1000)
+        for anterior, atual in zip(trechos, trechos[1:]):
+            self.assertEqual(anterior[1], atual[0])
+
+    def test_timeline_fills_gaps_and_drops_outliers(self):
+        # Rosto à esquerda até 10 s, à direita depois; um falso positivo isolado aos 4 s
+        deteccoes = [(t + 0.25, 0.3, 0.05) for t in range(0, 10) if t != 4]
+        deteccoes += [(4.5, 0.9, 0.01), (4.6, 0.3, 0.0)]
+        deteccoes += [(t + 0.5, 0.7, 0.05) for t in range(12, 20)]
+        linha = suavizar(deteccoes, 20.0)
+        self.assertEqual(len(linha), 20)
+        self.assertEqual(linha[4], 0.3)
+        self.assertEqual(linha[2], 0.3)
+        self.assertEqual(linha[17], 0.7)
+        # Segundos 10–11 sem rosto herdam o vizinho mais próximo
+        self.assertIsNotNone(linha[10])
+        self.assertEqual(suavizar([], 5.0), [None] * 5)
+
+    def test_cut_center_reads_timeline(self):
+        trilha = {"por_segundo": [0.25] * 10 + [None] * 5 + [0.75] * 10}
+        self.assertEqual(centro_corte(trilha, 0, 8, 1920), 480.0)
+        self.assertEqual(centro_corte(trilha, 15.5, 22, 1920), 1440.0)
+        self.assertIsNone(centro_corte(trilha, 11, 14, 1920))
+        self.assertIsNone(centro_corte({"por_segundo": []}, 0, 8, 1920))
+
+    def test_track_cached_next_to_transcript(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            cache = TranscriptCache(os.path.join(pasta, "transcricoes"))
+            self.assertIsNone(cache.get_artefato("yt:x", "rosto:v1"))
+            trilha = {"versao": 1, "por_segundo": [0.5, None, 0.4]}
+            cache.put_artefato("yt:x", "rosto:v1", trilha)
+            cache.put("yt:x", "base", [{"start": 0.0, "end": 1.0, "text": " oi"}])
+            recarregado = TranscriptCache(os.path.join(pasta, "transcricoes"))
+            self.assertEqual(recarregado.get_artefato("yt:x", "rosto:v1"), trilha)
+            self.assertIsNone(recarregado.get_artefato("yt:x", "rosto:v2"))
+            self.assertEqual(len(recarregado.get("yt:x")["segments"]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Testes do Grafo de Render FFmpeg
+Recorte 9:16, montagem do filter_complex com uma entrada por corte, legendas ASS na linha do
+tempo concatenada e escape de caminhos no grafo
+"""
+
+import unittest
+
+from utils.ffmpeg_graph import (blocos_legenda, cor_ass, escapar_caminho_filtro, geometria_crop, gerar_ass,
+                                job_cortes, montar_grafo)
+from utils.render_scheduler import RenderScheduler
+
+SEGMENTOS = [
+    {"start": 10.0, "end": 14.0, "text": " um dois três quatro cinco seis sete"},
+    {"start": 30.0, "end": 31.0, "text": " fora do corte"},
+    {"start": 62.0, "end": 64.0, "text": " segundo corte"},
+]
+CORTES = [{"start": 9.0, "end": 20.0}, {"start": 60.0, "end": 70.0}]
+
+
+class TestFfmpegGraph(unittest.TestCase):
+
+    def test_crop_geometry(self):
+        largura, altura, xs = geometria_crop(1920, 1080, [None, 100.0, 1900.0, 960.0])
+        self.assertEqual((largura, altura), (606, 1080))
+        self.assertEqual(xs, [657, 0, 1314, 657])
+        # Fonte já vertical: recorte limitado à largura da fonte
+        self.assertEqual(geometria_crop(720, 1281, [None])[:2], (720, 1280))
+
+    def test_subtitle_blocks(self):
+        blocos = list(blocos_legenda(SEGMENTOS, 9.0, 20.0))
+        self.assertEqual([b[0] for b in blocos], ["UM DOIS TRÊS QUATRO CINCO", "SEIS SETE"])
+        self.assertEqual(blocos[0][1:], (1.0, 3.0))
+        self.assertEqual(blocos[1][1:], (3.0, 5.0))
+
+    def test_ass_timeline_follows_concatenation(self):
+        ass = gerar_ass(SEGMENTOS, CORTES, 606, 1080, y_pixels=864, tamanho=48,
+                        cor_texto="#ff8800", cor_fundo="transparent")
+        self.assertIn("PlayResX: 606", ass)
+        self.assertIn("&H000088FF", ass)
+        dialogos = [l for l in ass.splitlines() if l.startswith("Dialogue:")]
+        self.assertEqual(len(dialogos), 3)
+        self.assertTrue(dialogos[0].startswith("Dialogue: 0,0:00:01.00,0:00:03.00,Viral"))
+        # Segundo corte começa após os 11 s do primeiro: 62 s da fonte → 11 + 2 = 13 s
+        self.assertTrue(dialogos[2].startswith("Dialogue: 0,0:00:13.00,0:00:15.00,Viral"))
+        self.assertIn("{\\pos(303,864)\\fad(100,100)}SEGUNDO CORTE", dialogos[2])
+        caixa = gerar_ass(SEGMENTOS, CORTES, 606, 1080, 864, 48, "yellow", "black")
+        estilo = next(l for l in caixa.splitlines() if l.startswith("Style:")).split(",")
+        self.assertEqual(estilo[15], "3")   # BorderStyle 3 = caixa opaca
+        self.assertEqual(cor_ass("yellow"), "&H0000FFFF")
+
+    def test_graph_uses_one_seeked_input_per_cut(self):
+        entradas, filtro, mapas = montar_grafo(CORTES, [657, 100], 606, 1080, tem_audio=True,
+                                               arquivo_ass="temp_video/leg.ass")
+        self.assertEqual(entradas, [["-ss", "9.000", "-t", "11.000"], ["-ss", "60.000", "-t", "10.000"]])
+        self.assertIn("[1:v]crop=606:1080:100:0", filtro)
+        self.assertIn("[v0][a0][v1][a1]concat=n=2:v=1:a=1[vc][aout]", filtro)
+        self.assertTrue(filtro.endswith("[vc]ass=temp_video/leg.ass[vout]"))
+        self.assertEqual(mapas, ["-map", "[vout]", "-map", "[aout]"])
+
+        _, mudo, mapas = montar_grafo(CORTES, [0, 0], 606, 1080, tem_audio=False)
+        self.assertNotIn(":a]", mudo)
+        self.assertIn("concat=n=2:v=1:a=0[vout]", mudo)
+        self.assertEqual(mapas, ["-map", "[vout]"])
+
+    def test_job_command(self):
+        job = job_cortes("x", "fonte.mp4", "saida.mp4", CORTES, [0, 0], 606, 1080)
+        self.assertEqual(job.duracao_s, 21.0)
+        cmd = RenderScheduler(ffmpeg="ffmpeg").comando(job, threads=4)
+        self.assertEqual(cmd.count("-i"), 2)
+        self.assertEqual(cmd[cmd.index("-i") - 4:cmd.index("-i") + 2],
+                         ["-ss", "9.000", "-t", "11.000", "-i", "fonte.mp4"])
+        self.assertEqual(cmd[-1], "saida.mp4")
+        self.assertIn("-filter_complex", cmd)
+
+    def test_filter_path_escaping(self):
+        self.assertEqual(escapar_caminho_filtro("temp/leg.ass"), "temp/leg.ass")
+        self.assertEqual(escapar_caminho_filtro("C:\\r2\\leg.ass"), "C\\\\:/r2/leg.ass")
+        self.assertEqual(escapar_caminho_filtro("a'b,c.ass"), "a\\\\\\'b\\,c.ass")
+
+
+if __name__ == '__main__':
+    unittest.main()
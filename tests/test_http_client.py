@@ -0,0 +1,169 @@
+"""
+Testes do Transporte HTTP Compartilhado
+HttpClient contra um servidor HTTP local: retry, GET condicional, coalescência, rate limit e métricas
+"""
+
+import socket
+import threading
+import time
+import unittest
+from collections import Counter
+
+import requests
+
+from http_stub import StubHandler, start_stub
+from utils.http_client import HttpClient, TokenBucket
+
+
+class StubState:
+    def __init__(self):
+        self.hits = Counter()
+        self.conditional = Counter()
+        self.flaky_failures = 2
+        self.lock = threading.Lock()
+
+
+class Handler(StubHandler):
+
+    def do_GET(self):
+        state = self.state
+        path = self.path.split("?")[0]
+        with state.lock:
+            state.hits[path] += 1
+            hit = state.hits[path]
+        if path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                state.conditional[path] += 1
+                return self._reply(304, headers={"ETag": '"v1"'})
+            return self._reply(200, b'{"versao": 1}', {"ETag": '"v1"', "Content-Type": "application/json"})
+        if path == "/lastmod":
+            stamp = "Wed, 21 Oct 2026 07:28:00 GMT"
+            if self.headers.get("If-Modified-Since") == stamp:
+                state.conditional[path] += 1
+                return self._reply(304)
+            return self._reply(200, b"conteudo", {"Last-Modified": stamp})
+        if path.startswith("/big/"):
+            etag = '"%s"' % path[-1]
+            if self.headers.get("If-None-Match") == etag:
+                state.conditional[path] += 1
+                return self._reply(304, headers={"ETag": etag})
+            return self._reply(200, path[-1].encode() * 1000, {"ETag": etag})
+        if path == "/flaky":
+            if hit <= state.flaky_failures:
+                return self._reply(503, headers={"Retry-After": "0"})
+            return self._reply(200, b"ok")
+        if path == "/slow":
+            time.sleep(0.3)
+            return self._reply(200, str(hit).encode())
+        return self._reply(200, b"ok")
+
+    def do_POST(self):
+        with self.state.lock:
+            self.state.hits["POST " + self.path] += 1
+        self._reply(503)
+
+
+class TestHttpClient(unittest.TestCase):
+
+    def setUp(self):
+        self.state = StubState()
+        stub = start_stub(self, Handler, self.state)
+        self.host, self.base = stub.host, stub.base
+        self.http = HttpClient(backoff_base=0.01, backoff_max=0.05)
+
+    def tearDown(self):
+        self.http.close()
+
+    def test_retry_on_503(self):
+        r = self.http.get(f"{self.base}/flaky", attempts=3)
+        self.assertEqual(r.status_code, 200)
+        stats = self.http.get_stats()[self.host]
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["5xx"], 2)
+        self.assertIn("latencia_p50_ms", stats)
+
+    def test_retry_gives_up_with_last_response(self):
+        self.state.flaky_failures = 10
+        r = self.http.get(f"{self.base}/flaky", attempts=2)
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(self.state.hits["/flaky"], 2)
+
+    def test_post_is_not_retried(self):
+        r = self.http.post(f"{self.base}/order", data="x=1")
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(self.state.hits["POST /order"], 1)
+
+    def test_conditional_get_etag(self):
+        first = self.http.get(f"{self.base}/etag")
+        second = self.http.get(f"{self.base}/etag")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), {"versao": 1})
+        self.assertIsNot(second, first)   # recriada do corpo guardado, sem a conexão da primeira
+        self.assertEqual(second.headers["etag"], '"v1"')
+        self.assertEqual(second.url, first.url)
+        self.assertEqual(self.state.conditional["/etag"], 1)
+        self.assertEqual(self.http.get_stats()[self.host]["nao_modificado"], 1)
+
+    def test_conditional_get_last_modified(self):
+        self.http.get(f"{self.base}/lastmod")
+        second = self.http.get(f"{self.base}/lastmod")
+        self.assertEqual(second.text, "conteudo")
+        self.assertEqual(self.state.conditional["/lastmod"], 1)
+
+    def test_validator_cache_is_capped_by_bytes(self):
+        http = HttpClient(validators_max_bytes=3500)
+        self.addCleanup(http.close)
+        for i in range(3):
+            http.get(f"{self.base}/big/{i}")   # 1000 bytes cada, com ETag
+        self.assertEqual(http._validators_bytes, 3000)
+        http.get(f"{self.base}/big/0")         # revalida e vira o mais recente
+        http.get(f"{self.base}/big/3")         # despeja o menos usado (/big/1)
+        self.assertEqual(list(http._validators), [f"{self.base}/big/{i}" for i in (2, 0, 3)])
+        self.assertEqual(http._validators_bytes, 3000)
+        self.assertEqual(self.state.conditional["/big/0"], 1)
+        self.assertEqual(http.get(f"{self.base}/big/0").content, b"0" * 1000)
+
+    def test_identical_inflight_requests_are_coalesced(self):
+        results = []
+
+        def fetch():
+            results.append(self.http.get(f"{self.base}/slow", params={"a": 1}).text)
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(self.state.hits["/slow"], 1)
+        self.assertEqual(results, ["1"] * 5)
+        self.assertEqual(self.http.get_stats()[self.host]["coalescidas"], 4)
+
+    def test_rate_limit_per_host(self):
+        self.http.set_rate_limit(self.host, rate=20, burst=1)
+        t0 = time.perf_counter()
+        for _ in range(6):
+            self.http.get(f"{self.base}/ok", conditional=False)
+        self.assertGreaterEqual(time.perf_counter() - t0, 5 / 20 * 0.9)
+        self.assertGreater(self.http.get_stats()[self.host]["espera_rate_limit_s"], 0)
+
+    def test_connection_error_raises_after_attempts(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        with self.assertRaises(requests.ConnectionError):
+            self.http.get(f"http://127.0.0.1:{port}/x", attempts=2, timeout=1)
+        stats = self.http.get_stats()[f"127.0.0.1:{port}"]
+        self.assertEqual(stats["erros"], 2)
+        self.assertEqual(stats["retries"], 1)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=50, burst=3)
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertGreater(bucket.acquire(), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+"""
+Testes dos Indicadores de Trading
+Paridade do motor incremental e do modo batch (NumPy) com as implementações pandas
+"""
+
+import unittest
+
+import numpy as np
+
+from trading.indicators.sma import calculate_sma, calculate_ema
+from trading.indicators.rsi import calculate_rsi
+from trading.indicators.macd import calculate_macd
+from trading.indicators.incremental import (
+    SMA, EMA, RSI, MACD, Bollinger,
+    sma_batch, ema_batch, rsi_batch, macd_batch, bollinger_batch, rsi_last,
+)
+
+
+def random_walk(n, start=30000.0, seed=7):
+    rng = np.random.default_rng(seed)
+    return list(start + np.cumsum(rng.normal(0, start * 0.001, n)))
+
+
+def wilder_reference(prices, period):
+    """RSI de Wilder escrito da forma mais literal possível."""
+    deltas = [b - a for a, b in zip(prices, prices[1:])]
+    gains = [max(d, 0.0) for d in deltas]
+    losses = [max(-d, 0.0) for d in deltas]
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+    out = [None] * period
+
+    def rsi(g, l):
+        if l == 0:
+            return 50.0 if g == 0 else 100.0
+        return 100 - 100 / (1 + g / l)
+
+    out.append(rsi(avg_gain, avg_loss))
+    for g, l in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + g) / period
+        avg_loss = (avg_loss * (period - 1) + l) / period
+        out.append(rsi(avg_gain, avg_loss))
+    return out
+
+
+class TestIncrementalParity(unittest.TestCase):
+    """O estado incremental deve bater com a função pandas em cada prefixo da série"""
+
+    def setUp(self):
+        self.prices = random_walk(300)
+
+    def test_sma(self):
+        ind = SMA(21)
+        for i, p in enumerate(self.prices, 1):
+            self.assertAlmostEqual(ind.update(p) or 0.0, calculate_sma(self.prices[:i], 21) or 0.0, places=6)
+
+    def test_sma_peek_does_not_change_state(self):
+        ind = SMA(5)
+        for i, p in enumerate(self.prices[:40], 1):
+            preview = ind.peek(p)
+            self.assertEqual(len(ind.window), min(i - 1, 5))
+            value = ind.update(p)
+            if value is None:
+                self.assertIsNone(preview)
+            else:
+                self.assertAlmostEqual(preview, value, places=9)
+
+    def test_ema(self):
+        ind = EMA(13)
+        for i, p in enumerate(self.prices, 1):
+            expected = calculate_ema(self.prices[:i], 13)
+            got = ind.update(p)
+            if expected is None:
+                self.assertIsNone(got)
+            else:
+                self.assertAlmostEqual(got, expected, places=6)
+
+    def test_rsi_sma_matches_calculate_rsi(self):
+        ind = RSI(14, method="sma")
+        for i, p in enumerate(self.prices, 1):
+            expected = calculate_rsi(self.prices[:i], 14)
+            got = ind.update(p)
+            if expected is None:
+                self.assertIsNone(got)
+            else:
+                self.assertAlmostEqual(got, expected, places=6)
+                self.assertAlmostEqual(rsi_last(self.prices[:i], 14), expected, places=6)
+
+    def test_rsi_wilder(self):
+        ind = RSI(14)
+        expected = wilder_reference(self.prices, 14)
+        for p, e in zip(self.prices, expected):
+            got = ind.update(p)
+            if e is None:
+                self.assertIsNone(got)
+            else:
+                self.assertAlmostEqual(got, e, places=8)
+
+    def test_macd(self):
+        ind = MACD()
+        for i, p in enumerate(self.prices, 1):
+            expected = calculate_macd(self.prices[:i])
+            got = ind.update(p)
+            for g, e in zip(got, expected):
+                if e is None:
+                    self.assertIsNone(g)
+                else:
+                    self.assertAlmostEqual(g, e, places=6)
+
+    def test_bollinger(self):
+        import pandas as pd
+        close = pd.Series(self.prices)
+        mid = close.rolling(20).mean()
+        std = close.rolling(20).std()
+        ind = Bollinger(20, 2.0)
+        for i, p in enumerate(self.prices):
+            upper, middle, lower = ind.update(p)
+            if i < 19:
+                self.assertIsNone(middle)
+                continue
+            self.assertAlmostEqual(middle, mid.iloc[i], places=6)
+            self.assertAlmostEqual(upper, mid.iloc[i] + 2 * std.iloc[i], places=6)
+            self.assertAlmostEqual(lower, mid.iloc[i] - 2 * std.iloc[i], places=6)
+
+    def test_rsi_flat_market(self):
+        ind = RSI(14, method="sma")
+        for _ in range(20):
+            value = ind.update(100.0)
+        self.assertEqual(value, calculate_rsi([100.0] * 20, 14))
+
+
+class TestBatchParity(unittest.TestCase):
+    """Modo batch sobre históricos longos contra pandas"""
+
+    def setUp(self):
+        import pandas as pd
+        self.pd = pd
+        self.prices = np.array(random_walk(5000, seed=11))
+        self.close = pd.Series(self.prices)
+
+    def assertSeriesClose(self, got, expected):
+        expected = np.asarray(expected, dtype=np.float64)
+        np.testing.assert_array_equal(np.isnan(got), np.isnan(expected))
+        mask = ~np.isnan(expected)
+        np.testing.assert_allclose(got[mask], expected[mask], rtol=1e-9, atol=1e-7)
+
+    def test_sma_batch(self):
+        self.assertSeriesClose(sma_batch(self.prices, 21), self.close.rolling(21).mean())
+
+    def test_ema_batch(self):
+        expected = self.close.ewm(span=13, adjust=False).mean().to_numpy().copy()
+        expected[:12] = np.nan
+        self.assertSeriesClose(ema_batch(self.prices, 13), expected)
+
+    def test_ema_batch_short_period(self):
+        expected = self.close.ewm(span=2, adjust=False).mean().to_numpy().copy()
+        expected[:1] = np.nan
+        self.assertSeriesClose(ema_batch(self.prices, 2), expected)
+
+    def test_rsi_batch_sma(self):
+        delta = self.close.diff()
+        gain = delta.where(delta > 0, 0).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        expected = (100 - 100 / (1 + gain / loss)).to_numpy().copy()
+        # where() troca o primeiro delta (NaN) por 0; calculate_rsi só usa a partir de period+1 preços
+        expected[:14] = np.nan
+        self.assertSeriesClose(rsi_batch(self.prices, 14, method="sma"), expected)
+
+    def test_rsi_batch_wilder(self):
+        expected = np.array([np.nan if v is None else v for v in wilder_reference(list(self.prices), 14)])
+        self.assertSeriesClose(rsi_batch(self.prices, 14), expected)
+
+    def test_macd_batch(self):
+        macd, signal, hist = macd_batch(self.prices)
+        exp_macd = self.close.ewm(span=12, adjust=False).mean() - self.close.ewm(span=26, adjust=False).mean()
+        exp_signal = exp_macd.ewm(span=9, adjust=False).mean()
+        for got, expected in ((macd, exp_macd), (signal, exp_signal), (hist, exp_macd - exp_signal)):
+            expected = expected.to_numpy().copy()
+            expected[:34] = np.nan
+            self.assertSeriesClose(got, expected)
+        self.assertAlmostEqual(macd[-1], calculate_macd(list(self.prices))[0], places=6)
+
+    def test_bollinger_batch(self):
+        upper, mid, lower = bollinger_batch(self.prices, 20, 2.0)
+        exp_mid = self.close.rolling(20).mean()
+        exp_std = self.close.rolling(20).std()
+        self.assertSeriesClose(mid, exp_mid)
+        self.assertSeriesClose(upper, exp_mid + 2 * exp_std)
+        self.assertSeriesClose(lower, exp_mid - 2 * exp_std)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Testes da Base de Conhecimento (RAG)
+Sync incremental pelo manifesto: arquivos novos, alterados e apagados mexem só nos próprios
+chunks; arquivos intactos não voltam ao embedder. Acima do Flat, um único índice ANN recebe
+os vetores novos e guarda os removidos como órfãos até a reconstrução
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from core.knowledge_base import KnowledgeBase
+
+
+class EmbedderFalso:
+    """Vetor determinístico por texto (semente = sha1 do texto); conta os textos recebidos"""
+
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.textos = []
+
+    def encode(self, textos, convert_to_numpy=True):
+        self.textos.extend(textos)
+        vetores = []
+        for texto in textos:
+            semente = int(hashlib.sha1(texto.encode("utf-8")).hexdigest()[:8], 16)
+            vetores.append(np.random.default_rng(semente).normal(size=self.dim))
+        return np.asarray(vetores, dtype=np.float32)
+
+
+def documento(assunto, n_blocos=2):
+    """Texto com `n_blocos` chunks de 800 caracteres sobre `assunto`"""
+    return "".join(f"{assunto} parte {i}: " + "x" * 780 + "\n" for i in range(n_blocos))
+
+
+def escrever(pasta, nome, texto):
+    caminho = os.path.join(pasta, nome)
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(texto)
+    # mtime diferente mesmo em sistemas de arquivos com resolução de segundos
+    st = os.stat(caminho)
+    os.utime(caminho, (st.st_atime, st.st_mtime + time.time() % 1 + 1))
+
+
+class TestKnowledgeBaseSync(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.pasta = self.tmp.name
+        self.embedder = EmbedderFalso()
+        self.kb = KnowledgeBase(docs_dir=self.pasta, embedder=self.embedder, tipo_indice="flat")
+
+    def escrever(self, nome, texto):
+        escrever(self.pasta, nome, texto)
+
+    def textos_indexados(self, kb=None):
+        kb = kb or self.kb
+        ids = [i for m in kb.manifest.values() for i in m["ids"]]
+        return kb._buscar_textos(ids)
+
+    def test_added_changed_and_deleted_files(self):
+        self.escrever("solar.md", documento("vento solar"))
+        self.escrever("radar.md", documento("radar aéreo"))
+        self.assertIn("2 arquivos reprocessados", self.kb.sync())
+        self.assertEqual(self.kb.arquivos_indexados, ["radar.md", "solar.md"])
+        self.assertEqual(self.kb.index.ntotal, 4)
+        ids_radar = list(self.kb.manifest["radar.md"]["ids"])
+
+        # Nada mudou: nenhum texto volta ao embedder
+        enviados = len(self.embedder.textos)
+        self.assertIn("já sincronizado", self.kb.sync())
+        self.assertEqual(len(self.embedder.textos), enviados)
+
+        # Alterado: só os chunks do arquivo alterado são trocados
+        self.escrever("solar.md", documento("tempestade geomagnética", 3))
+        self.escrever("novo.md", documento("satélite"))
+        self.assertIn("2 arquivos reprocessados", self.kb.sync())
+        self.assertEqual(len(self.embedder.textos), enviados + 5)
+        self.assertEqual(self.kb.manifest["radar.md"]["ids"], ids_radar)
+        textos = self.textos_indexados()
+        self.assertEqual(len(textos), 7)
+        self.assertFalse(any("vento solar" in t for t in textos.values()))
+        self.assertEqual(self.kb.index.ntotal, 7)
+
+        # Apagado: vetores e textos somem
+        os.remove(os.path.join(self.pasta, "radar.md"))
+        self.assertIn("1 removidos", self.kb.sync())
+        self.assertEqual(self.kb.arquivos_indexados, ["novo.md", "solar.md"])
+        self.assertEqual(self.kb.index.ntotal, 5)
+        self.assertFalse(self.kb._buscar_textos(ids_radar))
+
+    def test_touched_file_with_same_content_is_not_reembedded(self):
+        self.escrever("solar.md", documento("vento solar"))
+        self.kb.sync()
+        enviados = len(self.embedder.textos)
+        self.escrever("solar.md", documento("vento solar"))
+        self.assertIn("já sincronizado", self.kb.sync())
+        self.assertEqual(len(self.embedder.textos), enviados)
+
+    def test_search_and_reload_from_disk(self):
+        self.escrever("solar.md", documento("vento solar", 1))
+        self.escrever("radar.md", documento("radar aéreo", 1))
+        self.kb.sync()
+        alvo = next(t for t in self.textos_indexados().values() if "radar" in t)
+        self.assertTrue(self.kb.search(alvo).startswith(alvo))
+
+        recarregada = KnowledgeBase(docs_dir=self.pasta, embedder=self.embedder, tipo_indice="flat")
+        self.assertEqual(recarregada.arquivos_indexados, ["radar.md", "solar.md"])
+        self.assertEqual(recarregada.index.ntotal, 2)
+        self.assertTrue(recarregada.search(alvo).startswith(alvo))
+
+
+class TestKnowledgeBaseAnn(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.pasta = self.tmp.name
+        self.kb = KnowledgeBase(docs_dir=self.pasta, embedder=EmbedderFalso(), tipo_indice="hnsw")
+
+    def escrever(self, nome, texto):
+        escrever(self.pasta, nome, texto)
+
+    def test_single_ann_index_with_orphans_until_rebuild(self):
+        for i in range(5):
+            self.escrever(f"doc{i}.md", documento(f"assunto {i}"))
+        self.kb.sync()
+        self.assertEqual(self.kb.tipo_ativo, "hnsw")
+        self.assertEqual(self.kb.index.ntotal, 10)
+        self.assertEqual(self.kb.meta_indice, {"treinado_com": 10, "orfaos": 0})
+
+        # Alteração pequena: vetores novos entram no HNSW existente, os antigos ficam órfãos
+        indice = self.kb.index
+        self.escrever("doc0.md", documento("assunto trocado"))
+        self.kb.sync()
+        self.assertIs(self.kb.index, indice)
+        self.assertEqual(self.kb.index.ntotal, 12)
+        self.assertEqual(self.kb.meta_indice["orfaos"], 2)
+        novo = self.kb._buscar_textos(self.kb.manifest["doc0.md"]["ids"])
+        alvo = next(iter(novo.values()))
+        resultado = self.kb.search(alvo)
+        self.assertTrue(resultado.startswith(alvo))
+        self.assertNotIn("assunto 0 ", resultado)
+
+        # Estado persistido: um único índice, com o contador de órfãos
+        self.assertFalse(os.path.exists(os.path.join(self.pasta, "faiss_ann.bin")))
+        recarregada = KnowledgeBase(docs_dir=self.pasta, embedder=self.kb.embedder, tipo_indice="hnsw")
+        self.assertEqual((recarregada.tipo_ativo, recarregada.index.ntotal), ("hnsw", 12))
+        self.assertEqual(recarregada.meta_indice["orfaos"], 2)
+
+        # Órfãos acima de 20% do índice: reconstrução só com os vivos
+        self.escrever("doc1.md", documento("outro assunto"))
+        self.kb.sync()
+        self.assertIsNot(self.kb.index, indice)
+        self.assertEqual(self.kb.index.ntotal, 10)
+        self.assertEqual(self.kb.meta_indice, {"treinado_com": 10, "orfaos": 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
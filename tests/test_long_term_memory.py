@@ -0,0 +1,85 @@
+"""
+Testes da Memória de Longo Prazo
+Índice invertido BM25 incremental, persistência append-only, snapshot e migração do JSON antigo
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from core.long_term_memory import LongTermMemory
+
+
+class TestLongTermMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.config = SimpleNamespace(DATA_DIR=self.tmp.name)
+
+    def preencher(self, memoria):
+        memoria.save_interaction("qual a previsão do clima espacial", "tempestade geomagnética moderada")
+        memoria.save_interaction("abre o gráfico do dogecoin", "gráfico do dogecoin aberto")
+        memoria.save_interaction("como está o dogecoin hoje", "dogecoin subiu dois por cento")
+        memoria.save_interaction("toca uma música", "tocando playlist")
+        for i in range(5):
+            memoria.save_interaction(f"assunto recente {i}", "ok")
+
+    def test_bm25_ranking_and_recent_skip(self):
+        memoria = LongTermMemory(self.config)
+        self.preencher(memoria)
+        resultado = memoria.search("dogecoin hoje", limit=2)
+        self.assertEqual([m['user'] for m in resultado],
+                         ["como está o dogecoin hoje", "abre o gráfico do dogecoin"])
+        # As 5 últimas já estão no contexto curto
+        self.assertEqual(memoria.search("assunto recente"), [])
+        contexto = memoria.retrieve_relevant_context("tempestade geomagnética")
+        self.assertIn("qual a previsão do clima espacial", contexto)
+        self.assertEqual(memoria.retrieve_relevant_context("inexistente"), "")
+
+    def test_append_only_and_lazy_reload(self):
+        memoria = LongTermMemory(self.config, snapshot_every=3)
+        self.preencher(memoria)
+        caminho = os.path.join(self.tmp.name, "permanent_memory.jsonl")
+        with open(caminho, 'rb') as f:
+            linhas = f.read().splitlines()
+        self.assertEqual(len(linhas), 9)
+        self.assertEqual(json.loads(linhas[0])['id'], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "permanent_memory.idx")))
+
+        # Snapshot cobre 6 memórias; as 3 seguintes vêm do JSONL na primeira consulta
+        nova = LongTermMemory(self.config)
+        self.assertFalse(nova._loaded)
+        self.assertEqual(len(nova), 9)
+        self.assertEqual(nova.search("dogecoin hoje", limit=1)[0]['id'], 3)
+        self.assertEqual(nova.save_interaction("mais uma", "certo")['id'], 10)
+
+    def test_truncated_line_and_missing_snapshot(self):
+        memoria = LongTermMemory(self.config)
+        self.preencher(memoria)
+        caminho = os.path.join(self.tmp.name, "permanent_memory.jsonl")
+        with open(caminho, 'ab') as f:
+            f.write(b'{"id": 10, "user": "corta')
+        nova = LongTermMemory(self.config)
+        self.assertEqual(len(nova), 9)
+        self.assertEqual(nova.search("clima espacial", limit=1)[0]['id'], 1)
+        nova.save_interaction("depois da queda", "gravado")
+        self.assertEqual(len(LongTermMemory(self.config)), 10)
+
+    def test_legacy_json_is_migrated(self):
+        with open(os.path.join(self.tmp.name, "permanent_memory.json"), 'w', encoding='utf-8') as f:
+            json.dump([{"id": 1, "timestamp": "2024-01-01T10:00:00", "user": "radar de ivinhema",
+                        "bot": "radar gerado", "keywords": ["radar", "ivinhema", "radar", "gerado"]}], f)
+        memoria = LongTermMemory(self.config)
+        self.assertEqual(memoria.search("ivinhema", skip_recent=0)[0]['bot'], "radar gerado")
+
+    def test_reranker_reorders_candidates(self):
+        memoria = LongTermMemory(self.config, reranker=lambda q, mems: sorted(mems, key=lambda m: m['id']))
+        self.preencher(memoria)
+        self.assertEqual(memoria.search("dogecoin hoje", limit=1)[0]['id'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Testes da Camada de Dados de Mercado
+MarketDataFeed e TradingEngine contra um servidor HTTP local que imita a API da Binance
+"""
+
+import threading
+import time
+import unittest
+import urllib.parse
+
+from http_stub import StubHandler, start_stub
+from trading.binance_client import BinanceClient
+from trading.market_data import MarketDataFeed, KlineCache
+from trading.strategies.base_strategy import BaseStrategy
+from trading.trading_engine import TradingEngine
+
+MINUTO_MS = 60_000
+
+
+class FakeBinance:
+    """Estado do servidor falso: relógio em ms, latência artificial e log de requisições"""
+
+    def __init__(self):
+        self.now_ms = 1_700_000_000_000 // MINUTO_MS * MINUTO_MS
+        self.delay = 0.0
+        self.usdt = 1_000_000.0
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def kline(self, open_time):
+        close = 100.0 + (open_time // MINUTO_MS) % 37
+        return [open_time, str(close), str(close + 1), str(close - 1), str(close), "1.0",
+                open_time + MINUTO_MS - 1, "0", 1, "0", "0", "0"]
+
+    def klines(self, params):
+        limit = int(params.get('limit', 500))
+        current = self.now_ms // MINUTO_MS * MINUTO_MS
+        if 'startTime' in params:
+            start = int(params['startTime'])
+            times = list(range(start, current + 1, MINUTO_MS))[:limit]
+        else:
+            times = [current - i * MINUTO_MS for i in range(limit)][::-1]
+        return [self.kline(t) for t in times]
+
+    def count(self, path):
+        with self.lock:
+            return sum(1 for p, _ in self.requests if p == path)
+
+
+class BinanceHandler(StubHandler):
+
+    def do_GET(self):
+        fake = self.state
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        with fake.lock:
+            fake.requests.append((url.path, params))
+        if fake.delay:
+            time.sleep(fake.delay)
+        if url.path == "/api/v3/klines":
+            self._reply_json(fake.klines(params))
+        elif url.path == "/api/v3/account":
+            self._reply_json({"balances": [{"asset": "USDT", "free": str(fake.usdt), "locked": "0"}]})
+        elif url.path == "/api/v3/ticker/price":
+            self._reply_json({"symbol": params.get("symbol"), "price": "100.0"})
+        else:
+            self._reply_json({})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        params = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode()))
+        with self.state.lock:
+            self.state.requests.append((self.path, params))
+        self._reply_json({"symbol": params.get("symbol"), "fills": [{"price": "100.0"}]})
+
+
+class AlwaysBuy(BaseStrategy):
+    def __init__(self):
+        super().__init__("Always Buy")
+
+    def should_buy(self, data):
+        return True
+
+    def should_sell(self, data):
+        return False
+
+
+class BinanceStubTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeBinance()
+        stub = start_stub(self, BinanceHandler, self.fake)
+        self.client = BinanceClient("key", "secret", base_url=stub.base)
+
+
+class TestMarketDataFeed(BinanceStubTestCase):
+
+    def test_parallel_fetch(self):
+        """Latência do ciclo ~ uma requisição, não uma por par"""
+        self.fake.delay = 0.2
+        feed = MarketDataFeed(self.client, max_workers=8)
+        symbols = [f"C{i}USDT" for i in range(6)]
+        t0 = time.perf_counter()
+        result = feed.refresh(symbols)
+        elapsed = time.perf_counter() - t0
+        feed.close()
+        self.assertEqual(set(result), set(symbols))
+        self.assertTrue(all(len(k) == 100 for k in result.values()))
+        self.assertLess(elapsed, 0.2 * len(symbols) / 2)
+
+    def test_incremental_klines(self):
+        """Depois da carga inicial só as velas novas (mais a última em aberto) são pedidas"""
+        feed = MarketDataFeed(self.client, clock=lambda: self.fake.now_ms / 1000)
+        first = feed.refresh(["BTCUSDT"])["BTCUSDT"]
+        self.fake.now_ms += 3 * MINUTO_MS
+        second = feed.refresh(["BTCUSDT"])["BTCUSDT"]
+        feed.close()
+
+        calls = [p for path, p in self.fake.requests if path == "/api/v3/klines"]
+        self.assertNotIn("startTime", calls[0])
+        self.assertEqual(int(calls[1]["startTime"]), first[-1][0])
+        self.assertEqual(feed.stats["velas_recebidas"], 100 + 4)
+        self.assertEqual(second, self.fake.klines({"limit": 100}))
+
+    def test_account_snapshot_per_cycle(self):
+        feed = MarketDataFeed(self.client)
+        feed.refresh(["BTCUSDT"])
+        self.assertIs(feed.account(), feed.account())
+        self.assertEqual(self.fake.count("/api/v3/account"), 1)
+        feed.refresh(["BTCUSDT"])
+        feed.account()
+        feed.close()
+        self.assertEqual(self.fake.count("/api/v3/account"), 2)
+
+
+class TestKlineCache(unittest.TestCase):
+
+    def test_merge_replaces_open_candle_and_trims(self):
+        cache = KlineCache(depth=3)
+        cache.replace("X", "1m", [[0, "a"], [1, "b"], [2, "c"]])
+        cache.merge("X", "1m", [[2, "c2"], [3, "d"]])
+        self.assertEqual(cache.get("X", "1m"), [[1, "b"], [2, "c2"], [3, "d"]])
+
+
+class TestTradingEngineCycle(BinanceStubTestCase):
+
+    def test_cycle_uses_one_balance_snapshot(self):
+        engine = TradingEngine(self.client)
+        engine.strategies["always"] = AlwaysBuy()
+        for i in range(3):
+            engine.trading_pairs[f"C{i}USDT"] = {
+                'strategy': engine.strategies["always"], 'quantity': 1.0,
+                'last_signal': None, 'is_opened': False,
+            }
+        engine._run_cycle()
+        engine.market_data.close()
+
+        self.assertEqual(self.fake.count("/api/v3/klines"), 3)
+        self.assertEqual(self.fake.count("/api/v3/account"), 1)
+        self.assertEqual(self.fake.count("/api/v3/ticker/price"), 0)
+        self.assertEqual(self.fake.count("/api/v3/order"), 3)
+        self.assertTrue(all(info['is_opened'] for info in engine.trading_pairs.values()))
+
+    def test_snapshot_reserves_balance_within_cycle(self):
+        self.fake.usdt = 250.0  # dá para duas compras de 1 unidade a ~100-136
+        engine = TradingEngine(self.client)
+        engine.strategies["always"] = AlwaysBuy()
+        for i in range(3):
+            engine.trading_pairs[f"C{i}USDT"] = {
+                'strategy': engine.strategies["always"], 'quantity': 1.0,
+                'last_signal': None, 'is_opened': False,
+            }
+        engine._run_cycle()
+        engine.market_data.close()
+        self.assertLess(self.fake.count("/api/v3/order"), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+"""
+Testes do Modo Streaming
+BinanceStream contra um servidor WebSocket local que imita o stream combinado da Binance
+"""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+import websockets
+
+from trading.binance_client import BinanceClient
+from trading.market_stream import BinanceStream, CandleBook
+from trading.strategies.base_strategy import BaseStrategy
+from trading.trading_engine import TradingEngine
+
+MINUTO_MS = 60_000
+T0 = 1_700_000_000_000 // MINUTO_MS * MINUTO_MS
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class FakeStreamServer:
+    """Servidor WebSocket local: registra SUBSCRIBEs, envia eventos e derruba conexões sob demanda"""
+
+    def __init__(self):
+        self.connections = set()
+        self.received = []
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._main, daemon=True)
+        self.thread.start()
+        self._ready.wait(5)
+        self.url = f"ws://127.0.0.1:{self.port}/stream"
+
+    def _main(self):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(websockets.serve(self._handler, "127.0.0.1", 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _handler(self, ws, path=None):
+        self.connections.add(ws)
+        try:
+            async for message in ws:
+                request = json.loads(message)
+                self.received.append(request)
+                await ws.send(json.dumps({"result": None, "id": request.get("id")}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(ws)
+
+    def subscriptions(self):
+        return [r for r in self.received if r.get("method") == "SUBSCRIBE"]
+
+    def push(self, stream, data):
+        message = json.dumps({"stream": stream, "data": data})
+
+        async def _broadcast():
+            for ws in list(self.connections):
+                await ws.send(message)
+        asyncio.run_coroutine_threadsafe(_broadcast(), self.loop).result(5)
+
+    def drop(self):
+        async def _close_all():
+            for ws in list(self.connections):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(_close_all(), self.loop).result(5)
+
+    def close(self):
+        async def _shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+        asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+class FakeRestClient(BinanceClient):
+    """BinanceClient com o REST trocado por velas geradas a partir de um relógio controlado"""
+
+    def __init__(self, ws_url):
+        super().__init__("key", "secret", base_url="http://127.0.0.1:9", ws_url=ws_url)
+        self.now_ms = T0 + 30_000
+        self.kline_calls = []
+        self.orders = []
+
+    def clock(self):
+        return self.now_ms / 1000
+
+    def row(self, open_time, close=None):
+        close = close if close is not None else 100.0 + (open_time // MINUTO_MS) % 37
+        return [open_time, str(close), str(close + 1), str(close - 1), str(close), "1.0", open_time + MINUTO_MS - 1]
+
+    def get_klines(self, symbol, interval='1m', limit=100, start_time=None):
+        self.kline_calls.append(start_time)
+        current = self.now_ms // MINUTO_MS * MINUTO_MS
+        if start_time is not None:
+            times = list(range(start_time, current + 1, MINUTO_MS))[:limit]
+        else:
+            times = [current - i * MINUTO_MS for i in range(limit)][::-1]
+        return [self.row(t) for t in times]
+
+    def get_account_info(self):
+        return {"balances": [{"asset": "USDT", "free": "1000000", "locked": "0"}]}
+
+    def create_order(self, symbol, side, quantity, order_type="MARKET"):
+        self.orders.append((symbol, side, quantity))
+        return {"fills": [{"price": "100.0"}]}
+
+
+def kline_event(symbol, open_time, close, closed):
+    return {"e": "kline", "E": open_time, "s": symbol, "k": {
+        "t": open_time, "T": open_time + MINUTO_MS - 1, "s": symbol, "i": "1m",
+        "o": str(close), "c": str(close), "h": str(close), "l": str(close), "v": "1", "x": closed}}
+
+
+class StreamTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeStreamServer()
+        self.client = FakeRestClient(self.server.url)
+        self.events = []
+
+    def tearDown(self):
+        self.server.close()
+
+    def make_stream(self):
+        stream = BinanceStream(self.client, on_candle_close=lambda s, i, k: self.events.append((s, i, k)),
+                               reconnect_min_s=0.05, reconnect_max_s=0.2, clock=self.client.clock)
+        self.addCleanup(stream.stop)
+        return stream
+
+
+class TestBinanceStream(StreamTestCase):
+
+    def test_subscribe_and_candle_close(self):
+        stream = self.make_stream()
+        stream.subscribe("BTCUSDT")
+        stream.start()
+        self.assertTrue(wait_for(lambda: self.server.subscriptions() and stream.connected.is_set()))
+        self.assertEqual(self.server.subscriptions()[0]["params"], ["btcusdt@kline_1m", "btcusdt@bookTicker"])
+        self.assertEqual(len(stream.book.klines("BTCUSDT", "1m", include_open=False)), 499)
+
+        self.server.push("btcusdt@kline_1m", kline_event("BTCUSDT", T0, 123.0, False))
+        self.assertTrue(wait_for(lambda: stream.book.last_price("BTCUSDT", "1m") == 123.0))
+        self.assertEqual(self.events, [])
+
+        self.server.push("btcusdt@kline_1m", kline_event("BTCUSDT", T0, 124.0, True))
+        self.assertTrue(wait_for(lambda: len(self.events) == 1))
+        symbol, interval, klines = self.events[0]
+        self.assertEqual((symbol, interval), ("BTCUSDT", "1m"))
+        self.assertEqual(klines[-1][0], T0)
+        self.assertEqual(float(klines[-1][4]), 124.0)
+
+        self.server.push("btcusdt@bookTicker", {"u": 1, "s": "BTCUSDT", "b": "99.5", "B": "2", "a": "100.5", "A": "3"})
+        self.assertTrue(wait_for(lambda: stream.book.top("BTCUSDT") is not None))
+        self.assertEqual(stream.book.top("BTCUSDT")["ask"], 100.5)
+
+    def test_reconnect_backfills_gap(self):
+        stream = self.make_stream()
+        stream.subscribe("BTCUSDT")
+        stream.start()
+        self.assertTrue(wait_for(stream.connected.is_set))
+        last_closed = stream.book.last_closed_open_time("BTCUSDT", "1m")
+
+        # Três velas fecham enquanto a conexão está caída
+        self.client.now_ms += 3 * MINUTO_MS
+        self.server.drop()
+        self.assertTrue(wait_for(lambda: len(self.server.subscriptions()) == 2 and len(self.events) == 1))
+
+        self.assertEqual(self.client.kline_calls[-1], last_closed)
+        self.assertEqual(stream.book.last_closed_open_time("BTCUSDT", "1m"), last_closed + 3 * MINUTO_MS)
+        self.assertEqual(stream.stats["velas_backfill"], 3)
+        self.assertGreaterEqual(stream.stats["reconexoes"], 1)
+        closes = [int(k[0]) for k in self.events[0][2]]
+        self.assertEqual(closes, sorted(set(closes)))
+
+
+class TestCandleBook(unittest.TestCase):
+
+    def test_duplicate_close_is_ignored(self):
+        book = CandleBook(depth=10)
+        row = [T0, "1", "1", "1", "1", "1", T0 + MINUTO_MS - 1]
+        self.assertEqual(book.load("X", "1m", [row], now_ms=T0 + MINUTO_MS), 1)
+        self.assertFalse(book.update("X", "1m", list(row), closed=True))
+        self.assertEqual(len(book.klines("X", "1m")), 1)
+
+
+class AlwaysBuy(BaseStrategy):
+    def __init__(self):
+        super().__init__("Always Buy")
+        self.calls = 0
+
+    def should_buy(self, data):
+        self.calls += 1
+        return True
+
+    def should_sell(self, data):
+        return False
+
+
+class TestEngineStreaming(StreamTestCase):
+
+    def test_strategy_runs_on_candle_close(self):
+        engine = TradingEngine(self.client)
+        engine.strategies["always"] = AlwaysBuy()
+        engine.start_streaming()
+        self.addCleanup(engine.stop_streaming)
+        engine.start_auto_trading("always", "ETHUSDT", 1.0)
+        self.addCleanup(engine.stop_auto_trading)
+        self.assertTrue(wait_for(lambda: self.server.subscriptions() and engine.stream.connected.is_set()))
+        self.assertEqual(engine.strategies["always"].calls, 0)
+
+        # O engine usa o relógio real: todo o backfill já está fechado, o próximo minuto é vela nova
+        self.server.push("ethusdt@kline_1m", kline_event("ETHUSDT", T0 + MINUTO_MS, 101.0, True))
+        self.assertTrue(wait_for(lambda: self.client.orders))
+        self.assertEqual(self.client.orders, [("ETHUSDT", "BUY", 1.0)])
+        self.assertTrue(engine.trading_pairs["ETHUSDT"]["is_opened"])
+        self.assertIsNone(engine.trading_thread)
+
+    def test_stop_streaming_resumes_polling(self):
+        engine = TradingEngine(self.client)
+        engine.strategies["always"] = AlwaysBuy()
+        ciclos = threading.Event()
+        engine._run_cycle = ciclos.set
+        engine.start_streaming()
+        engine.start_auto_trading("always", "ETHUSDT", 1.0)
+        self.addCleanup(engine.stop_auto_trading)
+        self.assertIsNone(engine.trading_thread)
+
+        engine.stop_streaming()
+        self.assertTrue(engine.is_trading)
+        self.assertTrue(ciclos.wait(5.0))
+        self.assertTrue(engine.trading_thread.is_alive())
+        self.assertTrue(engine.scheduler.is_subscribed("ETHUSDT", engine.market_data.interval))
+
+        # Sem pares cadastrados, encerrar o stream deixa o trading parado
+        vazio = TradingEngine(self.client)
+        vazio.start_streaming()
+        vazio.stop_streaming()
+        self.assertFalse(vazio.is_trading)
+        self.assertIsNone(vazio.trading_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Testes do Cache de Mídia
+MediaCache contra um servidor HTTP local: revalidação 304, hash de conteúdo, fallback e despejo LRU
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from collections import Counter
+
+from http_stub import StubHandler, start_stub
+from utils.http_client import HttpClient
+from utils.media_cache import MediaCache
+
+
+class StubState:
+    def __init__(self):
+        self.hits = Counter()
+        self.bodies = {"/etag.gif": b"G" * 2000, "/sem_validador.jpg": b"J" * 2000}
+        self.etag = '"v1"'
+        self.fail = False
+
+
+class Handler(StubHandler):
+
+    def do_GET(self):
+        state, path = self.state, self.path
+        state.hits[path] += 1
+        if state.fail:
+            return self._reply(500)
+        if path == "/etag.gif":
+            if self.headers.get("If-None-Match") == state.etag:
+                return self._reply(304, headers={"ETag": state.etag})
+            return self._reply(200, state.bodies[path], {"ETag": state.etag})
+        if path.startswith("/blob"):
+            return self._reply(200, path.encode() * 200)
+        return self._reply(200, state.bodies.get(path, b""))
+
+
+class TestMediaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.state = StubState()
+        self.base = start_stub(self, Handler, self.state).base
+        self.http = HttpClient(backoff_base=0.01, backoff_max=0.05)
+        self.pasta = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.http.close()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def make_cache(self, **kwargs):
+        return MediaCache(self.pasta, http=self.http, **kwargs)
+
+    def test_not_modified_reuses_file(self):
+        cache = self.make_cache()
+        first = cache.fetch(f"{self.base}/etag.gif", ext=".gif")
+        self.assertTrue(first["mudou"])
+        self.assertEqual(first["origem"], "rede")
+        self.assertTrue(first["path"].endswith(".gif"))
+
+        second = cache.fetch(f"{self.base}/etag.gif", ext=".gif")
+        self.assertFalse(second["mudou"])
+        self.assertEqual(second["origem"], "304")
+        self.assertEqual(second["path"], first["path"])
+        self.assertEqual(cache.get_stats()["nao_modificado"], 1)
+
+    def test_index_survives_restart(self):
+        url = f"{self.base}/etag.gif"
+        self.make_cache().fetch(url, ext=".gif")
+        self.assertEqual(self.make_cache().fetch(url, ext=".gif")["origem"], "304")
+
+    def test_same_hash_without_validators_is_unchanged(self):
+        cache = self.make_cache()
+        url = f"{self.base}/sem_validador.jpg"
+        cache.fetch(url)
+        cache.set_meta(url, "derivado", "abc")
+        again = cache.fetch(url)
+        self.assertFalse(again["mudou"])
+        self.assertEqual(cache.get_meta(url, "derivado"), "abc")
+
+        self.state.bodies["/sem_validador.jpg"] = b"K" * 2000
+        changed = cache.fetch(url)
+        self.assertTrue(changed["mudou"])
+        self.assertNotEqual(changed["sha1"], again["sha1"])
+        self.assertIsNone(cache.get_meta(url, "derivado"))
+
+    def test_server_error_serves_stale_copy(self):
+        cache = self.make_cache()
+        url = f"{self.base}/sem_validador.jpg"
+        cache.fetch(url)
+        self.state.fail = True
+        stale = cache.fetch(url, attempts=1)
+        self.assertEqual(stale["origem"], "stale")
+        self.assertTrue(os.path.exists(stale["path"]))
+        self.assertIsNone(cache.fetch(f"{self.base}/nunca_visto.jpg", attempts=1))
+
+    def test_small_body_is_rejected(self):
+        self.state.bodies["/pequeno.jpg"] = b"x" * 100
+        self.assertIsNone(self.make_cache().fetch(f"{self.base}/pequeno.jpg"))
+
+    def test_lru_eviction_bounds_total_size(self):
+        cache = self.make_cache(max_bytes=3000)
+        for nome in ("a", "b"):
+            cache.fetch(f"{self.base}/blob{nome}")
+            time.sleep(0.01)
+        cache.fetch(f"{self.base}/bloba")  # 'a' vira a mais recente
+        time.sleep(0.01)
+        cache.fetch(f"{self.base}/blobc")
+
+        self.assertLessEqual(cache.total_bytes(), 3000)
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+        hits_b = self.state.hits["/blobb"]
+        self.assertEqual(cache.fetch(f"{self.base}/blobb")["origem"], "rede")
+        self.assertEqual(self.state.hits["/blobb"], hits_b + 1)
+        self.assertEqual(len([f for f in os.listdir(self.pasta) if f != "index.json"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
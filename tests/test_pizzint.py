@@ -0,0 +1,124 @@
+"""
+Testes do PizzINT
+Matcher de palavras-chave em passada única, coleta RSS paralela com dedup e cache do get_status
+"""
+
+import random
+import time
+import unittest
+from collections import Counter
+from unittest import mock
+
+from features import pizzint_service
+from features.pizzint_service import CATEGORIAS_AMEACA, PizzaINTService, _calcular_score_e_hits
+from http_stub import StubHandler, start_stub
+
+
+def score_ingenuo(texto):
+    """Implementação original: str.count por palavra"""
+    texto = texto.lower()
+    score, hits = 0, {}
+    for cat, dados in CATEGORIAS_AMEACA.items():
+        hits[cat] = {}
+        for palavra in dados["palavras"]:
+            count = texto.count(palavra)
+            if count:
+                hits[cat][palavra] = count
+                score += count * dados["peso"]
+    return score, hits
+
+
+def rss(*items):
+    corpo = "".join(
+        f"<item><title>{t}</title><link>http://x/{g}</link><guid>{g}</guid>"
+        f"<description>&lt;p&gt;{d}&lt;/p&gt;</description></item>" for t, g, d in items)
+    return f"<rss><channel>{corpo}</channel></rss>".encode()
+
+
+class TestMatcher(unittest.TestCase):
+
+    def test_matches_per_keyword_count(self):
+        vocab = ([p for d in CATEGORIAS_AMEACA.values() for p in d["palavras"]]
+                 + ["toward", "award", "the", "NUCLEAR", "Warhead", "attacks", "alerted"])
+        rng = random.Random(7)
+        for _ in range(200):
+            texto = " ".join(rng.choice(vocab) for _ in range(rng.randint(0, 40)))
+            self.assertEqual(_calcular_score_e_hits(texto), score_ingenuo(texto), texto)
+
+    def test_prefix_keywords_counted_together(self):
+        score, hits = _calcular_score_e_hits("War declared after the warhead attack launched")
+        self.assertEqual(hits["tensao_regional"]["war"], 2)
+        self.assertEqual(hits["tensao_regional"]["attack"], 1)
+        self.assertEqual(hits["guerra_direta"]["attack launched"], 1)
+        self.assertEqual(score, score_ingenuo("War declared after the warhead attack launched")[0])
+
+
+class FeedState:
+    def __init__(self):
+        self.hits = Counter()
+        self.delay = {}
+        self.feeds = {
+            "/a": rss(("Nuclear test alert", "g1", "missile &lt;b&gt;drill&lt;/b&gt;"), ("Quiet day", "g2", "")),
+            "/b": rss(("Nuclear test alert", "g1", "missile drill"), ("Border dispute", "g3", "tension")),
+            "/lento": rss(("Late", "g9", "")),
+        }
+
+
+class FeedHandler(StubHandler):
+
+    def do_GET(self):
+        state = self.state
+        state.hits[self.path] += 1
+        time.sleep(state.delay.get(self.path, 0))
+        self._reply(200, state.feeds.get(self.path, b"<html><body>calm</body></html>"))
+
+
+class TestColeta(unittest.TestCase):
+
+    def setUp(self):
+        self.state = FeedState()
+        self.base = start_stub(self, FeedHandler, self.state).base
+        feeds = [{"nome": n, "url": f"{self.base}/{n}", "prioridade": 1} for n in ("a", "b")]
+        patcher = mock.patch.object(pizzint_service, "RSS_FEEDS", feeds)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = PizzaINTService({"status_ttl_s": 60})
+        self.service.url_primario = f"{self.base}/"
+
+    def test_feeds_are_fetched_concurrently_and_deduped(self):
+        self.state.delay = {"/a": 0.3, "/b": 0.3}
+        t0 = time.perf_counter()
+        score, noticias = self.service._coletar_rss(limite_por_feed=5)
+        self.assertLess(time.perf_counter() - t0, 0.55)
+        self.assertEqual(sorted(n["id"] for n in noticias), ["g1", "g2", "g3"])
+        self.assertEqual(noticias[0]["titulo"], "Nuclear test alert")
+        self.assertEqual(noticias[0]["desc"], "missile drill")
+        self.assertTrue(all(n["novo"] for n in noticias))
+
+        score2, noticias2 = self.service._coletar_rss(limite_por_feed=5)
+        self.assertEqual(score2, score)
+        self.assertFalse(any(n["novo"] for n in noticias2))
+
+    def test_slow_feed_is_dropped_at_deadline(self):
+        pizzint_service.RSS_FEEDS.append({"nome": "lento", "url": f"{self.base}/lento", "prioridade": 2})
+        self.state.delay = {"/lento": 1.0}
+        t0 = time.perf_counter()
+        _, noticias = self.service._coletar_rss(prazo_s=0.3)
+        self.assertLess(time.perf_counter() - t0, 0.8)
+        self.assertNotIn("g9", [n["id"] for n in noticias])
+
+    def test_status_is_cached_for_ttl(self):
+        primeiro = self.service.get_status()
+        segundo = self.service.get_status()
+        self.assertFalse(primeiro["em_cache"])
+        self.assertTrue(segundo["em_cache"])
+        self.assertEqual(segundo["level"], primeiro["level"])
+        self.assertEqual(self.state.hits["/a"], 1)
+        self.assertEqual(len(self.service._historico_scores), 1)
+
+        self.assertFalse(self.service.get_status(forcar=True)["em_cache"])
+        self.assertEqual(self.state.hits["/a"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
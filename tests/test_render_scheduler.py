@@ -0,0 +1,125 @@
+"""
+Testes do Agendador de Renders
+Encodes simultâneos, dimensionamento por núcleos, progresso via -progress, falhas isoladas e
+cancelamento
+(um script Python faz o papel do ffmpeg: imprime blocos de progresso e grava a saída)
+"""
+
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+
+from utils.render_scheduler import RenderJob, RenderScheduler, dimensionar
+
+FFMPEG_FALSO = textwrap.dedent(f"""\
+    #!{sys.executable}
+    import sys, time
+    args = sys.argv[1:]
+    saida = args[-1]
+    duracao = float(args[args.index("-t") + 1])
+    threads = args[args.index("-threads") + 1]
+    inicio = time.time()
+    if "falha" in saida:
+        sys.stderr.write("Invalid data found when processing input\\n")
+        sys.exit(1)
+    if "lento" in saida:
+        time.sleep(30)
+    for passo in range(1, 4):
+        time.sleep(0.1)
+        print("fps=%d" % (30 * passo))
+        print("out_time_us=%d" % int(duracao * passo / 3 * 1e6))
+        print("speed=1.5x")
+        print("progress=" + ("end" if passo == 3 else "continue"), flush=True)
+    with open(saida, "w") as f:
+        f.write("threads=" + threads)
+    with open(saida + ".tempos", "w") as f:
+        f.write("%r %r" % (inicio, time.time()))
+""")
+
+
+class TestRenderScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.ffmpeg = os.path.join(self.tmp.name, "ffmpeg")
+        with open(self.ffmpeg, "w") as f:
+            f.write(FFMPEG_FALSO)
+        os.chmod(self.ffmpeg, os.stat(self.ffmpeg).st_mode | stat.S_IEXEC)
+
+    def job(self, nome, duracao=60.0):
+        return RenderJob(nome=nome, arquivo_entrada="entrada.mp4",
+                         arquivo_saida=os.path.join(self.tmp.name, f"{nome}.mp4"), duracao_s=duracao,
+                         entrada=["-ss", "3600.000", "-t", f"{duracao:.3f}"], saida=["-c:v", "libx264"])
+
+    def test_jobs_run_concurrently_with_progress(self):
+        eventos = []
+        scheduler = RenderScheduler(max_paralelo=3, threads_por_job=2, ffmpeg=self.ffmpeg,
+                                    on_progress=lambda nome, info: eventos.append((nome, info)))
+        resultados = scheduler.executar([self.job("a"), self.job("b"), self.job("c")])
+        # Cada ffmpeg falso grava quando começou e terminou: os três intervalos se sobrepõem
+        tempos = []
+        for r in resultados:
+            with open(r["arquivo"] + ".tempos") as f:
+                tempos.append([float(t) for t in f.read().split()])
+        self.assertLess(max(inicio for inicio, _ in tempos), min(fim for _, fim in tempos))
+
+        self.assertEqual([r["nome"] for r in resultados], ["a", "b", "c"])
+        self.assertTrue(all(r["ok"] for r in resultados))
+        self.assertEqual(resultados[0]["fps"], 90.0)
+        with open(resultados[0]["arquivo"]) as f:
+            self.assertEqual(f.read(), "threads=2")
+
+        de_a = [info for nome, info in eventos if nome == "a"]
+        self.assertEqual([i["percent"] for i in de_a], [33.3, 66.7, 100.0])
+        self.assertEqual(de_a[0]["speed"], "1.5")
+        self.assertEqual(de_a[-1]["status"], "concluido")
+
+    def test_failed_job_does_not_stop_others(self):
+        eventos = []
+        scheduler = RenderScheduler(ffmpeg=self.ffmpeg, on_progress=lambda n, i: eventos.append((n, i["status"])))
+        ok, falha = scheduler.executar([self.job("ok"), self.job("falha")])
+        self.assertTrue(ok["ok"])
+        self.assertFalse(falha["ok"])
+        self.assertIn("Invalid data", falha["erro"])
+        self.assertIn(("falha", "falhou"), eventos)
+
+    def test_cancel_kills_jobs_with_the_same_name(self):
+        scheduler = RenderScheduler(max_paralelo=2, ffmpeg=self.ffmpeg)
+        jobs = [self.job("dup"), self.job("dup")]
+        jobs[0].arquivo_saida = os.path.join(self.tmp.name, "lento_1.mp4")
+        jobs[1].arquivo_saida = os.path.join(self.tmp.name, "lento_2.mp4")
+        resultados = []
+        thread = threading.Thread(target=lambda: resultados.extend(scheduler.executar(jobs)))
+        thread.start()
+        prazo = time.monotonic() + 10
+        while len(scheduler._procs) < 2 and time.monotonic() < prazo:
+            time.sleep(0.01)
+        self.assertEqual(len(scheduler._procs), 2)
+
+        scheduler.cancelar()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual([r["ok"] for r in resultados], [False, False])
+        self.assertEqual(scheduler._procs, {})
+
+    def test_missing_binary(self):
+        scheduler = RenderScheduler(ffmpeg=os.path.join(self.tmp.name, "nao_existe"))
+        resultado, = scheduler.executar([self.job("x")])
+        self.assertFalse(resultado["ok"])
+        self.assertIn("erro", resultado)
+
+    def test_sizing(self):
+        self.assertEqual(dimensionar(3, nucleos=12), (3, 4))
+        self.assertEqual(dimensionar(3, nucleos=4), (2, 2))
+        self.assertEqual(dimensionar(3, nucleos=1), (1, 1))
+        self.assertEqual(dimensionar(5, nucleos=16, max_paralelo=2), (2, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Testes do Agendador de Sinais
+Concorrência entre pares, serialização/coalescência por par e métricas de latência sinal→ordem
+"""
+
+import threading
+import time
+import unittest
+
+from trading.binance_client import BinanceClient
+from trading.scheduler import SignalScheduler, LatencyMetrics
+from trading.strategies.base_strategy import BaseStrategy
+from trading.trading_engine import TradingEngine
+
+
+class TestSignalScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = SignalScheduler(max_workers=8)
+
+    def tearDown(self):
+        self.scheduler.close()
+
+    def test_pairs_run_concurrently(self):
+        """50 pares com 50 ms de avaliação não devem levar 50 x 50 ms"""
+        def slow(symbol, interval, klines, event_ts):
+            time.sleep(0.05)
+
+        symbols = [f"C{i}USDT" for i in range(50)]
+        for symbol in symbols:
+            self.scheduler.subscribe(symbol, "1m", slow)
+        t0 = time.perf_counter()
+        futures = [self.scheduler.publish(symbol, "1m", []) for symbol in symbols]
+        for future in futures:
+            future.result(5)
+        elapsed = time.perf_counter() - t0
+        self.assertLess(elapsed, 50 * 0.05 / 4)
+        self.assertEqual(self.scheduler.get_stats()['avaliacoes'], 50)
+
+    def test_one_worker_per_pair_and_coalescing(self):
+        release = threading.Event()
+        seen = []
+        active = []
+        max_active = [0]
+        lock = threading.Lock()
+
+        def handler(symbol, interval, klines, event_ts):
+            with lock:
+                active.append(1)
+                max_active[0] = max(max_active[0], len(active))
+            if klines == [0]:
+                release.wait(5)
+            seen.append(klines[0])
+            with lock:
+                active.pop()
+
+        self.scheduler.subscribe("BTCUSDT", "1m", handler)
+        first = self.scheduler.publish("BTCUSDT", "1m", [0])
+        time.sleep(0.05)
+        for i in range(1, 4):
+            self.assertIs(self.scheduler.publish("BTCUSDT", "1m", [i]), first)
+        release.set()
+        first.result(5)
+
+        self.assertEqual(seen, [0, 3])
+        self.assertEqual(max_active[0], 1)
+        self.assertEqual(self.scheduler.stats['coalescidos'], 2)
+
+    def test_publish_without_subscribers(self):
+        self.assertIsNone(self.scheduler.publish("ETHUSDT", "1m", []))
+        self.scheduler.subscribe("ETHUSDT", "1m", lambda *a: None)
+        self.scheduler.unsubscribe("ETHUSDT")
+        self.assertIsNone(self.scheduler.publish("ETHUSDT", "1m", []))
+
+    def test_latency_metrics_snapshot(self):
+        metrics = LatencyMetrics(window=10)
+        for ms in range(20):
+            metrics.record('x', float(ms))
+        snap = metrics.snapshot()['x']
+        self.assertEqual(snap['n'], 10)
+        self.assertEqual(snap['max'], 19.0)
+
+
+class OfflineClient(BinanceClient):
+    """REST em memória com latência de ordem artificial"""
+
+    def __init__(self):
+        super().__init__("key", "secret", base_url="http://127.0.0.1:9")
+        self.orders = []
+
+    def get_klines(self, symbol, interval='1m', limit=100, start_time=None):
+        now = int(time.time() * 1000) // 60_000 * 60_000
+        return [[now - i * 60_000, "1", "1", "1", "1", "1", now - i * 60_000 + 59_999] for i in range(limit)][::-1]
+
+    def get_account_info(self):
+        return {"balances": [{"asset": "USDT", "free": "1000000", "locked": "0"}]}
+
+    def create_order(self, symbol, side, quantity, order_type="MARKET"):
+        time.sleep(0.02)
+        self.orders.append(symbol)
+        return {"fills": [{"price": "1.0"}]}
+
+
+class AlwaysBuy(BaseStrategy):
+    def __init__(self):
+        super().__init__("Always Buy")
+
+    def should_buy(self, data):
+        return True
+
+    def should_sell(self, data):
+        return False
+
+
+class TestEngineScheduling(unittest.TestCase):
+
+    def test_cycle_exports_signal_to_order_latency(self):
+        client = OfflineClient()
+        engine = TradingEngine(client, max_workers=8)
+        engine.strategies["always"] = AlwaysBuy()
+        for i in range(16):
+            engine.trading_pairs[f"C{i}USDT"] = {
+                'strategy': engine.strategies["always"], 'quantity': 1.0,
+                'last_signal': None, 'is_opened': False,
+            }
+        t0 = time.perf_counter()
+        engine._run_cycle()
+        elapsed = time.perf_counter() - t0
+
+        self.assertEqual(len(client.orders), 16)
+        self.assertLess(elapsed, 16 * 0.02)
+        latency = engine.get_status()['agendador']['latencia']
+        for name in ('fila_ms', 'avaliacao_ms', 'sinal_ordem_ms', 'evento_ordem_ms'):
+            self.assertIn(name, latency)
+        self.assertEqual(latency['sinal_ordem_ms']['n'], 16)
+        self.assertGreaterEqual(latency['sinal_ordem_ms']['p50'], 20.0)
+        engine.scheduler.close()
+        engine.market_data.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
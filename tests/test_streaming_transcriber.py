@@ -0,0 +1,160 @@
+"""
+Testes da Transcrição em Streaming
+VAD por energia, grade de janelas sobrepostas, emissão em ordem sem duplicatas, retomada pelo
+cache e o map-reduce da transcrição (um modelo falso faz o papel do Whisper)
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from utils.streaming_transcriber import (SAMPLE_RATE, ResumoMapReduce, TranscritorStreaming, detectar_fala,
+                                         linha_segmento, planejar_janelas)
+from utils.transcript_cache import TranscriptCache
+
+
+def audio_sintetico(duracao, falas):
+    """Ruído baixo com tons altos nos trechos de `falas`"""
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 0.001, int(duracao * SAMPLE_RATE)).astype(np.float32)
+    for a, b in falas:
+        t = np.arange(int(a * SAMPLE_RATE), int(b * SAMPLE_RATE))
+        audio[t] += 0.3 * np.sin(2 * np.pi * 220 * t / SAMPLE_RATE).astype(np.float32)
+    return audio
+
+
+class WhisperFalso:
+    """Um segmento por trecho de fala que o VAD acha na janela recebida (tempos relativos à janela)"""
+
+    def __init__(self, atraso=0.0):
+        self.chamadas = []
+        self.atraso = atraso
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio, **opcoes):
+        with self._lock:
+            self.chamadas.append(opcoes)
+        time.sleep(self.atraso)
+        segmentos = [{"start": a, "end": b, "text": f" fala {len(audio)}",
+                      "words": [{"word": " fala", "start": a, "end": b, "probability": 0.9}]}
+                     for a, b in detectar_fala(audio)]
+        return {"segments": segmentos, "language": "pt"}
+
+
+class TestVadAndWindows(unittest.TestCase):
+
+    def test_energy_vad(self):
+        trechos = detectar_fala(audio_sintetico(60, [(10, 20), (40, 45)]))
+        self.assertEqual(len(trechos), 2)
+        self.assertAlmostEqual(trechos[0][0], 10, delta=0.5)
+        self.assertAlmostEqual(trechos[1][1], 45, delta=0.5)
+        self.assertEqual(detectar_fala(np.zeros(10, np.float32)), [])
+
+    def test_window_grid(self):
+        fala = [(10, 20), (50, 62)]
+        janelas = planejar_janelas(100, fala, janela_s=30, sobreposicao_s=2)
+        self.assertEqual(janelas[0].inicio, 0)
+        self.assertEqual(janelas[-1].fim, 100)
+        self.assertEqual([j.tem_fala for j in janelas][:2], [True, True])
+        self.assertFalse(janelas[-1].tem_fala)
+        for anterior, atual in zip(janelas, janelas[1:]):
+            self.assertLessEqual(anterior.fim - anterior.inicio, 30)
+            self.assertAlmostEqual(anterior.fim - atual.inicio, 2)
+            # Posse contígua, com a fronteira num silêncio
+            self.assertEqual(anterior.dono_fim, atual.dono_inicio)
+            self.assertFalse(any(a < anterior.dono_fim < b for a, b in fala))
+        # A fala 50–62 cruzaria o corte nominal (54.5): a fronteira recua para o silêncio antes dela
+        self.assertTrue(any(49.5 <= j.dono_fim <= 50 for j in janelas))
+        with self.assertRaises(ValueError):
+            planejar_janelas(100, [], janela_s=2, sobreposicao_s=2)
+
+
+class TestTranscritorStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_ordered_emission_skips_silence_and_dedupes_boundaries(self):
+        audio = audio_sintetico(100, [(10, 15), (27.5, 29), (70, 76)])
+        modelo = WhisperFalso()
+        transcritor = TranscritorStreaming(modelo, janela_s=30, sobreposicao_s=2)
+        segmentos = list(transcritor.transcrever(audio))
+
+        self.assertEqual(len(segmentos), 3)
+        inicios = [s["start"] for s in segmentos]
+        self.assertEqual(inicios, sorted(inicios))
+        self.assertAlmostEqual(segmentos[2]["start"], 70, delta=0.5)
+        self.assertAlmostEqual(segmentos[2]["words"][0]["start"], segmentos[2]["start"])
+        # A fala 27.5–29 fica inteira numa janela; a última janela é só silêncio
+        self.assertEqual(transcritor.stats["whisper"], 3)
+        self.assertEqual(transcritor.stats["silencio"], 1)
+        self.assertTrue(all(c["language"] == "pt" for c in modelo.chamadas[1:]))
+        self.assertTrue(all(c["word_timestamps"] for c in modelo.chamadas))
+
+    def test_worker_pool_replicas(self):
+        audio = audio_sintetico(120, [(5, 25), (35, 55), (65, 85), (95, 115)])
+        criados = []
+        def fabrica():
+            criados.append(WhisperFalso(atraso=0.2))
+            return criados[-1]
+        transcritor = TranscritorStreaming(WhisperFalso(atraso=0.2), fabrica_modelo=fabrica, workers=3,
+                                           janela_s=30, sobreposicao_s=2)
+        t0 = time.perf_counter()
+        self.assertEqual(len(list(transcritor.transcrever(audio))), 4)
+        self.assertLess(time.perf_counter() - t0, 0.2 * 4)
+        self.assertEqual(len(criados), 2)
+
+    def test_cache_resume(self):
+        cache = TranscriptCache(os.path.join(self.tmp.name, "cache"))
+        audio = audio_sintetico(100, [(10, 15), (70, 76)])
+        primeiro = WhisperFalso()
+        gerador = TranscritorStreaming(primeiro, cache=cache, janela_s=30, sobreposicao_s=2).transcrever(audio, "yt:x")
+        next(gerador)   # interrompido após a primeira janela
+        gerador.close()
+
+        segundo = WhisperFalso()
+        transcritor = TranscritorStreaming(segundo, cache=cache, janela_s=30, sobreposicao_s=2)
+        self.assertEqual(len(list(transcritor.transcrever(audio, "yt:x"))), 2)
+        self.assertGreaterEqual(transcritor.stats["cache"], 1)
+        # Cada janela com fala passou pelo Whisper uma única vez somando as duas execuções
+        self.assertEqual(len(primeiro.chamadas) + len(segundo.chamadas), 2)
+
+        completo = cache.get("yt:x")
+        self.assertEqual(len(completo["segments"]), 2)
+        self.assertEqual(completo["language"], "pt")
+
+
+class TestResumoMapReduce(unittest.TestCase):
+
+    def test_short_transcript_passes_through(self):
+        resumo = ResumoMapReduce(lambda *a, **k: self.fail("LLM não deveria ser chamado"), limite_chars=1000)
+        resumo.adicionar(linha_segmento({"start": 1, "end": 2, "text": " oi"}))
+        self.assertEqual(resumo.finalizar(), "[1.0 - 2.0] oi\n")
+
+    def test_map_runs_per_block_and_reduce_fits_limit(self):
+        prompts = []
+        def llm(prompt, **kwargs):
+            prompts.append(prompt)
+            return {"choices": [{"text": "[0.0 - 1.0] momento forte " + "x" * 120}]}
+        resumo = ResumoMapReduce(llm, limite_chars=300)
+        for i in range(40):
+            resumo.adicionar(linha_segmento({"start": i * 10, "end": i * 10 + 9, "text": " " + "palavra " * 6}))
+        self.assertGreater(len(prompts), 5)   # blocos mapeados durante a alimentação
+        antes = len(prompts)
+        final = resumo.finalizar()
+        self.assertLessEqual(len(final), 300)
+        self.assertGreater(len(prompts), antes)   # rodadas de reduce
+        self.assertIn("momento forte", final)
+
+    def test_hms_line(self):
+        self.assertEqual(linha_segmento({"start": 3725.2, "end": 3730, "text": " ok "}, hms=True),
+                         "[01:02:05 - 01:02:10] ok\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
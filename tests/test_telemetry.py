@@ -0,0 +1,120 @@
+"""
+Testes da Telemetria do HUD
+Coletores em threads próprias, snapshots imutáveis e métricas de frame/travamento da UI
+"""
+
+import threading
+import time
+import unittest
+
+from gui.telemetry import FrameMonitor, TelemetryCollector, TelemetrySnapshot
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestTelemetryCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = TelemetryCollector()
+        self.addCleanup(self.collector.stop, 1.0)
+
+    def test_slow_source_does_not_block_fast_source_or_reader(self):
+        release = threading.Event()
+        fast_calls = []
+
+        def slow():
+            release.wait(2)
+            return {'level': 50}
+
+        self.collector.add_source('fast', lambda: fast_calls.append(1) or len(fast_calls), 0.02)
+        self.collector.add_source('slow', slow, 60)
+        self.collector.start()
+
+        self.assertTrue(wait_for(lambda: len(fast_calls) >= 5))
+        t0 = time.perf_counter()
+        snapshot = self.collector.snapshot()
+        self.assertLess(time.perf_counter() - t0, 0.01)
+        self.assertIsNone(snapshot.get('slow'))
+        self.assertGreaterEqual(snapshot.get('fast'), 1)
+
+        release.set()
+        self.assertTrue(wait_for(lambda: self.collector.snapshot().get('slow') == {'level': 50}))
+        stats = self.collector.get_stats()
+        self.assertGreaterEqual(stats['slow']['duracao_max_ms'], 50)
+        self.assertEqual(stats['slow']['coletas'], 1)
+
+    def test_snapshots_are_immutable_and_versioned(self):
+        self.collector.add_source('x', lambda: 1, 0.01)
+        self.collector.start()
+        self.assertTrue(wait_for(lambda: self.collector.snapshot().version >= 2))
+        first = self.collector.snapshot()
+        with self.assertRaises(TypeError):
+            first.values['x'] = 2
+        with self.assertRaises(AttributeError):
+            first.version = 99
+        self.assertTrue(wait_for(lambda: self.collector.snapshot() is not first))
+        self.assertGreater(self.collector.snapshot().version, first.version)
+
+    def test_failure_keeps_last_good_value(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) > 1:
+                raise ConnectionError("offline")
+            return 'ok'
+
+        self.collector.add_source('net', flaky, 0.01)
+        self.collector.start()
+        self.assertTrue(wait_for(lambda: 'net' in self.collector.snapshot().errors))
+        snapshot = self.collector.snapshot()
+        self.assertEqual(snapshot.get('net'), 'ok')
+        self.assertIn('offline', snapshot.errors['net'])
+        self.assertGreaterEqual(self.collector.get_stats()['net']['falhas'], 1)
+
+
+class TestFrameMonitor(unittest.TestCase):
+
+    def test_stalls_are_counted(self):
+        monitor = FrameMonitor(stall_ms=100)
+        t = 0.0
+        for _ in range(60):
+            monitor.tick(t)
+            t += 1 / 60
+        monitor.tick(t + 0.5)
+        stats = monitor.get_stats()
+        self.assertEqual(stats['stalls'], 1)
+        self.assertGreaterEqual(stats['max_stall_ms'], 500)
+        self.assertAlmostEqual(stats['frame_p50_ms'], 1000 / 60, places=1)
+
+    def test_ui_loop_holds_frame_rate_while_collector_is_slow(self):
+        """Loop de UI simulado lendo snapshots a 60 fps enquanto um coletor leva 0,5 s"""
+        collector = TelemetryCollector()
+        collector.add_source('pizzint', lambda: time.sleep(0.5) or {'level': 10}, 60)
+        collector.start()
+        self.addCleanup(collector.stop, 1.0)
+
+        monitor = FrameMonitor(stall_ms=100)
+        end = time.perf_counter() + 0.7
+        while time.perf_counter() < end:
+            monitor.tick()
+            collector.snapshot().get('pizzint')
+            time.sleep(1 / 60)
+        self.assertEqual(monitor.get_stats()['stalls'], 0)
+        self.assertEqual(collector.snapshot().get('pizzint'), {'level': 10})
+
+    def test_empty_snapshot(self):
+        snapshot = TelemetrySnapshot()
+        self.assertIsNone(snapshot.get('x'))
+        self.assertIsNone(snapshot.age('x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
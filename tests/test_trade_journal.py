@@ -0,0 +1,125 @@
+"""
+Testes do Diário de Trades
+Append-only em JSONL, casamento de P&L por símbolo, recuperação de linha truncada e exportação CSV
+"""
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from trading.journal import CSV_HEADER, TradeJournal
+
+
+def trade(side, price, symbol='DOGEUSDT', quantity=10.0):
+    return {'symbol': symbol, 'side': side, 'quantity': quantity, 'price': price,
+            'strategy': 'Manual', 'timestamp': datetime(2024, 1, 1, 12, 0, 0)}
+
+
+class TestTradeJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'history.jsonl')
+
+    def test_sell_consumes_latest_open_buy(self):
+        journal = TradeJournal(self.path)
+        journal.record(trade('BUY', 1.0))
+        journal.record(trade('BUY', 2.0))
+        journal.record(trade('BUY', 5.0, symbol='ADAUSDT'))
+        first = journal.record(trade('SELL', 3.0))
+        second = journal.record(trade('SELL', 0.5))
+        orphan = journal.record(trade('SELL', 4.0))
+
+        self.assertEqual(first['buy_price'], 2.0)
+        self.assertAlmostEqual(first['pnl'], 10.0)
+        self.assertEqual(second['buy_price'], 1.0)
+        self.assertAlmostEqual(second['pnl_percent'], -50.0)
+        self.assertNotIn('pnl', orphan)
+
+        stats = journal.stats()
+        self.assertEqual(stats['total_trades'], 6)
+        self.assertEqual(stats['sell_trades'], 3)
+        self.assertAlmostEqual(stats['total_pnl'], 5.0)
+        self.assertEqual(stats['profitable_trades'], 1)
+        self.assertEqual(stats['posicoes_abertas'], {'ADAUSDT': 1})
+
+        # Reabrir reconstrói índice e agregados a partir do arquivo
+        reopened = TradeJournal(self.path)
+        self.assertEqual(reopened.stats(), stats)
+        self.assertEqual(reopened.record(trade('SELL', 6.0, symbol='ADAUSDT'))['buy_price'], 5.0)
+
+    def test_appends_do_not_rewrite_file(self):
+        journal = TradeJournal(self.path)
+        journal.record(trade('BUY', 1.0))
+        with open(self.path, 'rb') as f:
+            first_line = f.read()
+        journal.record(trade('SELL', 2.0))
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        self.assertTrue(content.startswith(first_line))
+        self.assertEqual(content.count(b"\n"), 2)
+        self.assertEqual(json.loads(content.splitlines()[0])['timestamp'], '2024-01-01T12:00:00')
+
+    def test_torn_last_line_is_discarded(self):
+        journal = TradeJournal(self.path)
+        journal.record(trade('BUY', 1.0))
+        with open(self.path, 'ab') as f:
+            f.write(b'{"symbol": "DOGEUSDT", "side": "SE')
+
+        recovered = TradeJournal(self.path)
+        self.assertEqual(len(recovered), 1)
+        recovered.record(trade('SELL', 2.0))
+        self.assertEqual(len(TradeJournal(self.path)), 2)
+
+    def test_tail_and_refresh(self):
+        journal = TradeJournal(self.path, tail_size=3)
+        for i in range(10):
+            journal.record(trade('BUY', float(i + 1)))
+        self.assertEqual([t['price'] for t in journal.tail(2)], [9.0, 10.0])
+        self.assertEqual([t['price'] for t in journal.tail(6)], [5.0, 6.0, 7.0, 8.0, 9.0, 10.0])
+
+        reader = TradeJournal(self.path)
+        version = reader.version
+        journal.record(trade('SELL', 20.0))
+        self.assertEqual(reader.refresh(), 1)
+        self.assertNotEqual(reader.version, version)
+        self.assertEqual(reader.tail(1)[0]['pnl'], 100.0)
+        self.assertEqual(reader.refresh(), 0)
+
+    def test_legacy_json_migration_and_csv_export(self):
+        legacy = os.path.join(self.tmp.name, 'history.json')
+        with open(legacy, 'w', encoding='utf-8') as f:
+            json.dump([
+                {'symbol': 'DOGEUSDT', 'side': 'BUY', 'quantity': 10, 'price': 1.0,
+                 'strategy': 'Manual', 'timestamp': '2024-01-01T12:00:00'},
+                {'symbol': 'DOGEUSDT', 'side': 'SELL', 'quantity': 10, 'price': 1.5,
+                 'strategy': 'Manual', 'timestamp': '2024-01-01T13:00:00',
+                 'pnl': 5.0, 'pnl_percent': 50.0, 'buy_price': 1.0},
+            ], f)
+        journal = TradeJournal(self.path, legacy_json=legacy)
+        self.assertEqual(len(journal), 2)
+        self.assertEqual(journal.stats()['total_pnl'], 5.0)
+        self.assertEqual(journal.stats()['posicoes_abertas'], {})
+
+        csv_path = os.path.join(self.tmp.name, 'history.csv')
+        self.assertEqual(journal.export_csv(csv_path), 2)
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual(rows[2][1:], ['DOGEUSDT', 'SELL', '10', '1.5', 'Manual', '5.0', '50.0', '1.0'])
+
+    def test_clear(self):
+        journal = TradeJournal(self.path)
+        journal.record(trade('BUY', 1.0))
+        journal.clear()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(journal.tail(10), [])
+        self.assertEqual(journal.stats()['total_trades'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Testes do Cache de Transcrições
+Chaves por URL/hash (com memos limitados), cobertura parcial de trechos, persistência, despejo
+das transcrições por tamanho e vídeo guardado com despejo LRU
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from utils import transcript_cache
+from utils.transcript_cache import TranscriptCache, id_youtube
+
+
+def segmento(inicio, fim, texto):
+    return {"id": 0, "seek": 0, "start": inicio, "end": fim, "text": texto, "tokens": [1, 2],
+            "no_speech_prob": 0.01,
+            "words": [{"word": texto.split()[0], "start": inicio, "end": fim, "probability": 0.9}]}
+
+
+class TestTranscriptCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = TranscriptCache(os.path.join(self.tmp.name, "transcricoes"))
+
+    def test_keys(self):
+        for url in ("https://www.youtube.com/watch?v=abc123XYZ_-&t=10", "https://youtu.be/abc123XYZ_-",
+                    "https://youtube.com/shorts/abc123XYZ_-"):
+            self.assertEqual(TranscriptCache.chave_url(url), "yt:abc123XYZ_-")
+        self.assertIsNone(id_youtube("https://vimeo.com/123"))
+        self.assertTrue(TranscriptCache.chave_url("https://vimeo.com/123").startswith("url:"))
+        self.assertEqual(TranscriptCache.chave_bytes(b"audio"), TranscriptCache.chave_bytes(b"audio"))
+
+        caminho = os.path.join(self.tmp.name, "video.mp4")
+        with open(caminho, "wb") as f:
+            f.write(b"conteudo")
+        copia = os.path.join(self.tmp.name, "copia.mp4")
+        with open(copia, "wb") as f:
+            f.write(b"conteudo")
+        self.assertEqual(self.cache.chave_arquivo(caminho), self.cache.chave_arquivo(copia))
+
+    def test_file_hash_memos_are_bounded(self):
+        def arquivo(nome):
+            caminho = os.path.join(self.tmp.name, nome)
+            with open(caminho, "wb") as f:
+                f.write(nome.encode())
+            return caminho
+
+        temporario = arquivo("temp_download.mp4")
+        self.cache.chave_arquivo(temporario)
+        os.remove(temporario)
+        a, b, c = arquivo("a.mp4"), arquivo("b.mp4"), arquivo("c.mp4")
+        self.cache.chave_arquivo(a)
+        # Memo de arquivo apagado sai ao memorizar o próximo
+        self.assertEqual(list(TranscriptCache(self.cache.pasta)._index["hashes"]), [os.path.abspath(a)])
+
+        with mock.patch.object(transcript_cache, "HASHES_MAX", 2):
+            self.cache.chave_arquivo(b)
+            self.cache.chave_arquivo(a)   # uso recente: "b" passa a ser o mais antigo
+            self.cache.chave_arquivo(c)
+        self.assertEqual(list(TranscriptCache(self.cache.pasta)._index["hashes"]),
+                         [os.path.abspath(a), os.path.abspath(c)])
+
+    def test_full_transcript_roundtrip(self):
+        chave = "yt:abc"
+        self.assertIsNone(self.cache.get(chave))
+        self.cache.put_resultado(chave, "base", {"text": " Olá mundo. Tudo bem?", "language": "pt",
+                                                 "segments": [segmento(0, 2.5, " Olá mundo."),
+                                                              segmento(2.5, 4.0, " Tudo bem?")]})
+        # Outra instância (reinício do processo) lê do disco
+        resultado = TranscriptCache(self.cache.pasta).get(chave)
+        self.assertEqual(resultado["text"], " Olá mundo. Tudo bem?")
+        self.assertEqual(resultado["language"], "pt")
+        self.assertEqual(resultado["segments"][0]["words"][0]["word"], "Olá")
+        self.assertNotIn("tokens", resultado["segments"][0])
+        self.assertIsNone(self.cache.get(chave, perfil="large"))
+        self.assertEqual(len(self.cache.get(chave, inicio=3.0, fim=10.0)["segments"]), 1)
+
+    def test_partial_coverage(self):
+        chave = "sha1:x"
+        self.cache.put(chave, "base", [segmento(0, 30, " primeira janela")], inicio=0, fim=30)
+        self.cache.put(chave, "base", [segmento(60, 90, " terceira janela")], inicio=60, fim=90)
+        self.assertIsNotNone(self.cache.get(chave, inicio=5, fim=25))
+        self.assertIsNone(self.cache.get(chave, inicio=20, fim=70))
+        self.assertEqual(self.cache.faltando(chave, inicio=0, fim=90), [(30, 60)])
+        self.assertEqual(self.cache.faltando(chave), [(30, 60), (90, None)])
+
+        self.cache.put(chave, "base", [segmento(30, 60, " segunda janela")], inicio=30, fim=60)
+        self.assertEqual(self.cache.faltando(chave, inicio=0, fim=90), [])
+        trecho = self.cache.get(chave, inicio=0, fim=90)
+        self.assertEqual(trecho["text"], " primeira janela segunda janela terceira janela")
+
+        # Retranscrever um trecho substitui os segmentos dele
+        self.cache.put(chave, "base", [segmento(30, 60, " segunda revisada")], inicio=30, fim=60)
+        self.assertIn("segunda revisada", self.cache.get(chave, inicio=0, fim=90)["text"])
+        self.assertNotIn("segunda janela", self.cache.get(chave, inicio=0, fim=90)["text"])
+
+    def test_media_storage_and_eviction(self):
+        cache = TranscriptCache(os.path.join(self.tmp.name, "lru"), max_midia_bytes=2500)
+        for nome in ("a", "b", "c"):
+            baixado = os.path.join(self.tmp.name, f"temp_{nome}.mp4")
+            with open(baixado, "wb") as f:
+                f.write(b"v" * 1000)
+            destino = cache.guardar_midia(f"yt:{nome}", baixado)
+            self.assertFalse(os.path.exists(baixado))
+            self.assertTrue(destino.endswith(".mp4"))
+            if nome == "b":
+                cache.midia("yt:a")   # acesso recente: "b" passa a ser o mais antigo
+        self.assertIsNone(cache.midia("yt:b"))
+        self.assertIsNotNone(cache.midia("yt:a"))
+        self.assertIsNotNone(TranscriptCache(cache.pasta).midia("yt:c"))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_transcript_eviction_by_size(self):
+        pasta = os.path.join(self.tmp.name, "voz")
+        resultado = {"language": "pt", "segments": [segmento(0, 3.0, " mensagem de voz" * 20)]}
+        cache = TranscriptCache(pasta)
+        cache.put_resultado("sha1:0", "base:pt", resultado)
+        tamanho = cache.get_stats()["transcricoes_bytes"]
+
+        cache = TranscriptCache(pasta, max_transcricoes_bytes=int(tamanho * 2.5))
+        self.assertEqual(cache.get_stats()["transcricoes_bytes"], tamanho)
+        time.sleep(0.01)
+        cache.put_resultado("sha1:1", "base:pt", resultado)
+        time.sleep(0.01)
+        self.assertIsNotNone(cache.get("sha1:0", "base:pt"))   # leitura recente: "1" passa a ser o mais antigo
+        time.sleep(0.01)
+        cache.put_resultado("sha1:2", "base:pt", resultado)
+
+        self.assertIsNone(cache.get("sha1:1", "base:pt"))
+        self.assertIsNotNone(cache.get("sha1:0", "base:pt"))
+        self.assertIsNotNone(cache.get("sha1:2", "base:pt"))
+        stats = cache.get_stats()
+        self.assertEqual(stats["transcricoes_evictions"], 1)
+        self.assertLessEqual(stats["transcricoes_bytes"], cache.max_transcricoes_bytes)
+        self.assertEqual(TranscriptCache(pasta).get_stats()["transcricoes_bytes"], stats["transcricoes_bytes"])
+
+    def test_artifacts_have_their_own_counters(self):
+        self.cache.put_artefato("yt:abc", "rosto", [[0.0, 0.5]])
+        self.assertEqual(self.cache.get_artefato("yt:abc", "rosto"), [[0.0, 0.5]])
+        self.assertIsNone(self.cache.get_artefato("yt:abc", "outro"))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["artefato_hits"], stats["artefato_misses"]), (1, 1))
+        self.assertEqual((stats["hits"], stats["misses"]), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
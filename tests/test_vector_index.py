@@ -0,0 +1,94 @@
+"""
+Testes dos Índices Vetoriais do RAG
+Escolha do tipo pelo tamanho do corpus, recall do HNSW e do IVF-PQ contra a busca exata,
+extração de vetores e a decisão de reconstruir depois de um sync incremental
+"""
+
+import os
+import tempfile
+import unittest
+
+import faiss
+import numpy as np
+
+from core import vector_index
+from core.vector_index import (ajustar_busca, construir_indice, escolher_tipo, extrair_vetores, precisa_reconstruir,
+                               tipo_do_indice)
+
+
+def corpus(n, dim=32, semente=0):
+    """Vetores agrupados (como embeddings de texto), não ruído uniforme"""
+    rng = np.random.default_rng(semente)
+    centros = rng.normal(size=(50, dim))
+    vetores = centros[rng.integers(0, 50, n)] + 0.3 * rng.normal(size=(n, dim))
+    return vetores.astype(np.float32), np.arange(n, dtype=np.int64) * 7 + 3
+
+
+def recall(indice, exato, consultas, k=10):
+    _, achados = indice.search(consultas, k)
+    _, verdade = exato.search(consultas, k)
+    return np.mean([len(set(a) & set(v)) / k for a, v in zip(achados, verdade)])
+
+
+class TestVectorIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        faiss.omp_set_num_threads(1)
+        cls.vetores, cls.ids = corpus(12000)
+        # Consultas perto dos documentos, como no RAG (pergunta sobre algo que está no corpus)
+        rng = np.random.default_rng(1)
+        cls.consultas = (cls.vetores[rng.choice(len(cls.vetores), 100)]
+                         + 0.3 * rng.normal(size=(100, cls.vetores.shape[1]))).astype(np.float32)
+        cls.exato, _ = construir_indice(cls.vetores, cls.ids, "flat")
+
+    def test_type_selection(self):
+        self.assertEqual(escolher_tipo(10, "auto"), "flat")
+        self.assertEqual(escolher_tipo(vector_index.LIMIAR_HNSW, "auto"), "hnsw")
+        self.assertEqual(escolher_tipo(vector_index.LIMIAR_IVFPQ, "auto"), "ivfpq")
+        self.assertEqual(escolher_tipo(10, "ivfpq"), "ivfpq")
+        with self.assertRaises(ValueError):
+            escolher_tipo(10, "lsh")
+
+    def test_ann_recall_against_flat(self):
+        for tipo, minimo in (("hnsw", 0.95), ("ivfpq", 0.9)):
+            indice, usado = construir_indice(self.vetores, self.ids, tipo)
+            self.assertEqual((usado, tipo_do_indice(indice)), (tipo, tipo))
+            self.assertGreaterEqual(recall(indice, self.exato, self.consultas), minimo, tipo)
+
+    def test_search_params_survive_disk_roundtrip(self):
+        indice, _ = construir_indice(self.vetores, self.ids, "hnsw")
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "ann.bin")
+            faiss.write_index(indice, caminho)
+            lido = ajustar_busca(faiss.read_index(caminho))
+        self.assertEqual(faiss.downcast_index(lido.index).hnsw.efSearch, vector_index.HNSW_EF_SEARCH)
+        self.assertGreaterEqual(recall(lido, self.exato, self.consultas), 0.9)
+
+    def test_extract_vectors_from_every_type(self):
+        for tipo in ("flat", "hnsw", "ivfpq"):
+            indice, _ = construir_indice(self.vetores, self.ids, tipo)
+            vetores, ids = extrair_vetores(indice)
+            np.testing.assert_array_equal(ids, self.ids)
+            np.testing.assert_allclose(vetores, self.vetores, rtol=1e-6)
+
+    def test_incremental_adds_and_rebuild_decision(self):
+        pequeno, _ = construir_indice(self.vetores[:100], self.ids[:100], "flat")
+        self.assertIsNone(precisa_reconstruir(pequeno, 100, 0, 100))
+        self.assertEqual(precisa_reconstruir(pequeno, vector_index.LIMIAR_HNSW, 0, 100), "hnsw")
+
+        hnsw, _ = construir_indice(self.vetores[:11000], self.ids[:11000], "hnsw")
+        hnsw.add_with_ids(self.vetores[11000:], self.ids[11000:])
+        self.assertEqual(hnsw.ntotal, 12000)
+        self.assertGreaterEqual(recall(hnsw, self.exato, self.consultas), 0.9)
+        self.assertIsNone(precisa_reconstruir(hnsw, 50000, 0, 11000))        # HNSW cresce sem re-treino
+        self.assertEqual(precisa_reconstruir(hnsw, 11000, 3000, 12000), "hnsw")   # órfãos demais
+        self.assertEqual(precisa_reconstruir(hnsw, 100, 0, 12000), "flat")
+
+        ivfpq, _ = construir_indice(self.vetores, self.ids, "ivfpq")
+        self.assertIsNone(precisa_reconstruir(ivfpq, 20000, 0, 12000, "ivfpq"))
+        self.assertEqual(precisa_reconstruir(ivfpq, 24000, 0, 12000, "ivfpq"), "ivfpq")
+
+
+if __name__ == '__main__':
+    unittest.main()
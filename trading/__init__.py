@@ -3,5 +3,6 @@ Módulo de Trading Automático para R2 Assistant
 """
 from .binance_client import BinanceClient
 from .trading_engine import TradingEngine
+from .market_data import MarketDataFeed
 
-__all__ = ['BinanceClient', 'TradingEngine']
\ No newline at end of file
+__all__ = ['BinanceClient', 'TradingEngine', 'MarketDataFeed']
\ No newline at end of file
@@ -1,20 +1,34 @@
 import hmac
 import hashlib
 import urllib.parse
-import requests
 import logging
+from urllib.parse import urlsplit
 from typing import Dict, Optional, List
 from datetime import datetime
 
+from utils.http_client import HttpClient, get_http_client
+
+# Limite de peso da API spot: 1200/min; com folga para klines (peso 2) e ordens
+RATE_LIMIT_POR_SEGUNDO = 15
+RATE_LIMIT_RAJADA = 30
+
 class BinanceClient:
     """Cliente seguro para API Binance"""
     
-    def __init__(self, api_key: str, secret_key: str, testnet: bool = True):
+    def __init__(self, api_key: str, secret_key: str, testnet: bool = True,
+                 base_url: Optional[str] = None, ws_url: Optional[str] = None,
+                 http_client: Optional[HttpClient] = None):
         self.api_key = api_key
         self.secret_key = secret_key
-        self.base_url = "https://testnet.binance.vision" if testnet else "https://api.binance.com"
+        self.base_url = base_url or ("https://testnet.binance.vision" if testnet else "https://api.binance.com")
+        self.ws_url = ws_url or ("wss://testnet.binance.vision/stream" if testnet else "wss://stream.binance.com:9443/stream")
         self.logger = logging.getLogger(__name__)
         
+        # Transporte compartilhado: pool keep-alive por host, rate limit e retry com backoff
+        self.http = http_client or get_http_client()
+        self.http.set_rate_limit(urlsplit(self.base_url).netloc, RATE_LIMIT_POR_SEGUNDO,
+                                 RATE_LIMIT_RAJADA, overwrite=False)
+        
         # Verifica se as chaves foram fornecidas
         if not api_key or not secret_key:
             self.logger.error("Chaves API não fornecidas")
@@ -33,14 +47,20 @@ class BinanceClient:
         """Testa a conexão com a API"""
         try:
             endpoint = "/api/v3/ping"
-            response = requests.get(f"{self.base_url}{endpoint}", timeout=10)
+            response = self.http.get(f"{self.base_url}{endpoint}", timeout=10)
             return response.status_code == 200
         except Exception as e:
             self.logger.error(f"Erro ao testar conexão: {e}")
             return False
     
-    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100) -> Optional[List]:
-        """Obtém dados de candlestick"""
+    def create_stream(self, interval: str = '1m', on_candle_close=None, **kwargs):
+        """Modo streaming: kline + bookTicker via WebSocket (ver trading.market_stream.BinanceStream)"""
+        from .market_stream import BinanceStream
+        return BinanceStream(self, interval=interval, on_candle_close=on_candle_close, **kwargs)
+    
+    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100,
+                   start_time: Optional[int] = None) -> Optional[List]:
+        """Obtém dados de candlestick (a partir de start_time em ms, se informado)"""
         try:
             endpoint = "/api/v3/klines"
             params = {
@@ -48,8 +68,10 @@ class BinanceClient:
                 'interval': interval,
                 'limit': limit
             }
+            if start_time is not None:
+                params['startTime'] = start_time
             
-            response = requests.get(f"{self.base_url}{endpoint}", params=params, timeout=10)
+            response = self.http.get(f"{self.base_url}{endpoint}", params=params, timeout=10)
             
             if response.status_code == 401:
                 self.logger.error("Erro 401 - Não autorizado. Verifique as chaves API.")
@@ -78,7 +100,7 @@ class BinanceClient:
                 'X-MBX-APIKEY': self.api_key
             }
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}{endpoint}", 
                 params=params, 
                 headers=headers, 
@@ -117,7 +139,7 @@ class BinanceClient:
                 'Content-Type': 'application/x-www-form-urlencoded'
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}{endpoint}", 
                 data=urllib.parse.urlencode(params),
                 headers=headers,
@@ -146,7 +168,7 @@ class BinanceClient:
             endpoint = "/api/v3/ticker/price"
             params = {'symbol': symbol}
             
-            response = requests.get(f"{self.base_url}{endpoint}", params=params, timeout=10)
+            response = self.http.get(f"{self.base_url}{endpoint}", params=params, timeout=10)
             
             if response.status_code == 401:
                 self.logger.error("Erro 401 - Não autorizado.")
@@ -0,0 +1,304 @@
+"""
+Motor de indicadores incremental
+Indicadores com estado atualizados em O(1) por vela nova, e versões vetorizadas em NumPy
+para backtests sobre históricos longos. Mesma semântica das funções pandas em
+sma.py / rsi.py / macd.py (EMA com adjust=False, desvio padrão amostral).
+"""
+
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class SMA:
+    """Média móvel simples com soma corrente; ressincroniza a cada `period` velas para não acumular erro."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self._sum = 0.0
+        self._since_resync = 0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        if len(self.window) == self.period:
+            self._sum -= self.window[0]
+        self.window.append(price)
+        self._sum += price
+        self._since_resync += 1
+        if self._since_resync >= self.period:
+            self._sum = sum(self.window)
+            self._since_resync = 0
+        self.value = self._sum / self.period if len(self.window) == self.period else None
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        """Valor que update(price) daria, sem alterar o estado (vela ainda aberta)."""
+        if len(self.window) < self.period - 1:
+            return None
+        dropped = self.window[0] if len(self.window) == self.period else 0.0
+        return (self._sum - dropped + price) / self.period
+
+
+class EMA:
+    """EMA com alpha = 2 / (period + 1), semeada no primeiro preço (pandas ewm adjust=False)."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self._ema: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        self._ema = price if self._ema is None else self._ema + self.alpha * (price - self._ema)
+        self.count += 1
+        self.value = self._ema if self.count >= self.period else None
+        return self.value
+
+
+class RSI:
+    """
+    RSI incremental.
+
+    method='wilder': médias suavizadas de Wilder (semente = média simples dos primeiros `period` deltas)
+    method='sma':    médias móveis simples, idêntico a calculate_rsi (rsi.py)
+    """
+
+    def __init__(self, period: int = 14, method: str = "wilder"):
+        if method not in ("wilder", "sma"):
+            raise ValueError(f"Método de RSI inválido: {method}")
+        self.period = period
+        self.method = method
+        self._prev: Optional[float] = None
+        self._gains = SMA(period)
+        self._losses = SMA(period)
+        self._avg_gain: Optional[float] = None
+        self._avg_loss: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        prev, self._prev = self._prev, price
+        if prev is None:
+            return None
+        delta = price - prev
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if self.method == "sma" or self._avg_gain is None:
+            avg_gain = self._gains.update(gain)
+            avg_loss = self._losses.update(loss)
+            if avg_gain is None:
+                return None
+            if self.method == "wilder":
+                # Semente pronta: daqui em diante só a suavização de Wilder
+                self._avg_gain, self._avg_loss = avg_gain, avg_loss
+        else:
+            p = self.period
+            self._avg_gain = (self._avg_gain * (p - 1) + gain) / p
+            self._avg_loss = (self._avg_loss * (p - 1) + loss) / p
+            avg_gain, avg_loss = self._avg_gain, self._avg_loss
+
+        self.value = _rsi_from_averages(avg_gain, avg_loss)
+        return self.value
+
+
+class MACD:
+    """MACD, linha de sinal e histograma; None até `slow + signal` velas, como calculate_macd."""
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+        self.fast = EMA(fast_period)
+        self.slow = EMA(slow_period)
+        self.signal = EMA(signal_period)
+        self.min_periods = slow_period + signal_period
+        self.count = 0
+        self.value: Tuple[Optional[float], Optional[float], Optional[float]] = (None, None, None)
+
+    def update(self, price: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        self.fast.update(price)
+        self.slow.update(price)
+        macd = self.fast._ema - self.slow._ema
+        self.signal.update(macd)
+        signal = self.signal._ema
+        self.count += 1
+        self.value = (macd, signal, macd - signal) if self.count >= self.min_periods else (None, None, None)
+        return self.value
+
+
+class Bollinger:
+    """Bandas de Bollinger (média ± k desvios amostrais) sobre uma janela de `period` velas."""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self.window = deque(maxlen=period)
+        # Somas deslocadas por `_shift` evitam cancelamento catastrófico em preços altos (BTC)
+        self._shift = 0.0
+        self._s1 = 0.0
+        self._s2 = 0.0
+        self._since_resync = 0
+        self.value: Tuple[Optional[float], Optional[float], Optional[float]] = (None, None, None)
+
+    def _resync(self):
+        self._shift = self.window[-1]
+        self._s1 = sum(x - self._shift for x in self.window)
+        self._s2 = sum((x - self._shift) ** 2 for x in self.window)
+        self._since_resync = 0
+
+    def update(self, price: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        if len(self.window) == self.period:
+            old = self.window[0] - self._shift
+            self._s1 -= old
+            self._s2 -= old * old
+        self.window.append(price)
+        d = price - self._shift
+        self._s1 += d
+        self._s2 += d * d
+        self._since_resync += 1
+        if self._since_resync >= self.period:
+            self._resync()
+
+        n = len(self.window)
+        if n < self.period:
+            self.value = (None, None, None)
+            return self.value
+        mean_d = self._s1 / n
+        var = max((self._s2 - n * mean_d * mean_d) / (n - 1), 0.0) if n > 1 else 0.0
+        mid = mean_d + self._shift
+        band = self.num_std * var ** 0.5
+        self.value = (mid + band, mid, mid - band)
+        return self.value
+
+
+def _rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    # Mesmos casos de borda do pandas em calculate_rsi: perda zero -> 100, sem movimento -> 50
+    if avg_loss == 0:
+        return 50.0 if avg_gain == 0 else 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+# ============================================================
+# Modo batch (NumPy) — séries completas para backtests
+# ============================================================
+def _ewm(x: np.ndarray, alpha: float, init: Optional[float] = None) -> np.ndarray:
+    """
+    y[t] = y[t-1] + alpha * (x[t] - y[t-1]), com y[-1] = init (ou y[0] = x[0]).
+    Resolve a recorrência em blocos vetorizados; o tamanho do bloco limita (1-alpha)^-m a 1e3
+    para não perder precisão com entradas de sinal misto (ex.: linha MACD).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    if init is None:
+        out[0] = prev = x[0]
+        start = 1
+    else:
+        prev = float(init)
+        start = 0
+    if decay <= 0.0:
+        out[start:] = x[start:]
+        return out
+    m = max(1, int(np.log(1e3) / -np.log(decay))) if decay < 1.0 else n
+    powers = decay ** np.arange(1, m + 1)
+    inv_powers = 1.0 / powers
+    for i in range(start, n, m):
+        blk = x[i:i + m]
+        k = len(blk)
+        acc = np.cumsum(blk * inv_powers[:k]) * powers[:k] * alpha
+        out[i:i + k] = acc + prev * powers[:k]
+        prev = out[i + k - 1]
+    return out
+
+
+def _rolling_mean(x: np.ndarray, period: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        csum = np.cumsum(np.insert(x, 0, 0.0))
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+def sma_batch(prices, period: int) -> np.ndarray:
+    """SMA para toda a série; NaN nas primeiras period-1 posições."""
+    return _rolling_mean(prices, period)
+
+
+def ema_batch(prices, period: int) -> np.ndarray:
+    """EMA (adjust=False) para toda a série; NaN antes de `period` velas, como calculate_ema."""
+    out = _ewm(prices, 2.0 / (period + 1))
+    out[:period - 1] = np.nan
+    return out
+
+
+def rsi_batch(prices, period: int = 14, method: str = "wilder") -> np.ndarray:
+    """RSI para toda a série; NaN nas primeiras `period` posições."""
+    if method not in ("wilder", "sma"):
+        raise ValueError(f"Método de RSI inválido: {method}")
+    prices = np.asarray(prices, dtype=np.float64)
+    out = np.full(len(prices), np.nan)
+    if len(prices) < period + 1:
+        return out
+    delta = np.diff(prices)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+
+    if method == "sma":
+        avg_gain = _rolling_mean(gains, period)[period - 1:]
+        avg_loss = _rolling_mean(losses, period)[period - 1:]
+    else:
+        seed_gain = gains[:period].mean()
+        seed_loss = losses[:period].mean()
+        avg_gain = np.concatenate(([seed_gain], _ewm(gains[period:], 1.0 / period, init=seed_gain)))
+        avg_loss = np.concatenate(([seed_loss], _ewm(losses[period:], 1.0 / period, init=seed_loss)))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    out[period:] = rsi
+    return out
+
+
+def macd_batch(prices, fast_period: int = 12, slow_period: int = 26,
+               signal_period: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(macd, sinal, histograma) para toda a série; NaN antes de slow+signal velas."""
+    prices = np.asarray(prices, dtype=np.float64)
+    macd = _ewm(prices, 2.0 / (fast_period + 1)) - _ewm(prices, 2.0 / (slow_period + 1))
+    signal = _ewm(macd, 2.0 / (signal_period + 1))
+    hist = macd - signal
+    warmup = slow_period + signal_period - 1
+    for arr in (macd, signal, hist):
+        arr[:warmup] = np.nan
+    return macd, signal, hist
+
+
+def bollinger_batch(prices, period: int = 20, num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(superior, média, inferior) para toda a série; NaN nas primeiras period-1 posições."""
+    prices = np.asarray(prices, dtype=np.float64)
+    upper = np.full(len(prices), np.nan)
+    mid = np.full(len(prices), np.nan)
+    lower = np.full(len(prices), np.nan)
+    if len(prices) < period:
+        return upper, mid, lower
+    windows = np.lib.stride_tricks.sliding_window_view(prices, period)
+    mean = windows.mean(axis=1)
+    std = windows.std(axis=1, ddof=1) if period > 1 else np.zeros(len(mean))
+    mid[period - 1:] = mean
+    upper[period - 1:] = mean + num_std * std
+    lower[period - 1:] = mean - num_std * std
+    return upper, mid, lower
+
+
+def rsi_last(prices, period: int = 14, method: str = "sma") -> Optional[float]:
+    """Último valor do RSI olhando só as últimas period+1 velas (modo 'sma'); O(period)."""
+    if len(prices) < period + 1:
+        return None
+    if method == "sma":
+        window = np.asarray(prices[-(period + 1):], dtype=np.float64)
+        delta = np.diff(window)
+        return _rsi_from_averages(float(delta[delta > 0].sum()) / period, float(-delta[delta < 0].sum()) / period)
+    return float(rsi_batch(prices, period, method)[-1])
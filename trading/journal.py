@@ -0,0 +1,284 @@
+"""
+Diário de trades append-only
+Cada trade é uma linha JSON acrescentada ao arquivo (flush + fsync), sem reescrever o
+histórico. Em memória ficam só o índice de posições abertas por símbolo (casamento de
+P&L em O(1)), agregados para estatísticas e as últimas linhas para a UI.
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+CSV_HEADER = ['Data', 'Symbol', 'Side', 'Quantidade', 'Preço', 'Estratégia', 'P&L', 'P&L %', 'Preço Compra']
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+class TradeJournal:
+    """
+    Histórico de trades em JSONL.
+
+    - record(): acrescenta o trade; um SELL fecha a compra aberta mais recente do símbolo
+      (pilha por símbolo) e recebe pnl / pnl_percent / buy_price
+    - tail(n): últimos n trades (memória; arquivo lido de trás para frente se n for maior)
+    - stats(): totais, P&L acumulado e win rate sem varrer o histórico
+    - refresh(): incorpora linhas acrescentadas por outro processo desde a última leitura
+    - compact() / export_csv(): reescrita atômica do JSONL e exportação no formato CSV legado
+
+    Uma linha truncada no fim do arquivo (queda no meio de uma escrita) é descartada na abertura.
+    """
+
+    def __init__(self, path: str = "trading_history.jsonl", legacy_json: Optional[str] = None,
+                 tail_size: int = 500):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._recent: deque = deque(maxlen=tail_size)
+        self._reset_state()
+
+        if not os.path.exists(path) and legacy_json and os.path.exists(legacy_json):
+            self._import_legacy(legacy_json)
+        else:
+            self._replay()
+
+    # ------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------
+    def record(self, trade_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Acrescenta um trade ao diário e devolve o registro gravado (com P&L se fechou posição)"""
+        entry = dict(trade_info)
+        if isinstance(entry.get('timestamp'), datetime):
+            entry['timestamp'] = entry['timestamp'].isoformat()
+        entry['saved_at'] = datetime.now().isoformat()
+
+        with self._lock:
+            if entry['side'] == 'SELL':
+                buy = self._open_buy(entry['symbol'])
+                if buy is not None:
+                    buy_price = buy['price']
+                    entry['pnl'] = (entry['price'] - buy_price) * entry['quantity']
+                    entry['pnl_percent'] = ((entry['price'] - buy_price) / buy_price) * 100 if buy_price else 0.0
+                    entry['buy_price'] = buy_price
+            line = json.dumps(entry, ensure_ascii=False, default=_json_default) + "\n"
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                self._offset = f.tell()
+            self._apply(entry)
+        return entry
+
+    def tail(self, n: int = 50) -> List[Dict[str, Any]]:
+        """Últimos n trades, do mais antigo para o mais recente"""
+        with self._lock:
+            if n <= len(self._recent) or len(self._recent) == self._count:
+                return list(self._recent)[-n:] if n else []
+        return self._read_tail(n)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sells = self._sides['SELL']
+            return {
+                'total_trades': self._count,
+                'buy_trades': self._sides['BUY'],
+                'sell_trades': sells,
+                'total_pnl': self._total_pnl,
+                'profitable_trades': self._profitable,
+                'win_rate': (self._profitable / sells * 100) if sells else 0.0,
+                'posicoes_abertas': {s: len(b) for s, b in self._open.items() if b},
+            }
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def version(self) -> int:
+        """Muda sempre que o conteúdo do diário muda"""
+        return self._version
+
+    def refresh(self) -> int:
+        """Lê as linhas que outro processo acrescentou; devolve quantas entraram"""
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            if size < self._offset:
+                # Arquivo truncado/substituído por fora: relê tudo
+                self._reset_state()
+                self._replay_locked()
+                return self._count
+            if size == self._offset:
+                return 0
+            before = self._count
+            self._read_from(self._offset)
+            return self._count - before
+
+    def compact(self):
+        """Reescreve o diário de forma atômica só com registros válidos (descarta linhas corrompidas)"""
+        with self._lock:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as out:
+                for entry in self._iter_file():
+                    out.write(json.dumps(entry, ensure_ascii=False, default=_json_default) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, self.path)
+            self._reset_state()
+            self._replay_locked()
+
+    def export_csv(self, csv_path: str) -> int:
+        """Gera o CSV no formato histórico (mesmas colunas do save_to_csv antigo); devolve o nº de linhas"""
+        rows = 0
+        tmp = f"{csv_path}.tmp"
+        with self._lock, open(tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for trade in self._iter_file():
+                writer.writerow([
+                    trade['timestamp'],
+                    trade['symbol'],
+                    trade['side'],
+                    trade['quantity'],
+                    trade['price'],
+                    trade.get('strategy', 'Manual'),
+                    trade.get('pnl', 0),
+                    trade.get('pnl_percent', 0),
+                    trade.get('buy_price', 0),
+                ])
+                rows += 1
+        os.replace(tmp, csv_path)
+        return rows
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._reset_state()
+            self._version += 1
+
+    # ------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------
+    def _reset_state(self):
+        self._open: Dict[str, list] = defaultdict(list)   # símbolo → pilha de compras abertas
+        self._recent.clear()
+        self._sides = defaultdict(int)
+        self._count = 0
+        self._total_pnl = 0.0
+        self._profitable = 0
+        self._offset = 0
+        self._version = getattr(self, '_version', 0) + 1
+
+    def _open_buy(self, symbol: str) -> Optional[Dict[str, Any]]:
+        stack = self._open.get(symbol)
+        return stack[-1] if stack else None
+
+    def _apply(self, entry: Dict[str, Any]):
+        """Atualiza índice e agregados com um registro (gravação nova ou replay)"""
+        symbol, side = entry['symbol'], entry['side']
+        if side == 'BUY':
+            self._open[symbol].append(entry)
+        elif side == 'SELL' and self._open.get(symbol):
+            self._open[symbol].pop()
+        pnl = entry.get('pnl', 0) or 0
+        self._total_pnl += pnl
+        if pnl > 0:
+            self._profitable += 1
+        self._sides[side] += 1
+        self._count += 1
+        self._recent.append(entry)
+        self._version += 1
+
+    def _replay(self):
+        with self._lock:
+            self._replay_locked()
+
+    def _replay_locked(self):
+        if not os.path.exists(self.path):
+            return
+        valid_end = self._read_from(0)
+        size = os.path.getsize(self.path)
+        if valid_end < size:
+            # Linha final incompleta (escrita interrompida): corta para o próximo append ficar íntegro
+            self.logger.warning(f"Diário {self.path}: descartando {size - valid_end} bytes finais incompletos")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
+            self._offset = valid_end
+
+    def _read_from(self, offset: int) -> int:
+        """Aplica as linhas completas a partir de `offset`; devolve o fim da última linha válida"""
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                try:
+                    self._apply(json.loads(raw))
+                except (ValueError, KeyError) as e:
+                    self.logger.warning(f"Linha inválida no diário ignorada: {e}")
+        self._offset = offset
+        return offset
+
+    def _iter_file(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    yield json.loads(raw)
+                except ValueError:
+                    continue
+
+    def _read_tail(self, n: int, block: int = 64 * 1024) -> List[Dict[str, Any]]:
+        """Lê as últimas n linhas do arquivo de trás para frente, sem carregar o resto"""
+        with self._lock:
+            end = self._offset
+        if not end:
+            return []
+        data = b""
+        with open(self.path, 'rb') as f:
+            pos = end
+            while pos > 0 and data.count(b"\n") <= n:
+                step = min(block, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        lines = data[:end - pos].splitlines()[-n:]
+        result = []
+        for raw in lines:
+            try:
+                result.append(json.loads(raw))
+            except ValueError:
+                continue
+        return result
+
+    def _import_legacy(self, legacy_json: str):
+        """Migra o trading_history.json antigo (lista única) para o diário"""
+        try:
+            with open(legacy_json, 'r', encoding='utf-8') as f:
+                trades = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Histórico legado ilegível ({legacy_json}): {e}")
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as out:
+            for trade in trades:
+                out.write(json.dumps(trade, ensure_ascii=False, default=_json_default) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self.path)
+        self._replay()
+        self.logger.info(f"Histórico legado migrado: {len(trades)} trades → {self.path}")
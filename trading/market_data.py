@@ -0,0 +1,192 @@
+"""
+Camada de dados de mercado do TradingEngine
+Busca paralela de klines para todos os pares, cache local incremental
+e um único snapshot de saldo por ciclo
+"""
+
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Iterable
+
+from .binance_client import BinanceClient
+
+# Duração de cada intervalo de kline da Binance em milissegundos
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000,
+}
+
+MAX_KLINES_POR_REQUEST = 1000
+
+
+class KlineCache:
+    """Últimas `depth` velas por (símbolo, intervalo), ordenadas pelo open time"""
+
+    def __init__(self, depth: int = 100):
+        self.depth = depth
+        self._data: Dict[tuple, List[list]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, interval: str) -> Optional[List[list]]:
+        with self._lock:
+            klines = self._data.get((symbol, interval))
+            return list(klines) if klines else None
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        with self._lock:
+            klines = self._data.get((symbol, interval))
+            return int(klines[-1][0]) if klines else None
+
+    def replace(self, symbol: str, interval: str, klines: List[list]):
+        with self._lock:
+            self._data[(symbol, interval)] = list(klines[-self.depth:])
+
+    def merge(self, symbol: str, interval: str, new_klines: List[list]):
+        """Acrescenta velas novas; a vela em aberto (mesmo open time) é substituída pela versão mais recente"""
+        if not new_klines:
+            return
+        with self._lock:
+            klines = self._data.setdefault((symbol, interval), [])
+            first_new = int(new_klines[0][0])
+            while klines and int(klines[-1][0]) >= first_new:
+                klines.pop()
+            klines.extend(new_klines)
+            if len(klines) > self.depth:
+                del klines[:len(klines) - self.depth]
+
+    def discard(self, symbol: str):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == symbol]:
+                del self._data[key]
+
+
+class AccountSnapshot:
+    """Saldo da conta lido uma vez por ciclo; ordens do mesmo ciclo reservam o valor localmente"""
+
+    def __init__(self, account_info: Dict):
+        self._lock = threading.Lock()
+        self.free: Dict[str, float] = {}
+        self.locked: Dict[str, float] = {}
+        for balance in account_info.get('balances', []):
+            self.free[balance['asset']] = float(balance['free'])
+            self.locked[balance['asset']] = float(balance['locked'])
+
+    def get_free(self, asset: str) -> float:
+        return self.free.get(asset, 0.0)
+
+    def try_reserve(self, asset: str, amount: float) -> bool:
+        """Verifica e desconta o saldo de forma atômica; False se não houver saldo livre"""
+        with self._lock:
+            free = self.free.get(asset, 0.0)
+            if free < amount:
+                return False
+            self.free[asset] = free - amount
+            return True
+
+    def release(self, asset: str, amount: float):
+        """Devolve uma reserva cuja ordem falhou"""
+        with self._lock:
+            self.free[asset] = self.free.get(asset, 0.0) + amount
+
+
+class MarketDataFeed:
+    """
+    Dados de mercado de todos os pares ativos em uma rodada.
+
+    - refresh(): busca os símbolos em paralelo sobre a sessão com pool do BinanceClient
+    - klines incrementais: depois da primeira carga só pede as velas desde o último open time
+    - account(): snapshot de saldo compartilhado pelo ciclo inteiro
+    """
+
+    def __init__(self, binance_client: BinanceClient, interval: str = '1m',
+                 depth: int = 100, max_workers: int = 8, clock=time.time):
+        self.client = binance_client
+        self.clock = clock
+        self.interval = interval
+        self.depth = depth
+        self.cache = KlineCache(depth)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+        self.logger = logging.getLogger(__name__)
+        self._account: Optional[AccountSnapshot] = None
+        self._account_at = 0.0
+        self.account_max_age_s: Optional[float] = None  # None = vale até o próximo refresh()
+        self._account_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'ciclos': 0, 'requests_klines': 0, 'velas_recebidas': 0,
+                      'requests_conta': 0, 'ultimo_ciclo_ms': None}
+
+    def _fetch_symbol(self, symbol: str) -> Optional[List[list]]:
+        last_open = self.cache.last_open_time(symbol, self.interval)
+        interval_ms = INTERVAL_MS.get(self.interval)
+        now_ms = int(self.clock() * 1000)
+        incremental = (
+            last_open is not None and interval_ms is not None
+            and (now_ms - last_open) // interval_ms < MAX_KLINES_POR_REQUEST
+        )
+
+        if incremental:
+            # Reinclui a última vela conhecida: ela pode ter fechado desde a última leitura
+            klines = self.client.get_klines(symbol, self.interval, MAX_KLINES_POR_REQUEST, start_time=last_open)
+            if klines is None:
+                return self.cache.get(symbol, self.interval)
+            self.cache.merge(symbol, self.interval, klines)
+        else:
+            klines = self.client.get_klines(symbol, self.interval, self.depth)
+            if klines is None:
+                return self.cache.get(symbol, self.interval)
+            self.cache.replace(symbol, self.interval, klines)
+
+        with self._stats_lock:
+            self.stats['requests_klines'] += 1
+            self.stats['velas_recebidas'] += len(klines)
+        return self.cache.get(symbol, self.interval)
+
+    def refresh(self, symbols: Iterable[str]) -> Dict[str, Optional[List[list]]]:
+        """Atualiza todos os símbolos em paralelo e inicia um novo ciclo (descarta o snapshot de saldo)"""
+        symbols = list(symbols)
+        with self._account_lock:
+            self._account = None
+        t0 = time.perf_counter()
+        futures = {symbol: self.executor.submit(self._fetch_symbol, symbol) for symbol in symbols}
+        result = {}
+        for symbol, future in futures.items():
+            try:
+                result[symbol] = future.result()
+            except Exception as e:
+                self.logger.error(f"Erro ao atualizar klines de {symbol}: {e}")
+                result[symbol] = self.cache.get(symbol, self.interval)
+        self.stats['ciclos'] += 1
+        self.stats['ultimo_ciclo_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+        return result
+
+    def get_klines(self, symbol: str) -> Optional[List[list]]:
+        """Klines de um símbolo, buscando só o que falta no cache"""
+        return self._fetch_symbol(symbol)
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        """Último fechamento em cache (sem round trip)"""
+        klines = self.cache.get(symbol, self.interval)
+        return float(klines[-1][4]) if klines else None
+
+    def account(self) -> Optional[AccountSnapshot]:
+        """Snapshot de saldo do ciclo atual; só chama /account na primeira vez (ou quando expira)"""
+        with self._account_lock:
+            expired = (self.account_max_age_s is not None
+                       and self.clock() - self._account_at > self.account_max_age_s)
+            if self._account is None or expired:
+                self._account = None
+                self._account_at = self.clock()
+                self.stats['requests_conta'] += 1
+                info = self.client.get_account_info()
+                if info:
+                    self._account = AccountSnapshot(info)
+            return self._account
+
+    def discard(self, symbol: str):
+        self.cache.discard(symbol)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
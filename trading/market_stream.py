@@ -0,0 +1,290 @@
+"""
+Streaming de dados de mercado da Binance
+Streams kline + bookTicker via WebSocket, livro de velas em memória por símbolo,
+eventos de fechamento de vela e reconexão automática com backfill via REST
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import websockets
+
+from .binance_client import BinanceClient
+from .market_data import INTERVAL_MS, MAX_KLINES_POR_REQUEST
+
+CandleCloseCallback = Callable[[str, str, List[list]], None]
+
+
+def kline_from_event(k: Dict) -> list:
+    """Converte o payload 'k' do stream para o formato de linha do REST /api/v3/klines"""
+    return [int(k['t']), k['o'], k['h'], k['l'], k['c'], k['v'], int(k['T'])]
+
+
+class CandleBook:
+    """Velas fechadas (até `depth`) + vela em aberto por (símbolo, intervalo), e topo do book por símbolo"""
+
+    def __init__(self, depth: int = 500):
+        self.depth = depth
+        self._closed: Dict[Tuple[str, str], deque] = {}
+        self._open: Dict[Tuple[str, str], list] = {}
+        self._tops: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _series(self, key) -> deque:
+        series = self._closed.get(key)
+        if series is None:
+            series = self._closed[key] = deque(maxlen=self.depth)
+        return series
+
+    def last_closed_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        with self._lock:
+            series = self._closed.get((symbol, interval))
+            return int(series[-1][0]) if series else None
+
+    def load(self, symbol: str, interval: str, klines: List[list], now_ms: int) -> int:
+        """Mescla klines do REST; devolve quantas velas fechadas eram novas"""
+        key = (symbol, interval)
+        with self._lock:
+            series = self._series(key)
+            last = int(series[-1][0]) if series else None
+            added = 0
+            for row in klines:
+                open_time = int(row[0])
+                if int(row[6]) >= now_ms:
+                    # Ainda em aberto: só vale se for mais nova que a que o stream já mandou
+                    current = self._open.get(key)
+                    if current is None or int(current[0]) <= open_time:
+                        self._open[key] = list(row)
+                    continue
+                if last is None or open_time > last:
+                    series.append(list(row))
+                    last = open_time
+                    added += 1
+            current = self._open.get(key)
+            if current is not None and last is not None and int(current[0]) <= last:
+                del self._open[key]
+            return added
+
+    def update(self, symbol: str, interval: str, row: list, closed: bool) -> bool:
+        """Aplica um evento kline; True quando fecha uma vela nova"""
+        key = (symbol, interval)
+        with self._lock:
+            series = self._series(key)
+            if closed:
+                current = self._open.get(key)
+                if current is not None and int(current[0]) <= int(row[0]):
+                    del self._open[key]
+                if series and int(series[-1][0]) >= int(row[0]):
+                    return False  # já veio pelo backfill
+                series.append(row)
+                return True
+            if not series or int(row[0]) > int(series[-1][0]):
+                self._open[key] = row
+            return False
+
+    def set_top(self, symbol: str, bid: float, bid_qty: float, ask: float, ask_qty: float):
+        with self._lock:
+            self._tops[symbol] = {'bid': bid, 'bid_qty': bid_qty, 'ask': ask, 'ask_qty': ask_qty}
+
+    def top(self, symbol: str) -> Optional[Dict[str, float]]:
+        with self._lock:
+            top = self._tops.get(symbol)
+            return dict(top) if top else None
+
+    def klines(self, symbol: str, interval: str, include_open: bool = True) -> List[list]:
+        key = (symbol, interval)
+        with self._lock:
+            rows = list(self._closed.get(key, ()))
+            if include_open and key in self._open:
+                rows.append(self._open[key])
+            return rows
+
+    def last_price(self, symbol: str, interval: str) -> Optional[float]:
+        rows = self.klines(symbol, interval)
+        return float(rows[-1][4]) if rows else None
+
+    def discard(self, symbol: str):
+        with self._lock:
+            for store in (self._closed, self._open):
+                for key in [k for k in store if k[0] == symbol]:
+                    del store[key]
+            self._tops.pop(symbol, None)
+
+
+class BinanceStream:
+    """
+    Cliente de stream combinado da Binance rodando num event loop próprio (thread daemon).
+
+    A cada conexão: SUBSCRIBE de kline_<intervalo> e bookTicker de todos os símbolos,
+    backfill via REST das velas perdidas enquanto estava desconectado, e então o
+    processamento das mensagens. Quedas reconectam com backoff exponencial + jitter.
+    """
+
+    def __init__(self, client: BinanceClient, interval: str = '1m', depth: int = 500,
+                 on_candle_close: Optional[CandleCloseCallback] = None,
+                 reconnect_min_s: float = 1.0, reconnect_max_s: float = 30.0, clock=time.time):
+        self.client = client
+        self.url = client.ws_url
+        self.interval = interval
+        self.book = CandleBook(depth)
+        self.on_candle_close = on_candle_close
+        self.reconnect_min_s = reconnect_min_s
+        self.reconnect_max_s = reconnect_max_s
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self.symbols = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ws = None
+        self._running = False
+        self._request_id = 0
+        self.connected = threading.Event()
+        self.stats = {'conexoes': 0, 'reconexoes': 0, 'mensagens': 0, 'velas_fechadas': 0,
+                      'velas_backfill': 0, 'ultimo_evento_ms': None}
+
+    # ------------------------------------------------------------
+    # Controle
+    # ------------------------------------------------------------
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._thread_main, daemon=True, name="binance-stream")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._running = False
+        if self._loop and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout)
+        self.connected.clear()
+
+    def subscribe(self, symbol: str):
+        symbol = symbol.upper()
+        if symbol in self.symbols:
+            return
+        self.symbols.add(symbol)
+        if self._loop and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._subscribe_live([symbol]), self._loop)
+
+    def unsubscribe(self, symbol: str):
+        symbol = symbol.upper()
+        self.symbols.discard(symbol)
+        self.book.discard(symbol)
+        if self._loop and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._send("UNSUBSCRIBE", self._streams([symbol])), self._loop)
+
+    def _streams(self, symbols) -> List[str]:
+        streams = []
+        for symbol in symbols:
+            name = symbol.lower()
+            streams += [f"{name}@kline_{self.interval}", f"{name}@bookTicker"]
+        return streams
+
+    # ------------------------------------------------------------
+    # Conexão
+    # ------------------------------------------------------------
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _run(self):
+        delay = self.reconnect_min_s
+        while self._running:
+            try:
+                async with websockets.connect(self.url, ping_interval=20, close_timeout=2) as ws:
+                    self._ws = ws
+                    self.stats['conexoes'] += 1
+                    await self._subscribe_live(sorted(self.symbols))
+                    self.connected.set()
+                    delay = self.reconnect_min_s
+                    async for message in ws:
+                        self._handle(message)
+            except (websockets.ConnectionClosed, OSError, asyncio.TimeoutError) as e:
+                if self._running:
+                    self.logger.warning(f"Stream desconectado: {e}")
+            except Exception as e:
+                self.logger.error(f"Erro no stream: {e}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+
+            if self._running:
+                self.stats['reconexoes'] += 1
+                await asyncio.sleep(delay * (0.5 + random.random()))
+                delay = min(delay * 2, self.reconnect_max_s)
+
+    async def _send(self, method: str, params: List[str]):
+        if self._ws is None or not params:
+            return
+        self._request_id += 1
+        await self._ws.send(json.dumps({'method': method, 'params': params, 'id': self._request_id}))
+
+    async def _subscribe_live(self, symbols: List[str]):
+        """Assina primeiro e só depois faz o backfill: nada escapa entre o REST e o stream"""
+        await self._send("SUBSCRIBE", self._streams(symbols))
+        for symbol in symbols:
+            await asyncio.to_thread(self._backfill, symbol)
+
+    def _backfill(self, symbol: str):
+        interval_ms = INTERVAL_MS.get(self.interval)
+        last = self.book.last_closed_open_time(symbol, self.interval)
+        now_ms = int(self.clock() * 1000)
+        if last is None or interval_ms is None or (now_ms - last) // interval_ms >= MAX_KLINES_POR_REQUEST:
+            klines = self.client.get_klines(symbol, self.interval, self.book.depth)
+        else:
+            klines = self.client.get_klines(symbol, self.interval, MAX_KLINES_POR_REQUEST, start_time=last)
+        if not klines:
+            return
+        added = self.book.load(symbol, self.interval, klines, now_ms)
+        if last is not None and added:
+            # Velas que fecharam durante a queda: um único evento com o livro já completo
+            self.stats['velas_backfill'] += added
+            self._emit_close(symbol)
+
+    # ------------------------------------------------------------
+    # Mensagens
+    # ------------------------------------------------------------
+    def _handle(self, message):
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+        data = payload.get('data', payload)
+        if not isinstance(data, dict):
+            return
+        self.stats['mensagens'] += 1
+
+        if data.get('e') == 'kline':
+            k = data['k']
+            symbol = k['s']
+            if symbol not in self.symbols or k['i'] != self.interval:
+                return
+            if self.book.update(symbol, self.interval, kline_from_event(k), bool(k['x'])):
+                self.stats['velas_fechadas'] += 1
+                self._emit_close(symbol)
+        elif 'b' in data and 'a' in data and 's' in data:
+            self.book.set_top(data['s'], float(data['b']), float(data.get('B', 0)),
+                              float(data['a']), float(data.get('A', 0)))
+
+    def _emit_close(self, symbol: str):
+        self.stats['ultimo_evento_ms'] = int(self.clock() * 1000)
+        if self.on_candle_close is None:
+            return
+        try:
+            self.on_candle_close(symbol, self.interval, self.book.klines(symbol, self.interval))
+        except Exception as e:
+            self.logger.error(f"Erro no callback de fechamento de vela ({symbol}): {e}")
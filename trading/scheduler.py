@@ -0,0 +1,129 @@
+"""
+Agendador de sinais orientado a eventos
+Estratégias assinam eventos de fechamento de vela por (símbolo, intervalo); as avaliações
+de símbolos diferentes rodam em paralelo num pool, e cada par é avaliado por no máximo
+um worker por vez (eventos que chegam durante a avaliação são coalescidos no mais recente)
+"""
+
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# handler(símbolo, intervalo, klines, instante do evento em perf_counter)
+EventHandler = Callable[[str, str, List[list], float], None]
+
+
+class LatencyMetrics:
+    """Amostras recentes por etapa (ms) com percentis para o get_status"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, name: str, ms: float):
+        with self._lock:
+            self._samples[name].append(ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            series = {name: list(samples) for name, samples in self._samples.items() if samples}
+        result = {}
+        for name, samples in series.items():
+            p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+            result[name] = {'n': len(samples), 'p50': round(float(p50), 2), 'p90': round(float(p90), 2),
+                            'p99': round(float(p99), 2), 'max': round(max(samples), 2)}
+        return result
+
+
+class SignalScheduler:
+    """Despacha eventos de vela fechada para as estratégias inscritas em um pool de workers"""
+
+    def __init__(self, max_workers: int = 8):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="signal")
+        self.metrics = LatencyMetrics()
+        self.logger = logging.getLogger(__name__)
+        self._subs: Dict[Tuple[str, str], List[EventHandler]] = defaultdict(list)
+        self._pending: Dict[Tuple[str, str], Tuple[List[list], float]] = {}
+        self._futures: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'eventos': 0, 'avaliacoes': 0, 'coalescidos': 0, 'erros': 0}
+
+    def subscribe(self, symbol: str, interval: str, handler: EventHandler):
+        with self._lock:
+            handlers = self._subs[(symbol, interval)]
+            if handler not in handlers:
+                handlers.append(handler)
+
+    def unsubscribe(self, symbol: str, interval: Optional[str] = None, handler: Optional[EventHandler] = None):
+        with self._lock:
+            for key in [k for k in self._subs if k[0] == symbol and (interval is None or k[1] == interval)]:
+                if handler is None:
+                    del self._subs[key]
+                else:
+                    self._subs[key] = [h for h in self._subs[key] if h != handler]
+                self._pending.pop(key, None)
+
+    def is_subscribed(self, symbol: str, interval: str) -> bool:
+        with self._lock:
+            return bool(self._subs.get((symbol, interval)))
+
+    def publish(self, symbol: str, interval: str, klines: List[list],
+                event_ts: Optional[float] = None) -> Optional[Future]:
+        """
+        Enfileira um evento de fechamento de vela.
+
+        Returns:
+            Future que conclui quando este evento (ou um mais recente do mesmo par) foi avaliado;
+            None se ninguém assina o par
+        """
+        key = (symbol, interval)
+        event_ts = time.perf_counter() if event_ts is None else event_ts
+        with self._lock:
+            if not self._subs.get(key):
+                return None
+            self.stats['eventos'] += 1
+            if key in self._pending:
+                self.stats['coalescidos'] += 1
+            self._pending[key] = (klines, event_ts)
+            future = self._futures.get(key)
+            if future is None:
+                future = self._futures[key] = self.executor.submit(self._drain, key)
+            return future
+
+    def _drain(self, key: Tuple[str, str]):
+        symbol, interval = key
+        while True:
+            with self._lock:
+                item = self._pending.pop(key, None)
+                if item is None:
+                    self._futures.pop(key, None)
+                    return
+                handlers = list(self._subs.get(key, ()))
+            klines, event_ts = item
+            started = time.perf_counter()
+            self.metrics.record('fila_ms', (started - event_ts) * 1000)
+            for handler in handlers:
+                try:
+                    handler(symbol, interval, klines, event_ts)
+                except Exception as e:
+                    self.stats['erros'] += 1
+                    self.logger.error(f"Erro avaliando {symbol} {interval}: {e}")
+            self.metrics.record('avaliacao_ms', (time.perf_counter() - started) * 1000)
+            with self._lock:
+                self.stats['avaliacoes'] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['assinaturas'] = sum(len(h) for h in self._subs.values())
+        stats['latencia'] = self.metrics.snapshot()
+        return stats
+
+    def close(self):
+        self.executor.shutdown(wait=False)
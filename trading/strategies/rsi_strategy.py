@@ -1,5 +1,5 @@
 from .base_strategy import BaseStrategy
-from trading.indicators.rsi import calculate_rsi
+from trading.indicators.incremental import rsi_last
 from typing import Dict, Any
 
 class RSIStrategy(BaseStrategy):
@@ -17,7 +17,7 @@ class RSIStrategy(BaseStrategy):
         if not data.get('prices'):
             return False
             
-        rsi = calculate_rsi(data['prices'], self.rsi_period)
+        rsi = rsi_last(data['prices'], self.rsi_period)
         return rsi is not None and rsi < self.oversold and not self.is_opened
     
     def should_sell(self, data: Dict[str, Any]) -> bool:
@@ -25,7 +25,7 @@ class RSIStrategy(BaseStrategy):
         if not data.get('prices'):
             return False
             
-        rsi = calculate_rsi(data['prices'], self.rsi_period)
+        rsi = rsi_last(data['prices'], self.rsi_period)
         return rsi is not None and rsi > self.overbought and self.is_opened
     
     def set_position_status(self, opened: bool):
@@ -5,6 +5,8 @@ from typing import Dict, List, Optional
 from datetime import datetime
 
 from .binance_client import BinanceClient
+from .market_data import MarketDataFeed
+from .scheduler import SignalScheduler
 from .strategies.base_strategy import BaseStrategy
 from .strategies.sma_crossover import SMACrossoverStrategy
 from .strategies.rsi_strategy import RSIStrategy
@@ -12,10 +14,17 @@ from .strategies.rsi_strategy import RSIStrategy
 class TradingEngine:
     """Motor principal de trading com suporte a múltiplos pares"""
     
-    def __init__(self, binance_client: BinanceClient):
+    def __init__(self, binance_client: BinanceClient, max_workers: int = 8):
         self.binance_client = binance_client
         self.logger = logging.getLogger(__name__)
         
+        # Dados de mercado: busca paralela, cache incremental de klines e saldo por ciclo
+        self.market_data = MarketDataFeed(binance_client, interval='1m', depth=100)
+        
+        # Avaliação orientada a eventos: cada par assina (símbolo, intervalo) e roda num pool
+        self.scheduler = SignalScheduler(max_workers=max_workers)
+        self.latency = self.scheduler.metrics
+        
         # Estratégias disponíveis
         self.strategies = {
             'sma': SMACrossoverStrategy(),
@@ -34,6 +43,9 @@ class TradingEngine:
         # Thread de execução
         self.trading_thread = None
         
+        # Modo streaming (WebSocket): avaliação no fechamento de cada vela em vez do timer
+        self.stream = None
+        
     def start_auto_trading(self, strategy_name: str, symbol: str, quantity: float) -> bool:
         """Inicia trading automático para um par específico"""
         if strategy_name not in self.strategies:
@@ -48,12 +60,16 @@ class TradingEngine:
             'is_opened': False
         }
         
-        # Se não está trading, inicia o loop
-        if not self.is_trading:
+        self._subscribe_pair(symbol)
+        
+        # Em modo streaming o par só entra na assinatura; o fechamento da vela dispara a estratégia
+        if self.stream is not None:
+            self.stream.subscribe(symbol)
             self.is_trading = True
-            self.trading_thread = threading.Thread(target=self._trading_loop, daemon=True)
-            self.trading_thread.start()
-            self.logger.info(f"Loop de trading iniciado com {len(self.trading_pairs)} pares")
+        
+        # Se não está trading, inicia o loop
+        elif not self.is_trading:
+            self._start_polling_loop()
         
         self.logger.info(f"Trading automático iniciado: {strategy_name} - {symbol} - Qtd: {quantity}")
         return True
@@ -63,6 +79,10 @@ class TradingEngine:
         if symbol:
             if symbol in self.trading_pairs:
                 del self.trading_pairs[symbol]
+                self.market_data.discard(symbol)
+                self.scheduler.unsubscribe(symbol)
+                if self.stream is not None:
+                    self.stream.unsubscribe(symbol)
                 self.logger.info(f"Trading parado para {symbol}")
             
             # Se não há mais pares, para o loop
@@ -71,17 +91,85 @@ class TradingEngine:
                 self.logger.info("Todos os pares de trading parados")
         else:
             # Para tudo
+            if self.stream is not None:
+                for stream_symbol in list(self.stream.symbols):
+                    self.stream.unsubscribe(stream_symbol)
+            for pair_symbol in list(self.trading_pairs):
+                self.scheduler.unsubscribe(pair_symbol)
             self.trading_pairs.clear()
             self.is_trading = False
             self.logger.info("Trading automático completamente parado")
     
+    def start_streaming(self, interval: str = '1m') -> bool:
+        """Troca o polling de 60 s por streams kline/bookTicker; estratégias rodam no fechamento da vela"""
+        if self.stream is not None:
+            return True
+        # Se o loop de polling estiver rodando, ele sai na próxima volta (self.stream deixa de ser None)
+        self.stream = self.binance_client.create_stream(interval=interval, on_candle_close=self._on_candle_close)
+        # Fechamentos de vários pares chegam juntos: um snapshot de saldo serve a todos
+        self.market_data.account_max_age_s = 5.0
+        for symbol in self.trading_pairs:
+            self.scheduler.unsubscribe(symbol)
+            self._subscribe_pair(symbol)
+            self.stream.subscribe(symbol)
+        self.stream.start()
+        self.is_trading = bool(self.trading_pairs)
+        self.logger.info(f"Modo streaming iniciado ({interval}) com {len(self.trading_pairs)} pares")
+        return True
+    
+    def stop_streaming(self):
+        """Encerra o stream e volta ao polling de 60 s com os pares cadastrados (sem pares, o trading para)"""
+        if self.stream is None:
+            return
+        self.stream.stop()
+        self.stream = None
+        self.market_data.account_max_age_s = None
+        for symbol in self.trading_pairs:
+            self.scheduler.unsubscribe(symbol)
+            self._subscribe_pair(symbol)
+        if self.trading_pairs:
+            self._start_polling_loop()
+            self.logger.info(f"Modo streaming encerrado; {len(self.trading_pairs)} pares seguem no polling")
+        else:
+            self.is_trading = False
+            self.logger.info("Modo streaming encerrado")
+    
+    def _start_polling_loop(self):
+        """Liga o loop de polling; um loop anterior ainda vivo (dormindo entre ciclos) é reaproveitado"""
+        self.is_trading = True
+        if self.trading_thread is not None and self.trading_thread.is_alive():
+            return
+        self.trading_thread = threading.Thread(target=self._trading_loop, daemon=True)
+        self.trading_thread.start()
+        self.logger.info(f"Loop de trading iniciado com {len(self.trading_pairs)} pares")
+    
+    def _current_interval(self) -> str:
+        return self.stream.interval if self.stream is not None else self.market_data.interval
+    
+    def _subscribe_pair(self, symbol: str):
+        """Inscreve a estratégia do par nos fechamentos de vela do intervalo em uso"""
+        interval = self._current_interval()
+        if not self.scheduler.is_subscribed(symbol, interval):
+            self.scheduler.subscribe(symbol, interval, self._evaluate_pair)
+    
+    def _on_candle_close(self, symbol: str, interval: str, klines: List):
+        """Callback do stream: só enfileira; a avaliação roda no pool do scheduler"""
+        if symbol not in self.trading_pairs or not self.is_trading:
+            return
+        self.scheduler.publish(symbol, interval, klines)
+    
+    def _evaluate_pair(self, symbol: str, interval: str, klines: List, event_ts: float):
+        """Handler do scheduler: no máximo um worker por par, então o estado do par não precisa de lock"""
+        trade_info = self.trading_pairs.get(symbol)
+        if trade_info is None:
+            return
+        self._process_trading_pair(symbol, trade_info, klines, event_ts)
+    
     def _trading_loop(self):
         """Loop principal de trading para múltiplos pares"""
-        while self.is_trading and self.trading_pairs:
+        while self.is_trading and self.trading_pairs and self.stream is None:
             try:
-                # Processa cada par de trading
-                for symbol, trade_info in list(self.trading_pairs.items()):
-                    self._process_trading_pair(symbol, trade_info)
+                self._run_cycle()
                 
                 time.sleep(60)  # Espera 1 minuto entre verificações
                 
@@ -89,11 +177,27 @@ class TradingEngine:
                 self.logger.error(f"Erro no loop de trading: {e}")
                 time.sleep(30)
     
-    def _process_trading_pair(self, symbol: str, trade_info: Dict):
+    def _run_cycle(self):
+        """Uma rodada de polling: atualiza todos os pares em paralelo e avalia as estratégias no pool"""
+        symbols = list(self.trading_pairs)
+        klines_by_symbol = self.market_data.refresh(symbols)
+        event_ts = time.perf_counter()
+        futures = []
+        for symbol in symbols:
+            self._subscribe_pair(symbol)
+            future = self.scheduler.publish(symbol, self.market_data.interval, klines_by_symbol.get(symbol), event_ts)
+            if future is not None:
+                futures.append(future)
+        for future in futures:
+            future.result()
+    
+    def _process_trading_pair(self, symbol: str, trade_info: Dict, klines: Optional[List] = None,
+                              event_ts: Optional[float] = None):
         """Processa decisões de trading para um par específico"""
         try:
-            # Obtém dados de mercado
-            klines = self.binance_client.get_klines(symbol, '1m', 100)
+            # Obtém dados de mercado (já buscados pelo ciclo ou só o que falta no cache)
+            if klines is None:
+                klines = self.market_data.get_klines(symbol)
             if not klines:
                 return
             
@@ -114,44 +218,51 @@ class TradingEngine:
             
             # Executa estratégia
             if strategy.should_buy(data) and not is_opened:
-                self._execute_trade(symbol, "BUY", quantity, strategy.name)
+                self._execute_trade(symbol, "BUY", quantity, strategy.name, current_price, event_ts)
                 trade_info['is_opened'] = True
                 trade_info['last_signal'] = 'BUY'
                 
             elif strategy.should_sell(data) and is_opened:
-                self._execute_trade(symbol, "SELL", quantity, strategy.name)
+                self._execute_trade(symbol, "SELL", quantity, strategy.name, current_price, event_ts)
                 trade_info['is_opened'] = False
                 trade_info['last_signal'] = 'SELL'
                 
         except Exception as e:
             self.logger.error(f"Erro ao processar par {symbol}: {e}")
     
-    def _execute_trade(self, symbol: str, side: str, quantity: float, strategy_name: str):
+    def _execute_trade(self, symbol: str, side: str, quantity: float, strategy_name: str,
+                       current_price: Optional[float] = None, event_ts: Optional[float] = None):
         """Executa uma ordem de trading"""
+        signal_ts = time.perf_counter()
         try:
             # Verifica se temos saldo suficiente
             base_asset = symbol.replace('USDT', '')
             quote_asset = 'USDT'
             
+            account = None
             if side == "BUY":
-                # Para comprar, precisamos de USDT
-                account_info = self.binance_client.get_account_info()
-                if account_info:
-                    usdt_balance = 0
-                    for balance in account_info['balances']:
-                        if balance['asset'] == quote_asset:
-                            usdt_balance = float(balance['free'])
-                            break
-                    
-                    # Calcula custo aproximado
-                    current_price = self.binance_client.get_ticker_price(symbol)
-                    if current_price and usdt_balance < (current_price * quantity):
+                # Para comprar, precisamos de USDT (snapshot único do ciclo)
+                account = self.market_data.account()
+                if account:
+                    # Calcula custo aproximado com o último fechamento já em cache
+                    if current_price is None:
+                        current_price = self.market_data.last_price(symbol) or self.binance_client.get_ticker_price(symbol)
+                    # Reserva no snapshot antes da ordem: pares avaliados em paralelo não gastam o mesmo saldo
+                    if current_price and not account.try_reserve(quote_asset, current_price * quantity):
                         self.logger.warning(f"Saldo de {quote_asset} insuficiente para comprar {symbol}")
                         return
             
             result = self.binance_client.create_order(symbol, side, quantity)
             
+            if not result and account and current_price:
+                account.release(quote_asset, current_price * quantity)
+            
             if result:
+                done_ts = time.perf_counter()
+                self.latency.record('sinal_ordem_ms', (done_ts - signal_ts) * 1000)
+                if event_ts is not None:
+                    self.latency.record('evento_ordem_ms', (done_ts - event_ts) * 1000)
+                
                 # Atualiza status da posição
                 if side == "BUY":
                     self.active_trades[symbol] = {
@@ -212,12 +323,18 @@ class TradingEngine:
             'pares_ativos': list(self.trading_pairs.keys()),
             'trades_ativos': len(self.active_trades),
             'total_historico_trades': len(self.trade_history),
-            'pares_detalhes': {}
+            'pares_detalhes': {},
+            'dados_mercado': dict(self.market_data.stats),
+            'agendador': self.scheduler.get_stats(),
+            'streaming': dict(self.stream.stats) if self.stream is not None else None
         }
         
         # Adiciona detalhes de cada par
         for symbol, trade_info in self.trading_pairs.items():
-            current_price = self.binance_client.get_ticker_price(symbol)
+            current_price = None
+            if self.stream is not None:
+                current_price = self.stream.book.last_price(symbol, self.stream.interval)
+            current_price = current_price or self.market_data.last_price(symbol) or self.binance_client.get_ticker_price(symbol)
             status_info['pares_detalhes'][symbol] = {
                 'estrategia': trade_info['strategy'].name,
                 'quantidade': trade_info['quantity'],
@@ -0,0 +1,106 @@
+"""
+Série de preços do gráfico do dashboard
+Janela deslizante de velas com SMAs incrementais: cada atualização só processa as velas
+novas (e a vela em formação), sem refazer DataFrame/rolling a cada ciclo; uma série
+parada por mais de `depth` velas é recarregada do zero
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from trading.indicators.incremental import SMA
+
+
+class PriceSeries:
+    """
+    Velas de um símbolo para o gráfico: `depth` pontos visíveis + SMAs incrementais.
+
+    Velas fechadas entram uma vez nas SMAs; a vela em formação é reavaliada a cada
+    merge com `SMA.peek`, sem alterar o estado.
+    """
+
+    def __init__(self, symbol: str, depth: int = 50, sma_periods: Sequence[int] = (13, 21),
+                 interval_ms: int = 60_000):
+        self.symbol = symbol
+        self.depth = depth
+        self.sma_periods = tuple(sma_periods)
+        self.interval_ms = interval_ms
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        """Esvazia a série (velas e SMAs); o próximo fetch é uma carga completa"""
+        self._smas = {p: SMA(p) for p in self.sma_periods}
+        self.times: deque = deque(maxlen=self.depth)  # open_time (ms) das velas fechadas
+        self.closes: deque = deque(maxlen=self.depth)
+        self.sma_values: Dict[int, deque] = {p: deque(maxlen=self.depth) for p in self.sma_periods}
+        self.live: Optional[Tuple[int, float]] = None  # (open_time, close) da vela em formação
+        self.version += 1
+
+    @property
+    def last_closed_open_time(self) -> Optional[int]:
+        return self.times[-1] if self.times else None
+
+    def is_stale(self, now_ms: int) -> bool:
+        """
+        True se faltam `depth` velas ou mais desde a última conhecida: um fetch incremental
+        traria velas antigas e as SMAs atravessariam a lacuna, então vale recarregar
+        """
+        last_open = self.live[0] if self.live is not None else self.last_closed_open_time
+        return last_open is not None and now_ms - last_open >= self.depth * self.interval_ms
+
+    def next_start_time(self) -> Optional[int]:
+        """startTime para o próximo fetch incremental (None = carga inicial completa)"""
+        if self.live is not None:
+            return self.live[0]
+        if self.times:
+            return self.times[-1] + 1
+        return None
+
+    def merge(self, klines: List[list], now_ms: int) -> bool:
+        """
+        Incorpora velas (formato REST da Binance). Uma vela é fechada quando close_time < now_ms.
+
+        Returns:
+            True se algo visível mudou
+        """
+        changed = False
+        last_closed = self.last_closed_open_time
+        for row in sorted(klines, key=lambda k: int(k[0])):
+            open_time, close = int(row[0]), float(row[4])
+            if last_closed is not None and open_time <= last_closed:
+                continue
+            if int(row[6]) < now_ms:
+                self.times.append(open_time)
+                self.closes.append(close)
+                for period, sma in self._smas.items():
+                    self.sma_values[period].append(sma.update(close))
+                last_closed = open_time
+                if self.live is not None and self.live[0] <= open_time:
+                    self.live = None
+                changed = True
+            elif self.live != (open_time, close):
+                self.live = (open_time, close)
+                changed = True
+        if changed:
+            self.version += 1
+        return changed
+
+    def last_price(self) -> Optional[float]:
+        if self.live is not None:
+            return self.live[1]
+        return self.closes[-1] if self.closes else None
+
+    def arrays(self) -> Tuple[List[int], List[float], Dict[int, List[Optional[float]]]]:
+        """(times_ms, closes, {período: sma}) dos últimos `depth` pontos, incluindo a vela em formação"""
+        times, closes = list(self.times), list(self.closes)
+        smas = {p: list(v) for p, v in self.sma_values.items()}
+        if self.live is not None:
+            times.append(self.live[0])
+            closes.append(self.live[1])
+            for period, sma in self._smas.items():
+                smas[period].append(sma.peek(self.live[1]))
+            if len(times) > self.depth:
+                times, closes = times[1:], closes[1:]
+                smas = {p: v[1:] for p, v in smas.items()}
+        return times, closes, smas
@@ -8,9 +8,14 @@ from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 from datetime import datetime
 import logging
-import json
 import os
-import csv
+import time
+import queue
+import threading
+
+from trading.journal import TradeJournal
+from trading.market_data import INTERVAL_MS, MAX_KLINES_POR_REQUEST
+from trading.ui.chart_widget import PriceSeries
 
 class TradingGUI:
     """Interface gráfica de trading com histórico completo"""
@@ -21,100 +26,37 @@ class TradingGUI:
         self.audio_processor = audio_processor
         self.logger = logging.getLogger(__name__)
         
-        # Arquivos para salvar o histórico
-        self.history_file = "trading_history.json"
+        # Histórico em diário append-only (migra o trading_history.json antigo na 1ª abertura)
+        self.history_file = "trading_history.jsonl"
         self.csv_file = "trading_history.csv"
-        self.load_trading_history()
+        self.journal = TradeJournal(self.history_file, legacy_json="trading_history.json")
+        self._journal_version = self.journal.version
+        self.logger.info(f"Histórico carregado: {len(self.journal)} trades")
+        
+        # Atualização em segundo plano: o worker faz as chamadas bloqueantes (REST, disco)
+        # e entrega os dados numa fila que a thread do Tk consome sem bloquear
+        self._refresh_queue = queue.Queue()
+        self._refresh_wake = threading.Event()
+        self._refresh_stop = threading.Event()
+        self._refresh_requests = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        self._series = {}                  # símbolo → PriceSeries (só o worker mexe)
+        self._chart_symbol = "DOGEUSDT"    # cópia do combobox legível pelo worker
+        self._chart_drawn = (None, -1)     # (símbolo, versão) já desenhados
+        self._pairs_rows = None
+        self._recent_key = None
         
         self.setup_ui()
         
-    def load_trading_history(self):
-        """Carrega o histórico de trades do arquivo"""
-        try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.saved_history = json.load(f)
-                self.logger.info(f"Histórico carregado: {len(self.saved_history)} trades")
-            else:
-                self.saved_history = []
-                self.logger.info("Novo arquivo de histórico criado")
-        except Exception as e:
-            self.logger.error(f"Erro ao carregar histórico: {e}")
-            self.saved_history = []
-    
     def save_trade_to_history(self, trade_info):
-        """Salva um trade no histórico"""
+        """Salva um trade no histórico (uma linha acrescentada ao diário; P&L casado com a compra aberta)"""
         try:
-            # Adiciona informações adicionais
-            trade_with_metrics = trade_info.copy()
-            trade_with_metrics['saved_at'] = datetime.now().isoformat()
-            
-            # Calcula P&L se for uma venda e houver compra correspondente
-            if trade_info['side'] == 'SELL':
-                # Procura pela compra correspondente
-                for saved_trade in reversed(self.saved_history):
-                    if (saved_trade['symbol'] == trade_info['symbol'] and 
-                        saved_trade['side'] == 'BUY' and
-                        'pnl' not in saved_trade):
-                        
-                        buy_price = saved_trade['price']
-                        sell_price = trade_info['price']
-                        quantity = trade_info['quantity']
-                        
-                        # Calcula P&L
-                        pnl = (sell_price - buy_price) * quantity
-                        pnl_percent = ((sell_price - buy_price) / buy_price) * 100
-                        
-                        trade_with_metrics['pnl'] = pnl
-                        trade_with_metrics['pnl_percent'] = pnl_percent
-                        trade_with_metrics['buy_price'] = buy_price
-                        break
-            
-            self.saved_history.append(trade_with_metrics)
-            
-            # Salva em JSON
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.saved_history, f, indent=2, ensure_ascii=False)
-            
-            # Salva em CSV
-            self.save_to_csv(trade_with_metrics)
-            
+            self.journal.record(trade_info)
             self.logger.info(f"Trade salvo no histórico: {trade_info['symbol']} {trade_info['side']}")
-            
         except Exception as e:
             self.logger.error(f"Erro ao salvar trade no histórico: {e}")
     
-    def save_to_csv(self, trade_info):
-        """Salva trade no arquivo CSV"""
-        try:
-            file_exists = os.path.exists(self.csv_file)
-            
-            with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                if not file_exists:
-                    # Cabeçalho
-                    writer.writerow([
-                        'Data', 'Symbol', 'Side', 'Quantidade', 'Preço', 
-                        'Estratégia', 'P&L', 'P&L %', 'Preço Compra'
-                    ])
-                
-                # Dados
-                writer.writerow([
-                    trade_info['timestamp'],
-                    trade_info['symbol'],
-                    trade_info['side'],
-                    trade_info['quantity'],
-                    trade_info['price'],
-                    trade_info.get('strategy', 'Manual'),
-                    trade_info.get('pnl', 0),
-                    trade_info.get('pnl_percent', 0),
-                    trade_info.get('buy_price', 0)
-                ])
-                
-        except Exception as e:
-            self.logger.error(f"Erro ao salvar CSV: {e}")
-    
     def setup_ui(self):
         """Configura a interface"""
         # Frame principal
@@ -334,6 +276,20 @@ class TradingGUI:
         self.fig = Figure(figsize=(8, 4), dpi=100)
         self.ax = self.fig.add_subplot(111)
         
+        # Linhas criadas uma vez; as atualizações só trocam os dados (set_data)
+        self.price_line, = self.ax.plot([], [], color='blue', linewidth=1, label='Preço')
+        self.sma_lines = {
+            21: self.ax.plot([], [], color='orange', linewidth=1, label='SMA 21')[0],
+            13: self.ax.plot([], [], color='red', linewidth=1, label='SMA 13')[0],
+        }
+        self.ax.set_ylabel('Preço')
+        self.ax.legend()
+        self.ax.grid(True, alpha=0.3)
+        
+        # Formata eixo x
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+        self.fig.autofmt_xdate()
+        
         # Canvas para Tkinter
         self.canvas = FigureCanvasTkAgg(self.fig, chart_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -534,7 +490,8 @@ class TradingGUI:
                 self.full_history_tree.delete(item)
             
             # Adiciona trades do histórico salvo
-            for trade in reversed(self.saved_history[-50:]):  # Últimos 50 trades
+            self._journal_version = self.journal.version
+            for trade in reversed(self.journal.tail(50)):  # Últimos 50 trades
                 # Formata a data
                 trade_time = datetime.fromisoformat(trade['timestamp'])
                 data_formatada = trade_time.strftime('%d/%m %H:%M:%S')
@@ -573,6 +530,7 @@ class TradingGUI:
     
     def on_chart_symbol_change(self, event=None):
         """Callback quando o símbolo do gráfico é alterado"""
+        self._chart_symbol = self.chart_symbol_var.get()
         self.update_chart()
     
     def start_trading(self):
@@ -706,18 +664,17 @@ class TradingGUI:
     def show_statistics(self):
         """Mostra estatísticas do trading"""
         try:
-            if not self.saved_history:
+            stats = self.journal.stats()
+            if not stats['total_trades']:
                 messagebox.showinfo("Estatísticas", "Nenhum trade no histórico")
                 return
             
-            total_trades = len(self.saved_history)
-            buy_trades = len([t for t in self.saved_history if t['side'] == 'BUY'])
-            sell_trades = len([t for t in self.saved_history if t['side'] == 'SELL'])
-            
-            # Calcula P&L total
-            total_pnl = sum(t.get('pnl', 0) for t in self.saved_history)
-            profitable_trades = len([t for t in self.saved_history if t.get('pnl', 0) > 0])
-            win_rate = (profitable_trades / sell_trades * 100) if sell_trades > 0 else 0
+            total_trades = stats['total_trades']
+            buy_trades = stats['buy_trades']
+            sell_trades = stats['sell_trades']
+            total_pnl = stats['total_pnl']
+            profitable_trades = stats['profitable_trades']
+            win_rate = stats['win_rate']
             
             stats_text = f"📈 Estatísticas de Trading\n\n"
             stats_text += f"📊 Total de Trades: {total_trades}\n"
@@ -729,7 +686,7 @@ class TradingGUI:
             
             # Últimos 5 trades
             stats_text += f"\n📋 Últimos 5 Trades:\n"
-            for trade in self.saved_history[-5:]:
+            for trade in self.journal.tail(5):
                 side = "🟢 COMPRA" if trade['side'] == 'BUY' else "🔴 VENDA"
                 pnl = trade.get('pnl', 0)
                 pnl_display = f"+${pnl:.2f}" if pnl > 0 else f"${pnl:.2f}"
@@ -743,15 +700,12 @@ class TradingGUI:
     def export_history_csv(self):
         """Exporta histórico para CSV"""
         try:
-            if not self.saved_history:
+            if not len(self.journal):
                 messagebox.showwarning("Aviso", "Nenhum trade para exportar")
                 return
             
-            # Usa o arquivo CSV já existente
-            if os.path.exists(self.csv_file):
-                messagebox.showinfo("Sucesso", f"Histórico exportado para: {self.csv_file}")
-            else:
-                messagebox.showinfo("Sucesso", f"Arquivo CSV criado: {self.csv_file}")
+            linhas = self.journal.export_csv(self.csv_file)
+            messagebox.showinfo("Sucesso", f"{linhas} trades exportados para: {self.csv_file}")
                 
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao exportar CSV: {e}")
@@ -759,10 +713,8 @@ class TradingGUI:
     def clear_history(self):
         """Limpa o histórico de trades"""
         if messagebox.askyesno("Confirmar", "Limpar TODO o histórico de trades?"):
-            self.saved_history = []
             try:
-                if os.path.exists(self.history_file):
-                    os.remove(self.history_file)
+                self.journal.clear()
                 if os.path.exists(self.csv_file):
                     os.remove(self.csv_file)
                 messagebox.showinfo("Sucesso", "Histórico limpo")
@@ -770,66 +722,126 @@ class TradingGUI:
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao limpar histórico: {e}")
     
+    # ------------------------------------------------------------
+    # Atualização em segundo plano
+    # ------------------------------------------------------------
     def update_display(self):
-        """Atualiza a exibição em tempo real"""
+        """Inicia o worker de dados e o consumo periódico da fila na thread do Tk"""
+        if self._refresh_thread is None:
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, name="trading-gui-refresh", daemon=True)
+            self._refresh_thread.start()
+            self.main_frame.bind('<Destroy>', lambda e: self.close() if e.widget is self.main_frame else None)
+            self._poll_refresh()
+    
+    def close(self):
+        """Encerra o worker de atualização"""
+        self._refresh_stop.set()
+        self._refresh_wake.set()
+    
+    def _request_refresh(self, *parts):
+        """Pede ao worker uma coleta imediata (sem bloquear a UI)"""
+        with self._refresh_lock:
+            self._refresh_requests.update(parts)
+        self._refresh_wake.set()
+    
+    def _refresh_loop(self):
+        """Worker: coleta status, velas, saldos e histórico a cada update_interval"""
+        cycle = 0
+        while not self._refresh_stop.is_set():
+            with self._refresh_lock:
+                requests, self._refresh_requests = self._refresh_requests, set()
+            try:
+                self._refresh_queue.put(self._collect_refresh(cycle, requests))
+            except Exception as e:
+                self.logger.error(f"Erro ao coletar dados do display: {e}")
+            cycle += 1
+            self._refresh_wake.wait(self.update_interval / 1000)
+            self._refresh_wake.clear()
+    
+    def _collect_refresh(self, cycle, requests):
+        """Roda no worker: todas as chamadas bloqueantes ficam aqui"""
+        data = {'status': self.trading_engine.get_status()}
+        
+        # Gráfico: busca só as velas a partir da vela em formação; série parada há mais
+        # de `depth` velas (símbolo revisitado) volta a ser carregada do zero
+        symbol = self._chart_symbol
+        if symbol:
+            series = self._series.get(symbol)
+            if series is None:
+                series = self._series[symbol] = PriceSeries(symbol, depth=50, interval_ms=INTERVAL_MS['1m'])
+            if series.is_stale(int(time.time() * 1000)):
+                series.reset()
+            start = series.next_start_time()
+            limit = series.depth if start is None else MAX_KLINES_POR_REQUEST
+            klines = self.trading_engine.binance_client.get_klines(symbol, '1m', limit, start_time=start)
+            if klines:
+                series.merge(klines, int(time.time() * 1000))
+            price = series.last_price()
+            if price is None:
+                price = self.trading_engine.binance_client.get_ticker_price(symbol)
+            data['price'] = price
+            data['chart'] = (symbol, series.version, series.arrays())
+        
+        # Saldos a cada 3 ciclos (15 segundos) ou sob demanda
+        if cycle % 3 == 0 or 'balances' in requests:
+            data['balances'] = self.trading_engine.get_account_balances()
+        
+        # Histórico completo: lê só as linhas acrescentadas desde o último ciclo
         try:
-            # Atualiza status
-            status = self.trading_engine.get_status()
-            
-            # Status geral
-            self.status_vars['trading_ativo'].set("🟢 ATIVO" if status['trading_ativo'] else "🔴 PARADO")
-            self.status_vars['estrategia'].set("Múltiplas" if status['trading_ativo'] else "Nenhuma")
-            self.status_vars['pares_ativos'].set(f"{len(status['pares_ativos'])} pares")
-            self.status_vars['posicoes_abertas'].set(f"{status['trades_ativos']} abertas")
-            self.status_vars['total_trades'].set(str(status['total_historico_trades']))
-            
-            # Preço do par selecionado no gráfico
-            if self.chart_symbol_var.get():
-                preco = self.trading_engine.binance_client.get_ticker_price(self.chart_symbol_var.get())
-                self.status_vars['preco_atual'].set(f"{preco:.6f}" if preco else "N/A")
-            else:
-                self.status_vars['preco_atual'].set("N/A")
-            
-            # Atualiza histórico recente
-            self.update_history()
-            
-            # Atualiza pares ativos a cada 2 ciclos (10 segundos)
-            if hasattr(self, 'update_counter'):
-                self.update_counter += 1
-            else:
-                self.update_counter = 0
-                
-            if self.update_counter % 2 == 0:
-                self.update_active_pairs()
-            
-            # Atualiza gráfico
-            self.update_chart()
-            
-            # Atualiza saldos a cada 3 ciclos (15 segundos)
-            if self.update_counter % 3 == 0:
-                self.update_balances()
-            
-            # Atualiza histórico completo a cada 5 ciclos (25 segundos)
-            if self.update_counter % 5 == 0:
-                self.load_full_history()
-            
+            self.journal.refresh()
+        except OSError as e:
+            self.logger.warning(f"Histórico ainda não legível: {e}")
+        data['journal_version'] = self.journal.version
+        return data
+    
+    def _poll_refresh(self):
+        """Thread do Tk: aplica o que o worker entregou"""
+        try:
+            while True:
+                self._apply_refresh(self._refresh_queue.get_nowait())
+        except queue.Empty:
+            pass
         except Exception as e:
             self.logger.error(f"Erro ao atualizar display: {e}")
+        if not self._refresh_stop.is_set():
+            self.parent.after(200, self._poll_refresh)
+    
+    def _apply_refresh(self, data):
+        status = data['status']
+        
+        # Status geral
+        self.status_vars['trading_ativo'].set("🟢 ATIVO" if status['trading_ativo'] else "🔴 PARADO")
+        self.status_vars['estrategia'].set("Múltiplas" if status['trading_ativo'] else "Nenhuma")
+        self.status_vars['pares_ativos'].set(f"{len(status['pares_ativos'])} pares")
+        self.status_vars['posicoes_abertas'].set(f"{status['trades_ativos']} abertas")
+        self.status_vars['total_trades'].set(str(status['total_historico_trades']))
+        
+        # Preço do par selecionado no gráfico
+        preco = data.get('price')
+        self.status_vars['preco_atual'].set(f"{preco:.6f}" if preco else "N/A")
+        
+        # Atualiza histórico recente
+        self.update_history()
+        
+        self._apply_active_pairs(status)
+        
+        if 'chart' in data:
+            self._draw_chart(*data['chart'])
         
-        # Agenda próxima atualização
-        self.parent.after(self.update_interval, self.update_display)
+        if data.get('balances'):
+            self._apply_balances(data['balances'])
+        
+        if data.get('journal_version', self._journal_version) != self._journal_version:
+            self.load_full_history()
     
     def update_balances(self):
-        """Atualiza os saldos em tempo real"""
+        """Atualiza os saldos em tempo real (coleta no worker)"""
+        if self.trading_engine:
+            self._request_refresh('balances')
+    
+    def _apply_balances(self, balances):
+        """Mostra os saldos recebidos do worker"""
         try:
-            if not self.trading_engine:
-                return
-                
-            # Obtém informações da conta
-            balances = self.trading_engine.get_account_balances()
-            if not balances:
-                return
-            
             # Atualiza cada saldo
             for asset, var in self.balance_vars.items():
                 if asset in balances:
@@ -865,16 +877,13 @@ class TradingGUI:
                 self.balance_vars[asset].set("Erro")
     
     def update_active_pairs(self):
-        """Atualiza a lista de pares ativos"""
+        """Atualiza a lista de pares ativos (coleta no worker)"""
+        self._request_refresh('pairs')
+    
+    def _apply_active_pairs(self, status):
+        """Reconstrói a lista de pares só quando as linhas mudaram"""
         try:
-            # Limpa treeview
-            for item in self.pairs_tree.get_children():
-                self.pairs_tree.delete(item)
-            
-            # Obtém status atual
-            status = self.trading_engine.get_status()
-            
-            # Adiciona pares ativos
+            rows = []
             for symbol, detalhes in status['pares_detalhes'].items():
                 # Formata a posição
                 posicao = "🟢 ABERTA" if detalhes['posicao_aberta'] else "🔴 FECHADA"
@@ -885,14 +894,17 @@ class TradingGUI:
                 # Formata o preço
                 preco_text = f"{detalhes['preco_atual']:.6f}" if detalhes['preco_atual'] else "N/A"
                 
-                self.pairs_tree.insert('', 'end', values=(
-                    symbol,
-                    detalhes['estrategia'],
-                    detalhes['quantidade'],
-                    posicao,
-                    ultimo_sinal,
-                    preco_text
-                ))
+                rows.append((symbol, detalhes['estrategia'], detalhes['quantidade'],
+                             posicao, ultimo_sinal, preco_text))
+            if rows == self._pairs_rows:
+                return
+            self._pairs_rows = rows
+            
+            # Limpa treeview
+            for item in self.pairs_tree.get_children():
+                self.pairs_tree.delete(item)
+            for row in rows:
+                self.pairs_tree.insert('', 'end', values=row)
                 
         except Exception as e:
             self.logger.error(f"Erro ao atualizar pares ativos: {e}")
@@ -900,12 +912,18 @@ class TradingGUI:
     def update_history(self):
         """Atualiza histórico de trades recentes"""
         try:
+            trade_history = self.trading_engine.trade_history
+            key = (len(trade_history), id(trade_history[-1]) if trade_history else None)
+            if key == self._recent_key:
+                return
+            self._recent_key = key
+            
             # Limpa treeview
             for item in self.history_tree.get_children():
                 self.history_tree.delete(item)
             
             # Adiciona trades recentes (últimos 15)
-            recent_trades = self.trading_engine.trade_history[-15:]
+            recent_trades = trade_history[-15:]
             
             for trade in reversed(recent_trades):
                 # Formata o lado (BUY/SELL) com cores
@@ -932,50 +950,28 @@ class TradingGUI:
             self.logger.error(f"Erro ao atualizar histórico: {e}")
     
     def update_chart(self):
-        """Atualiza gráfico de preços"""
+        """Atualiza gráfico de preços (coleta no worker)"""
+        self._request_refresh('chart')
+    
+    def _draw_chart(self, symbol, version, arrays):
+        """Troca os dados das linhas existentes e agenda um redesenho (draw_idle)"""
         try:
-            symbol = self.chart_symbol_var.get()
-            if not symbol:
-                return
-                
-            klines = self.trading_engine.binance_client.get_klines(symbol, '1m', 50)
-            
-            if not klines:
+            if (symbol, version) == self._chart_drawn or symbol != self._chart_symbol:
                 return
+            times_ms, closes, smas = arrays
+            times = [datetime.fromtimestamp(t / 1000) for t in times_ms]
             
-            # Extrai dados para o gráfico
-            times = [datetime.fromtimestamp(candle[0] / 1000) for candle in klines]
-            opens = [float(candle[1]) for candle in klines]
-            highs = [float(candle[2]) for candle in klines]
-            lows = [float(candle[3]) for candle in klines]
-            closes = [float(candle[4]) for candle in klines]
-            
-            # Limpa e plota novo gráfico
-            self.ax.clear()
-            
-            # Gráfico de linha simplificado
-            self.ax.plot(times, closes, color='blue', linewidth=1, label='Preço')
-            
-            # Adiciona médias móveis se disponível
-            if len(closes) >= 21:
-                import pandas as pd
-                df = pd.DataFrame({'close': closes})
-                sma_21 = df['close'].rolling(21).mean()
-                sma_13 = df['close'].rolling(13).mean()
-                
-                self.ax.plot(times[-len(sma_21):], sma_21, color='orange', linewidth=1, label='SMA 21')
-                self.ax.plot(times[-len(sma_13):], sma_13, color='red', linewidth=1, label='SMA 13')
-            
-            self.ax.set_title(f'{symbol} - Preços em Tempo Real (MODO REAL)')
-            self.ax.set_ylabel('Preço')
-            self.ax.legend()
-            self.ax.grid(True, alpha=0.3)
+            if symbol != self._chart_drawn[0]:
+                self.ax.set_title(f'{symbol} - Preços em Tempo Real (MODO REAL)')
+            self._chart_drawn = (symbol, version)
             
-            # Formata eixo x
-            self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-            self.fig.autofmt_xdate()
+            self.price_line.set_data(times, closes)
+            for period, line in self.sma_lines.items():
+                line.set_data(times, [float('nan') if v is None else v for v in smas[period]])
             
-            self.canvas.draw()
+            self.ax.relim()
+            self.ax.autoscale_view()
+            self.canvas.draw_idle()
             
         except Exception as e:
-            self.logger.error(f"Erro ao atualizar gráfico: {e}")
\ No newline at end of file
+            self.logger.error(f"Erro ao atualizar gráfico: {e}")
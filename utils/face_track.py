@@ -0,0 +1,168 @@
+"""
+Trilha de Rosto
+Posição horizontal do rosto ao longo do vídeo inteiro, calculada uma vez por fonte: uma
+decodificação sequencial (sem buscas por corte) amostra poucos quadros por segundo, reduz
+cada um para a largura de análise e passa pelos Haar cascades, carregados uma vez por
+processo. Vídeos longos são divididos em trechos analisados em processos separados.
+As detecções viram uma linha do tempo suavizada com um centro de recorte por segundo,
+que cabe no TranscriptCache ao lado da transcrição.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+AMOSTRAS_POR_SEG = 2.0   # quadros analisados por segundo de vídeo
+LARGURA_ANALISE = 480    # largura do quadro reduzido (rostos de talking-head continuam acima de 24 px)
+TRECHO_MIN_S = 120.0     # abaixo disso não compensa abrir outro processo
+JANELA_SUAVE_S = 5       # mediana móvel da linha do tempo (segundos)
+VERSAO_TRILHA = 1
+
+# Detecção: (tempo_s, centro_x normalizado 0–1, área normalizada)
+Deteccao = Tuple[float, float, float]
+
+_cascatas = None
+
+
+def _carregar_cascatas():
+    """Frontal + perfil, uma vez por processo"""
+    global _cascatas
+    if _cascatas is None:
+        import cv2
+        _cascatas = (cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'),
+                     cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_profileface.xml'))
+    return _cascatas
+
+
+def analisar_trecho(video_path: str, inicio: float, fim: float, amostras_por_seg: float = AMOSTRAS_POR_SEG,
+                    largura_analise: int = LARGURA_ANALISE) -> List[Deteccao]:
+    """
+    Decodifica [inicio, fim) em sequência: uma única busca no começo do trecho, `grab()` nos
+    quadros pulados (sem conversão de cor) e `retrieve()` só nos amostrados.
+
+    Returns:
+        o maior rosto de cada quadro amostrado que tem rosto
+    """
+    import cv2
+    frontal, perfil = _carregar_cascatas()
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"Não foi possível abrir {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if inicio > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, inicio * 1000)
+        intervalo = 1.0 / amostras_por_seg
+        proxima = inicio
+        n_quadro = 0
+        deteccoes: List[Deteccao] = []
+        while True:
+            if not cap.grab():
+                break
+            t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if t <= 0 and n_quadro:            # container sem timestamps: conta quadros
+                t = inicio + n_quadro / fps
+            n_quadro += 1
+            if t >= fim:
+                break
+            if t + 0.5 / fps < proxima:
+                continue
+            proxima += intervalo
+            while proxima <= t:
+                proxima += intervalo
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+
+            altura, largura = frame.shape[:2]
+            escala = min(1.0, largura_analise / largura)
+            if escala < 1.0:
+                frame = cv2.resize(frame, (largura_analise, int(altura * escala)), interpolation=cv2.INTER_AREA)
+            gray = cv2.equalizeHist(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+
+            faces = frontal.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(24, 24))
+            if len(faces) == 0:
+                faces = perfil.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=3, minSize=(24, 24))
+            if len(faces) == 0:
+                continue
+            x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+            area_total = gray.shape[0] * gray.shape[1]
+            deteccoes.append((t, (x + w / 2) / gray.shape[1], (w * h) / area_total))
+        return deteccoes
+    finally:
+        cap.release()
+
+
+def dividir_trechos(duracao: float, processos: int, trecho_min_s: float = TRECHO_MIN_S) -> List[Tuple[float, float]]:
+    """[0, duracao) em até `processos` trechos contíguos de pelo menos `trecho_min_s`"""
+    n = max(1, min(processos, int(duracao // trecho_min_s)))
+    passo = duracao / n
+    return [(i * passo, duracao if i == n - 1 else (i + 1) * passo) for i in range(n)]
+
+
+def suavizar(deteccoes: List[Deteccao], duracao: float,
+             janela_s: int = JANELA_SUAVE_S) -> List[Optional[float]]:
+    """
+    Um centro x (0–1) por segundo: média das detecções do segundo ponderada pela área,
+    segundos sem rosto herdam o vizinho mais próximo e uma mediana móvel tira os saltos
+    de detecções isoladas. Sem nenhum rosto no vídeo: tudo None (recorte no meio).
+    """
+    n = max(1, int(math.ceil(duracao)))
+    soma = [0.0] * n
+    peso = [0.0] * n
+    for t, x, area in deteccoes:
+        s = min(n - 1, max(0, int(t)))
+        soma[s] += x * area
+        peso[s] += area
+    brutos = [soma[s] / peso[s] if peso[s] > 0 else None for s in range(n)]
+    conhecidos = [s for s in range(n) if brutos[s] is not None]
+    if not conhecidos:
+        return [None] * n
+
+    preenchidos: List[float] = []
+    k = 0
+    for s in range(n):
+        while k + 1 < len(conhecidos) and abs(conhecidos[k + 1] - s) <= abs(conhecidos[k] - s):
+            k += 1
+        preenchidos.append(brutos[conhecidos[k]])
+
+    meia = janela_s // 2
+    linha: List[Optional[float]] = []
+    for s in range(n):
+        vizinhos = sorted(preenchidos[max(0, s - meia):s + meia + 1])
+        linha.append(round(vizinhos[len(vizinhos) // 2], 4))
+    return linha
+
+
+def rastrear_rostos(video_path: str, duracao: float, processos: Optional[int] = None,
+                    amostras_por_seg: float = AMOSTRAS_POR_SEG,
+                    largura_analise: int = LARGURA_ANALISE) -> Dict[str, Any]:
+    """
+    Trilha do vídeo inteiro. Com mais de um trecho, cada um roda num processo próprio
+    (o Haar cascade não solta o GIL e cada processo decodifica só o seu pedaço).
+
+    Returns:
+        {'versao', 'amostras_por_seg', 'deteccoes', 'por_segundo': [x 0–1 ou None, ...]}
+    """
+    processos = processos or min(4, os.cpu_count() or 1)
+    trechos = dividir_trechos(duracao, processos)
+    if len(trechos) == 1:
+        deteccoes = analisar_trecho(video_path, 0.0, duracao, amostras_por_seg, largura_analise)
+    else:
+        with ProcessPoolExecutor(max_workers=len(trechos)) as pool:
+            futuros = [pool.submit(analisar_trecho, video_path, a, b, amostras_por_seg, largura_analise)
+                       for a, b in trechos]
+            deteccoes = [d for futuro in futuros for d in futuro.result()]
+    return {"versao": VERSAO_TRILHA, "amostras_por_seg": amostras_por_seg, "deteccoes": len(deteccoes),
+            "por_segundo": suavizar(deteccoes, duracao)}
+
+
+def centro_corte(trilha: Dict[str, Any], inicio: float, fim: float, largura_fonte: int) -> Optional[float]:
+    """Centro x (pixels da fonte) do recorte de [inicio, fim): mediana da linha do tempo no trecho"""
+    linha = trilha.get("por_segundo") or []
+    valores = sorted(x for x in linha[max(0, int(inicio)):max(int(inicio) + 1, int(math.ceil(fim)))]
+                     if x is not None)
+    if not valores:
+        return None
+    return valores[len(valores) // 2] * largura_fonte
@@ -0,0 +1,196 @@
+"""
+Grafo de Render FFmpeg
+Compila uma lista de cortes (com o recorte 9:16 de cada um) e as legendas num único comando
+ffmpeg: cada corte entra com busca no demuxer (-ss/-t antes do -i), passa por crop, e o
+concat junta vídeo e áudio; as legendas viram um arquivo ASS queimado pelo filtro `ass`.
+O Python só monta texto — nenhum frame passa por ele.
+"""
+
+import json
+import os
+import subprocess
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.render_scheduler import RenderJob
+
+PALAVRAS_POR_BLOCO = 5
+
+_CORES = {
+    "white": (255, 255, 255), "black": (0, 0, 0), "yellow": (255, 255, 0), "red": (255, 0, 0),
+    "green": (0, 255, 0), "blue": (0, 0, 255), "cyan": (0, 255, 255), "magenta": (255, 0, 255),
+    "orange": (255, 165, 0),
+}
+
+
+def sondar_video(caminho: str, ffprobe: str = "ffprobe") -> Dict[str, Any]:
+    """Largura, altura, duração e presença de áudio via ffprobe (sem abrir decodificador)"""
+    proc = subprocess.run([ffprobe, "-v", "error", "-print_format", "json", "-show_streams", "-show_format", caminho],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffprobe falhou: {proc.stderr.decode('utf-8', 'replace')[-300:]}")
+    dados = json.loads(proc.stdout or b"{}")
+    video = next((s for s in dados.get("streams", []) if s.get("codec_type") == "video"), None)
+    if video is None:
+        raise RuntimeError(f"Sem trilha de vídeo em {caminho}")
+    duracao = dados.get("format", {}).get("duration") or video.get("duration") or 0
+    return {"largura": int(video["width"]), "altura": int(video["height"]), "duracao": float(duracao),
+            "tem_audio": any(s.get("codec_type") == "audio" for s in dados.get("streams", []))}
+
+
+# ══════════════════════════════════════════════════════════════════
+# LEGENDAS
+# ══════════════════════════════════════════════════════════════════
+def blocos_legenda(segmentos: List[Dict[str, Any]], st_corte: float, nd_corte: float,
+                   palavras_por_bloco: int = PALAVRAS_POR_BLOCO) -> Iterator[Tuple[str, float, float]]:
+    """
+    Blocos de até `palavras_por_bloco` palavras em caixa alta, com o tempo de cada segmento
+    dividido igualmente entre seus blocos. Tempos relativos ao início do corte.
+    """
+    duracao_corte = nd_corte - st_corte
+    for seg in segmentos:
+        if seg["end"] <= st_corte or seg["start"] >= nd_corte:
+            continue
+        clip_start = max(0.0, seg["start"] - st_corte)
+        clip_end = min(duracao_corte, seg["end"] - st_corte)
+        dur_seg = clip_end - clip_start
+        if dur_seg <= 0:
+            continue
+        palavras = seg["text"].strip().upper().split()
+        if not palavras:
+            continue
+        blocos = [palavras[i:i + palavras_por_bloco] for i in range(0, len(palavras), palavras_por_bloco)]
+        tempo_bloco = dur_seg / len(blocos)
+        for idx, bloco in enumerate(blocos):
+            b_start = clip_start + idx * tempo_bloco
+            b_end = min(b_start + tempo_bloco, clip_end)
+            if b_end - b_start < 0.2:
+                continue
+            yield " ".join(bloco), b_start, b_end
+
+
+def cor_ass(cor: str, padrao: Tuple[int, int, int] = (255, 255, 255)) -> str:
+    """'#rrggbb' ou nome de cor → &H00BBGGRR do ASS"""
+    cor = (cor or "").strip().lower()
+    if cor.startswith("#") and len(cor) == 7:
+        try:
+            r, g, b = (int(cor[i:i + 2], 16) for i in (1, 3, 5))
+        except ValueError:
+            r, g, b = padrao
+    else:
+        r, g, b = _CORES.get(cor, padrao)
+    return f"&H00{b:02X}{g:02X}{r:02X}"
+
+
+def _tempo_ass(t: float) -> str:
+    cs = int(round(max(0.0, t) * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+
+def gerar_ass(segmentos: List[Dict[str, Any]], cortes: List[Dict[str, float]], largura: int, altura: int,
+              y_pixels: float, tamanho: int, cor_texto: str, cor_fundo: str, fonte: Optional[str] = None) -> str:
+    """
+    Legendas de todos os cortes na linha do tempo do vídeo final (cortes concatenados),
+    no mesmo visual do caminho MoviePy: topo do texto em `y_pixels`, 88% da largura,
+    contorno preto de 2 px ou caixa preta quando `cor_fundo` não é 'transparent'.
+    """
+    fonte = fonte or ("Arial" if os.name == "nt" else "Liberation Sans")
+    caixa = cor_fundo != "transparent"
+    margem = int(largura * 0.06)
+    estilo = ",".join(map(str, [
+        "Viral", fonte, tamanho, cor_ass(cor_texto), "&H000000FF",
+        cor_ass(cor_fundo, (0, 0, 0)) if caixa else "&H00000000", "&H00000000",
+        -1, 0, 0, 0, 100, 100, 0, 0, 3 if caixa else 1, 6 if caixa else 2, 0, 8, margem, margem, 0, 1,
+    ]))
+    linhas = [
+        "[Script Info]", "ScriptType: v4.00+", f"PlayResX: {largura}", f"PlayResY: {altura}",
+        "WrapStyle: 0", "ScaledBorderAndShadow: yes", "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, "
+        "Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: {estilo}", "",
+        "[Events]", "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    posicao = f"{{\\pos({largura // 2},{int(y_pixels)})\\fad(100,100)}}"
+    deslocamento = 0.0
+    for corte in cortes:
+        st, nd = float(corte["start"]), float(corte["end"])
+        for texto, b_start, b_end in blocos_legenda(segmentos, st, nd):
+            texto = texto.replace("\\", "/").replace("{", "(").replace("}", ")")
+            linhas.append(f"Dialogue: 0,{_tempo_ass(deslocamento + b_start)},{_tempo_ass(deslocamento + b_end)},"
+                          f"Viral,,0,0,0,,{posicao}{texto}")
+        deslocamento += nd - st
+    return "\n".join(linhas) + "\n"
+
+
+# ══════════════════════════════════════════════════════════════════
+# GRAFO
+# ══════════════════════════════════════════════════════════════════
+def escapar_caminho_filtro(caminho: str) -> str:
+    """Escapa um caminho para valor de opção dentro de -filter_complex (dois níveis de escape do ffmpeg)"""
+    valor = caminho.replace("\\", "/")
+    for c in ("\\", "'", ":"):            # nível da opção do filtro
+        valor = valor.replace(c, "\\" + c)
+    escapado = ""
+    for c in valor:                        # nível do grafo
+        escapado += "\\" + c if c in "\\'[],;" else c
+    return escapado
+
+
+def montar_grafo(cortes: List[Dict[str, float]], crops_x: List[int], largura: int, altura: int,
+                 tem_audio: bool = True, arquivo_ass: Optional[str] = None,
+                 fps: int = 30) -> Tuple[List[List[str]], str, List[str]]:
+    """
+    Args:
+        cortes:  [{'start', 'end'}] em segundos do vídeo fonte
+        crops_x: x do canto esquerdo do recorte largura×altura de cada corte
+
+    Returns:
+        (opções -ss/-t de cada entrada — uma por corte, todas do mesmo arquivo —, filter_complex, -map)
+    """
+    entradas: List[List[str]] = []
+    filtros: List[str] = []
+    pares = ""
+    for i, (corte, x) in enumerate(zip(cortes, crops_x)):
+        st, nd = float(corte["start"]), float(corte["end"])
+        entradas.append(["-ss", f"{st:.3f}", "-t", f"{nd - st:.3f}"])
+        filtros.append(f"[{i}:v]crop={largura}:{altura}:{int(x)}:0,setsar=1,fps={fps},setpts=PTS-STARTPTS[v{i}]")
+        pares += f"[v{i}]"
+        if tem_audio:
+            filtros.append(f"[{i}:a]aresample=async=1,asetpts=PTS-STARTPTS[a{i}]")
+            pares += f"[a{i}]"
+    n = len(cortes)
+    saida_video = "[vc]" if arquivo_ass else "[vout]"
+    filtros.append(f"{pares}concat=n={n}:v=1:a={1 if tem_audio else 0}{saida_video}" + ("[aout]" if tem_audio else ""))
+    if arquivo_ass:
+        filtros.append(f"[vc]ass={escapar_caminho_filtro(arquivo_ass)}[vout]")
+    mapas = ["-map", "[vout]"] + (["-map", "[aout]"] if tem_audio else [])
+    return entradas, ";".join(filtros), mapas
+
+
+def geometria_crop(largura_fonte: int, altura_fonte: int, centros_x: List[Optional[float]]) -> Tuple[int, int, List[int]]:
+    """Recorte 9:16 da altura toda (dimensões pares, exigência do x264) centrado em cada x (ou no meio)"""
+    altura = altura_fonte - altura_fonte % 2
+    largura = min(int(altura * 9 / 16), largura_fonte)
+    largura -= largura % 2
+    xs = []
+    for centro in centros_x:
+        centro = centro if centro else largura_fonte / 2
+        centro = max(largura / 2, min(centro, largura_fonte - largura / 2))
+        xs.append(int(centro - largura / 2))
+    return largura, altura, xs
+
+
+def job_cortes(nome: str, video_path: str, arquivo_saida: str, cortes: List[Dict[str, float]], crops_x: List[int],
+               largura: int, altura: int, tem_audio: bool = True, arquivo_ass: Optional[str] = None,
+               fps: int = 30, preset: str = "ultrafast", crf: int = 23) -> RenderJob:
+    """RenderJob com o grafo inteiro: uma única execução do ffmpeg gera o vídeo final"""
+    entradas, filtro, mapas = montar_grafo(cortes, crops_x, largura, altura, tem_audio, arquivo_ass, fps)
+    previas = [arg for opcoes in entradas[:-1] for arg in (*opcoes, "-i", video_path)]
+    saida = ["-filter_complex", filtro, *mapas, "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+             "-pix_fmt", "yuv420p", "-movflags", "+faststart"]
+    if tem_audio:
+        saida += ["-c:a", "aac"]
+    return RenderJob(nome=nome, arquivo_entrada=video_path, arquivo_saida=arquivo_saida,
+                     duracao_s=sum(float(c["end"]) - float(c["start"]) for c in cortes),
+                     entrada=entradas[-1], saida=saida, entradas_previas=previas)
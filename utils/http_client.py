@@ -0,0 +1,345 @@
+"""
+Transporte HTTP Compartilhado
+Pools de conexão por host, rate limit (token bucket), retry com backoff + jitter,
+GET condicional (ETag / Last-Modified), coalescência de requisições idênticas em voo
+e métricas de latência/erros por host
+"""
+
+import time
+import random
+import threading
+import logging
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT_PADRAO = 15
+STATUS_RETRY = (429, 500, 502, 503, 504)
+METODOS_IDEMPOTENTES = ("GET", "HEAD", "OPTIONS")
+LIMITE_CORPO_CONDICIONAL = 5 * 1024 * 1024  # corpos maiores não ficam na memória para revalidação
+VALIDADORES_MAX_BYTES = 32 * 1024 * 1024     # soma dos corpos guardados para GET condicional
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` tokens por segundo com rajada de até `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(rate, 1.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Bloqueia até haver um token; devolve quanto tempo esperou (s)"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                delay = (1.0 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class HostMetrics:
+    """Contadores e latências recentes de um host"""
+
+    def __init__(self, window: int = 500):
+        self.counters = defaultdict(int)
+        self.latencies = deque(maxlen=window)
+        self.rate_wait_s = 0.0
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def add_wait(self, seconds: float):
+        with self._lock:
+            self.rate_wait_s += seconds
+
+    def observe(self, latency_s: float, status: Optional[int]):
+        with self._lock:
+            self.latencies.append(latency_s * 1000)
+            self.counters['respostas'] += 1
+            if status is not None:
+                self.counters[f'{status // 100}xx'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self.counters)
+            samples = sorted(self.latencies)
+            data['espera_rate_limit_s'] = round(self.rate_wait_s, 3)
+        if samples:
+            data['latencia_p50_ms'] = round(samples[len(samples) // 2], 1)
+            data['latencia_p99_ms'] = round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 1)
+        return data
+
+
+class _Validado:
+    """O que um 304 precisa para recriar a resposta: status, cabeçalhos e corpo (sem a conexão)"""
+
+    __slots__ = ("status", "headers", "body", "encoding", "reason")
+
+    def __init__(self, response: requests.Response):
+        self.status = response.status_code
+        self.headers = dict(response.headers)
+        self.body = response.content
+        self.encoding = response.encoding
+        self.reason = response.reason
+
+    def resposta(self, url: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response.encoding = self.encoding
+        response.reason = self.reason
+        response.url = url
+        return response
+
+
+class _EmVoo:
+    """Requisição líder que as cópias idênticas aguardam"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Optional[requests.Response] = None
+        self.error: Optional[BaseException] = None
+
+
+class HttpClient:
+    """
+    Cliente HTTP compartilhado pelos serviços (Binance, NOAA, PizzINT, alertas, USGS, clima).
+
+    - uma requests.Session (pool keep-alive) por host
+    - rate limit opcional por host (set_rate_limit)
+    - retry só para métodos idempotentes, em erros de conexão/timeout e 429/5xx,
+      com backoff exponencial "full jitter" e respeito ao Retry-After
+    - GETs repetidos mandam If-None-Match / If-Modified-Since; um 304 devolve uma resposta recriada
+      do corpo guardado (cache LRU limitado pela soma dos corpos, validators_max_bytes)
+    - GETs idênticos simultâneos viram uma única requisição
+    """
+
+    def __init__(self, pool_size: int = 10, attempts: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, timeout: float = TIMEOUT_PADRAO,
+                 validators_max_bytes: int = VALIDADORES_MAX_BYTES):
+        self.pool_size = pool_size
+        self.attempts = attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.validators_max_bytes = validators_max_bytes
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._metrics: Dict[str, HostMetrics] = {}
+        self._validators: "OrderedDict[str, _Validado]" = OrderedDict()
+        self._validators_bytes = 0
+        self._inflight: Dict[tuple, _EmVoo] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Configuração
+    # ------------------------------------------------------------
+    def set_rate_limit(self, host: str, rate: float, burst: Optional[float] = None, overwrite: bool = True):
+        """Limita `host` a `rate` requisições/s (rajada de `burst`)"""
+        with self._lock:
+            if overwrite or host not in self._buckets:
+                self._buckets[host] = TokenBucket(rate, burst)
+
+    def _session(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _host_metrics(self, host: str) -> HostMetrics:
+        with self._lock:
+            metrics = self._metrics.get(host)
+            if metrics is None:
+                metrics = self._metrics[host] = HostMetrics()
+            return metrics
+
+    # ------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+                data: Any = None, timeout: Optional[float] = None, stream: bool = False,
+                attempts: Optional[int] = None, conditional: Optional[bool] = None) -> requests.Response:
+        """
+        Faz a requisição pelo pool do host.
+
+        Args:
+            attempts: total de tentativas (padrão do cliente; métodos não idempotentes tentam uma vez só)
+            conditional: GET condicional; padrão ligado para GET sem stream
+
+        Returns:
+            requests.Response (a última, mesmo se o status for de erro)
+
+        Raises:
+            requests.RequestException quando todas as tentativas falham sem resposta
+        """
+        method = method.upper()
+        full_url = requests.Request(method, url, params=params).prepare().url
+        host = urlsplit(full_url).netloc
+        if conditional is None:
+            conditional = method == "GET" and not stream
+
+        if method != "GET" or stream:
+            return self._send(method, full_url, host, headers, data, timeout, stream, attempts, conditional)
+
+        key = (full_url, tuple(sorted((headers or {}).items())))
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _EmVoo()
+
+        if not leader:
+            self._host_metrics(host).incr('coalescidas')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            call.response = self._send(method, full_url, host, headers, data, timeout, stream, attempts, conditional)
+            return call.response
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Métricas por host"""
+        with self._lock:
+            hosts = list(self._metrics.items())
+        return {host: metrics.snapshot() for host, metrics in hosts}
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+    # ------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None and response.status_code in (429, 503):
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max * 4)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _send(self, method, url, host, headers, data, timeout, stream, attempts, conditional):
+        session = self._session(host)
+        metrics = self._host_metrics(host)
+        bucket = self._buckets.get(host)
+        timeout = self.timeout if timeout is None else timeout
+        total = attempts or self.attempts
+        if method not in METODOS_IDEMPOTENTES:
+            total = 1
+
+        req_headers = dict(headers or {})
+        cached = None
+        if conditional:
+            with self._lock:
+                cached = self._validators.get(url)
+                if cached is not None:
+                    self._validators.move_to_end(url)
+            if cached is not None:
+                if cached.headers.get("ETag"):
+                    req_headers["If-None-Match"] = cached.headers["ETag"]
+                if cached.headers.get("Last-Modified"):
+                    req_headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        response = None
+        for attempt in range(total):
+            if bucket is not None:
+                waited = bucket.acquire()
+                if waited:
+                    metrics.add_wait(waited)
+            metrics.incr('requisicoes')
+            t0 = time.perf_counter()
+            try:
+                response = session.request(method, url, headers=req_headers, data=data,
+                                           timeout=timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.observe(time.perf_counter() - t0, None)
+                metrics.incr('erros')
+                if attempt == total - 1:
+                    raise
+                metrics.incr('retries')
+                time.sleep(self._backoff(attempt, None))
+                continue
+
+            metrics.observe(time.perf_counter() - t0, response.status_code)
+            if response.status_code in STATUS_RETRY and attempt < total - 1:
+                metrics.incr('retries')
+                response.close()
+                time.sleep(self._backoff(attempt, response))
+                continue
+            break
+
+        if response.status_code >= 400:
+            metrics.incr('erros')
+        if conditional:
+            if response.status_code == 304 and cached is not None:
+                metrics.incr('nao_modificado')
+                return cached.resposta(url)
+            if response.status_code == 200 and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+                limite = min(LIMITE_CORPO_CONDICIONAL, self.validators_max_bytes)
+                if len(response.content) <= limite:
+                    self._guardar_validado(url, _Validado(response))
+        return response
+
+    def _guardar_validado(self, url: str, entrada: _Validado):
+        with self._lock:
+            anterior = self._validators.pop(url, None)
+            if anterior is not None:
+                self._validators_bytes -= len(anterior.body)
+            self._validators[url] = entrada
+            self._validators_bytes += len(entrada.body)
+            while self._validators_bytes > self.validators_max_bytes:
+                _, despejado = self._validators.popitem(last=False)
+                self._validators_bytes -= len(despejado.body)
+
+
+_cliente_padrao: Optional[HttpClient] = None
+_cliente_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Instância compartilhada por todo o processo"""
+    global _cliente_padrao
+    with _cliente_lock:
+        if _cliente_padrao is None:
+            _cliente_padrao = HttpClient()
+        return _cliente_padrao
@@ -0,0 +1,209 @@
+"""
+Cache de Mídia em Disco
+Arquivos remotos (imagens, vídeos, GIFs) indexados por URL com ETag, Last-Modified e hash
+do conteúdo; revalidação por GET condicional (304 reaproveita o arquivo) e limite de
+tamanho total com despejo LRU
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from typing import Any, Dict, Optional
+
+from utils.http_client import HttpClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_MAXIMO_PADRAO = 512 * 1024 * 1024
+CHUNK = 64 * 1024
+
+
+class MediaCache:
+    """
+    Cache de arquivos remotos em `pasta`.
+
+    `fetch(url)` devolve um dict com:
+        path    — arquivo local com o conteúdo atual da URL
+        sha1    — hash do conteúdo
+        mudou   — False quando o conteúdo é o mesmo da última busca (304 ou hash igual)
+        origem  — 'rede', '304' ou 'stale' (servidor falhou, arquivo antigo reaproveitado)
+
+    O corpo é gravado em streaming (não fica na memória); o índice sobrevive a reinícios.
+    `meta` guarda dados derivados por URL (ex.: hash do GIF que gerou um MP4).
+    """
+
+    def __init__(self, pasta: str, max_bytes: int = TAMANHO_MAXIMO_PADRAO, http: Optional[HttpClient] = None):
+        self.pasta = pasta
+        self.max_bytes = max_bytes
+        self.http = http or get_http_client()
+        self.index_path = os.path.join(pasta, "index.json")
+        self._lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'nao_modificado': 0, 'conteudo_igual': 0,
+                      'stale': 0, 'evictions': 0, 'bytes_baixados': 0}
+        os.makedirs(pasta, exist_ok=True)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._index: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    # ------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------
+    def fetch(self, url: str, ext: str = "", headers: Optional[Dict] = None, timeout: float = 30,
+              attempts: int = 3, min_bytes: int = 500) -> Optional[Dict[str, Any]]:
+        """
+        Baixa `url` se ela mudou desde a última vez; senão reaproveita o arquivo do cache.
+
+        Returns:
+            dict (path, sha1, mudou, origem) ou None se não há conteúdo válido
+        """
+        with self._url_lock(url):
+            entry = self._entry(url)
+            req_headers = dict(headers or {})
+            if entry is not None:
+                if entry.get("etag"):
+                    req_headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    req_headers["If-Modified-Since"] = entry["last_modified"]
+
+            try:
+                response = self.http.get(url, headers=req_headers, timeout=timeout, stream=True,
+                                         attempts=attempts, conditional=False)
+            except Exception as e:
+                logger.warning(f"Falha buscando {url}: {e}")
+                return self._stale(url, entry)
+
+            try:
+                if response.status_code == 304 and entry is not None:
+                    self._incr('nao_modificado')
+                    self._incr('hits')
+                    return self._hit(url, entry, "304")
+                if response.status_code != 200:
+                    return self._stale(url, entry)
+                return self._store(url, ext, entry, response, min_bytes)
+            finally:
+                response.close()
+
+    def get_meta(self, url: str, chave: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._index.get(url, {}).get("meta", {}).get(chave, default)
+
+    def set_meta(self, url: str, chave: str, valor: Any):
+        with self._lock:
+            if url in self._index:
+                self._index[url].setdefault("meta", {})[chave] = valor
+                self._salvar_index()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(e.get("tamanho", 0) for e in self._index.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entradas'] = len(self._index)
+            stats['bytes'] = sum(e.get("tamanho", 0) for e in self._index.values())
+        return stats
+
+    # ------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _incr(self, nome: str, n: int = 1):
+        with self._lock:
+            self.stats[nome] += n
+
+    def _entry(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._index.get(url)
+        if entry is None or not os.path.exists(os.path.join(self.pasta, entry["arquivo"])):
+            return None
+        return entry
+
+    def _resultado(self, entry: Dict[str, Any], mudou: bool, origem: str) -> Dict[str, Any]:
+        return {"path": os.path.join(self.pasta, entry["arquivo"]), "sha1": entry["sha1"],
+                "mudou": mudou, "origem": origem}
+
+    def _hit(self, url: str, entry: Dict[str, Any], origem: str) -> Dict[str, Any]:
+        with self._lock:
+            entry["acesso"] = time.time()
+            self._salvar_index()
+        return self._resultado(entry, False, origem)
+
+    def _stale(self, url: str, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            self._incr('misses')
+            return None
+        self._incr('stale')
+        return self._hit(url, entry, "stale")
+
+    def _store(self, url, ext, entry, response, min_bytes) -> Optional[Dict[str, Any]]:
+        self._incr('misses')
+        arquivo = hashlib.sha1(url.encode()).hexdigest() + ext
+        destino = os.path.join(self.pasta, arquivo)
+        tmp = f"{destino}.{threading.get_ident()}.part"
+        digest = hashlib.sha1()
+        tamanho = 0
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    tamanho += len(chunk)
+        except Exception as e:
+            logger.warning(f"Download interrompido em {url}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return self._stale(url, entry)
+        self._incr('bytes_baixados', tamanho)
+
+        if tamanho <= min_bytes:
+            os.remove(tmp)
+            return self._stale(url, entry)
+
+        sha1 = digest.hexdigest()
+        mudou = entry is None or entry.get("sha1") != sha1
+        if mudou:
+            os.replace(tmp, destino)
+        else:
+            self._incr('conteudo_igual')
+            os.remove(tmp)
+
+        novo = {"arquivo": arquivo, "sha1": sha1, "tamanho": tamanho, "acesso": time.time(),
+                "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"),
+                "meta": {} if mudou else dict(entry.get("meta", {}))}
+        with self._lock:
+            self._index[url] = novo
+            self._despejar(manter=url)
+            self._salvar_index()
+        return self._resultado(novo, mudou, "rede")
+
+    def _despejar(self, manter: str):
+        """Remove as entradas menos acessadas até caber em max_bytes (chamado com o lock)."""
+        total = sum(e.get("tamanho", 0) for e in self._index.values())
+        for url, entry in sorted(self._index.items(), key=lambda item: item[1].get("acesso", 0)):
+            if total <= self.max_bytes:
+                break
+            if url == manter:
+                continue
+            caminho = os.path.join(self.pasta, entry["arquivo"])
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            total -= entry.get("tamanho", 0)
+            del self._index[url]
+            self.stats['evictions'] += 1
+
+    def _salvar_index(self):
+        """Grava o índice de forma atômica (chamado com o lock)."""
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_path)
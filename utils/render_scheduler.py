@@ -0,0 +1,151 @@
+"""
+Agendador de renders FFmpeg
+Executa vários encodes em paralelo, dimensionados pelos núcleos disponíveis, com teto de
+threads por job e progresso (percentual, fps de encode, velocidade) via callback.
+"""
+
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+
+@dataclass
+class RenderJob:
+    """
+    Um encode: `entrada` são as opções antes do -i, `saida` as opções de saída (sem o arquivo).
+    `entradas_previas` são blocos completos (opções + -i arquivo) de outras entradas, para
+    grafos com várias entradas; a principal fica com o último índice.
+    """
+    nome: str
+    arquivo_entrada: str
+    arquivo_saida: str
+    duracao_s: float
+    entrada: List[str] = field(default_factory=list)
+    saida: List[str] = field(default_factory=list)
+    entradas_previas: List[str] = field(default_factory=list)
+
+
+def dimensionar(n_jobs: int, nucleos: Optional[int] = None, max_paralelo: Optional[int] = None):
+    """
+    (jobs simultâneos, threads por job). Com poucos núcleos os jobs vão em fila; com muitos,
+    cada encode recebe uma fatia fixa para os x264 não disputarem os mesmos núcleos.
+    `max_paralelo` explícito prevalece sobre o cálculo por núcleos.
+    """
+    nucleos = nucleos or os.cpu_count() or 1
+    paralelo = max(1, min(n_jobs, max_paralelo or max(1, nucleos // 2)))
+    return paralelo, max(1, nucleos // paralelo)
+
+
+class RenderScheduler:
+    """
+    Fila de RenderJobs executada por um pool de `paralelo` processos ffmpeg.
+
+    Cada processo roda com `-threads N` e `-progress pipe:1`; o bloco de progresso do
+    ffmpeg vira chamadas `on_progress(nome, info)` com info = {status, percent, fps,
+    speed, out_time_s}. status: 'rodando' | 'concluido' | 'falhou'.
+    """
+
+    def __init__(self, max_paralelo: Optional[int] = None, threads_por_job: Optional[int] = None,
+                 ffmpeg: str = "ffmpeg", on_progress: Optional[ProgressCallback] = None):
+        self.max_paralelo = max_paralelo
+        self.threads_por_job = threads_por_job
+        self.ffmpeg = ffmpeg
+        self.on_progress = on_progress
+        self._procs: Dict[int, subprocess.Popen] = {}   # posição do job na lista → processo
+        self._lock = threading.Lock()
+        self._cancelado = threading.Event()
+
+    def executar(self, jobs: List[RenderJob]) -> List[Dict[str, Any]]:
+        """Roda todos os jobs; devolve um resultado por job, na ordem recebida"""
+        if not jobs:
+            return []
+        self._cancelado.clear()
+        paralelo, threads = dimensionar(len(jobs), max_paralelo=self.max_paralelo)
+        threads = self.threads_por_job or threads
+        # Processos indexados pela posição: nomes repetidos não se sobrescrevem
+        with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix="render") as pool:
+            return list(pool.map(lambda item: self._rodar(item[0], item[1], threads), enumerate(jobs)))
+
+    def cancelar(self):
+        """Interrompe os encodes em andamento e descarta os que ainda não começaram"""
+        self._cancelado.set()
+        with self._lock:
+            for proc in self._procs.values():
+                proc.kill()
+
+    def comando(self, job: RenderJob, threads: int) -> List[str]:
+        return ([self.ffmpeg, "-y", "-hide_banner", "-nostats", *job.entradas_previas,
+                 *job.entrada, "-i", job.arquivo_entrada,
+                 *job.saida, "-threads", str(threads), "-filter_threads", str(threads),
+                 "-progress", "pipe:1", job.arquivo_saida])
+
+    # ------------------------------------------------------------
+    def _rodar(self, indice: int, job: RenderJob, threads: int) -> Dict[str, Any]:
+        resultado = {"nome": job.nome, "arquivo": job.arquivo_saida, "ok": False, "segundos": 0.0, "fps": None}
+        if self._cancelado.is_set():
+            resultado["erro"] = "cancelado"
+            return resultado
+        t0 = time.monotonic()
+        info = {"status": "rodando", "percent": 0.0, "fps": None, "speed": None, "out_time_s": 0.0}
+        with tempfile.TemporaryFile() as stderr:
+            try:
+                proc = subprocess.Popen(self.comando(job, threads), stdout=subprocess.PIPE,
+                                        stderr=stderr, stdin=subprocess.DEVNULL, text=True, bufsize=1)
+            except OSError as e:
+                resultado["erro"] = str(e)
+                self._notificar(job.nome, dict(info, status="falhou"))
+                return resultado
+            with self._lock:
+                self._procs[indice] = proc
+            try:
+                self._ler_progresso(job, proc, info)
+                rc = proc.wait()
+            finally:
+                proc.stdout.close()
+                with self._lock:
+                    self._procs.pop(indice, None)
+            ok = rc == 0 and os.path.exists(job.arquivo_saida) and os.path.getsize(job.arquivo_saida) > 0
+            if not ok:
+                stderr.seek(0)
+                resultado["erro"] = stderr.read().decode("utf-8", "replace")[-500:].strip() or f"ffmpeg rc={rc}"
+        resultado.update(ok=ok, segundos=round(time.monotonic() - t0, 2), fps=info["fps"])
+        self._notificar(job.nome, dict(info, status="concluido" if ok else "falhou",
+                                       percent=100.0 if ok else info["percent"]))
+        return resultado
+
+    def _ler_progresso(self, job: RenderJob, proc: subprocess.Popen, info: Dict[str, Any]):
+        """Consome os blocos chave=valor do -progress; cada 'progress=' fecha um bloco"""
+        for linha in proc.stdout:
+            chave, _, valor = linha.strip().partition("=")
+            if chave == "out_time_us" or chave == "out_time_ms":   # ambos em microssegundos
+                try:
+                    info["out_time_s"] = max(0.0, int(valor) / 1e6)
+                except ValueError:
+                    pass
+            elif chave == "fps":
+                try:
+                    info["fps"] = float(valor)
+                except ValueError:
+                    pass
+            elif chave == "speed":
+                info["speed"] = valor.rstrip("x") or None
+            elif chave == "progress":
+                if job.duracao_s > 0:
+                    info["percent"] = round(min(100.0, info["out_time_s"] / job.duracao_s * 100), 1)
+                if valor != "end":
+                    self._notificar(job.nome, dict(info))
+
+    def _notificar(self, nome: str, info: Dict[str, Any]):
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress(nome, info)
+        except Exception:
+            pass   # callback de UI não derruba o encode
@@ -0,0 +1,341 @@
+"""
+Transcrição em Streaming
+Áudio longo transcrito em janelas fixas com sobreposição: um VAD por energia descarta as
+janelas sem fala, as restantes vão para um pool de workers (cada um com seu modelo Whisper)
+e os segmentos saem em ordem assim que o prefixo do vídeo fica pronto. Com um
+TranscriptCache, cada janela é gravada ao terminar (retomada sem retranscrever).
+`ResumoMapReduce` condensa a transcrição inteira para caber no contexto do LLM.
+"""
+
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from queue import Queue
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+JANELA_PADRAO_S = 30.0       # contexto nativo do Whisper
+SOBREPOSICAO_PADRAO_S = 2.0  # palavras cortadas na borda reaparecem inteiras na janela vizinha
+
+
+# ══════════════════════════════════════════════════════════════════
+# ÁUDIO + VAD
+# ══════════════════════════════════════════════════════════════════
+def carregar_audio(caminho: str, ffmpeg: str = "ffmpeg") -> np.ndarray:
+    """Decodifica qualquer mídia para PCM mono 16 kHz float32 (sem WAV temporário)"""
+    proc = subprocess.run([ffmpeg, "-nostdin", "-i", caminho, "-vn", "-f", "s16le", "-acodec", "pcm_s16le",
+                           "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg falhou ao extrair áudio: {proc.stderr.decode('utf-8', 'replace')[-300:]}")
+    return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def detectar_fala(audio: np.ndarray, sr: int = SAMPLE_RATE, quadro_ms: int = 30, margem_db: float = 12.0,
+                  piso_db: float = -50.0, folga_s: float = 0.3, juntar_s: float = 0.5) -> List[Tuple[float, float]]:
+    """
+    VAD por energia: quadros com RMS acima de max(ruído de fundo + margem_db, piso_db) são fala.
+    O ruído de fundo é o percentil 10 da energia do próprio áudio. Cada trecho ganha `folga_s`
+    nas bordas e trechos separados por menos de `juntar_s` viram um só.
+
+    Returns:
+        lista de (inicio_s, fim_s)
+    """
+    quadro = max(1, int(sr * quadro_ms / 1000))
+    n = len(audio) // quadro
+    if n == 0:
+        return []
+    quadros = audio[:n * quadro].reshape(n, quadro)
+    db = 10 * np.log10(np.mean(quadros * quadros, axis=1) + 1e-10)
+    limiar = max(float(np.percentile(db, 10)) + margem_db, piso_db)
+    ativo = db > limiar
+
+    # Bordas dos blocos contínuos de quadros ativos
+    bordas = np.flatnonzero(np.diff(np.concatenate(([0], ativo.astype(np.int8), [0]))))
+    duracao = len(audio) / sr
+    passo = quadro / sr
+    trechos: List[Tuple[float, float]] = []
+    for ini, fim in zip(bordas[::2], bordas[1::2]):
+        a = max(0.0, ini * passo - folga_s)
+        b = min(duracao, fim * passo + folga_s)
+        if trechos and a - trechos[-1][1] < juntar_s:
+            trechos[-1] = (trechos[-1][0], b)
+        else:
+            trechos.append((a, b))
+    return trechos
+
+
+@dataclass
+class Janela:
+    """Trecho enviado ao Whisper; só os segmentos que começam em [dono_inicio, dono_fim) são dele"""
+    indice: int
+    inicio: float
+    fim: float
+    dono_inicio: float
+    dono_fim: float
+    tem_fala: bool
+
+
+def _ponto_de_corte(fala: List[Tuple[float, float]], minimo: float, alvo: float) -> float:
+    """Meio do silêncio mais próximo de `alvo` dentro de [minimo, alvo]; sem silêncio, o próprio alvo"""
+    cursor = alvo
+    for a, b in reversed(fala):
+        if a >= cursor:
+            continue
+        if b < cursor:
+            # Silêncio (b, cursor) ∩ [minimo, alvo]
+            inicio_silencio = max(b, minimo)
+            if inicio_silencio < cursor:
+                return (inicio_silencio + cursor) / 2
+            return alvo
+        cursor = a   # alvo (ou o cursor) cai dentro de fala: recua para antes dela
+        if cursor <= minimo:
+            return alvo
+    return (max(0.0, minimo) + cursor) / 2 if cursor > minimo else alvo
+
+
+def planejar_janelas(duracao: float, fala: List[Tuple[float, float]], janela_s: float = JANELA_PADRAO_S,
+                     sobreposicao_s: float = SOBREPOSICAO_PADRAO_S, ajuste_s: float = 5.0) -> List[Janela]:
+    """
+    Grade de janelas de até `janela_s` com `sobreposicao_s` entre vizinhas. A fronteira de posse
+    fica no meio da sobreposição, recuada até `ajuste_s` para cair num silêncio do VAD — assim
+    uma frase raramente é partida entre duas janelas.
+    """
+    passo = janela_s - sobreposicao_s
+    if passo <= 0:
+        raise ValueError("sobreposicao_s deve ser menor que janela_s")
+    ajuste_s = min(ajuste_s, passo / 2)
+    meia = sobreposicao_s / 2
+    janelas: List[Janela] = []
+    inicio, dono_inicio = 0.0, 0.0
+    while True:
+        if inicio + janela_s >= duracao:
+            fim, dono_fim = duracao, duracao
+        else:
+            alvo = inicio + janela_s - meia
+            dono_fim = _ponto_de_corte(fala, alvo - ajuste_s, alvo)
+            fim = dono_fim + meia
+        tem_fala = any(a < fim and b > inicio for a, b in fala)
+        janelas.append(Janela(len(janelas), inicio, fim, dono_inicio, dono_fim, tem_fala))
+        if fim >= duracao:
+            return janelas
+        inicio, dono_inicio = dono_fim - meia, dono_fim
+
+
+# ══════════════════════════════════════════════════════════════════
+# TRANSCRITOR
+# ══════════════════════════════════════════════════════════════════
+class TranscritorStreaming:
+    """
+    Pool de `workers` threads; cada janela pega um modelo livre da fila (`modelo` + réplicas
+    criadas sob demanda por `fabrica_modelo`). Sem fábrica, as janelas compartilham o único
+    modelo uma de cada vez — o Whisper não é seguro para chamadas simultâneas no mesmo modelo.
+
+    `transcrever(...)` é um gerador: emite os segmentos (tempos absolutos) em ordem conforme
+    as janelas terminam, então o consumidor começa a trabalhar antes do fim da transcrição.
+    """
+
+    def __init__(self, modelo, fabrica_modelo: Optional[Callable[[], Any]] = None, workers: int = 1,
+                 janela_s: float = JANELA_PADRAO_S, sobreposicao_s: float = SOBREPOSICAO_PADRAO_S,
+                 cache=None, perfil: str = "base", **opcoes_whisper):
+        self.fabrica_modelo = fabrica_modelo
+        self.workers = max(1, workers)
+        self.janela_s = janela_s
+        self.sobreposicao_s = sobreposicao_s
+        self.cache = cache
+        self.perfil = perfil
+        self.opcoes = {"word_timestamps": True, **opcoes_whisper}
+        self._modelos: Queue = Queue()
+        self._modelos.put(modelo)
+        self._criados = 1
+        self._lock = threading.Lock()
+        self.stats = {'janelas': 0, 'silencio': 0, 'cache': 0, 'whisper': 0}
+
+    def transcrever(self, fonte, chave: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Args:
+            fonte: caminho da mídia ou array float32 16 kHz
+            chave: chave do TranscriptCache (janelas já gravadas são reaproveitadas)
+        """
+        audio = carregar_audio(fonte) if isinstance(fonte, str) else fonte
+        duracao = len(audio) / SAMPLE_RATE
+        janelas = planejar_janelas(duracao, detectar_fala(audio), self.janela_s, self.sobreposicao_s)
+        self.stats['janelas'] += len(janelas)
+        opcoes = dict(self.opcoes)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="whisper") as pool:
+            pendentes = iter(janelas)
+            # A primeira janela com fala roda sozinha para fixar o idioma das demais
+            futuros = []
+            if opcoes.get("language") is None:
+                for janela in pendentes:
+                    futuros.append(pool.submit(self._janela, audio, janela, chave, opcoes))
+                    if janela.tem_fala:
+                        idioma = futuros[-1].result()[1]
+                        if idioma:
+                            opcoes["language"] = idioma
+                        break
+            futuros.extend(pool.submit(self._janela, audio, janela, chave, opcoes) for janela in pendentes)
+
+            idioma = opcoes.get("language")
+            try:
+                for futuro in futuros:
+                    segmentos, _ = futuro.result()
+                    yield from segmentos
+            finally:
+                for futuro in futuros:
+                    futuro.cancel()
+
+        if self.cache is not None and chave:
+            # Cobertura até o fim do arquivo: a próxima chamada acha a transcrição completa no cache
+            self.cache.put(chave, self.perfil, [], inicio=duracao, fim=None, language=idioma)
+
+    # ------------------------------------------------------------
+    def _janela(self, audio: np.ndarray, janela: Janela, chave: Optional[str],
+                opcoes: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        usar_cache = self.cache is not None and chave
+        if usar_cache:
+            salvo = self.cache.get(chave, self.perfil, janela.dono_inicio, janela.dono_fim)
+            if salvo is not None:
+                self._incr('cache')
+                return [seg for seg in salvo["segments"] if self._da_janela(seg, janela)], salvo.get("language")
+        if not janela.tem_fala:
+            self._incr('silencio')
+            segmentos, idioma = [], None
+        else:
+            self._incr('whisper')
+            trecho = audio[int(janela.inicio * SAMPLE_RATE):int(janela.fim * SAMPLE_RATE)]
+            modelo = self._pegar_modelo()
+            try:
+                try:
+                    resultado = modelo.transcribe(trecho, **opcoes)
+                except TypeError:
+                    # openai-whisper anterior a word_timestamps
+                    resultado = modelo.transcribe(trecho, **{k: v for k, v in opcoes.items() if k != "word_timestamps"})
+            finally:
+                self._modelos.put(modelo)
+            segmentos = [seg for seg in (self._deslocar(seg, janela.inicio) for seg in resultado.get("segments", []))
+                         if self._da_janela(seg, janela)]
+            idioma = resultado.get("language")
+        if usar_cache:
+            self.cache.put(chave, self.perfil, segmentos, janela.dono_inicio, janela.dono_fim, language=idioma)
+        return segmentos, idioma
+
+    def _pegar_modelo(self):
+        if self.fabrica_modelo is not None and self._modelos.empty():
+            with self._lock:
+                criar = self._criados < self.workers
+                if criar:
+                    self._criados += 1
+            if criar:
+                return self.fabrica_modelo()
+        return self._modelos.get()
+
+    @staticmethod
+    def _da_janela(seg: Dict[str, Any], janela: Janela) -> bool:
+        return janela.dono_inicio <= seg["start"] < janela.dono_fim
+
+    @staticmethod
+    def _deslocar(seg: Dict[str, Any], offset: float) -> Dict[str, Any]:
+        novo = dict(seg, start=seg["start"] + offset, end=seg["end"] + offset)
+        if seg.get("words"):
+            novo["words"] = [dict(w, start=w["start"] + offset, end=w["end"] + offset) for w in seg["words"]]
+        return novo
+
+    def _incr(self, nome: str):
+        with self._lock:
+            self.stats[nome] += 1
+
+
+def linha_segmento(seg: Dict[str, Any], hms: bool = False) -> str:
+    """'[12.0 - 15.5] texto' (ou HH:MM:SS) — formato das transcrições enviadas ao LLM"""
+    if hms:
+        fmt = lambda t: "%02d:%02d:%02d" % (int(t) // 3600, int(t) % 3600 // 60, int(t) % 60)
+        return f"[{fmt(seg['start'])} - {fmt(seg['end'])}] {seg['text'].strip()}\n"
+    return f"[{seg['start']:.1f} - {seg['end']:.1f}] {seg['text'].strip()}\n"
+
+
+# ══════════════════════════════════════════════════════════════════
+# MAP-REDUCE DA TRANSCRIÇÃO
+# ══════════════════════════════════════════════════════════════════
+PROMPT_MAP = (
+    "Você condensa trechos de transcrição para um editor de vídeo. Reescreva o trecho abaixo em notas curtas, "
+    "uma por linha, cada uma começando com o intervalo de tempo original entre colchetes exatamente como aparece. "
+    "Mantenha todos os momentos com gancho, revelação, conflito, humor ou pico emocional; descarte enrolação. "
+    "Não invente tempos."
+)
+
+
+class ResumoMapReduce:
+    """
+    Acumula linhas de transcrição em blocos de até `limite_chars`. Cada bloco cheio é resumido
+    pelo LLM na hora (map) — com o transcritor em streaming, isso corre enquanto as janelas
+    seguintes ainda estão no Whisper. `finalizar()` devolve a transcrição inteira se ela couber
+    no limite; senão junta os resumos, resumindo de novo em grupos até caber (reduce).
+    """
+
+    def __init__(self, ai_brain, limite_chars: int = 8000, max_tokens: int = 600,
+                 temperatura: float = 0.1, log: Optional[Callable[[str], None]] = None):
+        self.ai_brain = ai_brain
+        self.limite_chars = limite_chars
+        self.max_tokens = max_tokens
+        self.temperatura = temperatura
+        self.log = log or (lambda msg: None)
+        self._bloco: List[str] = []
+        self._tamanho = 0
+        self._resumos: List[str] = []
+
+    def adicionar(self, linha: str):
+        if self._tamanho + len(linha) > self.limite_chars and self._bloco:
+            self._mapear_bloco()
+        self._bloco.append(linha)
+        self._tamanho += len(linha)
+
+    def finalizar(self) -> str:
+        if not self._resumos:
+            return "".join(self._bloco)
+        if self._bloco:
+            self._mapear_bloco()
+        textos = self._resumos
+        for _ in range(4):   # cada rodada divide o tamanho; 4 bastam para horas de vídeo
+            if sum(len(t) for t in textos) <= self.limite_chars:
+                break
+            textos = [self._resumir("".join(grupo)) for grupo in self._agrupar(textos)]
+        return "\n".join(textos)[:self.limite_chars]
+
+    # ------------------------------------------------------------
+    def _mapear_bloco(self):
+        self.log(f"🧾 [MAP-REDUCE]: Resumindo bloco {len(self._resumos) + 1} da transcrição...")
+        self._resumos.append(self._resumir("".join(self._bloco)))
+        self._bloco, self._tamanho = [], 0
+
+    def _agrupar(self, textos: List[str]) -> List[List[str]]:
+        grupos, atual, tamanho = [], [], 0
+        for texto in textos:
+            if atual and tamanho + len(texto) > self.limite_chars:
+                grupos.append(atual)
+                atual, tamanho = [], 0
+            atual.append(texto)
+            tamanho += len(texto)
+        if atual:
+            grupos.append(atual)
+        if len(grupos) == len(textos) and len(grupos) > 1:
+            # Cada resumo sozinho já enche o limite: junta aos pares para a rodada encolher
+            grupos = [sum(grupos[i:i + 2], []) for i in range(0, len(grupos), 2)]
+        return grupos
+
+    def _resumir(self, texto: str) -> str:
+        prompt = (f"<|im_start|>system\n{PROMPT_MAP}<|im_end|>\n<|im_start|>user\n{texto}<|im_end|>\n"
+                  f"<|im_start|>assistant\n")
+        try:
+            resp = self.ai_brain(prompt, max_tokens=self.max_tokens, stop=["<|im_end|>"],
+                                 temperature=self.temperatura)
+            resumo = resp["choices"][0]["text"].strip()
+        except Exception as e:
+            self.log(f"⚠️ [MAP-REDUCE]: Falha ao resumir bloco — {e}")
+            resumo = ""
+        # Sem resposta útil, fica o começo do próprio bloco (melhor que perder o trecho inteiro)
+        return (resumo or texto[:self.limite_chars // 4]) + "\n"
@@ -0,0 +1,372 @@
+"""
+Cache de Transcrições
+Transcrições do Whisper persistidas por fonte: URL (id do vídeo no YouTube) ou hash do
+conteúdo (arquivo local / áudio em bytes). Guarda os segmentos com timestamps por palavra e
+os intervalos já transcritos, então um trecho pode ser reaproveitado sem retranscrever o
+resto; opcionalmente guarda o vídeo baixado para o pipeline pular também o download e
+artefatos derivados do mesmo vídeo (como a trilha de rosto). Transcrições e vídeos têm
+limites de tamanho próprios, com despejo dos menos acessados.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+PASTA_PADRAO = "static/cache/transcricoes"
+MIDIA_MAX_BYTES_PADRAO = 4 * 1024 * 1024 * 1024
+TRANSCRICOES_MAX_BYTES_PADRAO = 256 * 1024 * 1024   # JSONs de transcrições e artefatos
+HASHES_MAX = 1000     # memos de chave_arquivo guardados no índice
+CHUNK = 1024 * 1024
+TOLERANCIA_S = 0.05   # folga ao juntar/comparar intervalos de cobertura
+
+_HOSTS_YOUTUBE = ("youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com")
+
+
+def id_youtube(url: str) -> Optional[str]:
+    """Id do vídeo em links youtube.com/watch, /shorts, /live, /embed e youtu.be"""
+    try:
+        p = urlparse(url.strip())
+    except ValueError:
+        return None
+    host = (p.hostname or "").lower()
+    if host == "youtu.be":
+        return p.path.strip("/").split("/")[0] or None
+    if host in _HOSTS_YOUTUBE:
+        if p.path == "/watch":
+            return (parse_qs(p.query).get("v") or [None])[0]
+        partes = p.path.strip("/").split("/")
+        if len(partes) >= 2 and partes[0] in ("shorts", "live", "embed", "v"):
+            return partes[1]
+    return None
+
+
+def _juntar(intervalos: List[List[Optional[float]]]) -> List[List[Optional[float]]]:
+    """Une intervalos [inicio, fim] sobrepostos ou encostados (fim None = até o final)"""
+    resultado: List[List[Optional[float]]] = []
+    for a, b in sorted(intervalos, key=lambda i: i[0]):
+        if resultado:
+            ultimo = resultado[-1]
+            if ultimo[1] is None:
+                continue
+            if a <= ultimo[1] + TOLERANCIA_S:
+                ultimo[1] = None if b is None else max(ultimo[1], b)
+                continue
+        resultado.append([a, b])
+    return resultado
+
+
+def _limpar_segmento(seg: Dict[str, Any]) -> Dict[str, Any]:
+    """Só o que interessa do segmento do Whisper, em tipos JSON (o Whisper às vezes devolve numpy)"""
+    limpo = {"start": float(seg["start"]), "end": float(seg["end"]), "text": str(seg.get("text", ""))}
+    for campo in ("avg_logprob", "no_speech_prob"):
+        if seg.get(campo) is not None:
+            limpo[campo] = float(seg[campo])
+    if seg.get("words"):
+        limpo["words"] = [{"word": str(w["word"]), "start": float(w["start"]), "end": float(w["end"]),
+                           "probability": float(w.get("probability", 0.0))} for w in seg["words"]]
+    return limpo
+
+
+class TranscriptCache:
+    """
+    Transcrições em `pasta/<sha1(chave|perfil)>.json` e vídeos em `pasta/midia/`.
+
+    chave  — `chave_url`, `chave_arquivo` ou `chave_bytes`
+    perfil — modelo/idioma usados (ex.: 'base', 'base:pt'); perfis diferentes não se misturam
+
+    Cada transcrição guarda `cobertura`, a lista de intervalos [inicio, fim] já transcritos
+    (fim None = até o final do arquivo). `get` só responde se o trecho pedido estiver coberto;
+    `faltando` diz o que ainda precisa passar pelo Whisper e `put` mescla o trecho novo.
+
+    Os JSONs (transcrições e artefatos) somam no máximo `max_transcricoes_bytes`: ao passar
+    do limite saem os de acesso mais antigo (mtime, renovado a cada leitura), como as
+    transcrições de mensagens de voz, que raramente se repetem.
+    """
+
+    def __init__(self, pasta: str = PASTA_PADRAO, max_midia_bytes: int = MIDIA_MAX_BYTES_PADRAO,
+                 max_transcricoes_bytes: int = TRANSCRICOES_MAX_BYTES_PADRAO):
+        self.pasta = pasta
+        self.pasta_midia = os.path.join(pasta, "midia")
+        self.max_midia_bytes = max_midia_bytes
+        self.max_transcricoes_bytes = max_transcricoes_bytes
+        self.index_path = os.path.join(pasta, "index.json")
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'parciais': 0, 'artefato_hits': 0, 'artefato_misses': 0,
+                      'midia_hits': 0, 'evictions': 0, 'transcricoes_evictions': 0}
+        os.makedirs(self.pasta_midia, exist_ok=True)
+        self._transcricoes_bytes = sum(tamanho for _, _, tamanho in self._arquivos_json())
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._index: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+        self._index.setdefault("midia", {})
+        self._index.setdefault("hashes", {})
+
+    # ------------------------------------------------------------
+    # Chaves
+    # ------------------------------------------------------------
+    @staticmethod
+    def chave_url(url: str, video_id: Optional[str] = None) -> str:
+        """'yt:<id>' para YouTube (ou id informado pelo yt-dlp); senão hash da URL"""
+        video_id = video_id or id_youtube(url)
+        if video_id:
+            return f"yt:{video_id}"
+        return "url:" + hashlib.sha1(url.strip().encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def chave_bytes(dados: bytes) -> str:
+        return "sha1:" + hashlib.sha1(dados).hexdigest()
+
+    def chave_arquivo(self, caminho: str) -> str:
+        """
+        Hash do conteúdo; memorizado por (caminho, tamanho, mtime) para não reler arquivos grandes.
+        Ao memorizar um caminho novo saem os memos de arquivos que não existem mais (temporários,
+        downloads já movidos) e, acima de HASHES_MAX, os de uso mais antigo.
+        """
+        st = os.stat(caminho)
+        assinatura = [st.st_size, st.st_mtime_ns]
+        real = os.path.abspath(caminho)
+        with self._lock:
+            hashes = self._index["hashes"]
+            memo = hashes.get(real)
+            if memo and memo["assinatura"] == assinatura:
+                hashes[real] = hashes.pop(real)   # mais recente no fim
+                return memo["chave"]
+        digest = hashlib.sha1()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(CHUNK), b""):
+                digest.update(bloco)
+        chave = "sha1:" + digest.hexdigest()
+        with self._lock:
+            hashes = self._index["hashes"]
+            hashes.pop(real, None)
+            for antigo in [c for c in hashes if not os.path.exists(c)]:
+                del hashes[antigo]
+            hashes[real] = {"assinatura": assinatura, "chave": chave}
+            for antigo in list(hashes)[:max(0, len(hashes) - HASHES_MAX)]:
+                del hashes[antigo]
+            self._salvar_index()
+        return chave
+
+    # ------------------------------------------------------------
+    # Transcrições
+    # ------------------------------------------------------------
+    def get(self, chave: str, perfil: str = "base", inicio: float = 0.0,
+            fim: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Transcrição do trecho [inicio, fim] (fim None = arquivo inteiro) se já estiver coberto.
+
+        Returns:
+            dict (text, segments, language) no formato do whisper.transcribe, ou None
+        """
+        entrada = self._ler(chave, perfil)
+        if entrada is None or self._lacunas(entrada["cobertura"], inicio, fim):
+            self._incr('misses' if entrada is None else 'parciais')
+            return None
+        self._incr('hits')
+        self._tocar(chave, perfil)
+        segmentos = [s for s in entrada["segments"]
+                     if s["end"] > inicio and (fim is None or s["start"] < fim)]
+        return {"text": "".join(s["text"] for s in segmentos), "segments": segmentos,
+                "language": entrada.get("language")}
+
+    def faltando(self, chave: str, perfil: str = "base", inicio: float = 0.0,
+                 fim: Optional[float] = None) -> List[Tuple[float, Optional[float]]]:
+        """Trechos de [inicio, fim] que ainda não foram transcritos"""
+        entrada = self._ler(chave, perfil)
+        if entrada is None:
+            return [(inicio, fim)]
+        return self._lacunas(entrada["cobertura"], inicio, fim)
+
+    def put(self, chave: str, perfil: str, segmentos: List[Dict[str, Any]], inicio: float = 0.0,
+            fim: Optional[float] = None, language: Optional[str] = None):
+        """
+        Grava os segmentos transcritos de [inicio, fim] (tempos absolutos no arquivo).
+        Segmentos antigos que começam dentro do trecho são substituídos pelos novos.
+        """
+        with self._lock:
+            entrada = self._ler(chave, perfil) or {"chave": chave, "perfil": perfil,
+                                                   "cobertura": [], "segments": []}
+            antigos = [s for s in entrada["segments"]
+                       if s["start"] < inicio or (fim is not None and s["start"] >= fim)]
+            entrada["segments"] = sorted(antigos + [_limpar_segmento(s) for s in segmentos],
+                                         key=lambda s: s["start"])
+            entrada["cobertura"] = _juntar(entrada["cobertura"] + [[inicio, fim]])
+            entrada["language"] = language or entrada.get("language")
+            entrada["atualizado"] = time.time()
+            self._gravar(self._caminho(chave, perfil), entrada)
+
+    def put_resultado(self, chave: str, perfil: str, resultado: Dict[str, Any]):
+        """Atalho para o retorno de whisper.transcribe do arquivo inteiro"""
+        self.put(chave, perfil, resultado.get("segments", []), language=resultado.get("language"))
+
+    # ------------------------------------------------------------
+    # Artefatos derivados da mesma fonte (ex.: trilha de rosto)
+    # ------------------------------------------------------------
+    def get_artefato(self, chave: str, nome: str) -> Optional[Any]:
+        """Dados gravados por `put_artefato` para a fonte (None se não existem)"""
+        entrada = self._ler(chave, f"artefato:{nome}")
+        if entrada is None:
+            self._incr('artefato_misses')
+            return None
+        self._incr('artefato_hits')
+        self._tocar(chave, f"artefato:{nome}")
+        return entrada.get("dados")
+
+    def put_artefato(self, chave: str, nome: str, dados: Any):
+        """Grava qualquer valor JSON ao lado da transcrição da mesma chave"""
+        with self._lock:
+            self._gravar(self._caminho(chave, f"artefato:{nome}"),
+                         {"chave": chave, "artefato": nome, "atualizado": time.time(), "dados": dados})
+
+    # ------------------------------------------------------------
+    # Vídeo baixado
+    # ------------------------------------------------------------
+    def midia(self, chave: str) -> Optional[str]:
+        """Caminho do vídeo guardado para a chave (None se não existe ou foi despejado)"""
+        with self._lock:
+            entrada = self._index["midia"].get(chave)
+            if entrada is None:
+                return None
+            caminho = os.path.join(self.pasta_midia, entrada["arquivo"])
+            if not os.path.exists(caminho):
+                del self._index["midia"][chave]
+                self._salvar_index()
+                return None
+            entrada["acesso"] = time.time()
+            self.stats['midia_hits'] += 1
+            self._salvar_index()
+        return caminho
+
+    def guardar_midia(self, chave: str, caminho: str) -> str:
+        """Move o arquivo baixado para o cache; devolve o novo caminho"""
+        arquivo = hashlib.sha1(chave.encode("utf-8")).hexdigest() + os.path.splitext(caminho)[1]
+        destino = os.path.join(self.pasta_midia, arquivo)
+        try:
+            os.replace(caminho, destino)
+        except OSError:
+            shutil.move(caminho, destino)   # outro disco
+        with self._lock:
+            self._index["midia"][chave] = {"arquivo": arquivo, "tamanho": os.path.getsize(destino),
+                                           "acesso": time.time()}
+            self._despejar(manter=chave)
+            self._salvar_index()
+        return destino
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['midia_bytes'] = sum(e.get("tamanho", 0) for e in self._index["midia"].values())
+            stats['transcricoes_bytes'] = self._transcricoes_bytes
+        return stats
+
+    # ------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------
+    def _caminho(self, chave: str, perfil: str) -> str:
+        return os.path.join(self.pasta, hashlib.sha1(f"{chave}|{perfil}".encode("utf-8")).hexdigest() + ".json")
+
+    def _ler(self, chave: str, perfil: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._caminho(chave, perfil), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _tocar(self, chave: str, perfil: str):
+        """Renova o mtime do JSON lido: é a ordem de acesso usada no despejo"""
+        try:
+            os.utime(self._caminho(chave, perfil))
+        except OSError:
+            pass
+
+    def _gravar(self, caminho: str, entrada: Dict[str, Any]):
+        """Grava o JSON de forma atômica e despeja os mais antigos se passar do limite (chamado com o lock)."""
+        tmp = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        tamanho = os.path.getsize(tmp)
+        try:
+            anterior = os.path.getsize(caminho)
+        except OSError:
+            anterior = 0
+        os.replace(tmp, caminho)
+        self._transcricoes_bytes += tamanho - anterior
+        if self._transcricoes_bytes > self.max_transcricoes_bytes:
+            self._despejar_transcricoes(manter=caminho)
+
+    def _arquivos_json(self) -> List[Tuple[float, str, int]]:
+        """(mtime, caminho, tamanho) de cada transcrição/artefato gravado"""
+        arquivos = []
+        for entrada in os.scandir(self.pasta):
+            if entrada.name.endswith(".json") and entrada.path != self.index_path and entrada.is_file():
+                st = entrada.stat()
+                arquivos.append((st.st_mtime, entrada.path, st.st_size))
+        return arquivos
+
+    def _despejar_transcricoes(self, manter: str):
+        """Remove os JSONs de acesso mais antigo até caber em max_transcricoes_bytes (chamado com o lock)."""
+        arquivos = self._arquivos_json()
+        total = sum(tamanho for _, _, tamanho in arquivos)
+        for _, caminho, tamanho in sorted(arquivos):
+            if total <= self.max_transcricoes_bytes:
+                break
+            if caminho == manter:
+                continue
+            try:
+                os.remove(caminho)
+            except OSError:
+                continue
+            total -= tamanho
+            self.stats['transcricoes_evictions'] += 1
+        self._transcricoes_bytes = total
+
+    @staticmethod
+    def _lacunas(cobertura, inicio: float, fim: Optional[float]) -> List[Tuple[float, Optional[float]]]:
+        """Partes de [inicio, fim] fora dos intervalos de `cobertura` (já unidos e ordenados)"""
+        lacunas = []
+        cursor: Optional[float] = inicio
+        for a, b in cobertura:
+            if cursor is None or (fim is not None and cursor >= fim - TOLERANCIA_S):
+                break
+            if b is not None and b <= cursor:
+                continue
+            if a > cursor + TOLERANCIA_S:
+                lacunas.append((cursor, a if fim is None else min(a, fim)))
+            cursor = None if b is None else max(cursor, b)
+        if cursor is not None and (fim is None or cursor < fim - TOLERANCIA_S):
+            lacunas.append((cursor, fim))
+        return [(a, b) for a, b in lacunas if b is None or b - a > TOLERANCIA_S]
+
+    def _incr(self, nome: str, n: int = 1):
+        with self._lock:
+            self.stats[nome] += n
+
+    def _despejar(self, manter: str):
+        """Remove os vídeos menos acessados até caber em max_midia_bytes (chamado com o lock)."""
+        midia = self._index["midia"]
+        total = sum(e.get("tamanho", 0) for e in midia.values())
+        for chave, entrada in sorted(midia.items(), key=lambda item: item[1].get("acesso", 0)):
+            if total <= self.max_midia_bytes:
+                break
+            if chave == manter:
+                continue
+            caminho = os.path.join(self.pasta_midia, entrada["arquivo"])
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            total -= entrada.get("tamanho", 0)
+            del midia[chave]
+            self.stats['evictions'] += 1
+
+    def _salvar_index(self):
+        """Grava o índice de forma atômica (chamado com o lock)."""
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_path)
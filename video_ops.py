@@ -1,16 +1,25 @@
 # filename: video_ops.py
 import os
 import json
-import tempfile
-import subprocess
 import gc
 import re
 import torch
 
+from utils.render_scheduler import RenderJob, RenderScheduler
+from utils.transcript_cache import TranscriptCache
+from utils.streaming_transcriber import ResumoMapReduce, TranscritorStreaming, linha_segmento
+
+# Contexto do Gemma é de 4k tokens com até 2k de resposta: a transcrição entra com ~5k caracteres
+LIMITE_TRANSCRICAO_LLM = 5000
+
 class VideoSurgeon:
-    def __init__(self, whisper_model=None):
+    PERFIL_WHISPER = "base"   # modelo carregado quando nenhum é injetado; separa as entradas do cache
+
+    def __init__(self, whisper_model=None, transcript_cache=None):
         # BUG FIX #2: Aceita modelo Whisper externo para evitar duplo carregamento na VRAM.
         self._whisper_model = whisper_model
+        # Transcrições (e vídeos baixados) reaproveitados entre execuções
+        self.cache = transcript_cache or TranscriptCache()
         print("✂️ [TESOURA NEURAL V5.2]: Córtex Viral Vertical Inicializado (Modo Sniper + Full HD 1080x1920).")
 
     # ──────────────────────────────────────────────────────────────────
@@ -29,67 +38,66 @@ class VideoSurgeon:
         except Exception:
             return 0.0
 
-    def processar_video_viral(self, video_path, ai_brain):
-        temp_audio = None
+    @staticmethod
+    def _log_progresso():
+        """Callback padrão do render: uma linha por corte a cada 25%."""
+        marcos = {}
+        def log(nome, info):
+            marco = int(info["percent"] // 25)
+            if info["status"] == "rodando" and marco and marco != marcos.get(nome):
+                marcos[nome] = marco
+                print(f"✂️ [TESOURA] {nome}: {info['percent']:.0f}% ({info['fps'] or 0:.0f} fps)")
+        return log
+
+    def processar_video_viral(self, video_path, ai_brain, on_progress=None):
+        """on_progress(nome_do_corte, info): progresso de cada render (ver utils.render_scheduler)."""
         # 1. INTERCEPTADOR DE YOUTUBE
         if video_path.startswith("http://") or video_path.startswith("https://"):
-            try:
-                import yt_dlp
-            except ImportError:
-                return "❌ Erro: Biblioteca yt-dlp não instalada. Execute: pip install yt-dlp"
-            
-            print(f"✂️ [TESOURA NEURAL]: Interceptando link do YouTube...")
-            os.makedirs("static/media", exist_ok=True)
-            
-            ydl_opts = {
-                'format': 'best',
-                'outtmpl': 'static/media/temp_yt_%(id)s.%(ext)s',
-                'quiet': True,
-                'no_warnings': True,
-                'socket_timeout': 30
-            }
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(video_path, download=True)
-                    video_path = ydl.prepare_filename(info)
-                    print(f"✂️ [TESOURA NEURAL]: Download tático concluído -> {video_path}")
-            except Exception as e:
-                return f"❌ Erro ao baixar vídeo do YouTube: {str(e)}"
-                
+            chave = self.cache.chave_url(video_path)
+            em_cache = self.cache.midia(chave)
+            if em_cache:
+                print(f"✂️ [TESOURA NEURAL]: Vídeo já está no cache, download dispensado -> {em_cache}")
+                video_path = em_cache
+            else:
+                try:
+                    import yt_dlp
+                except ImportError:
+                    return "❌ Erro: Biblioteca yt-dlp não instalada. Execute: pip install yt-dlp"
+
+                print(f"✂️ [TESOURA NEURAL]: Interceptando link do YouTube...")
+                os.makedirs("static/media", exist_ok=True)
+
+                ydl_opts = {
+                    'format': 'best',
+                    'outtmpl': 'static/media/temp_yt_%(id)s.%(ext)s',
+                    'quiet': True,
+                    'no_warnings': True,
+                    'socket_timeout': 30
+                }
+                try:
+                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                        info = ydl.extract_info(video_path, download=True)
+                        video_path = self.cache.guardar_midia(chave, ydl.prepare_filename(info))
+                        print(f"✂️ [TESOURA NEURAL]: Download tático concluído -> {video_path}")
+                except Exception as e:
+                    return f"❌ Erro ao baixar vídeo do YouTube: {str(e)}"
+
         elif not os.path.exists(video_path):
             return f"❌ Arquivo não encontrado: {video_path}"
+        else:
+            chave = self.cache.chave_arquivo(video_path)
 
-        # 2. VALIDAÇÃO DO WHISPER
         try:
-            import whisper
-        except ImportError:
-            return "❌ Erro: openai-whisper não instalado no sistema."
+            # 2-5. Transcrição (cache por URL/hash ou Whisper em streaming). Os blocos que
+            # passam do limite do LLM já vão sendo resumidos enquanto o resto é transcrito
+            resumo = ResumoMapReduce(ai_brain, LIMITE_TRANSCRICAO_LLM, log=print)
+            try:
+                for seg in self._transcrever(video_path, chave):
+                    resumo.adicionar(linha_segmento(seg, hms=True))
+            except ImportError:
+                return "❌ Erro: openai-whisper não instalado no sistema."
+            transcricao = resumo.finalizar()
 
-        temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix=".wav").name
-        
-        try:
-            # 3. Extração Acelerada de Áudio
-            cmd_audio = f'ffmpeg -y -i "{video_path}" -vn -acodec pcm_s16le -ar 16000 -ac 1 "{temp_audio}"'
-            subprocess.run(cmd_audio, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            
-            # 4. Audição (Whisper)
-            print("✂️ [TESOURA NEURAL]: Transcrevendo áudio alvo...")
-            model = self._whisper_model
-            modelo_local = False
-            if model is None:
-                model = whisper.load_model("base")
-                modelo_local = True
-
-            result = model.transcribe(temp_audio)
-            transcricao = result["text"]
-            
-            # 5. Limpeza de VRAM Crítica
-            if modelo_local:
-                del model
-                gc.collect()
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-                    
             # 6. Raciocínio LLM (Córtex Viral) - PROMPT V5.2 (MODO SNIPER + CLICKBAIT EXTREMO)
             print("✂️ [TESOURA NEURAL]: Analisando viés de engajamento para cortes verticais...")
             sys_prompt = (
@@ -127,30 +135,42 @@ class VideoSurgeon:
             out_dir = "static/media/cortes_virais"
             os.makedirs(out_dir, exist_ok=True)
             
-            arquivos_gerados = []
+            # Cortes renderizados em paralelo; cada um abre o vídeo com -ss/-t antes do -i
+            # (busca no demuxer até o keyframe anterior), sem decodificar desde o início
+            jobs = []
             for i, c in enumerate(cortes):
                 tema = re.sub(r'[^\w\-]', '_', c.get('tema', f'corte_viral_{i}'))
+                if any(j.nome == tema for j in jobs):
+                    tema = f"{tema}_{i}"
                 t_start = c.get('start', '00:00:00')
                 t_end   = c.get('end',   '00:01:00')
                 out_file = os.path.join(out_dir, f"{tema}.mp4")
                 
                 # Cálculo de duração via -t (Relativo ao output)
-                duracao_seg = self._hms_to_seconds(t_end) - self._hms_to_seconds(t_start)
+                inicio_seg = self._hms_to_seconds(t_start)
+                duracao_seg = self._hms_to_seconds(t_end) - inicio_seg
                 if duracao_seg <= 0:
                     print(f"⚠️ [TESOURA] Corte '{tema}' ignorado: duração inválida ({t_start} → {t_end})")
                     continue
 
-                cmd_cut = (
-                    f'ffmpeg -y -ss {t_start} -i "{video_path}" '
-                    f'-t {duracao_seg:.3f} '
-                    f'-vf "crop=floor(ih*9/16/2)*2:ih,scale=1080:1920" -c:v libx264 -preset superfast -c:a copy "{out_file}"'
-                )
-                subprocess.run(cmd_cut, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                
-                if os.path.exists(out_file) and os.path.getsize(out_file) > 0:
-                    arquivos_gerados.append(out_file)
+                jobs.append(RenderJob(
+                    nome=tema,
+                    arquivo_entrada=video_path,
+                    arquivo_saida=out_file,
+                    duracao_s=duracao_seg,
+                    entrada=["-ss", f"{inicio_seg:.3f}", "-t", f"{duracao_seg:.3f}"],
+                    saida=["-vf", "crop=floor(ih*9/16/2)*2:ih,scale=1080:1920",
+                           "-c:v", "libx264", "-preset", "superfast", "-c:a", "copy"],
+                ))
+
+            print(f"✂️ [TESOURA NEURAL]: Renderizando {len(jobs)} cortes em paralelo...")
+            arquivos_gerados = []
+            for r in RenderScheduler(on_progress=on_progress or self._log_progresso()).executar(jobs):
+                if r["ok"]:
+                    arquivos_gerados.append(r["arquivo"])
+                    print(f"✂️ [TESOURA] {r['nome']}: {r['segundos']:.1f}s ({r['fps'] or 0:.0f} fps)")
                 else:
-                    print(f"⚠️ [TESOURA] Falha ao gerar corte: {out_file}")
+                    print(f"⚠️ [TESOURA] Falha ao gerar corte: {r['arquivo']} — {r.get('erro', '')}")
                 
             if not arquivos_gerados:
                 return "❌ Nenhum corte foi gerado com sucesso. Verifique os timestamps da IA."
@@ -159,17 +179,34 @@ class VideoSurgeon:
             
         except Exception as e:
             return f"❌ Erro Crítico na Tesoura Neural: {str(e)}"
-        
-        # Bloco finally restaurado e limpo (Evita duplicação)
+
+    def _transcrever(self, video_path, chave):
+        """Segmentos em ordem (com timestamps por palavra): do cache, ou do Whisper em janelas com VAD."""
+        resultado = self.cache.get(chave, self.PERFIL_WHISPER)
+        if resultado is not None:
+            print("✂️ [TESOURA NEURAL]: Transcrição recuperada do cache.")
+            yield from resultado["segments"]
+            return
+
+        import whisper   # ImportError tratado por quem chama
+
+        # 4. Audição (Whisper) — janelas já transcritas numa execução interrompida vêm do cache
+        print("✂️ [TESOURA NEURAL]: Transcrevendo áudio alvo em streaming...")
+        model = self._whisper_model
+        modelo_local = False
+        if model is None:
+            model = whisper.load_model(self.PERFIL_WHISPER)
+            modelo_local = True
+
+        # Um só modelo (o mesmo da transcrição de voz do main2): janelas em série na GPU
+        transcritor = TranscritorStreaming(model, cache=self.cache, perfil=self.PERFIL_WHISPER)
+        try:
+            yield from transcritor.transcrever(video_path, chave)
+            print(f"✂️ [TESOURA NEURAL]: Janelas — {transcritor.stats}")
         finally:
-            if temp_audio and os.path.exists(temp_audio):
-                try:
-                    os.unlink(temp_audio)
-                except Exception:
-                    pass
-            
-            if video_path and video_path.startswith("static/media/temp_yt_"):
-                try:
-                    os.unlink(video_path)
-                except Exception:
-                    pass
\ No newline at end of file
+            # 5. Limpeza de VRAM Crítica
+            if modelo_local:
+                del transcritor, model
+                gc.collect()
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()